@@ -3,14 +3,17 @@
 """
 import httpx
 import asyncio
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Tuple
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import PointStruct, Filter, FieldCondition, VectorParams, Distance
 import uuid
 import logging
 
 from .exceptions import EmbeddingServiceError, LLMServiceError, VectorDBError
 from .config import settings
+from .http_clients import HTTPClientPool, http_clients
+from .qdrant_clients import qdrant_clients, upload_points_in_batches
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +21,13 @@ logger = logging.getLogger(__name__)
 class EmbeddingClient:
     """임베딩 서비스 클라이언트"""
     
-    def __init__(self, base_url: str = None, timeout: float = None, max_retries: int = None):
+    def __init__(self, base_url: str = None, timeout: float = None, max_retries: int = None,
+                 pool: HTTPClientPool = None):
         self.base_url = (base_url or settings.embedding_server_url).rstrip('/')
         self.timeout = timeout or settings.request_timeout
-        self.max_retries = max_retries or settings.max_retries
+        self.max_retries = settings.max_retries if max_retries is None else max_retries
+        # 지정하지 않으면 전역 커넥션 풀 공유 (app.main lifespan에서 종료)
+        self.pool = pool or http_clients
     
     async def embed_single(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """단일 텍스트 임베딩"""
@@ -39,12 +45,11 @@ class EmbeddingClient:
         
         for attempt in range(self.max_retries + 1):
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.request(
-                        method, url, timeout=self.timeout, **kwargs
-                    )
-                    response.raise_for_status()
-                    return response.json()
+                response = await self.pool.request(
+                    "embedding", method, url, timeout=self.timeout, **kwargs
+                )
+                response.raise_for_status()
+                return response.json()
             
             except httpx.HTTPStatusError as e:
                 last_exception = e
@@ -66,10 +71,13 @@ class EmbeddingClient:
 class LLMClient:
     """LLM 서비스 클라이언트"""
     
-    def __init__(self, base_url: str = None, timeout: float = None, max_retries: int = None):
+    def __init__(self, base_url: str = None, timeout: float = None, max_retries: int = None,
+                 pool: HTTPClientPool = None):
         self.base_url = (base_url or settings.llm_server_url).rstrip('/')
         self.timeout = timeout or 60.0  # LLM은 더 긴 타임아웃
-        self.max_retries = max_retries or settings.max_retries
+        self.max_retries = settings.max_retries if max_retries is None else max_retries
+        # 지정하지 않으면 전역 커넥션 풀 공유 (app.main lifespan에서 종료)
+        self.pool = pool or http_clients
     
     async def chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """채팅 완성 요청 (OpenAI 호환)"""
@@ -82,12 +90,11 @@ class LLMClient:
         
         for attempt in range(self.max_retries + 1):
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.request(
-                        method, url, timeout=self.timeout, **kwargs
-                    )
-                    response.raise_for_status()
-                    return response.json()
+                response = await self.pool.request(
+                    "llm", method, url, timeout=self.timeout, **kwargs
+                )
+                response.raise_for_status()
+                return response.json()
             
             except httpx.HTTPStatusError as e:
                 last_exception = e
@@ -106,27 +113,66 @@ class LLMClient:
 
 
 class VectorClient:
-    """벡터 DB (Qdrant) 클라이언트"""
+    """
+    벡터 DB (Qdrant) 클라이언트
+    
+    동기 메서드는 QdrantClient를, a 접두사 메서드는 같은 접속 설정의 공유 AsyncQdrantClient를
+    사용한다. async 코드에서는 이벤트 루프를 막지 않도록 a 접두사 메서드를 부른다.
+    """
     
     def __init__(self, host: str = None, port: int = None):
         self.host = host or settings.qdrant_host
         self.port = port or settings.qdrant_port
         self.client = QdrantClient(host=self.host, port=self.port)
+        # 컬렉션별 쓰기 세대 (이 클라이언트를 통한 삽입/삭제마다 증가)
+        self._write_generations: Dict[str, int] = {}
+        # (컬렉션, 쓰기 세대, 후보 포인트 ID) -> 후보 문서로 학습한 BM25 점수기 (LRU)
+        self._bm25_scorers: "OrderedDict[Tuple[str, int, Tuple[str, ...]], Any]" = OrderedDict()
+    
+    def write_generation(self, collection_name: str) -> int:
+        """컬렉션 쓰기 세대"""
+        return self._write_generations.get(collection_name, 0)
+    
+    def _bump_write_generation(self, collection_name: str):
+        # 쓰기가 반영된 뒤 올려야 이전 세대 후보로 학습한 점수기를 다시 쓰지 않음
+        self._write_generations[collection_name] = self.write_generation(collection_name) + 1
+    
+    @property
+    def aclient(self) -> AsyncQdrantClient:
+        """공유 비동기 Qdrant 클라이언트 (app.main lifespan에서 종료)"""
+        return qdrant_clients.get(host=self.host, port=self.port)
+    
+    @staticmethod
+    def _collection_vectors_config(vector_size: int) -> VectorParams:
+        return VectorParams(size=vector_size, distance=Distance.COSINE)
     
     def create_collection(self, collection_name: str, vector_size: int) -> bool:
         """컬렉션 생성"""
         try:
             self.client.create_collection(
                 collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=vector_size,
-                    distance=Distance.COSINE
-                )
+                vectors_config=self._collection_vectors_config(vector_size)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"컬렉션 생성 실패: {e}")
+            raise VectorDBError(f"컬렉션 생성 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    async def acreate_collection(self, collection_name: str, vector_size: int) -> bool:
+        """컬렉션 생성 (비동기)"""
+        try:
+            await self.aclient.create_collection(
+                collection_name=collection_name,
+                vectors_config=self._collection_vectors_config(vector_size)
             )
             return True
         except Exception as e:
             logger.error(f"컬렉션 생성 실패: {e}")
             raise VectorDBError(f"컬렉션 생성 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
     
     def insert_code_embedding(self, collection_name: str, 
                              embedding: List[float], metadata: Dict[str, Any]) -> str:
@@ -149,88 +195,203 @@ class VectorClient:
         except Exception as e:
             logger.error(f"임베딩 삽입 실패: {e}")
             raise VectorDBError(f"임베딩 삽입 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    @property
+    def upload_aclient(self) -> AsyncQdrantClient:
+        """대량 업로드용 공유 비동기 클라이언트 (설정에 따라 gRPC)"""
+        return qdrant_clients.get(
+            host=self.host,
+            port=self.port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_upload_prefer_grpc
+        )
+    
+    async def ainsert_code_embeddings(self, collection_name: str,
+                                      items: List[Tuple[List[float], Dict[str, Any]]]) -> List[str]:
+        """(임베딩, 메타데이터) 목록을 배치 병렬 업서트하고 포인트 ID 목록 반환"""
+        try:
+            point_ids = [str(uuid.uuid4()) for _ in items]
+            points = [
+                PointStruct(id=point_id, vector=embedding, payload=metadata)
+                for point_id, (embedding, metadata) in zip(point_ids, items)
+            ]
+            await upload_points_in_batches(
+                self.upload_aclient,
+                collection_name,
+                points,
+                batch_size=settings.qdrant_upload_batch_size,
+                parallelism=settings.qdrant_upload_parallelism
+            )
+            return point_ids
+        except Exception as e:
+            logger.error(f"임베딩 대량 삽입 실패: {e}")
+            raise VectorDBError(f"임베딩 대량 삽입 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    async def ainsert_code_embedding(self, collection_name: str,
+                                     embedding: List[float], metadata: Dict[str, Any]) -> str:
+        """코드 임베딩 삽입 (비동기)"""
+        try:
+            point_id = str(uuid.uuid4())
+            await self.aclient.upsert(
+                collection_name=collection_name,
+                points=[PointStruct(id=point_id, vector=embedding, payload=metadata)]
+            )
+            return point_id
+        except Exception as e:
+            logger.error(f"임베딩 삽입 실패: {e}")
+            raise VectorDBError(f"임베딩 삽입 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    @staticmethod
+    def _file_path_filter(file_path: str) -> Filter:
+        return Filter(
+            must=[
+                FieldCondition(
+                    key="file_path",
+                    match={"value": file_path}
+                )
+            ]
+        )
     
     def delete_by_file_path(self, collection_name: str, file_path: str) -> int:
         """파일 경로로 임베딩 삭제"""
         try:
             result = self.client.delete(
                 collection_name=collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="file_path",
-                            match={"value": file_path}
-                        )
-                    ]
-                )
+                points_selector=self._file_path_filter(file_path)
             )
             return result.operation_id if result else 0
         except Exception as e:
             logger.error(f"임베딩 삭제 실패: {e}")
             raise VectorDBError(f"임베딩 삭제 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    async def adelete_by_file_path(self, collection_name: str, file_path: str) -> int:
+        """파일 경로로 임베딩 삭제 (비동기)"""
+        try:
+            result = await self.aclient.delete(
+                collection_name=collection_name,
+                points_selector=self._file_path_filter(file_path)
+            )
+            return result.operation_id if result else 0
+        except Exception as e:
+            logger.error(f"임베딩 삭제 실패: {e}")
+            raise VectorDBError(f"임베딩 삭제 실패: {e}")
+        finally:
+            self._bump_write_generation(collection_name)
+    
+    @staticmethod
+    def _hybrid_search_limit(limit: int) -> int:
+        # 벡터 검색 (더 많은 결과 가져와서 키워드 필터링)
+        return max(limit * 3, 50)  # BM25 필터링을 위해 더 많은 결과
     
     def hybrid_search(self, collection_name: str, query_embedding: List[float], 
                      keywords: Optional[List[str]] = None, 
                      limit: int = 10) -> List[Dict[str, Any]]:
         """하이브리드 검색 (벡터 + BM25 키워드)"""
         try:
-            # 벡터 검색 (더 많은 결과 가져와서 키워드 필터링)
-            search_limit = max(limit * 3, 50)  # BM25 필터링을 위해 더 많은 결과
             search_result = self.client.search(
                 collection_name=collection_name,
                 query_vector=query_embedding,
-                limit=search_limit,
+                limit=self._hybrid_search_limit(limit),
                 with_payload=True,
                 with_vectors=False
             )
+            return self._rank_hybrid_results(collection_name, search_result, keywords, limit)
             
-            # 결과 변환
-            results = []
-            documents = []  # BM25용 문서 컬렉션
-            
-            for scored_point in search_result:
-                result = {
-                    "id": str(scored_point.id),
-                    "vector_score": scored_point.score,
-                    **scored_point.payload
-                }
-                results.append(result)
-                
-                # BM25를 위한 문서 토큰 준비
-                doc_tokens = []
-                if 'keywords' in scored_point.payload:
-                    doc_tokens.extend(scored_point.payload['keywords'])
-                if 'code_content' in scored_point.payload:
-                    # 코드 내용도 간단히 토큰화
-                    code_tokens = self._tokenize_code_content(scored_point.payload['code_content'])
-                    doc_tokens.extend(code_tokens)
-                
-                documents.append(doc_tokens)
-            
-            # BM25 키워드 점수 계산
-            if keywords and results:
-                keyword_scores = self._calculate_bm25_scores(keywords, documents)
-                
-                for i, result in enumerate(results):
-                    if i < len(keyword_scores):
-                        result["keyword_score"] = keyword_scores[i]
-                        result["combined_score"] = (result["vector_score"] * 0.7 + keyword_scores[i] * 0.3)
-                    else:
-                        result["keyword_score"] = 0.0
-                        result["combined_score"] = result["vector_score"]
-            else:
-                for result in results:
-                    result["keyword_score"] = 0.0
-                    result["combined_score"] = result["vector_score"]
-            
-            # 결합 점수로 재정렬 후 limit 적용
-            results.sort(key=lambda x: x["combined_score"], reverse=True)
-            return results[:limit]
+        except Exception as e:
+            logger.error(f"하이브리드 검색 실패: {e}")
+            raise VectorDBError(f"하이브리드 검색 실패: {e}")
+    
+    async def ahybrid_search(self, collection_name: str, query_embedding: List[float],
+                             keywords: Optional[List[str]] = None,
+                             limit: int = 10) -> List[Dict[str, Any]]:
+        """하이브리드 검색 (비동기)"""
+        try:
+            response = await self.aclient.query_points(
+                collection_name=collection_name,
+                query=query_embedding,
+                limit=self._hybrid_search_limit(limit),
+                with_payload=True,
+                with_vectors=False
+            )
+            return self._rank_hybrid_results(collection_name, response.points, keywords, limit)
             
         except Exception as e:
             logger.error(f"하이브리드 검색 실패: {e}")
             raise VectorDBError(f"하이브리드 검색 실패: {e}")
     
+    def _rank_hybrid_results(self, collection_name: str, search_result, keywords: Optional[List[str]],
+                             limit: int) -> List[Dict[str, Any]]:
+        """벡터 검색 결과에 BM25 키워드 점수를 더해 재정렬"""
+        # 결과 변환
+        results = [
+            {
+                "id": str(scored_point.id),
+                "vector_score": scored_point.score,
+                **scored_point.payload
+            }
+            for scored_point in search_result
+        ]
+        
+        # BM25 키워드 점수 계산
+        if keywords and results:
+            keyword_scores = self._calculate_bm25_scores(collection_name, keywords, search_result)
+            
+            for i, result in enumerate(results):
+                if i < len(keyword_scores):
+                    result["keyword_score"] = keyword_scores[i]
+                    result["combined_score"] = (result["vector_score"] * 0.7 + keyword_scores[i] * 0.3)
+                else:
+                    result["keyword_score"] = 0.0
+                    result["combined_score"] = result["vector_score"]
+        else:
+            for result in results:
+                result["keyword_score"] = 0.0
+                result["combined_score"] = result["vector_score"]
+        
+        # 결합 점수로 재정렬 후 limit 적용
+        results.sort(key=lambda x: x["combined_score"], reverse=True)
+        return results[:limit]
+    
+    @staticmethod
+    def _chunk_filter(file_path: Optional[str], code_type: Optional[str],
+                      language: Optional[str], keyword: Optional[str]) -> Optional[Filter]:
+        """청크 조회 필터 조건 구성"""
+        must_conditions = []
+        
+        if file_path:
+            must_conditions.append(
+                FieldCondition(key="file_path", match={"value": file_path})
+            )
+        
+        if code_type:
+            must_conditions.append(
+                FieldCondition(key="code_type", match={"value": code_type})
+            )
+        
+        if language:
+            must_conditions.append(
+                FieldCondition(key="language", match={"value": language})
+            )
+        
+        if keyword:
+            must_conditions.append(
+                FieldCondition(key="keywords", match={"any": [keyword]})
+            )
+        
+        return Filter(must=must_conditions) if must_conditions else None
+    
+    @staticmethod
+    def _chunks_from_points(points) -> List[Dict[str, Any]]:
+        return [{"id": str(point.id), **point.payload} for point in points]
+    
     def query_chunks(self, collection_name: str, 
                     file_path: Optional[str] = None,
                     code_type: Optional[str] = None,
@@ -240,33 +401,7 @@ class VectorClient:
                     limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
         """청크 조회 (필터링 및 페이지네이션 지원)"""
         try:
-            # 필터 조건 구성
-            must_conditions = []
-            
-            if file_path:
-                must_conditions.append(
-                    FieldCondition(key="file_path", match={"value": file_path})
-                )
-            
-            if code_type:
-                must_conditions.append(
-                    FieldCondition(key="code_type", match={"value": code_type})
-                )
-            
-            if language:
-                must_conditions.append(
-                    FieldCondition(key="language", match={"value": language})
-                )
-            
-            if keyword:
-                must_conditions.append(
-                    FieldCondition(key="keywords", match={"any": [keyword]})
-                )
-            
-            # 필터 설정
-            query_filter = None
-            if must_conditions:
-                query_filter = Filter(must=must_conditions)
+            query_filter = self._chunk_filter(file_path, code_type, language, keyword)
             
             # 스크롤 검색으로 데이터 조회
             scroll_result = self.client.scroll(
@@ -284,49 +419,99 @@ class VectorClient:
                 count_filter=query_filter
             )
             
-            # 결과 변환
-            chunks = []
-            for point in scroll_result[0]:  # scroll_result is (points, next_page_offset)
-                chunk_data = {
-                    "id": str(point.id),
-                    **point.payload
-                }
-                chunks.append(chunk_data)
-            
-            total_count = count_result.count
+            # scroll_result is (points, next_page_offset)
+            return self._chunks_from_points(scroll_result[0]), count_result.count
             
-            return chunks, total_count
+        except Exception as e:
+            logger.error(f"청크 조회 실패: {e}")
+            raise VectorDBError(f"청크 조회 실패: {e}")
+    
+    async def aquery_chunks(self, collection_name: str,
+                            file_path: Optional[str] = None,
+                            code_type: Optional[str] = None,
+                            language: Optional[str] = None,
+                            keyword: Optional[str] = None,
+                            offset: int = 0,
+                            limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        """청크 조회 (비동기) - 조회와 전체 개수를 동시에 요청"""
+        try:
+            query_filter = self._chunk_filter(file_path, code_type, language, keyword)
+            scroll_result, count_result = await asyncio.gather(
+                self.aclient.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=query_filter,
+                    limit=limit,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False
+                ),
+                self.aclient.count(
+                    collection_name=collection_name,
+                    count_filter=query_filter
+                )
+            )
+            return self._chunks_from_points(scroll_result[0]), count_result.count
             
         except Exception as e:
             logger.error(f"청크 조회 실패: {e}")
             raise VectorDBError(f"청크 조회 실패: {e}")
 
-    def _calculate_bm25_scores(self, query_keywords: List[str], 
-                             documents: List[List[str]]) -> List[float]:
+    def _document_tokens(self, payload: Dict[str, Any]) -> List[str]:
+        """BM25를 위한 문서 토큰 (키워드 + 코드 내용 토큰)"""
+        doc_tokens = []
+        if 'keywords' in payload:
+            doc_tokens.extend(payload['keywords'])
+        if 'code_content' in payload:
+            # 코드 내용도 간단히 토큰화
+            doc_tokens.extend(self._tokenize_code_content(payload['code_content']))
+        return doc_tokens
+    
+    def _fitted_bm25_scorer(self, collection_name: str, search_result):
+        """
+        후보 문서로 학습한 BM25 점수기 (컬렉션 쓰기 세대와 후보 ID가 같으면 재사용)
+        
+        같은/비슷한 질의가 반복되면 후보 집합도 같으므로 토큰화와 가중치 행렬 생성을 건너뛰고
+        희소 행렬 곱만 수행한다. 쓰기가 있으면 세대가 바뀌어 캐시를 쓰지 않는다.
+        """
+        from app.features.search.bm25_scorer import BM25KeywordScorer
+        
+        key = (
+            collection_name,
+            self.write_generation(collection_name),
+            tuple(str(scored_point.id) for scored_point in search_result)
+        )
+        bm25 = self._bm25_scorers.get(key)
+        if bm25 is not None:
+            self._bm25_scorers.move_to_end(key)
+            return bm25
+        
+        bm25 = BM25KeywordScorer()
+        bm25.fit([self._document_tokens(scored_point.payload) for scored_point in search_result])
+        if settings.hybrid_bm25_scorer_cache_size > 0:
+            self._bm25_scorers[key] = bm25
+            while len(self._bm25_scorers) > settings.hybrid_bm25_scorer_cache_size:
+                self._bm25_scorers.popitem(last=False)
+        return bm25
+    
+    def _calculate_bm25_scores(self, collection_name: str, query_keywords: List[str],
+                               search_result) -> List[float]:
         """BM25를 사용한 키워드 점수 계산"""
         try:
-            from app.features.search.bm25_scorer import BM25KeywordScorer
-            
-            if not documents or not query_keywords:
-                return [0.0] * len(documents)
+            if not search_result or not query_keywords:
+                return [0.0] * len(search_result)
             
-            # BM25 스코어러 초기화 및 학습
-            bm25 = BM25KeywordScorer()
-            bm25.fit(documents)
-            
-            # 모든 문서에 대한 점수 계산
-            scores = bm25.get_scores(query_keywords)
+            # 후보 문서의 BM25 가중치 행렬은 캐시에서 꺼내고 희소 행렬 곱으로 점수 계산
+            bm25 = self._fitted_bm25_scorer(collection_name, search_result)
+            scores = bm25.get_batch_scores([query_keywords])[0]
             
             # 0-1 범위로 정규화
-            normalized_scores = bm25.normalize_scores(scores)
-            
-            return normalized_scores
+            return bm25.normalize_scores(scores).tolist()
             
         except Exception as e:
             logger.warning(f"BM25 점수 계산 실패, 기본 방식 사용: {e}")
             # BM25 실패 시 기본 Jaccard 방식 fallback
-            return [self._calculate_keyword_score_fallback(doc, query_keywords) 
-                   for doc in documents]
+            return [self._calculate_keyword_score_fallback(self._document_tokens(scored_point.payload), query_keywords)
+                   for scored_point in search_result]
     
     def _calculate_keyword_score_fallback(self, doc_keywords: List[str], 
                                         query_keywords: List[str]) -> float:
@@ -364,7 +549,9 @@ class VectorClient:
 class ExternalServiceClients:
     """외부 서비스 클라이언트 팩토리"""
     
-    def __init__(self):
+    def __init__(self, pool: HTTPClientPool = None):
+        # 임베딩/LLM 클라이언트와 의존성 팩토리가 같은 커넥션 풀을 공유
+        self.pool = pool or http_clients
         self._embedding_client: Optional[EmbeddingClient] = None
         self._llm_client: Optional[LLMClient] = None
         self._vector_client: Optional[VectorClient] = None
@@ -373,14 +560,14 @@ class ExternalServiceClients:
     def embedding(self) -> EmbeddingClient:
         """임베딩 클라이언트 인스턴스 (싱글톤)"""
         if self._embedding_client is None:
-            self._embedding_client = EmbeddingClient()
+            self._embedding_client = EmbeddingClient(pool=self.pool)
         return self._embedding_client
     
     @property
     def llm(self) -> LLMClient:
         """LLM 클라이언트 인스턴스 (싱글톤)"""
         if self._llm_client is None:
-            self._llm_client = LLMClient()
+            self._llm_client = LLMClient(pool=self.pool)
         return self._llm_client
     
     @property
@@ -389,6 +576,10 @@ class ExternalServiceClients:
         if self._vector_client is None:
             self._vector_client = VectorClient()
         return self._vector_client
+    
+    def connection_stats(self) -> Dict[str, Any]:
+        """HTTP 커넥션 풀 요청/연결 재사용 카운터"""
+        return self.pool.stats()
 
 
 # 전역 클라이언트 인스턴스
@@ -41,6 +41,36 @@ class Settings(BaseSettings):
     qdrant_host: str = "vector-db"  # Docker 컨테이너 내에서는 서비스 이름 사용
     qdrant_port: int = 6333
     qdrant_collection_name: str = "code_embeddings"
+    qdrant_grpc_port: int = 6334
+    qdrant_upload_prefer_grpc: bool = True  # 대량 업로드는 gRPC 클라이언트로 전송
+    qdrant_upload_batch_size: int = 256  # 업서트 요청 한 번에 보내는 포인트 수
+    qdrant_upload_parallelism: int = 4  # 동시에 진행하는 업서트 요청 수
+    qdrant_search_hnsw_ef: int = 0  # 벡터 검색 HNSW ef (0이면 컬렉션 설정값)
+    vector_index_idle_seconds: float = 600.0  # 이 시간 동안 쓰지 않은 컬렉션 인덱스 핸들 정리
+    vector_index_max_handles: int = 32  # 준비된 상태로 유지하는 컬렉션 인덱스 핸들 최대 수
+    
+    # BM25 인덱스 설정
+    bm25_index_root: str = "data/bm25_index"
+    bm25_memory_budget_mb: int = 512  # 상주 BM25 인덱스 메모리 예산 (초과 시 LRU 축출)
+    bm25_tokenize_workers: int = 0  # 대량 인덱싱 토큰화 프로세스 수 (0이면 CPU 수, 1이면 사용 안 함)
+    bm25_parallel_tokenize_threshold: int = 1000  # 이 문서 수 이상인 배치만 프로세스 풀 사용
+    bm25_store_positions: bool = False  # 구문/근접 질의용 토큰 위치 저장 (세그먼트 크기 증가, 기존 세그먼트는 재구성 후 적용)
+    
+    # 벡터 인덱싱 임베딩 설정 (/embedding/embed/bulk 배치 호출)
+    embedding_batch_size: int = 64  # 벌크 요청 한 번에 보내는 청크 수
+    embedding_max_concurrency: int = 4  # 동시에 진행하는 벌크 요청 수
+    embedding_batch_retries: int = 2  # 배치별 재시도 횟수 (실패한 배치만 다시 보냄)
+    
+    # 검색 결과 캐시 설정 (쓰기가 일어나면 컬렉션 쓰기 세대로 무효화)
+    search_cache_max_entries: int = 1024  # 0이면 캐시 사용 안 함
+    search_cache_ttl_seconds: float = 300.0  # 서비스 밖에서 들어온 쓰기 대비 최대 보관 시간
+    hybrid_bm25_scorer_cache_size: int = 256  # 하이브리드 재정렬용 학습된 BM25 점수기 캐시 크기 (0이면 사용 안 함)
+    
+    # 외부 서비스 HTTP 커넥션 풀 설정 (서비스별 장수명 클라이언트 공유)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # 유휴 keep-alive 연결 유지 시간 (초)
+    http2_enabled: bool = False  # h2 패키지가 있을 때만 적용
     
     # 기타 설정
     request_timeout: int = 30
@@ -1,5 +1,6 @@
 from functools import lru_cache
 from .clients import EmbeddingClient, VectorClient, LLMClient
+from .http_clients import http_clients
 from .config import settings
 from app.features.indexing.service import HybridIndexingService
 from app.features.search.service import HybridSearchService
@@ -24,7 +25,8 @@ def get_embedding_client() -> EmbeddingClient:
     return EmbeddingClient(
         base_url=settings.embedding_server_url,
         timeout=settings.request_timeout,
-        max_retries=settings.max_retries
+        max_retries=settings.max_retries,
+        pool=http_clients
     )
 
 @lru_cache()
@@ -40,7 +42,8 @@ def get_llm_client() -> LLMClient:
     return LLMClient(
         base_url=settings.llm_server_url,
         timeout=120.0,  # 생성 작업은 더 긴 타임아웃 필요
-        max_retries=settings.max_retries
+        max_retries=settings.max_retries,
+        pool=http_clients
     )
 
 
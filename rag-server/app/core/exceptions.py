@@ -20,4 +20,14 @@ class LLMServiceError(ExternalServiceError):
 
 class VectorDBError(ExternalServiceError):
     """벡터 DB 접근 오류"""
+    pass
+
+
+class CollectionNotFoundError(VectorDBError):
+    """존재하지 않는 벡터 컬렉션 (검색은 컬렉션을 만들지 않음)"""
+    pass
+
+
+class InvalidFilterError(VectorDBError):
+    """Qdrant 필터로 변환할 수 없는 메타데이터 필터 (요청 오류)"""
     pass 
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+외부 서비스 호출용 공유 HTTP 커넥션 풀
+
+EmbeddingClient/LLMClient 인스턴스는 몇 개를 만들든 서비스 이름별로 하나의 httpx.AsyncClient를
+공유한다. 커넥션은 keep-alive로 재사용되고 앱 lifespan 종료 시 aclose()로 정리된다.
+요청마다 httpcore trace 확장으로 새 TCP 연결 수를 세어 재사용 비율을 stats()로 노출한다.
+"""
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _ConnectionCounters:
+    """서비스별 요청/연결 카운터"""
+
+    __slots__ = ("requests", "connections_opened")
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+
+    async def trace(self, event_name: str, info: Dict[str, Any]):
+        # connection.connect_tcp.complete / connection.connect_unix_socket.complete
+        if event_name.startswith("connection.connect_") and event_name.endswith(".complete"):
+            self.connections_opened += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(0, self.requests - self.connections_opened),
+        }
+
+
+class HTTPClientPool:
+    """서비스 이름별 장수명 httpx.AsyncClient 모음"""
+
+    def __init__(
+        self,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        http2: bool = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.http_max_connections,
+            max_keepalive_connections=(
+                settings.http_max_keepalive_connections
+                if max_keepalive_connections is None else max_keepalive_connections
+            ),
+            keepalive_expiry=settings.http_keepalive_expiry if keepalive_expiry is None else keepalive_expiry,
+        )
+        http2 = settings.http2_enabled if http2 is None else http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("h2 패키지가 없어 HTTP/1.1로 연결합니다 (pip install httpx[http2])")
+            http2 = False
+        self.http2 = http2
+        # 서비스 이름 -> (클라이언트, 생성한 이벤트 루프)
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._counters: Dict[str, _ConnectionCounters] = {}
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        """
+        서비스용 공유 클라이언트
+
+        커넥션은 만든 이벤트 루프에 묶이므로, 다른 루프(asyncio.run을 쓰는 스레드 등)에서
+        부르면 그 루프용 클라이언트를 새로 만든다.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        entry = self._clients.get(service)
+        if entry is not None and not entry[0].is_closed and (entry[1] is loop or entry[1] is None):
+            if entry[1] is None and loop is not None:
+                self._clients[service] = (entry[0], loop)
+            return entry[0]
+
+        client = httpx.AsyncClient(limits=self.limits, http2=self.http2)
+        self._clients[service] = (client, loop)
+        logger.debug(f"HTTP 커넥션 풀 생성: {service} (http2={self.http2})")
+        return client
+
+    async def request(self, service: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """공유 클라이언트로 요청하고 연결 재사용 카운터를 갱신"""
+        counters = self._counters.setdefault(service, _ConnectionCounters())
+        counters.requests += 1
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = counters.trace
+        return await self.get(service).request(method, url, extensions=extensions, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """서비스별 요청 수, 새로 연 연결 수, 재사용된 연결 수"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "services": {service: counters.as_dict() for service, counters in self._counters.items()},
+        }
+
+    async def aclose(self):
+        """모든 클라이언트 연결 정리 (앱 종료 시)"""
+        clients, self._clients = self._clients, {}
+        for service, (client, _) in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP 커넥션 풀 종료 중 오류 ({service}): {e}")
+        if clients:
+            logger.info(f"HTTP 커넥션 풀 종료: {', '.join(clients)}")
+
+
+# 전역 커넥션 풀 (app.main lifespan에서 종료)
+http_clients = HTTPClientPool()
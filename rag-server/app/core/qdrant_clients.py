@@ -0,0 +1,120 @@
+"""
+공유 AsyncQdrantClient 풀
+
+CodeVectorIndex와 VectorClient는 async 메서드 안에서 동기 QdrantClient를 부르면 요청 동안
+이벤트 루프 전체가 멈춘다. 같은 접속 설정(URL/포트/gRPC/API 키)의 인덱스는 하나의
+AsyncQdrantClient를 공유해 검색/인덱싱/통계 요청이 동시에 진행되고, 앱 lifespan 종료 시
+aclose()로 정리된다. 대량 업로드는 prefer_grpc 클라이언트로 배치를 병렬 전송한다
+(upload_points_in_batches).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+
+logger = logging.getLogger(__name__)
+
+# (url, host, port, grpc_port, prefer_grpc, https, api_key)
+ConnectionKey = Tuple[Optional[str], Optional[str], Optional[int], int, bool, Optional[bool], Optional[str]]
+
+
+class QdrantClientPool:
+    """접속 설정별 AsyncQdrantClient 모음"""
+
+    def __init__(self):
+        # 접속 설정 -> (클라이언트, 생성한 이벤트 루프)
+        self._clients: Dict[ConnectionKey, Tuple[AsyncQdrantClient, Optional[asyncio.AbstractEventLoop]]] = {}
+
+    def get(
+        self,
+        url: str = None,
+        host: str = None,
+        port: int = 6333,
+        grpc_port: int = 6334,
+        prefer_grpc: bool = False,
+        https: bool = None,
+        api_key: str = None
+    ) -> AsyncQdrantClient:
+        """
+        접속 설정용 공유 클라이언트
+
+        커넥션은 만든 이벤트 루프에 묶이므로 다른 루프에서 부르면 그 루프용 클라이언트를 새로 만든다.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        key = (url, host, port, grpc_port, prefer_grpc, https, api_key)
+        entry = self._clients.get(key)
+        if entry is not None and (entry[1] is loop or entry[1] is None):
+            if entry[1] is None and loop is not None:
+                self._clients[key] = (entry[0], loop)
+            return entry[0]
+
+        client = AsyncQdrantClient(
+            url=url,
+            host=host,
+            port=port,
+            grpc_port=grpc_port,
+            prefer_grpc=prefer_grpc,
+            https=https,
+            api_key=api_key
+        )
+        self._clients[key] = (client, loop)
+        logger.debug(f"AsyncQdrantClient 생성: {url or host}:{port} (prefer_grpc={prefer_grpc})")
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def aclose(self):
+        """모든 클라이언트 연결 정리 (앱 종료 시)"""
+        clients, self._clients = self._clients, {}
+        for key, (client, _) in clients.items():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"AsyncQdrantClient 종료 중 오류 ({key[0] or key[1]}): {e}")
+
+
+async def upload_points_in_batches(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    points: List[PointStruct],
+    batch_size: int,
+    parallelism: int
+) -> Dict[str, Any]:
+    """
+    포인트를 batch_size개씩, 최대 parallelism개 동시 요청으로 업서트하고 처리량 통계 반환
+
+    마지막 배치를 뺀 배치는 wait=False로 보내 서버 적용을 기다리지 않고 다음 배치를 보낸다.
+    모든 배치가 접수된 뒤 마지막 배치를 wait=True로 보내는데, Qdrant는 접수한 업데이트를
+    순서대로 적용하므로 이 응답이 앞선 배치까지 모두 반영되었다는 일관성 장벽이 된다.
+    """
+    batch_size = max(1, batch_size)
+    batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+    start_time = time.perf_counter()
+
+    async def send(batch: List[PointStruct]):
+        async with semaphore:
+            await client.upsert(collection_name=collection_name, points=batch, wait=False)
+
+    if batches:
+        await asyncio.gather(*(send(batch) for batch in batches[:-1]))
+        await client.upsert(collection_name=collection_name, points=batches[-1], wait=True)
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "points": len(points),
+        "batches": len(batches),
+        "elapsed_seconds": round(elapsed, 4),
+        "points_per_sec": round(len(points) / elapsed, 2) if points and elapsed > 0 else 0.0
+    }
+
+
+# 전역 Qdrant 클라이언트 풀 (app.main lifespan에서 종료)
+qdrant_clients = QdrantClientPool()
@@ -102,6 +102,8 @@ class IndexingResponse(BaseModel):
     indexed_count: int = 0
     collection_name: Optional[str] = None
     index_time_ms: Optional[int] = None
+    embedding_chunks_per_sec: Optional[float] = Field(None, description="벡터 인덱싱 임베딩 처리량 (청크/초)")
+    upload_points_per_sec: Optional[float] = Field(None, description="벡터 DB 업로드 처리량 (포인트/초, 임베딩 시간 제외)")
     error_message: Optional[str] = None
 
 
@@ -18,8 +18,8 @@ from .schema import (
 from app.retriever.parser_factory import ASTParserFactory
 from app.retriever.ast_parser import Language as ASTLanguage
 from app.retriever.document_builder import DocumentBuilder
-from app.index.vector_service import VectorIndexService
-from app.index.bm25_service import BM25IndexService
+from app.index.vector_service import get_vector_index_service
+from app.index.bm25_service import get_bm25_index_service
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +30,8 @@ class HybridIndexingService:
     def __init__(self):
         self.parser_factory = ASTParserFactory()
         self.document_builder = DocumentBuilder()
-        self.vector_service = VectorIndexService()
-        self.bm25_service = BM25IndexService()
+        self.vector_service = get_vector_index_service()  # 인덱싱/검색 서비스가 쓰기 세대 공유
+        self.bm25_service = get_bm25_index_service()  # 프로세스 전체에서 인덱스 레지스트리 공유
     
     async def parse_code(self, request: ParseRequest) -> ParseResponse:
         """코드 파싱"""
@@ -153,7 +153,9 @@ class HybridIndexingService:
                 success=True,
                 indexed_count=len(request.documents),
                 collection_name=request.collection_name,
-                index_time_ms=index_time_ms
+                index_time_ms=index_time_ms,
+                embedding_chunks_per_sec=result.get("embedding_chunks_per_sec"),
+                upload_points_per_sec=result.get("upload_points_per_sec")
             )
             
         except Exception as e:
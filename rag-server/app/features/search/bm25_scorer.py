@@ -1,12 +1,22 @@
-import math
 import logging
-from typing import List, Dict, Set
-from collections import Counter, defaultdict
+from itertools import chain
+from typing import List, Dict, Sequence, Union
+
+import numpy as np
+from scipy import sparse
 
 logger = logging.getLogger(__name__)
 
+Scores = Union[List[float], np.ndarray]
+
+
 class BM25KeywordScorer:
-    """BM25 알고리즘을 사용한 키워드 유사도 스코어러"""
+    """
+    BM25 알고리즘을 사용한 키워드 유사도 스코어러
+    
+    fit()에서 문서-용어 BM25 가중치를 CSR 행렬로 한 번 계산해 두고, 쿼리 점수는
+    쿼리 용어 빈도 벡터와의 희소 행렬-벡터 곱으로 구한다.
+    """
     
     def __init__(self, k1: float = 1.5, b: float = 0.75):
         """
@@ -21,152 +31,153 @@ class BM25KeywordScorer:
         
         # 문서 컬렉션 통계
         self.documents: List[List[str]] = []
-        self.doc_freqs: List[Counter] = []
+        self.vocabulary: Dict[str, int] = {}  # 용어 -> 열 번호
         self.idf: Dict[str, float] = {}
         self.avg_doc_len: float = 0.0
         self.num_docs: int = 0
+        # 문서 x 용어 BM25 가중치 (idf * 포화된 tf)
+        self.weights: sparse.csr_matrix = sparse.csr_matrix((0, 0))
         
     def fit(self, documents: List[List[str]]) -> None:
         """문서 컬렉션으로 BM25 모델 학습"""
         self.documents = documents
         self.num_docs = len(documents)
+        self.vocabulary = {}
+        self.idf = {}
+        self.avg_doc_len = 0.0
+        self.weights = sparse.csr_matrix((self.num_docs, 0))
         
         if self.num_docs == 0:
             return
-            
-        # 각 문서의 단어 빈도 계산
-        self.doc_freqs = [Counter(doc) for doc in documents]
+        
+        # 토큰을 열 번호로 바꾼 뒤 (문서, 용어) 중복을 합산해 tf 행렬 구성
+        tokens = list(chain.from_iterable(documents))
+        self.vocabulary = vocabulary = {term: i for i, term in enumerate(dict.fromkeys(tokens))}
+        doc_lens = np.fromiter(map(len, documents), dtype=np.int64, count=self.num_docs)
+        term_ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        doc_ids = np.repeat(np.arange(self.num_docs), doc_lens)
+        tf = sparse.csr_matrix(
+            (np.ones(len(term_ids)), (doc_ids, term_ids)), shape=(self.num_docs, len(vocabulary))
+        )
+        tf.sum_duplicates()
         
         # 평균 문서 길이 계산
-        total_len = sum(len(doc) for doc in documents)
-        self.avg_doc_len = total_len / self.num_docs
+        self.avg_doc_len = float(doc_lens.sum()) / self.num_docs
         
         # IDF 계산
-        self._calculate_idf()
-        
-        logger.info(f"BM25 모델 학습 완료: {self.num_docs}개 문서, 평균 길이: {self.avg_doc_len:.2f}")
-    
-    def _calculate_idf(self) -> None:
-        """역문서 빈도(IDF) 계산"""
-        # 모든 고유 단어 수집
-        all_words: Set[str] = set()
-        for doc in self.documents:
-            all_words.update(doc)
+        idf = self._calculate_idf(np.bincount(tf.indices, minlength=len(vocabulary)))
+        self.idf = dict(zip(vocabulary, idf.tolist()))
         
-        # 각 단어가 나타나는 문서 수 계산
-        word_doc_count = defaultdict(int)
-        for doc in self.documents:
-            unique_words = set(doc)
-            for word in unique_words:
-                word_doc_count[word] += 1
+        # 문서별 길이 정규화와 tf 포화를 미리 적용
+        rows = np.repeat(np.arange(self.num_docs), np.diff(tf.indptr))
+        norm = self.k1 * (1 - self.b + self.b * (doc_lens[rows] / (self.avg_doc_len or 1.0)))
+        tf.data = idf[tf.indices] * (tf.data * (self.k1 + 1) / (tf.data + norm))
+        self.weights = tf
         
-        # IDF 계산: log((N - df + 0.5) / (df + 0.5))
-        self.idf = {}
-        for word in all_words:
-            df = word_doc_count[word]  # 단어가 포함된 문서 수
-            idf_value = math.log((self.num_docs - df + 0.5) / (df + 0.5))
-            self.idf[word] = max(idf_value, 0.01)  # 최소값 보장
+        logger.debug(f"BM25 모델 학습 완료: {self.num_docs}개 문서, 평균 길이: {self.avg_doc_len:.2f}")
+    
+    def _calculate_idf(self, doc_counts: np.ndarray) -> np.ndarray:
+        """역문서 빈도(IDF) 계산: log((N - df + 0.5) / (df + 0.5)), 최소 0.01"""
+        idf = np.log((self.num_docs - doc_counts + 0.5) / (doc_counts + 0.5))
+        return np.maximum(idf, 0.01)  # 최소값 보장
+    
+    def _query_matrix(self, queries: Sequence[List[str]]) -> sparse.csr_matrix:
+        """쿼리 x 용어 빈도 행렬 (모르는 단어는 무시)"""
+        vocabulary = self.vocabulary
+        rows, cols = [], []
+        for i, query in enumerate(queries):
+            for term in query:
+                col = vocabulary.get(term)
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(cols)), (rows, cols)), shape=(len(queries), len(vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix
     
     def score(self, query: List[str], doc_index: int) -> float:
         """쿼리와 문서 간 BM25 점수 계산"""
-        if not query or doc_index >= len(self.documents):
+        if not query or doc_index >= self.num_docs:
             return 0.0
         
-        doc = self.documents[doc_index]
-        doc_freq = self.doc_freqs[doc_index]
-        doc_len = len(doc)
-        
-        score = 0.0
-        
-        for term in query:
-            if term not in self.idf:
-                continue  # 모르는 단어는 무시
-                
-            # 단어 빈도 (TF)
-            tf = doc_freq.get(term, 0)
-            
-            if tf == 0:
-                continue  # 문서에 없는 단어
-            
-            # BM25 점수 계산
-            idf = self.idf[term]
-            numerator = tf * (self.k1 + 1)
-            denominator = tf + self.k1 * (1 - self.b + self.b * (doc_len / self.avg_doc_len))
-            
-            term_score = idf * (numerator / denominator)
-            score += term_score
-        
-        return score
+        start, end = self.weights.indptr[doc_index], self.weights.indptr[doc_index + 1]
+        query_vector = self._query_matrix([query]).toarray()[0]
+        return float(self.weights.data[start:end] @ query_vector[self.weights.indices[start:end]])
+    
+    def get_batch_scores(self, queries: Sequence[List[str]]) -> np.ndarray:
+        """여러 쿼리의 전체 문서 BM25 점수 (쿼리 수 x 문서 수)"""
+        if not self.num_docs or not len(queries):
+            return np.zeros((len(queries), self.num_docs))
+        return (self._query_matrix(queries) @ self.weights.T).toarray()
     
     def get_scores(self, query: List[str]) -> List[float]:
         """모든 문서에 대한 BM25 점수 계산"""
-        return [self.score(query, i) for i in range(len(self.documents))]
+        return self.get_batch_scores([query])[0].tolist()
     
     def get_top_k(self, query: List[str], k: int = 10) -> List[tuple]:
-        """상위 k개 문서 반환 (doc_index, score)"""
-        scores = self.get_scores(query)
-        indexed_scores = [(i, score) for i, score in enumerate(scores)]
-        
-        # 점수 기준 내림차순 정렬
-        indexed_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        return indexed_scores[:k]
+        """상위 k개 문서 반환 (doc_index, score) - 동점은 문서 순서 유지"""
+        scores = self.get_batch_scores([query])[0]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(int(i), float(scores[i])) for i in order]
     
-    def normalize_scores(self, scores: List[float]) -> List[float]:
+    def normalize_scores(self, scores: Scores) -> Scores:
         """점수를 0-1 범위로 정규화 (기본 방식 - 하위 호환성)"""
         return self.adaptive_normalize(scores)
     
-    def normalize_scores_improved(self, scores: List[float]) -> List[float]:
+    def normalize_scores_improved(self, scores: Scores) -> Scores:
         """개선된 정규화 - 절대적 품질 반영"""
         return self.adaptive_normalize(scores)
     
-    def sigmoid_normalize(self, scores: List[float], scale: float = 2.0) -> List[float]:
+    @staticmethod
+    def _like(scores: Scores, normalized: np.ndarray) -> Scores:
+        """입력과 같은 형태로 반환 (리스트 입력은 리스트, 배열 입력은 배열)"""
+        return normalized if isinstance(scores, np.ndarray) else normalized.tolist()
+    
+    def sigmoid_normalize(self, scores: Scores, scale: float = 2.0) -> Scores:
         """시그모이드 함수를 사용한 정규화"""
-        if not scores:
+        if not len(scores):
             return scores
             
         # 시그모이드 함수: 1 / (1 + exp(-scale * x))
-        normalized = []
-        for score in scores:
-            sigmoid_score = 1 / (1 + math.exp(-scale * score))
-            normalized.append(sigmoid_score)
-        
-        return normalized
+        values = np.asarray(scores, dtype=np.float64)
+        return self._like(scores, 1 / (1 + np.exp(-scale * values)))
     
-    def percentile_normalize(self, scores: List[float], 
-                           percentile_95: float = None) -> List[float]:
+    def percentile_normalize(self, scores: Scores, 
+                           percentile_95: float = None) -> Scores:
         """백분위 기반 정규화"""
-        if not scores:
+        if not len(scores):
             return scores
-            
+        
+        values = np.asarray(scores, dtype=np.float64)
         # 95 백분위를 1.0으로 설정
         if percentile_95 is None:
-            sorted_scores = sorted(scores)
+            sorted_scores = np.sort(values)
             idx_95 = int(len(sorted_scores) * 0.95)
             percentile_95 = sorted_scores[min(idx_95, len(sorted_scores) - 1)]
         
         if percentile_95 == 0:
-            return [0.0] * len(scores)
+            return self._like(scores, np.zeros(len(values)))
             
         # 95 백분위로 나누고 1.0으로 클리핑
-        normalized = [min(score / percentile_95, 1.0) for score in scores]
-        return normalized
+        return self._like(scores, np.minimum(values / percentile_95, 1.0))
     
-    def adaptive_normalize(self, scores: List[float]) -> List[float]:
+    def adaptive_normalize(self, scores: Scores) -> Scores:
         """적응형 정규화 - 절대적 품질 기반 정규화"""
-        if not scores:
+        if not len(scores):
             return scores
             
         # 모든 점수가 0인 경우
-        if all(score == 0 for score in scores):
+        if not np.any(np.asarray(scores)):
             return scores
             
         # 절대적 품질 기반 정규화
         return self._quality_based_normalize(scores)
     
-    def _quality_based_normalize(self, scores: List[float]) -> List[float]:
+    def _quality_based_normalize(self, scores: Scores) -> Scores:
         """품질 기반 정규화 - BM25 점수의 절대적 의미 반영"""
-        if not scores:
+        if not len(scores):
             return scores
             
         # BM25 점수 품질 임계값 정의
@@ -175,75 +186,69 @@ class BM25KeywordScorer:
         FAIR_THRESHOLD = 0.5         # 보통 매칭
         POOR_THRESHOLD = 0.1         # 낮은 매칭
         
-        normalized = []
-        for score in scores:
-            if score >= EXCELLENT_THRESHOLD:
+        score = np.asarray(scores, dtype=np.float64)
+        normalized = np.select(
+            [
+                score >= EXCELLENT_THRESHOLD,
+                score >= GOOD_THRESHOLD,
+                score >= FAIR_THRESHOLD,
+                score >= POOR_THRESHOLD,
+                score > 0,
+            ],
+            [
                 # 매우 좋은 매칭: 0.9-1.0
-                norm_score = 0.9 + min(0.1, (score - EXCELLENT_THRESHOLD) / 10.0)
-            elif score >= GOOD_THRESHOLD:
+                0.9 + np.minimum(0.1, (score - EXCELLENT_THRESHOLD) / 10.0),
                 # 좋은 매칭: 0.7-0.9
-                norm_score = 0.7 + 0.2 * (score - GOOD_THRESHOLD) / (EXCELLENT_THRESHOLD - GOOD_THRESHOLD)
-            elif score >= FAIR_THRESHOLD:
+                0.7 + 0.2 * (score - GOOD_THRESHOLD) / (EXCELLENT_THRESHOLD - GOOD_THRESHOLD),
                 # 보통 매칭: 0.4-0.7
-                norm_score = 0.4 + 0.3 * (score - FAIR_THRESHOLD) / (GOOD_THRESHOLD - FAIR_THRESHOLD)
-            elif score >= POOR_THRESHOLD:
+                0.4 + 0.3 * (score - FAIR_THRESHOLD) / (GOOD_THRESHOLD - FAIR_THRESHOLD),
                 # 낮은 매칭: 0.1-0.4
-                norm_score = 0.1 + 0.3 * (score - POOR_THRESHOLD) / (FAIR_THRESHOLD - POOR_THRESHOLD)
-            elif score > 0:
+                0.1 + 0.3 * (score - POOR_THRESHOLD) / (FAIR_THRESHOLD - POOR_THRESHOLD),
                 # 매우 낮은 매칭: 0.01-0.1
-                norm_score = 0.01 + 0.09 * score / POOR_THRESHOLD
-            else:
-                # 매칭 없음: 0.0
-                norm_score = 0.0
-                
-            normalized.append(norm_score)
-        
-        return normalized
+                0.01 + 0.09 * score / POOR_THRESHOLD,
+            ],
+            default=0.0  # 매칭 없음
+        )
+        return self._like(scores, normalized)
     
-    def _log_scale_normalize(self, scores: List[float]) -> List[float]:
+    def _log_scale_normalize(self, scores: Scores) -> Scores:
         """로그 스케일 정규화 - 매우 낮은 점수 범위용"""
-        if not scores:
+        if not len(scores):
             return scores
             
         # 로그 변환 후 정규화
-        log_scores = []
-        for score in scores:
-            if score > 0:
-                log_score = math.log(1 + score * 100)  # 스케일 조정
-                log_scores.append(log_score)
-            else:
-                log_scores.append(0.0)
-        
-        if not log_scores or max(log_scores) == 0:
-            return [0.0] * len(scores)
-            
-        max_log = max(log_scores)
-        return [score / max_log for score in log_scores]
+        values = np.asarray(scores, dtype=np.float64)
+        log_scores = np.where(values > 0, np.log1p(np.maximum(values, 0) * 100), 0.0)  # 스케일 조정
+        
+        max_log = log_scores.max()
+        if max_log == 0:
+            return self._like(scores, np.zeros(len(values)))
+        return self._like(scores, log_scores / max_log)
     
-    def _sqrt_normalize(self, scores: List[float]) -> List[float]:
+    def _sqrt_normalize(self, scores: Scores) -> Scores:
         """제곱근 정규화 - 낮은 점수 범위의 차이 강조"""
-        if not scores:
+        if not len(scores):
             return scores
-            
-        sqrt_scores = [math.sqrt(score) if score > 0 else 0.0 for score in scores]
-        max_sqrt = max(sqrt_scores) if sqrt_scores else 0
+        
+        values = np.asarray(scores, dtype=np.float64)
+        sqrt_scores = np.sqrt(np.maximum(values, 0.0))
+        max_sqrt = sqrt_scores.max()
         
         if max_sqrt == 0:
-            return [0.0] * len(scores)
+            return self._like(scores, np.zeros(len(values)))
             
-        return [score / max_sqrt for score in sqrt_scores]
+        return self._like(scores, sqrt_scores / max_sqrt)
     
-    def _linear_normalize_improved(self, scores: List[float]) -> List[float]:
+    def _linear_normalize_improved(self, scores: Scores) -> Scores:
         """개선된 선형 정규화 - 1.0 만점 방지"""
-        if not scores:
+        if not len(scores):
             return scores
-            
-        max_score = max(scores)
+        
+        values = np.asarray(scores, dtype=np.float64)
+        max_score = values.max()
         if max_score == 0:
             return scores
             
         # 최대값의 90%를 1.0으로 설정하여 완벽한 매칭이 아니면 1.0이 안되도록 함
         threshold = max_score * 0.9
-        normalized = [min(score / threshold, 1.0) for score in scores]
-        
-        return normalized 
\ No newline at end of file
+        return self._like(scores, np.minimum(values / threshold, 1.0))
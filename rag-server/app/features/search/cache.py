@@ -0,0 +1,94 @@
+"""
+검색 결과 캐시
+
+평가 실행이나 IDE 플러그인처럼 같은 질의가 반복될 때 다시 계산하지 않도록 변환이 끝난
+검색 결과를 보관한다. 키에는 컬렉션 쓰기 세대가 들어가므로 쓰기가 일어나면 이전 항목은
+더 이상 조회되지 않고 LRU/TTL로 밀려난다.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class SearchResultCache:
+    """크기 제한 LRU + TTL 검색 결과 캐시"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # 키 -> (만료 시각, 결과), 마지막이 가장 최근 사용
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Any]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        collection_name: str,
+        generation: int,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+        **params: Any
+    ) -> Hashable:
+        """캐시 키 생성 (질의 공백 정규화, 필터/검색 파라미터는 순서 무관)"""
+        normalized_query = " ".join(query.split())
+        options = json.dumps(
+            {"filters": filters or {}, **params}, sort_keys=True, default=str, ensure_ascii=False
+        )
+        return (kind, collection_name, generation, normalized_query, top_k, options)
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """캐시된 결과 조회 (없거나 만료되면 None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, results = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(results)
+
+    def put(self, key: Hashable, results: List[Any]):
+        """결과 저장, 최대 항목 수를 넘으면 가장 오래 쓰지 않은 항목부터 제거"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, list(results))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_bypass(self):
+        """요청에서 캐시를 건너뛴 횟수 집계"""
+        self.bypasses += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
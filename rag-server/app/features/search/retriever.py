@@ -25,7 +25,7 @@ class HybridRetriever:
             query_embedding = embedding_response["embedding"]
             
             # 벡터 DB에서 하이브리드 검색 수행 (기존 구현 활용)
-            results = self.vector_client.hybrid_search(
+            results = await self.vector_client.ahybrid_search(
                 collection_name=collection_name,
                 query_embedding=query_embedding,
                 keywords=keywords,
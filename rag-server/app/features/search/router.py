@@ -7,11 +7,13 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
 import logging
 
+from app.core.exceptions import InvalidFilterError
 from .service import hybrid_search_service
 from .schema import (
     VectorSearchRequest, VectorSearchResponse,
     BM25SearchRequest, BM25SearchResponse,
-    HybridSearchRequest, HybridSearchResponse
+    HybridSearchRequest, HybridSearchResponse,
+    AutocompleteResponse
 )
 
 logger = logging.getLogger(__name__)
@@ -37,6 +39,8 @@ async def vector_search(request: VectorSearchRequest):
         return result
     except HTTPException:
         raise  # HTTPException은 그대로 전달
+    except InvalidFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"벡터 검색 실패: {e}")
         raise HTTPException(status_code=500, detail=f"벡터 검색 실패: {str(e)}")
@@ -76,6 +80,23 @@ async def hybrid_search(request: HybridSearchRequest):
         raise HTTPException(status_code=500, detail=f"하이브리드 검색 실패: {str(e)}")
 
 
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=200, description="입력 중인 심볼 이름 (BookServ, findBy 등)"),
+    index_name: str = Query(..., min_length=1, pattern=r"^[A-Za-z0-9_-]+$", description="BM25 인덱스 이름"),
+    limit: int = Query(10, gt=0, le=100, description="반환할 후보 수")
+):
+    """
+    심볼 자동완성 API
+    
+    색인된 클래스/메서드 이름과 camelCase 하위 토큰의 접두사로 후보를 찾아 인기도 순으로 반환합니다.
+    """
+    result = await hybrid_search_service.autocomplete(prefix, index_name, limit)
+    if not result.success:
+        raise HTTPException(status_code=500, detail=result.error)
+    return result
+
+
 @router.get("/collections")
 async def get_collections():
     """
@@ -106,6 +127,16 @@ async def get_indexes():
         raise HTTPException(status_code=500, detail=f"인덱스 목록 조회 실패: {str(e)}")
 
 
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    검색 결과 캐시 통계 API
+    
+    벡터/BM25 검색 결과 캐시의 적중률과 항목 수를 반환합니다.
+    """
+    return hybrid_search_service.get_cache_stats()
+
+
 @router.get("/health")
 async def health_check():
     """
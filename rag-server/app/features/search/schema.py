@@ -21,6 +21,7 @@ class SearchResult(BaseModel):
     score: float = Field(..., description="유사도 점수", ge=0.0)
     metadata: Dict[str, Any] = Field(default_factory=dict, description="메타데이터")
     document_id: Optional[str] = Field(None, description="문서 ID")
+    match_type: Optional[str] = Field(None, description="심볼 정확 일치 결과면 'symbol'")
 
 
 # 벡터 검색 관련 스키마
@@ -31,6 +32,9 @@ class VectorSearchRequest(BaseModel):
     top_k: int = Field(10, description="반환할 결과 수", gt=0, le=100)
     score_threshold: float = Field(0.0, description="최소 유사도 점수", ge=0.0, le=1.0)
     filter_metadata: Optional[Dict[str, Any]] = Field(None, description="메타데이터 필터")
+    hnsw_ef: Optional[int] = Field(None, description="HNSW 탐색 폭 (클수록 정확하고 느림, 없으면 서버 기본값)", gt=0, le=4096)
+    exact: bool = Field(False, description="HNSW 대신 전수 검색 여부")
+    use_cache: bool = Field(True, description="검색 결과 캐시 사용 여부 (False면 항상 다시 검색)")
 
     @validator('collection_name')
     def validate_collection_name(cls, v):
@@ -46,6 +50,7 @@ class VectorSearchResponse(BaseModel):
     total_results: int
     search_time_ms: int
     collection_name: str
+    cached: bool = False
     error: Optional[str] = None
 
 
@@ -56,6 +61,21 @@ class BM25SearchRequest(BaseModel):
     index_name: str = Field(..., description="인덱스 이름", min_length=1)
     top_k: int = Field(10, description="반환할 결과 수", gt=0, le=100)
     filter_language: Optional[Language] = Field(None, description="언어 필터")
+    filter_metadata: Optional[Dict[str, Any]] = Field(
+        None, description="메타데이터 필터 (language, code_type, file_path는 색인으로 처리)"
+    )
+    field_weights: Optional[Dict[str, float]] = Field(
+        None, description="BM25F 필드 가중치 (code, name, keywords, annotations, types) - 재색인 없이 질의별 적용"
+    )
+    use_cache: bool = Field(True, description="검색 결과 캐시 사용 여부 (False면 항상 다시 검색)")
+    symbol_lookup: bool = Field(True, description="식별자 질의는 심볼 정확 일치를 먼저 조회하고 있으면 바로 반환")
+    phrase_query: bool = Field(
+        True, description='따옴표 구문 조건 적용 - "save book"은 순서대로 인접, "save book"~3은 토큰 수 + 3개 창 안 (위치 색인 필요)'
+    )
+    proximity_window: Optional[int] = Field(
+        None, description="질의 토큰이 모두 이 토큰 수 안에 모여 있는 문서의 점수 가중 (없으면 사용 안 함)", ge=2, le=1000
+    )
+    proximity_boost: float = Field(0.5, description="근접 가중치 (가장 가까이 모여 있으면 점수 x (1 + boost))", ge=0.0, le=10.0)
 
     @validator('index_name')
     def validate_index_name(cls, v):
@@ -63,6 +83,12 @@ class BM25SearchRequest(BaseModel):
             raise ValueError('인덱스 이름은 영문자, 숫자, _, -만 사용 가능합니다')
         return v
 
+    @validator('field_weights')
+    def validate_field_weights(cls, v):
+        if v and any(weight < 0 for weight in v.values()):
+            raise ValueError('필드 가중치는 0 이상이어야 합니다')
+        return v
+
 
 class BM25SearchResponse(BaseModel):
     """BM25 검색 응답"""
@@ -71,6 +97,26 @@ class BM25SearchResponse(BaseModel):
     total_results: int
     search_time_ms: int
     index_name: str
+    cached: bool = False
+    error: Optional[str] = None
+
+
+# 심볼 자동완성 관련 스키마
+class SymbolSuggestion(BaseModel):
+    """자동완성 후보 심볼"""
+    symbol: str = Field(..., description="심볼 이름 (메서드는 parent_class.name)")
+    kind: str = Field(..., description="코드 종류 (class, method 등)")
+    score: int = Field(..., description="인기도(청크 수) x 종류별 중요도 점수", ge=0)
+
+
+class AutocompleteResponse(BaseModel):
+    """자동완성 응답"""
+    success: bool
+    suggestions: List[SymbolSuggestion]
+    total_suggestions: int
+    search_time_ms: float
+    index_name: str
+    prefix: str
     error: Optional[str] = None
 
 
@@ -96,6 +142,12 @@ class HybridSearchRequest(BaseModel):
     score_threshold: float = Field(0.0, description="최소 점수 임계값", ge=0.0, le=1.0)
     filter_metadata: Optional[Dict[str, Any]] = Field(None, description="메타데이터 필터")
     filter_language: Optional[Language] = Field(None, description="언어 필터")
+    symbol_lookup: bool = Field(True, description="식별자 질의는 심볼 정확 일치를 먼저 조회하고 있으면 바로 반환")
+    proximity_window: Optional[int] = Field(
+        None, description="BM25 결과 중 질의 토큰이 이 토큰 수 안에 모여 있는 문서를 융합 전에 가중 (없으면 사용 안 함)",
+        ge=2, le=1000
+    )
+    proximity_boost: float = Field(0.5, description="근접 가중치 (가장 가까이 모여 있으면 BM25 점수 x (1 + boost))", ge=0.0, le=10.0)
 
     @validator('vector_weight', 'bm25_weight')
     def validate_weights(cls, v, values):
@@ -7,15 +7,19 @@ import time
 from typing import List, Dict, Any, Optional
 import asyncio
 
+from app.core.config import settings
+from app.core.exceptions import InvalidFilterError
 from app.retriever.hybrid_retriever import HybridRetrievalService
-from app.index.vector_service import VectorIndexService
-from app.index.bm25_service import BM25IndexService
+from app.index.vector_service import get_vector_index_service
+from app.index.bm25_service import get_bm25_index_service
 from app.features.search.schema import (
     VectorSearchRequest, VectorSearchResponse,
     BM25SearchRequest, BM25SearchResponse,
+    AutocompleteResponse, SymbolSuggestion,
     HybridSearchRequest, HybridSearchResponse,
     SearchResult
 )
+from .cache import SearchResultCache
 from .utils import enhance_metadata_for_java
 
 
@@ -23,37 +27,63 @@ class HybridSearchService:
     """하이브리드 검색 서비스"""
     
     def __init__(self):
-        self.vector_service = VectorIndexService()
-        self.bm25_service = BM25IndexService()
+        self.vector_service = get_vector_index_service()  # 인덱싱/검색 서비스가 쓰기 세대 공유
+        self.bm25_service = get_bm25_index_service()  # 프로세스 전체에서 인덱스 레지스트리 공유
+        self.result_cache = SearchResultCache(
+            max_entries=settings.search_cache_max_entries,
+            ttl_seconds=settings.search_cache_ttl_seconds
+        )
     
     async def vector_search(self, request: VectorSearchRequest) -> VectorSearchResponse:
         """벡터 검색"""
         start_time = time.time()
         
         try:
-            # 벡터 검색 실행
-            search_results = await self.vector_service.search_similar_code(
-                query=request.query,
-                limit=request.top_k,
-                threshold=request.score_threshold or 0.0,
-                filters=request.filter_metadata
+            # 요청한 컬렉션의 쓰기 세대로 캐시 키 생성
+            searched_collection = request.collection_name
+            cache_key = self.result_cache.make_key(
+                "vector", searched_collection, self.vector_service.write_generation(searched_collection),
+                request.query, request.top_k, request.filter_metadata,
+                score_threshold=request.score_threshold or 0.0,
+                hnsw_ef=request.hnsw_ef, exact=request.exact
             )
+            results = self.result_cache.get(cache_key) if request.use_cache else None
+            cached = results is not None
             
-            # 결과 변환 (Java 메타데이터 향상 포함)
-            results = []
-            for result in search_results:
-                content = result.get("content", "")
-                metadata = result.get("metadata", {})
+            if not cached:
+                if not request.use_cache:
+                    self.result_cache.record_bypass()
                 
-                # Java 파일인 경우 메타데이터 향상
-                enhanced_metadata = enhance_metadata_for_java(metadata, content)
+                # 벡터 검색 실행
+                search_results = await self.vector_service.search_similar_code(
+                    query=request.query,
+                    limit=request.top_k,
+                    threshold=request.score_threshold or 0.0,
+                    filters=request.filter_metadata,
+                    collection_name=searched_collection,
+                    hnsw_ef=request.hnsw_ef,
+                    exact=request.exact or None
+                )
                 
-                results.append(SearchResult(
-                    content=content,
-                    score=result.get("score", 0.0),
-                    metadata=enhanced_metadata,
-                    document_id=result.get("id")
-                ))
+                # 결과 변환 (Java 메타데이터 향상 포함)
+                results = []
+                for result in search_results:
+                    content = result.get("content", "")
+                    metadata = result.get("metadata", {})
+                    
+                    # Java 파일인 경우 메타데이터 향상
+                    enhanced_metadata = enhance_metadata_for_java(metadata, content)
+                    
+                    results.append(SearchResult(
+                        content=content,
+                        score=result.get("score", 0.0),
+                        metadata=enhanced_metadata,
+                        document_id=result.get("id")
+                    ))
+                
+                # 검색 실패는 빈 결과로 돌아오므로 결과가 있을 때만 저장
+                if request.use_cache and results:
+                    self.result_cache.put(cache_key, results)
             
             search_time_ms = int((time.time() - start_time) * 1000)
             
@@ -63,9 +93,12 @@ class HybridSearchService:
                 total_results=len(results),
                 search_time_ms=search_time_ms,
                 collection_name=request.collection_name,
+                cached=cached,
                 query=request.query
             )
             
+        except InvalidFilterError:
+            raise  # 잘못된 필터는 요청 오류로 라우터에서 처리
         except Exception as e:
             search_time_ms = int((time.time() - start_time) * 1000)
             return VectorSearchResponse(
@@ -82,29 +115,67 @@ class HybridSearchService:
         start_time = time.time()
         
         try:
-            # BM25 검색 실행 - index_name을 collection_name으로 전달
-            search_results = await self.bm25_service.search_keywords(
-                query=request.query,
-                collection_name=request.index_name,  # 중요: index_name을 collection_name으로 사용
-                limit=request.top_k,
-                filters={"language": request.filter_language} if request.filter_language else None
+            filters = dict(request.filter_metadata or {})
+            if request.filter_language:
+                filters["language"] = request.filter_language.value
+            
+            cache_key = self.result_cache.make_key(
+                "bm25", request.index_name, self.bm25_service.write_generation(request.index_name),
+                request.query, request.top_k, filters,
+                field_weights=request.field_weights, symbol_lookup=request.symbol_lookup,
+                phrase_query=request.phrase_query, proximity_window=request.proximity_window,
+                proximity_boost=request.proximity_boost
             )
+            results = self.result_cache.get(cache_key) if request.use_cache else None
+            cached = results is not None
             
-            # 결과 변환 (Java 메타데이터 향상 포함)
-            results = []
-            for result in search_results:
-                content = result.get("content", "")
-                metadata = result.get("metadata", {})
+            if not cached:
+                if not request.use_cache:
+                    self.result_cache.record_bypass()
                 
-                # Java 파일인 경우 메타데이터 향상
-                enhanced_metadata = enhance_metadata_for_java(metadata, content)
+                # 식별자 질의는 심볼 정확 일치가 있으면 BM25 점수 계산 없이 반환
+                search_results = []
+                if request.symbol_lookup:
+                    search_results = await self.bm25_service.find_symbol(
+                        query=request.query,
+                        collection_name=request.index_name,
+                        limit=request.top_k,
+                        filters=filters or None
+                    )
                 
-                results.append(SearchResult(
-                    content=content,
-                    score=result.get("score", 0.0),
-                    metadata=enhanced_metadata,
-                    document_id=result.get("id")
-                ))
+                if not search_results:
+                    # BM25 검색 실행 - index_name을 collection_name으로 전달
+                    search_results = await self.bm25_service.search_keywords(
+                        query=request.query,
+                        collection_name=request.index_name,  # 중요: index_name을 collection_name으로 사용
+                        limit=request.top_k,
+                        filters=filters or None,
+                        field_weights=request.field_weights,
+                        phrase_query=request.phrase_query,
+                        proximity_window=request.proximity_window,
+                        proximity_boost=request.proximity_boost
+                    )
+                
+                # 결과 변환 (Java 메타데이터 향상 포함)
+                results = []
+                for result in search_results:
+                    content = result.get("content", "")
+                    metadata = result.get("metadata", {})
+                    
+                    # Java 파일인 경우 메타데이터 향상
+                    enhanced_metadata = enhance_metadata_for_java(metadata, content)
+                    
+                    results.append(SearchResult(
+                        content=content,
+                        score=result.get("score", 0.0),
+                        metadata=enhanced_metadata,
+                        document_id=result.get("id"),
+                        match_type="symbol" if result.get("source") == "symbol" else None
+                    ))
+                
+                # 검색 실패는 빈 결과로 돌아오므로 결과가 있을 때만 저장
+                if request.use_cache and results:
+                    self.result_cache.put(cache_key, results)
             
             search_time_ms = int((time.time() - start_time) * 1000)
             
@@ -114,6 +185,7 @@ class HybridSearchService:
                 total_results=len(results),
                 search_time_ms=search_time_ms,
                 index_name=request.index_name,
+                cached=cached,
                 query=request.query
             )
             
@@ -133,17 +205,35 @@ class HybridSearchService:
         start_time = time.time()
         
         try:
+            # 식별자 질의는 심볼 정확 일치가 있으면 임베딩/벡터 검색/BM25 없이 반환
+            if request.symbol_lookup:
+                filters = dict(request.filter_metadata or {})
+                if request.filter_language:
+                    filters["language"] = request.filter_language.value
+                symbol_results = await self.bm25_service.find_symbol(
+                    query=request.query,
+                    collection_name=request.index_name,
+                    limit=request.top_k,
+                    filters=filters or None
+                )
+                if symbol_results:
+                    return self._symbol_hybrid_response(request, symbol_results, start_time)
+            
             # 직접 벡터 검색과 BM25 검색을 수행하고 결합
             vector_results = await self.vector_service.search_similar_code(
                 query=request.query,
                 limit=request.top_k * 2,  # 더 많은 결과를 가져와서 융합
-                threshold=0.0
+                threshold=0.0,
+                collection_name=request.collection_name
             )
             
+            # 근접 가중치는 BM25 점수/순위에 반영되어 융합에 들어감
             bm25_results = await self.bm25_service.search_keywords(
                 query=request.query,
                 collection_name=request.index_name,
-                limit=request.top_k * 2
+                limit=request.top_k * 2,
+                proximity_window=request.proximity_window,
+                proximity_boost=request.proximity_boost
             )
             
             # 결과를 표준 형식으로 변환
@@ -231,6 +321,65 @@ class HybridSearchService:
                 error=f"하이브리드 검색 실패: {str(e)}"
             )
     
+    async def autocomplete(self, prefix: str, index_name: str, limit: int = 10) -> AutocompleteResponse:
+        """심볼 이름/camelCase 하위 토큰 접두사 자동완성"""
+        start_time = time.perf_counter()
+        
+        try:
+            suggestions = await self.bm25_service.complete_symbols(
+                prefix=prefix,
+                collection_name=index_name,
+                limit=limit
+            )
+            return AutocompleteResponse(
+                success=True,
+                suggestions=[SymbolSuggestion(**suggestion) for suggestion in suggestions],
+                total_suggestions=len(suggestions),
+                search_time_ms=(time.perf_counter() - start_time) * 1000,
+                index_name=index_name,
+                prefix=prefix
+            )
+            
+        except Exception as e:
+            return AutocompleteResponse(
+                success=False,
+                suggestions=[],
+                total_suggestions=0,
+                search_time_ms=(time.perf_counter() - start_time) * 1000,
+                index_name=index_name,
+                prefix=prefix,
+                error=f"자동완성 실패: {str(e)}"
+            )
+    
+    def _symbol_hybrid_response(
+        self, request: HybridSearchRequest, symbol_results: List[Dict[str, Any]], start_time: float
+    ) -> HybridSearchResponse:
+        """심볼 정확 일치 결과로 하이브리드 검색 응답 생성"""
+        results = [
+            SearchResult(
+                content=result.get("content", ""),
+                score=result.get("score", 0.0),
+                metadata=enhance_metadata_for_java(result.get("metadata", {}), result.get("content", "")),
+                document_id=result.get("id"),
+                match_type="symbol"
+            )
+            for result in symbol_results
+        ]
+        return HybridSearchResponse(
+            success=True,
+            results=results,
+            total_results=len(results),
+            search_time_ms=int((time.time() - start_time) * 1000),
+            vector_results_count=0,
+            bm25_results_count=0,
+            fusion_method="symbol",
+            weights_used={
+                "vector_weight": request.vector_weight,
+                "bm25_weight": request.bm25_weight
+            },
+            query=request.query
+        )
+    
     async def get_collections(self) -> Dict[str, List[str]]:
         """벡터 컬렉션 목록 조회"""
         try:
@@ -258,6 +407,10 @@ class HybridSearchService:
                 "total_indexes": 0
             }
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """검색 결과 캐시 적중률/항목 수 조회"""
+        return self.result_cache.get_stats()
+    
     async def health_check(self) -> Dict[str, Any]:
         """서비스 헬스체크"""
         components = {}
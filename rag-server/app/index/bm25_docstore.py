@@ -0,0 +1,97 @@
+"""
+BM25 문서 저장소
+
+역색인은 용어 ID/tf 컬럼만 메모리에 두고, 응답에 필요한 원문과 메타데이터는 이 저장소에서
+응답을 만들 때만 읽는다. 세그먼트에 아직 기록되지 않은 문서의 저장 필드
+(encode_stored_document 바이트)를 인덱스 디렉터리의 익명 임시 파일에 이어 붙이고,
+메모리에는 문서별 (오프셋, 길이)만 둔다. 세그먼트에 기록된 문서는 세그먼트의 STORED 섹션에서 읽는다.
+
+파일은 저널 재생으로 다시 만들 수 있는 캐시이므로 fsync하지 않으며 프로세스가 끝나면 사라진다.
+추가 전용이라 이전 위치는 retain()으로 정리하기 전까지 유효하므로, 스냅샷 기록 스레드는
+capture()로 고정한 위치를 락 밖에서 읽을 수 있다.
+"""
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# 메모리 사용량 추정용 근사치 (dict 항목, 문서 ID 문자열, (오프셋, 길이) 튜플)
+_ENTRY_BYTES = 200
+
+
+class BM25DocumentStore:
+    """메모리 문서의 저장 필드를 파일에 두는 추가 전용 저장소"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._file = None
+        self._end = 0
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()  # 파일 위치 이동과 읽기/쓰기 보호
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._locations
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._locations))
+
+    @property
+    def file_size(self) -> int:
+        return self._end
+
+    def estimated_memory_bytes(self) -> int:
+        return len(self._locations) * _ENTRY_BYTES
+
+    def put(self, doc_id: str, payload: bytes) -> None:
+        """저장 필드 추가 (같은 ID는 새 위치로 교체)"""
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="bm25-docs-", dir=self.directory)
+            self._file.seek(self._end)
+            self._file.write(payload)
+            self._locations[doc_id] = (self._end, len(payload))
+            self._end += len(payload)
+
+    def get(self, doc_id: str) -> Optional[bytes]:
+        location = self._locations.get(doc_id)
+        return self.read(location) if location is not None else None
+
+    def read(self, location: Tuple[int, int]) -> bytes:
+        """capture()로 얻은 위치의 저장 필드"""
+        offset, length = location
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def discard(self, doc_id: str) -> bool:
+        """문서 제외 (파일 공간은 retain() 때 정리)"""
+        return self._locations.pop(doc_id, None) is not None
+
+    def capture(self) -> Dict[str, Tuple[int, int]]:
+        """현재 문서 위치 고정 (이후 교체/삭제와 무관하게 retain() 전까지 읽을 수 있다)"""
+        return dict(self._locations)
+
+    def retain(self, doc_ids: Iterable[str]) -> None:
+        """주어진 문서만 남기고 파일을 다시 씀 (스냅샷 교체 후 세그먼트에 없는 문서만 유지)"""
+        kept = [(doc_id, self.get(doc_id)) for doc_id in doc_ids if doc_id in self._locations]
+        self.clear()
+        for doc_id, payload in kept:
+            self.put(doc_id, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._locations = {}
+            self._end = 0
+            if self._file is not None:
+                self._file.truncate(0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._locations = {}
+            self._end = 0
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,1344 @@
+"""
+증분 BM25 역색인 엔진
+
+LlamaIndex BM25Retriever는 문서가 바뀔 때마다 전체 코퍼스로 다시 만들어야 하므로
+배치 인덱싱 비용이 코퍼스 크기에 비례한다. 이 엔진은 용어 사전, 포스팅, 문서 길이,
+누적 통계(avgdl, df)를 직접 관리하여 추가/삭제를 제자리에서 반영한다.
+
+디스크에 저장된 세그먼트(mmap)를 기반(base)으로 두고, 이후 변경분은 메모리 포스팅에
+쌓는다. 기반 세그먼트의 문서 삭제는 세그먼트를 다시 쓰지 않고 살아 있는 문서 비트셋
+(live-docs)의 표시(tombstone)와 df 보정값으로 처리하며, 질의 시점에 비트셋으로 걸러낸다.
+삭제 표시가 쌓인 세그먼트의 정리(병합)는 호출자의 병합 정책이 스냅샷으로 수행한다.
+
+메모리 변경분은 인턴된 어휘(용어 -> 용어 ID)와 문서 슬롯 번호 위의 NumPy 컬럼으로 둔다.
+문서별 용어 ID/tf는 슬롯 오프셋으로 나뉜 하나의 uint32 컬럼 쌍(CSR)에 이어 붙이고, 용어별
+df와 문서/필드 길이도 컬럼이다. 용어나 문서마다 파이썬 컨테이너를 만들지 않으며, 원문과
+메타데이터는 역색인에 두지 않는다 (bm25_docstore).
+
+스냅샷은 capture_snapshot()으로 변경분을 복사해 두고 다른 스레드에서 기록한 뒤,
+complete_snapshot()으로 새 세그먼트를 기반으로 교체한다. 기록 중에 들어온 변경은
+교체 시 새 기반 위로 옮겨진다.
+
+메타데이터 필드(언어, 코드 타입, 파일 경로 등)는 값별 문서 집합으로 색인하여, 필터가
+있는 검색은 조건을 만족하는 문서만 점수 계산과 top-k 선택에 참여시킨다.
+
+점수는 BM25F로 계산한다. 문서는 텍스트 필드(code, name, keywords 등)별로 색인되고,
+질의 시점의 필드 가중치와 필드별 길이 정규화로 용어별 가상 tf를 만든 뒤 한 번만 포화시킨다.
+df는 필드별 df의 최댓값으로 근사한다 (Lucene CombinedFieldQuery와 같은 방식).
+
+블록 정보가 있는 세그먼트(v3)는 MaxScore로 top-k를 구한다. 용어별 점수 상한(블록 최대
+tf, 최소 문서 길이)이 높은 순으로 포스팅 전체를 처리하다가, 남은 용어들의 상한 합이
+현재 k번째 점수보다 작아지면 나머지 용어는 후보 문서가 속한 블록만 디코딩한다.
+
+위치를 저장하는 색인(store_positions)은 포스팅마다 필드 안 토큰 위치도 둔다 (메모리는 tf 컬럼과
+나란한 위치 시작 컬럼, 세그먼트는 POSITIONS 섹션). 구문/근접 조건은 질의 용어의 (문서, 위치)
+출현 목록을 교집합/탐색해 본문을 다시 읽지 않고 판정한다.
+"""
+import heapq
+import itertools
+import math
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Iterable
+
+import numpy as np
+
+from .bm25_segment import (
+    DEFAULT_TEXT_FIELD, BM25SegmentReader, field_key, range_indices, text_field_of, text_field_term, write_segment
+)
+
+# 메모리 사용량 추정용 근사치 (CPython 객체 오버헤드 기준, NumPy 컬럼은 실제 크기로 계산)
+_TERM_ENTRY_BYTES = 160  # 어휘 dict 항목과 용어 문자열, 용어 목록 항목
+_DOC_ENTRY_BYTES = 200  # 슬롯 dict 항목과 문서 ID 문자열, 슬롯별 목록 항목
+_FIELD_ENTRY_BYTES = 12  # 필드 값별 슬롯 항목과 문서별 키 참조
+_FIELD_MASK_CACHE_SIZE = 64  # 기반 세그먼트 필드 마스크 캐시 항목 수
+_INITIAL_CAPACITY = 64  # 메모리 컬럼 초기 크기 (부족하면 두 배로 늘림)
+_COMPACT_MIN_DEAD_POSTINGS = 4096  # 삭제된 문서의 포스팅이 이보다 많고 살아 있는 포스팅보다 많으면 컬럼 압축
+_POSITION_BITS = 32  # 출현 키 (문서 << 32 | 위치)의 위치 비트 수
+_POSITION_MASK = (1 << _POSITION_BITS) - 1
+
+
+def _ensure_capacity(column: np.ndarray, size: int) -> np.ndarray:
+    """size개 이상을 담을 수 있는 컬럼 (부족하면 두 배씩 늘린 복사본, 기존 배열은 수정하지 않는다)"""
+    if size <= len(column):
+        return column
+    capacity = max(len(column), _INITIAL_CAPACITY)
+    while capacity < size:
+        capacity *= 2
+    grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+
+class BM25SnapshotState:
+    """스냅샷 시점의 고정 뷰 (기록 스레드에서 읽기 전용으로 사용)"""
+
+    def __init__(
+        self,
+        base: Optional[BM25SegmentReader],
+        base_live: Optional[np.ndarray],
+        terms: List[str],
+        doc_ids: List[str],
+        doc_term_counts: np.ndarray,
+        term_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        doc_field_lengths: np.ndarray,
+        doc_fields: List[Tuple[str, ...]],
+        positions: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            base_live: 기반 세그먼트 문서별 살아 있음 여부 (기반이 없으면 None)
+            terms: 용어 ID -> 용어 (메모리 어휘)
+            doc_ids: 메모리 문서 ID (슬롯 순서)
+            doc_term_counts: 문서별 용어 수 (term_ids/term_freqs를 doc_ids 순서로 나누는 길이)
+            term_ids, term_freqs: 문서 순서로 이어 붙인 용어 ID/tf 컬럼 (복사본)
+            doc_lengths, doc_field_lengths: 문서 길이와 필드별 길이 (doc_ids 순서)
+            doc_fields: 문서별 필터 필드 색인 키
+            positions: term_ids 항목 순서로 tf개씩 이어 붙인 토큰 위치 (위치를 저장하지 않으면 None)
+        """
+        self.base = base
+        self.base_live = base_live
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.doc_term_counts = doc_term_counts
+        self.term_ids = term_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.doc_field_lengths = doc_field_lengths
+        self.doc_fields = doc_fields
+        self.positions = positions
+
+
+class BM25InvertedIndex:
+    """증분 BM25 역색인"""
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        filter_fields: Sequence[str] = (),
+        text_fields: Sequence[str] = (DEFAULT_TEXT_FIELD,),
+        field_weights: Optional[Dict[str, float]] = None,
+        field_b: Optional[Dict[str, float]] = None,
+        store_positions: bool = False
+    ):
+        """
+        Args:
+            filter_fields: 필터용으로 값별 문서 집합을 색인할 메타데이터 필드
+            text_fields: BM25F 텍스트 필드 (첫 번째가 용어 키에 접두어가 없는 기본 필드)
+            field_weights: 필드별 기본 가중치 (없으면 1.0, 질의마다 덮어쓸 수 있음)
+            field_b: 필드별 길이 정규화 계수 (없으면 b)
+            store_positions: 구문/근접 질의용 토큰 위치 저장 여부
+        """
+        self.k1 = k1
+        self.b = b
+        self.filter_fields = tuple(filter_fields)
+        self.text_fields = tuple(text_fields)
+        self.field_weights = dict(field_weights or {})
+        self.field_b = dict(field_b or {})
+        self.store_positions = store_positions
+        self._text_field_index = {field: i for i, field in enumerate(self.text_fields)}
+
+        self._reset_memory()
+
+        # 디스크 기반 세그먼트와 그 위의 삭제 정보
+        self.base: Optional[BM25SegmentReader] = None
+        self._base_live: Optional[np.ndarray] = None  # 기반 문서별 살아 있음 여부 (삭제 표시)
+        self._base_deleted_count = 0
+        self._base_df_removed: Counter = Counter()
+        self._base_length_removed = 0
+        # text_fields 순서의 기반 세그먼트 필드 길이 컬럼 (세그먼트에 없는 필드는 None)
+        self._base_field_columns: List[Optional[np.ndarray]] = []
+        self._base_field_totals = np.zeros(len(self.text_fields), dtype=np.int64)
+        self._base_field_length_removed = np.zeros(len(self.text_fields), dtype=np.int64)
+        # (필드, 값 목록) -> 기반 세그먼트 불리언 마스크 (기반이 바뀌면 비움)
+        self._base_field_masks: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+        # 스냅샷 기록 중 변경된 문서 ID (capture_snapshot 이후에만 추적)
+        self._touched: Optional[Dict[str, None]] = None
+
+    def _reset_memory(self) -> None:
+        """메모리 변경분 초기화"""
+        # 인턴된 어휘: 용어 -> 용어 ID, 용어 ID -> 용어 (기본 필드 밖의 용어는 text_field_term() 키)
+        self._vocabulary: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._term_dfs = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)  # 용어 ID -> 살아 있는 문서의 df
+        self._term_in_base = np.zeros(_INITIAL_CAPACITY, dtype=bool)  # 용어 ID -> 기반 세그먼트 어휘에 있는지
+        self._new_term_count = 0  # 기반 어휘에 없고 df > 0인 메모리 용어 수 (vocabulary_size용)
+        self._marked_terms = 0  # _term_in_base를 기록한 용어 ID 수
+
+        # 문서 ID -> 슬롯, 슬롯 -> 문서 ID (삭제된 슬롯은 None, 스냅샷 교체 때 다시 채번)
+        self._slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._slot_live = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        # 정방향 용어 ID/tf 컬럼: 슬롯 s의 항목은 [offsets[s], offsets[s + 1]) (삭제된 슬롯 항목은 압축 때 제거)
+        self._term_column = np.zeros(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._tf_column = np.zeros(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._slot_offsets = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._column_size = 0
+        # 위치 컬럼: 항목 i의 위치는 _pos_column[_pos_starts[i]:_pos_starts[i] + tf] (store_positions일 때만 채움)
+        self._pos_starts = np.zeros(_INITIAL_CAPACITY if self.store_positions else 0, dtype=np.int64)
+        self._pos_column = np.zeros(_INITIAL_CAPACITY if self.store_positions else 0, dtype=np.uint32)
+        self._pos_size = 0
+        self._live_postings = 0
+        self._dead_postings = 0
+        # 슬롯별 문서 길이 (전체 필드 토큰 수)와 필드별 길이 (text_fields 순서)
+        self._slot_lengths = np.zeros(_INITIAL_CAPACITY, dtype=np.uint32)
+        self._slot_field_lengths = np.zeros((_INITIAL_CAPACITY, len(self.text_fields)), dtype=np.uint32)
+        self._memory_length = 0
+        self._memory_field_lengths = np.zeros(len(self.text_fields), dtype=np.int64)
+
+        # 필드 색인 키 -> 슬롯 목록 (삭제된 슬롯은 _slot_live로 거름), 슬롯 -> 필드 색인 키
+        self.field_docs: Dict[str, array] = {}
+        self._slot_fields: List[Tuple[str, ...]] = []
+
+    @property
+    def base_doc_count(self) -> int:
+        return self.base.doc_count - self._base_deleted_count if self.base else 0
+
+    @property
+    def base_deleted_ratio(self) -> float:
+        """기반 세그먼트에서 삭제 표시된 문서 비율 (병합 정책 판단용)"""
+        return self._base_deleted_count / self.base.doc_count if self.base and self.base.doc_count else 0.0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self._slots) + self.base_doc_count
+
+    @property
+    def total_length(self) -> int:
+        base_length = self.base.total_length - self._base_length_removed if self.base else 0
+        return self._memory_length + base_length
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+    def field_avg_lengths(self) -> np.ndarray:
+        """text_fields 순서의 필드별 평균 길이 (빈 필드는 1.0)"""
+        totals = self._memory_field_lengths + self._base_field_totals - self._base_field_length_removed
+        averages = totals / self.doc_count if self.doc_count else np.zeros(len(self.text_fields))
+        averages[averages <= 0] = 1.0
+        return averages
+
+    def field_total_length(self, field: str) -> int:
+        """살아 있는 문서의 텍스트 필드 토큰 수 합계 (필드가 없으면 0)"""
+        column = self._text_field_index.get(field)
+        if column is None:
+            return 0
+        return int(
+            self._memory_field_lengths[column] + self._base_field_totals[column]
+            - self._base_field_length_removed[column]
+        )
+
+    @property
+    def vocabulary_size(self) -> int:
+        # 기반 어휘와 메모리 어휘의 합집합 (삭제로 비게 된 기반 용어는 근사치), 추가/삭제 시 갱신된 값
+        return (self.base.term_count if self.base else 0) + self._new_term_count
+
+    @property
+    def has_positions(self) -> bool:
+        """구문/근접 질의 가능 여부 (위치 없이 기록된 기반 세그먼트가 있으면 재구성 전까지 불가)"""
+        return self.store_positions and (self.base is None or not self.base.doc_count or self.base.has_positions)
+
+    @property
+    def has_pending_changes(self) -> bool:
+        """기반 세그먼트에 반영되지 않은 변경 여부 (블록 정보가 없는 구버전 세그먼트 포함)"""
+        return bool(self._slots or self._base_deleted_count) or (self.base is not None and not self.base.has_blocks)
+
+    def estimated_memory_bytes(self) -> int:
+        """
+        메모리 사용량 근사치
+
+        메모리 변경분은 NumPy 컬럼의 할당 크기와 어휘/슬롯 항목 수로 추정하고, 기반 세그먼트는
+        mmap된 파일 크기를 상한으로 더한다 (접근한 페이지만 실제로 상주한다).
+        """
+        columns = (
+            self._term_dfs, self._slot_live, self._term_column, self._tf_column, self._slot_offsets,
+            self._slot_lengths, self._slot_field_lengths, self._pos_starts, self._pos_column
+        )
+        size = (
+            sum(column.nbytes for column in columns)
+            + len(self._terms) * _TERM_ENTRY_BYTES
+            + len(self._slot_ids) * _DOC_ENTRY_BYTES
+            + sum(len(slots) for slots in self.field_docs.values()) * _FIELD_ENTRY_BYTES
+        )
+        if self.base:
+            size += self.base.file_size + self._base_live.nbytes
+        return size
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._slots or self.base_doc_num(doc_id) is not None
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def in_memory(self, doc_id: str) -> bool:
+        """기반 세그먼트에 아직 기록되지 않은 (메모리 변경분) 문서인지"""
+        return doc_id in self._slots
+
+    def base_doc_num(self, doc_id: str) -> Optional[int]:
+        """기반 세그먼트에 살아 있는 문서의 로컬 번호"""
+        if not self.base:
+            return None
+        doc_num = self.base.find_doc(doc_id)
+        if doc_num is None or not self._base_live[doc_num]:
+            return None
+        return doc_num
+
+    def iter_doc_ids(self) -> Iterable[str]:
+        """살아 있는 전체 문서 ID"""
+        if self.base:
+            for doc_num in np.flatnonzero(self._base_live).tolist():
+                yield self.base.doc_id(doc_num)
+        yield from self._slots
+
+    def doc_term_freqs(self, doc_id: str) -> Optional[Dict[str, int]]:
+        """살아 있는 문서의 용어 빈도 (없으면 None)"""
+        slot = self._slots.get(doc_id)
+        if slot is not None:
+            start, end = self._slot_offsets[slot], self._slot_offsets[slot + 1]
+            return {
+                self._terms[term_id]: tf
+                for term_id, tf in zip(self._term_column[start:end].tolist(), self._tf_column[start:end].tolist())
+            }
+        doc_num = self.base_doc_num(doc_id)
+        return self.base.doc_terms(doc_num) if doc_num is not None else None
+
+    def _slot_positions(self, slot: int) -> Optional[Dict[str, List[int]]]:
+        """메모리 문서의 용어별 위치 (위치를 저장하지 않으면 None)"""
+        if not self.store_positions:
+            return None
+        start, end = self._slot_offsets[slot], self._slot_offsets[slot + 1]
+        return {
+            self._terms[term_id]: self._pos_column[pos_start:pos_start + tf].tolist()
+            for term_id, tf, pos_start in zip(
+                self._term_column[start:end].tolist(), self._tf_column[start:end].tolist(),
+                self._pos_starts[start:end].tolist()
+            )
+        }
+
+    def doc_field_lengths(self, doc_id: str) -> Optional[Tuple[int, ...]]:
+        """살아 있는 문서의 text_fields 순서 필드별 길이 (없으면 None)"""
+        slot = self._slots.get(doc_id)
+        if slot is not None:
+            return tuple(self._slot_field_lengths[slot].tolist())
+        doc_num = self.base_doc_num(doc_id)
+        if doc_num is None:
+            return None
+        return tuple(int(self._base_field_lengths(column)[doc_num]) for column in range(len(self.text_fields)))
+
+    def add_document(self, doc_id: str, tokens: Iterable[str], field_keys: Iterable[str] = ()) -> None:
+        """
+        문서 추가 (같은 ID가 있으면 교체)
+
+        Args:
+            doc_id: 문서 ID
+            tokens: 색인 토큰 (순서가 위치)
+            field_keys: 필터용 필드 색인 키 (bm25_segment.field_key)
+        """
+        positions: Dict[str, List[int]] = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        self.add_term_freqs(
+            doc_id, {term: len(found) for term, found in positions.items()}, field_keys, positions
+        )
+
+    def add_term_freqs(
+        self,
+        doc_id: str,
+        term_freqs: Dict[str, int],
+        field_keys: Iterable[str] = (),
+        positions: Optional[Dict[str, Sequence[int]]] = None
+    ) -> None:
+        """
+        용어 빈도가 이미 계산된 문서 추가 (같은 ID가 있으면 교체)
+
+        Args:
+            positions: 용어별 오름차순 토큰 위치 (tf개, store_positions면 필수이고 아니면 무시)
+        """
+        if self.store_positions and positions is None:
+            raise ValueError("위치를 저장하는 색인은 용어 위치가 필요합니다")
+        self.remove_document(doc_id)
+        self._mark_touched(doc_id)
+        self._add_term_freqs(doc_id, term_freqs, field_keys, positions)
+
+    def _intern(self, term: str) -> int:
+        """용어 ID (처음 보는 용어는 어휘에 추가)"""
+        term_id = self._vocabulary.get(term)
+        if term_id is None:
+            term_id = self._vocabulary[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def _add_term_freqs(
+        self,
+        doc_id: str,
+        term_freqs: Dict[str, int],
+        field_keys: Iterable[str] = (),
+        positions: Optional[Dict[str, Sequence[int]]] = None
+    ) -> None:
+        slot = len(self._slot_ids)
+        start = self._column_size
+        end = start + len(term_freqs)
+
+        term_ids = []
+        field_lengths = [0] * len(self.text_fields)
+        for term, tf in term_freqs.items():
+            term_ids.append(self._intern(term))
+            column = self._text_field_index.get(text_field_of(term))
+            if column is not None:
+                field_lengths[column] += tf
+
+        self._term_dfs = _ensure_capacity(self._term_dfs, len(self._terms))
+        self._term_column = _ensure_capacity(self._term_column, end)
+        self._tf_column = _ensure_capacity(self._tf_column, end)
+        self._slot_offsets = _ensure_capacity(self._slot_offsets, slot + 2)
+        self._slot_live = _ensure_capacity(self._slot_live, slot + 1)
+        self._slot_lengths = _ensure_capacity(self._slot_lengths, slot + 1)
+        self._slot_field_lengths = _ensure_capacity(self._slot_field_lengths, slot + 1)
+        self._mark_base_terms()
+
+        # 한 문서 안에서 용어 ID는 중복되지 않으므로 df는 인덱스 덧셈으로 갱신
+        term_ids = np.array(term_ids, dtype=np.int64)
+        self._term_dfs[term_ids] += 1
+        revived = term_ids[self._term_dfs[term_ids] == 1]
+        self._new_term_count += len(revived) - int(np.count_nonzero(self._term_in_base[revived]))
+        tfs = np.fromiter(term_freqs.values(), dtype=np.int64, count=len(term_freqs))
+        self._term_column[start:end] = term_ids
+        self._tf_column[start:end] = tfs
+        self._slot_offsets[slot + 1] = end
+        self._column_size = end
+        self._live_postings += len(term_ids)
+
+        length = int(tfs.sum())
+        if self.store_positions:
+            # 항목 순서대로 용어별 위치를 이어 붙임
+            pos_start = self._pos_size
+            self._pos_starts = _ensure_capacity(self._pos_starts, end)
+            self._pos_column = _ensure_capacity(self._pos_column, pos_start + length)
+            self._pos_starts[start:end] = pos_start + tfs.cumsum() - tfs
+            self._pos_column[pos_start:pos_start + length] = np.fromiter(
+                itertools.chain.from_iterable(positions[term] for term in term_freqs), dtype=np.uint32, count=length
+            )
+            self._pos_size = pos_start + length
+
+        self._slots[doc_id] = slot
+        self._slot_ids.append(doc_id)
+        self._slot_live[slot] = True
+        self._slot_lengths[slot] = length
+        self._slot_field_lengths[slot] = field_lengths
+        self._memory_length += length
+        self._memory_field_lengths += field_lengths
+
+        # 같은 필드 값의 키 문자열은 문서 사이에서 공유
+        keys = tuple(sys.intern(key) for key in field_keys)
+        self._slot_fields.append(keys)
+        for key in keys:
+            slots = self.field_docs.get(key)
+            if slots is None:
+                slots = self.field_docs[key] = array("I")
+            slots.append(slot)
+
+    def _mark_base_terms(self, start: Optional[int] = None) -> None:
+        """start 이후 용어 ID의 기반 어휘 포함 여부 기록 (기본값은 아직 기록하지 않은 새 용어)"""
+        if start is None:
+            start = self._marked_terms
+        self._term_in_base = _ensure_capacity(self._term_in_base, len(self._terms))
+        for term_id in range(start, len(self._terms)):
+            self._term_in_base[term_id] = self.base is not None and self.base.lookup_term(self._terms[term_id]) is not None
+        self._marked_terms = len(self._terms)
+
+    def _mark_touched(self, doc_id: str) -> None:
+        if self._touched is not None:
+            self._touched[doc_id] = None
+
+    def remove_document(self, doc_id: str) -> bool:
+        """문서 삭제"""
+        slot = self._slots.pop(doc_id, None)
+        if slot is not None:
+            self._remove_slot(slot)
+            self._mark_touched(doc_id)
+            return True
+
+        doc_num = self.base_doc_num(doc_id)
+        if doc_num is None:
+            return False
+
+        self._mark_touched(doc_id)
+        self._delete_base_doc(doc_num)
+        return True
+
+    def _remove_slot(self, slot: int) -> None:
+        """메모리 문서 삭제 표시 후 df/길이 통계 보정 (컬럼 항목은 압축 때 제거, 슬롯 번호는 재사용하지 않는다)"""
+        start, end = self._slot_offsets[slot], self._slot_offsets[slot + 1]
+        term_ids = self._term_column[start:end]
+        self._term_dfs[term_ids] -= 1
+        emptied = term_ids[self._term_dfs[term_ids] == 0]
+        self._new_term_count -= len(emptied) - int(np.count_nonzero(self._term_in_base[emptied]))
+        self._live_postings -= int(end - start)
+        self._dead_postings += int(end - start)
+        self._memory_length -= int(self._slot_lengths[slot])
+        self._memory_field_lengths -= self._slot_field_lengths[slot]
+
+        self._slot_live[slot] = False
+        self._slot_ids[slot] = None
+        self._slot_fields[slot] = ()
+
+        if self._dead_postings > max(self._live_postings, _COMPACT_MIN_DEAD_POSTINGS):
+            self._compact()
+
+    def _compact(self) -> None:
+        """삭제된 슬롯의 컬럼 항목 제거 (슬롯 번호는 유지하고 삭제된 슬롯은 빈 구간이 된다)"""
+        slot_count = len(self._slot_ids)
+        offsets = self._slot_offsets[:slot_count + 1]
+        counts = np.where(self._slot_live[:slot_count], np.diff(offsets), 0)
+        positions = range_indices(offsets[:-1], counts)
+
+        if self.store_positions:
+            tfs = self._tf_column[positions].astype(np.int64)
+            self._pos_column = self._pos_column[range_indices(self._pos_starts[positions], tfs)]
+            self._pos_starts = tfs.cumsum() - tfs
+            self._pos_size = len(self._pos_column)
+        self._term_column = self._term_column[positions]
+        self._tf_column = self._tf_column[positions]
+        compacted = np.zeros(len(self._slot_offsets), dtype=np.int64)
+        compacted[1:slot_count + 1] = np.cumsum(counts)
+        self._slot_offsets = compacted
+        self._column_size = len(positions)
+        self._dead_postings = 0
+
+        field_docs = {}
+        for key, slots in self.field_docs.items():
+            slots = np.array(slots, dtype=np.int64)
+            slots = slots[self._slot_live[slots]]
+            if len(slots):
+                field_docs[key] = array("I", slots.tolist())
+        self.field_docs = field_docs
+
+    def _delete_base_doc(self, doc_num: int) -> None:
+        """기반 세그먼트 문서는 비트셋에 삭제 표시 후 df/길이 통계만 보정 (세그먼트는 그대로)"""
+        self._base_live[doc_num] = False
+        self._base_deleted_count += 1
+        self._base_df_removed.update(self.base.doc_terms(doc_num).keys())
+        self._base_length_removed += int(self.base.doc_lengths[doc_num])
+        for column, lengths in enumerate(self._base_field_columns):
+            if lengths is not None:
+                self._base_field_length_removed[column] += int(lengths[doc_num])
+
+    def clear(self) -> None:
+        """전체 초기화"""
+        self._reset_memory()
+        self._touched = None
+        self.attach_base(None)
+
+    def attach_base(self, segment: Optional[BM25SegmentReader]) -> None:
+        """기반 세그먼트 교체 (기존 삭제 정보는 초기화)"""
+        previous = self.base
+        self.base = segment
+        self._base_live = np.ones(segment.doc_count, dtype=bool) if segment else None
+        self._base_deleted_count = 0
+        self._base_df_removed = Counter()
+        self._base_length_removed = 0
+        self._base_field_masks = {}
+
+        base_columns = {field: i for i, field in enumerate(segment.text_fields)} if segment else {}
+        self._base_field_columns = [
+            segment.field_lengths[:, base_columns[field]] if field in base_columns else None
+            for field in self.text_fields
+        ]
+        self._base_field_totals = np.array([
+            int(lengths.sum(dtype=np.uint64)) if lengths is not None else 0
+            for lengths in self._base_field_columns
+        ], dtype=np.int64)
+        self._base_field_length_removed = np.zeros(len(self.text_fields), dtype=np.int64)
+
+        # 남아 있는 메모리 용어의 기반 어휘 포함 여부는 새 기반 기준으로 다시 기록
+        if self._terms:
+            self._mark_base_terms(0)
+            count = len(self._terms)
+            live = self._term_dfs[:count] > 0
+            self._new_term_count = int(np.count_nonzero(live & ~self._term_in_base[:count]))
+        if previous is not None and previous is not segment:
+            previous.close()
+
+    def document_frequency(self, term: str) -> int:
+        term_id = self._vocabulary.get(term)
+        df = int(self._term_dfs[term_id]) if term_id is not None else 0
+        if self.base:
+            df += self.base.document_frequency(term) - self._base_df_removed.get(term, 0)
+        return df
+
+    def idf(self, term: str) -> float:
+        """
+        IDF 계산
+
+        Lucene 방식 log(1 + (N - df + 0.5) / (df + 0.5))를 사용한다.
+        항상 양수이므로 문서 수가 적거나 증분으로 바뀌어도 점수가 음수가 되지 않는다.
+        """
+        return self._idf_from_df(self.document_frequency(term))
+
+    def _idf_from_df(self, df: int) -> float:
+        if df == 0:
+            return 0.0
+        return math.log(1.0 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _filter_candidates(
+        self, filters: Dict[str, Sequence[str]]
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        필터를 만족하는 문서 (메모리 슬롯 불리언 마스크, 기반 세그먼트 불리언 마스크)
+
+        같은 필드의 값들은 OR, 필드 사이는 AND로 결합한다.
+        """
+        memory: Optional[np.ndarray] = None
+        mask: Optional[np.ndarray] = None
+        has_base = self.base is not None and self.base.doc_count > 0
+
+        for field, values in filters.items():
+            keys = [field_key(field, value) for value in values]
+
+            field_memory = np.zeros(len(self._slot_ids), dtype=bool)
+            for key in keys:
+                slots = self.field_docs.get(key)
+                if slots:
+                    field_memory[np.array(slots, dtype=np.int64)] = True
+            memory = field_memory if memory is None else memory & field_memory
+
+            if has_base:
+                field_mask = self._base_field_mask(field, keys)
+                mask = field_mask.copy() if mask is None else mask & field_mask
+
+        if has_base and mask is None:
+            mask = np.ones(self.base.doc_count, dtype=bool)
+        if memory is None:
+            memory = np.ones(len(self._slot_ids), dtype=bool)
+        return memory, mask
+
+    def _base_field_mask(self, field: str, keys: List[str]) -> np.ndarray:
+        cache_key = (field, tuple(keys))
+        field_mask = self._base_field_masks.get(cache_key)
+        if field_mask is None:
+            field_mask = np.zeros(self.base.doc_count, dtype=bool)
+            for key in keys:
+                field_mask[self.base.field_docs(key, self.filter_fields)] = True
+            if len(self._base_field_masks) >= _FIELD_MASK_CACHE_SIZE:
+                self._base_field_masks.pop(next(iter(self._base_field_masks)))
+            self._base_field_masks[cache_key] = field_mask
+        return field_mask
+
+    def field_doc_ids(self, field: str, value: str) -> List[str]:
+        """필드 색인 키 하나에 해당하는 살아 있는 문서 ID (기반 세그먼트 문서 먼저)"""
+        key = field_key(field, value)
+        doc_ids = []
+        if self.base is not None and self.base.doc_count > 0:
+            doc_nums = self.base.field_docs(key, self.filter_fields)
+            doc_ids.extend(self.base.doc_id(int(doc_num)) for doc_num in doc_nums[self._base_live[doc_nums]])
+        doc_ids.extend(self._slot_ids[slot] for slot in self.field_docs.get(key, ()) if self._slot_live[slot])
+        return doc_ids
+
+    def _occurrences(
+        self, key: str, allowed: Optional[np.ndarray], mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        용어 키의 출현 키 (문서 << 32 | 위치) - (메모리 슬롯 기준, 기반 문서 번호 기준), 각각 오름차순
+
+        삭제된 문서와 allowed/mask를 통과하지 못한 문서는 뺀다.
+        """
+        memory = base = np.zeros(0, dtype=np.int64)
+        term_id = self._vocabulary.get(key)
+        if term_id is not None and self._term_dfs[term_id] and (allowed is None or allowed.any()):
+            slot_count = len(self._slot_ids)
+            entries = np.flatnonzero(self._term_column[:self._column_size] == term_id)
+            entry_slots = np.searchsorted(self._slot_offsets[1:slot_count + 1], entries, side="right")
+            eligible = self._slot_live[entry_slots]
+            if allowed is not None:
+                eligible &= allowed[entry_slots]
+            entries, entry_slots = entries[eligible], entry_slots[eligible]
+            tfs = self._tf_column[entries].astype(np.int64)
+            found = self._pos_column[range_indices(self._pos_starts[entries], tfs)].astype(np.int64)
+            memory = (np.repeat(entry_slots, tfs) << _POSITION_BITS) | found
+
+        if self.base is not None and self.base.doc_count and (mask is None or mask.any()):
+            base_term = self.base.lookup_term(key)
+            if base_term is not None:
+                doc_nums, tfs, found = self.base.term_positions(base_term)
+                keep = np.repeat(self._eligible_base(doc_nums, mask), tfs)
+                base = ((np.repeat(doc_nums, tfs) << _POSITION_BITS) | found)[keep]
+        return memory, base
+
+    @staticmethod
+    def _phrase_starts(occurrences: List[np.ndarray]) -> np.ndarray:
+        """용어 순서대로 붙어 나오는 구문의 시작 출현 키"""
+        starts = occurrences[0]
+        for offset, keys in enumerate(occurrences[1:], start=1):
+            shifted = keys[(keys & _POSITION_MASK) >= offset] - offset
+            starts = np.intersect1d(starts, shifted, assume_unique=True)
+        return starts
+
+    @staticmethod
+    def _window_spans(occurrences: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        문서별로 모든 용어를 포함하는 가장 짧은 구간 (문서, 구간 길이)
+
+        가장 짧은 구간의 왼쪽 끝은 어떤 용어의 출현이므로, 출현마다 용어별로 그 위치 이후의 첫
+        출현을 이진 탐색해 구간 끝을 구하고 문서별 최솟값을 취한다.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        if any(not len(keys) for keys in occurrences):
+            return empty
+        lefts = np.unique(np.concatenate(occurrences))
+        ends = lefts.copy()
+        valid = np.ones(len(lefts), dtype=bool)
+        for keys in occurrences:
+            index = np.searchsorted(keys, lefts)
+            following = keys[np.minimum(index, len(keys) - 1)]
+            valid &= (index < len(keys)) & ((following >> _POSITION_BITS) == (lefts >> _POSITION_BITS))
+            ends = np.maximum(ends, following)
+        lefts, ends = lefts[valid], ends[valid]
+        if not len(lefts):
+            return empty
+
+        docs = lefts >> _POSITION_BITS
+        doc_starts = np.flatnonzero(np.concatenate(([True], docs[1:] != docs[:-1])))
+        return docs[doc_starts], np.minimum.reduceat(ends - lefts + 1, doc_starts)
+
+    def _phrase_docs(self, occurrences: List[np.ndarray], slop: Optional[int]) -> np.ndarray:
+        """구문 조건을 만족하는 문서 번호 (slop이 None이면 순서대로 인접, 아니면 토큰 창)"""
+        if slop is None:
+            return np.unique(self._phrase_starts(occurrences) >> _POSITION_BITS)
+        docs, spans = self._window_spans(occurrences)
+        return docs[spans <= len(occurrences) + slop]
+
+    def match_phrases(
+        self,
+        phrases: Sequence[Tuple[Sequence[str], Optional[int]]],
+        allowed: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        field: str = DEFAULT_TEXT_FIELD
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        모든 구문 조건을 만족하는 문서 (메모리 슬롯 불리언 마스크, 기반 세그먼트 불리언 마스크)
+
+        Args:
+            phrases: (질의 토큰 목록, slop) - slop이 None이면 토큰이 순서대로 붙어 나와야 하고,
+                정수면 순서와 무관하게 (서로 다른 토큰 수 + slop)개 토큰 창 안에 모두 나와야 한다
+            allowed, mask: 먼저 적용할 조건 (_filter_candidates 결과, 없으면 전체 문서)
+            field: 위치를 비교할 텍스트 필드
+        """
+        if not self.has_positions:
+            raise ValueError("토큰 위치를 저장하지 않은 색인에서는 구문/근접 질의를 할 수 없습니다")
+
+        memory = np.ones(len(self._slot_ids), dtype=bool) if allowed is None else allowed.copy()
+        has_base = self.base is not None and self.base.doc_count > 0
+        base = (np.ones(self.base.doc_count, dtype=bool) if mask is None else mask.copy()) if has_base else None
+
+        for tokens, slop in phrases:
+            if slop is not None:
+                tokens = list(dict.fromkeys(tokens))
+            if not tokens:
+                continue
+            occurrences = [self._occurrences(text_field_term(field, token), memory, base) for token in tokens]
+            matched = np.zeros(len(memory), dtype=bool)
+            matched[self._phrase_docs([memory_keys for memory_keys, _ in occurrences], slop)] = True
+            memory &= matched
+            if has_base:
+                matched = np.zeros(len(base), dtype=bool)
+                matched[self._phrase_docs([base_keys for _, base_keys in occurrences], slop)] = True
+                base &= matched
+        return memory, base
+
+    def proximity_spans(
+        self, doc_ids: Sequence[str], tokens: Sequence[str], field: str = DEFAULT_TEXT_FIELD
+    ) -> Dict[str, int]:
+        """
+        주어진 문서별로 서로 다른 질의 토큰을 모두 포함하는 가장 짧은 구간의 토큰 수
+
+        토큰이 하나라도 없는 문서는 결과에서 빠진다 (근접 가중치용, 위치 색인 필요).
+        """
+        if not self.has_positions:
+            raise ValueError("토큰 위치를 저장하지 않은 색인에서는 구문/근접 질의를 할 수 없습니다")
+        tokens = list(dict.fromkeys(tokens))
+        if not tokens or not doc_ids:
+            return {}
+
+        memory = np.zeros(len(self._slot_ids), dtype=bool)
+        base = np.zeros(self.base.doc_count, dtype=bool) if self.base is not None else None
+        for doc_id in doc_ids:
+            slot = self._slots.get(doc_id)
+            if slot is not None:
+                memory[slot] = True
+                continue
+            doc_num = self.base_doc_num(doc_id)
+            if doc_num is not None:
+                base[doc_num] = True
+
+        occurrences = [self._occurrences(text_field_term(field, token), memory, base) for token in tokens]
+        docs, spans = self._window_spans([memory_keys for memory_keys, _ in occurrences])
+        result = {self._slot_ids[slot]: span for slot, span in zip(docs.tolist(), spans.tolist())}
+        if base is not None:
+            docs, spans = self._window_spans([base_keys for _, base_keys in occurrences])
+            result.update((self.base.doc_id(doc_num), span) for doc_num, span in zip(docs.tolist(), spans.tolist()))
+        return result
+
+    def _field_params(
+        self, field_weights: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[str, int, float, float]]:
+        """
+        질의에 쓰는 텍스트 필드 (필드, 컬럼, 가중치, b) 목록
+
+        Args:
+            field_weights: 기본 가중치를 덮어쓸 필드별 가중치 (0이면 해당 필드 제외)
+        """
+        weights = dict(self.field_weights)
+        if field_weights:
+            weights.update(
+                (field, float(weight)) for field, weight in field_weights.items() if field in self._text_field_index
+            )
+        return [
+            (field, column, weights.get(field, 1.0), self.field_b.get(field, self.b))
+            for column, field in enumerate(self.text_fields)
+            if weights.get(field, 1.0) > 0
+        ]
+
+    def _query_groups(
+        self, query_terms: Dict[str, int], params: List[Tuple[str, int, float, float]]
+    ) -> List[Tuple[float, List[str]]]:
+        """
+        질의 용어별 (idf * qtf, params 순서의 필드 용어 키)
+
+        df는 가중치가 있는 필드의 df 중 최댓값으로 근사한다.
+        """
+        groups = []
+        for term, query_tf in query_terms.items():
+            keys = [text_field_term(field, term) for field, _, _, _ in params]
+            df = max((self.document_frequency(key) for key in keys), default=0)
+            if df:
+                groups.append((self._idf_from_df(df) * query_tf, keys))
+        return groups
+
+    def _saturate(self, weight, pseudo_tf):
+        """필드 가중 tf 합을 한 번만 포화 (스칼라/배열 공용)"""
+        return weight * pseudo_tf * (self.k1 + 1.0) / (pseudo_tf + self.k1)
+
+    @staticmethod
+    def _field_tf(field_weight: float, b: float, tfs, lengths, avg: float):
+        """필드 하나의 길이 정규화된 가중 tf (스칼라/배열 공용, 모든 경로가 같은 연산 순서)"""
+        return field_weight * tfs / (1.0 - b + b * lengths / avg)
+
+    def _base_field_lengths(self, column: int) -> np.ndarray:
+        """기반 세그먼트의 필드 길이 컬럼 (세그먼트에 없는 필드는 전체 문서 길이로 대체)"""
+        lengths = self._base_field_columns[column]
+        return self.base.doc_lengths if lengths is None else lengths
+
+    def _score_memory(
+        self,
+        groups: List[Tuple[float, List[str]]],
+        params: List[Tuple[str, int, float, float]],
+        avg_lengths: np.ndarray,
+        allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        메모리 문서 중 매칭된 (슬롯, 점수) - 기반 세그먼트 경로와 같은 연산 순서
+
+        질의 용어 키의 항목을 용어 ID 컬럼 한 번 훑기로 모은다. 메모리 변경분은 스냅샷마다
+        세그먼트로 옮겨지므로 컬럼 크기는 마지막 스냅샷 이후 색인량으로 제한된다.
+        """
+        slot_count = len(self._slot_ids)
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        key_ids = {key: self._vocabulary.get(key) for _, keys in groups for key in keys}
+        wanted_ids = [term_id for term_id in key_ids.values() if term_id is not None and self._term_dfs[term_id]]
+        if not wanted_ids:
+            return empty
+
+        wanted = np.zeros(len(self._terms), dtype=bool)
+        wanted[wanted_ids] = True
+        positions = np.flatnonzero(wanted[self._term_column[:self._column_size]])
+        entry_slots = np.searchsorted(self._slot_offsets[1:slot_count + 1], positions, side="right")
+        eligible = self._slot_live[entry_slots]
+        if allowed is not None:
+            eligible &= allowed[entry_slots]
+        positions, entry_slots = positions[eligible], entry_slots[eligible]
+        entry_terms = self._term_column[positions]
+
+        scores = None
+        for weight, keys in groups:
+            pseudo_tf = None
+            for key, (_, column, field_weight, b) in zip(keys, params):
+                term_id = key_ids[key]
+                if term_id is None:
+                    continue
+                matched = entry_terms == term_id
+                if not matched.any():
+                    continue
+
+                slots = entry_slots[matched]
+                tfs = self._tf_column[positions[matched]].astype(np.int64)
+                if pseudo_tf is None:
+                    pseudo_tf = np.zeros(slot_count, dtype=np.float64)
+
+                lengths = self._slot_field_lengths[slots, column]
+                pseudo_tf[slots] += self._field_tf(field_weight, b, tfs, lengths, float(avg_lengths[column]))
+
+            if pseudo_tf is None:
+                continue
+            if scores is None:
+                scores = np.zeros(slot_count, dtype=np.float64)
+            matched = np.flatnonzero(pseudo_tf)
+            scores[matched] += self._saturate(weight, pseudo_tf[matched])
+
+        if scores is None:
+            return empty
+        matched = np.flatnonzero(scores)
+        return matched, scores[matched]
+
+    def _memory_hits(self, slots: np.ndarray, scores: np.ndarray) -> List[Tuple[str, float]]:
+        return [(self._slot_ids[slot], score) for slot, score in zip(slots.tolist(), scores.tolist())]
+
+    def _score_base(
+        self,
+        groups: List[Tuple[float, List[str]]],
+        params: List[Tuple[str, int, float, float]],
+        avg_lengths: np.ndarray,
+        mask: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        if not self.base or not self.base.doc_count:
+            return None
+        if mask is not None and not mask.any():
+            return None
+
+        scores = None
+
+        for weight, keys in groups:
+            pseudo_tf = None
+            for key, (_, column, field_weight, b) in zip(keys, params):
+                postings = self.base.postings(key)
+                if postings is None:
+                    continue
+
+                doc_nums, tfs = postings
+                if mask is not None:
+                    # 필터를 통과한 문서만 점수 계산
+                    eligible = mask[doc_nums]
+                    doc_nums, tfs = doc_nums[eligible], tfs[eligible]
+                if pseudo_tf is None:
+                    pseudo_tf = np.zeros(self.base.doc_count, dtype=np.float64)
+
+                lengths = self._base_field_lengths(column)[doc_nums]
+                pseudo_tf[doc_nums] += self._field_tf(field_weight, b, tfs, lengths, float(avg_lengths[column]))
+
+            if pseudo_tf is None:
+                continue
+            if scores is None:
+                scores = np.zeros(self.base.doc_count, dtype=np.float64)
+            matched = np.flatnonzero(pseudo_tf)
+            scores[matched] += self._saturate(weight, pseudo_tf[matched])
+
+        if scores is not None and self._base_deleted_count:
+            scores[~self._base_live] = 0.0
+        return scores
+
+    def score_documents(
+        self,
+        query_tokens: List[str],
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        field_weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """쿼리 토큰과 매칭되는 모든 문서의 BM25F 점수"""
+        if not query_tokens or not self.doc_count:
+            return {}
+
+        params = self._field_params(field_weights)
+        groups = self._query_groups(Counter(query_tokens), params)
+        avg_lengths = self.field_avg_lengths()
+        allowed, mask = self._filter_candidates(filters) if filters else (None, None)
+        scores = dict(self._memory_hits(*self._score_memory(groups, params, avg_lengths, allowed)))
+
+        base_scores = self._score_base(groups, params, avg_lengths, mask)
+        if base_scores is not None:
+            for doc_num in np.flatnonzero(base_scores):
+                scores[self.base.doc_id(int(doc_num))] = float(base_scores[doc_num])
+
+        return scores
+
+    def search(
+        self,
+        query_tokens: List[str],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        phrases: Sequence[Tuple[Sequence[str], Optional[int]]] = ()
+    ) -> List[Tuple[str, float]]:
+        """
+        상위 top_k 문서 (doc_id, score) 반환
+
+        Args:
+            query_tokens: 쿼리 토큰
+            top_k: 반환할 문서 수
+            filters: 필드 -> 허용 값 목록 (조건을 만족하는 문서 안에서 top-k 선택)
+            field_weights: 이번 질의에만 적용할 텍스트 필드 가중치 (재색인 불필요)
+            phrases: 만족해야 하는 구문/근접 조건 (match_phrases 참고, 위치 색인 필요)
+        """
+        if not query_tokens or not self.doc_count:
+            return []
+
+        params = self._field_params(field_weights)
+        groups = self._query_groups(Counter(query_tokens), params)
+        if not groups:
+            return []
+        avg_lengths = self.field_avg_lengths()
+        allowed, mask = self._filter_candidates(filters) if filters else (None, None)
+        if phrases:
+            allowed, mask = self.match_phrases(phrases, allowed, mask)
+        candidates = self._memory_hits(*self._score_memory(groups, params, avg_lengths, allowed))
+
+        if self.base is not None and self.base.has_blocks:
+            doc_nums, scores = self._search_base(
+                groups, params, avg_lengths, top_k, mask, np.array([score for _, score in candidates])
+            )
+            candidates.extend(
+                (self.base.doc_id(int(doc_num)), float(score)) for doc_num, score in zip(doc_nums, scores)
+            )
+            return heapq.nsmallest(top_k, candidates, key=lambda item: (-item[1], item[0]))
+
+        base_scores = self._score_base(groups, params, avg_lengths, mask)
+        if base_scores is not None:
+            matched = np.flatnonzero(base_scores)
+            if len(matched) > top_k:
+                # 동점 처리를 위해 k번째 점수 이상은 모두 후보로 유지
+                kth = np.partition(base_scores[matched], len(matched) - top_k)[len(matched) - top_k]
+                matched = matched[base_scores[matched] >= kth]
+            candidates.extend(
+                (self.base.doc_id(int(doc_num)), float(base_scores[doc_num])) for doc_num in matched
+            )
+
+        # 점수 내림차순, 동점이면 doc_id 순으로 결정적 정렬
+        return heapq.nsmallest(top_k, candidates, key=lambda item: (-item[1], item[0]))
+
+    def _eligible_base(self, doc_nums: np.ndarray, mask: Optional[np.ndarray]) -> np.ndarray:
+        """삭제되지 않고 필터를 통과한 기반 문서 여부"""
+        keep = np.ones(len(doc_nums), dtype=bool) if mask is None else mask[doc_nums]
+        if self._base_deleted_count:
+            keep &= self._base_live[doc_nums]
+        return keep
+
+    def _search_base(
+        self,
+        groups: List[Tuple[float, List[str]]],
+        params: List[Tuple[str, int, float, float]],
+        avg_lengths: np.ndarray,
+        top_k: int,
+        mask: Optional[np.ndarray],
+        seed_scores: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        MaxScore 기반 세그먼트 top-k 후보
+
+        반환된 후보의 점수는 정확하며, 제외된 문서는 점수 상한이 k번째 점수보다 작다.
+        용어 상한은 필드별 블록 상한(max_tf, min_length)의 합을 포화시킨 값이다.
+
+        Args:
+            seed_scores: 이미 확정된 다른 후보(메모리 문서)의 점수 - 초기 임계값으로 사용
+        """
+        base = self.base
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        if not base.doc_count or top_k <= 0 or (mask is not None and not mask.any()):
+            return empty
+
+        terms = []
+        for weight, keys in groups:
+            parts = []
+            upper_tf = 0.0
+            for key, (_, column, field_weight, b) in zip(keys, params):
+                term_id = base.lookup_term(key)
+                if term_id is None:
+                    continue
+                blocks = base.term_blocks(term_id)
+                if not len(blocks):
+                    continue
+                avg = float(avg_lengths[column])
+                upper_tf += float(np.max(self._field_tf(
+                    field_weight, b, blocks["max_tf"].astype(np.float64), blocks["min_length"].astype(np.float64), avg
+                )))
+                parts.append((term_id, column, field_weight, b, avg))
+            if parts:
+                terms.append((self._saturate(weight, upper_tf), weight, parts, len(terms)))
+        if not terms:
+            return empty
+
+        # 상한이 큰 용어부터 처리, remaining[i] = i번째 이후 용어 상한의 합 (반올림 오차만큼 여유)
+        terms.sort(key=lambda item: -item[0])
+        remaining = np.concatenate((np.cumsum([t[0] for t in terms][::-1])[::-1], [0.0])) * (1.0 + 1e-9)
+
+        def kth_score(scores: np.ndarray) -> float:
+            pool = np.concatenate((scores, seed_scores))
+            if len(pool) < top_k:
+                return 0.0
+            return float(np.partition(pool, len(pool) - top_k)[len(pool) - top_k])
+
+        def total(contrib: np.ndarray) -> np.ndarray:
+            # 메모리/밀집 경로와 같은 점수가 나오도록 질의 용어 순서대로 합산
+            scores = np.zeros(len(contrib), dtype=np.float64)
+            for slot in range(contrib.shape[1]):
+                scores += contrib[:, slot]
+            return scores
+
+        # 후보 문서별 용어 기여도 (열은 질의 용어 순서)
+        cand_docs = np.zeros(0, dtype=np.int64)
+        contrib = np.zeros((0, len(terms)), dtype=np.float64)
+        cand_scores = np.zeros(0, dtype=np.float64)
+        threshold = kth_score(cand_scores)
+
+        # 1단계: 필수 용어는 필드별 포스팅 전체를 점수 계산
+        i = 0
+        while i < len(terms) and remaining[i] >= threshold:
+            _, weight, parts, slot = terms[i]
+            field_postings = []
+            for term_id, column, field_weight, b, avg in parts:
+                doc_nums, tfs = base.postings_by_id(term_id)
+                keep = self._eligible_base(doc_nums, mask)
+                doc_nums, tfs = doc_nums[keep], tfs[keep]
+                lengths = self._base_field_lengths(column)[doc_nums]
+                field_postings.append((doc_nums, self._field_tf(field_weight, b, tfs, lengths, avg)))
+
+            term_docs = np.unique(np.concatenate([doc_nums for doc_nums, _ in field_postings]))
+            pseudo_tf = np.zeros(len(term_docs), dtype=np.float64)
+            for doc_nums, partial in field_postings:
+                pseudo_tf[np.searchsorted(term_docs, doc_nums)] += partial
+
+            merged = np.union1d(cand_docs, term_docs)
+            merged_contrib = np.zeros((len(merged), len(terms)), dtype=np.float64)
+            merged_contrib[np.searchsorted(merged, cand_docs)] = contrib
+            merged_contrib[np.searchsorted(merged, term_docs), slot] = self._saturate(weight, pseudo_tf)
+            cand_docs, contrib = merged, merged_contrib
+            cand_scores = total(contrib)
+            threshold = kth_score(cand_scores)
+            i += 1
+
+        # 2단계: 나머지 용어는 후보가 속한 블록만 디코딩해 점수 보충
+        for j in range(i, len(terms)):
+            alive = cand_scores + remaining[j] >= threshold
+            cand_docs, contrib, cand_scores = cand_docs[alive], contrib[alive], cand_scores[alive]
+            if not len(cand_docs):
+                break
+
+            _, weight, parts, slot = terms[j]
+            pseudo_tf = np.zeros(len(cand_docs), dtype=np.float64)
+            for term_id, column, field_weight, b, avg in parts:
+                last_docs = base.term_blocks(term_id)["last_doc"]
+                block_ids = np.searchsorted(last_docs, cand_docs)
+                block_ids = np.unique(block_ids[block_ids < len(last_docs)])
+                doc_nums, tfs = base.block_postings(term_id, block_ids)
+                if not len(doc_nums):
+                    continue
+                position = np.minimum(np.searchsorted(doc_nums, cand_docs), len(doc_nums) - 1)
+                found = doc_nums[position] == cand_docs
+                matched = position[found]
+                lengths = self._base_field_lengths(column)[doc_nums[matched]]
+                pseudo_tf[found] += self._field_tf(field_weight, b, tfs[matched], lengths, avg)
+
+            hit = pseudo_tf > 0
+            contrib[hit, slot] = self._saturate(weight, pseudo_tf[hit])
+            cand_scores = total(contrib)
+            threshold = kth_score(cand_scores)
+
+        alive = cand_scores >= threshold
+        return cand_docs[alive], cand_scores[alive]
+
+    def capture_snapshot(self) -> BM25SnapshotState:
+        """
+        현재 상태를 고정하고 이후 변경 추적 시작
+
+        문서별 컬럼은 추가 후 변경되지 않으므로 참조만 모은다. 비용은 마지막 스냅샷 이후
+        메모리 문서 수에 비례한다. 호출자는 쓰기와 같은 락 안에서 호출해야 한다.
+        """
+        self._touched = {}
+        return self._memory_state(self._base_live.copy() if self._base_live is not None else None)
+
+    def _memory_state(self, base_live: Optional[np.ndarray]) -> BM25SnapshotState:
+        slots = np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+        starts = self._slot_offsets[slots]
+        counts = self._slot_offsets[slots + 1] - starts
+        positions = range_indices(starts, counts)
+        tfs = self._tf_column[positions].astype(np.int64)
+        return BM25SnapshotState(
+            base=self.base,
+            base_live=base_live,
+            terms=self._terms[:],
+            doc_ids=list(self._slots),
+            doc_term_counts=counts,
+            term_ids=self._term_column[positions].astype(np.int64),
+            term_freqs=tfs,
+            doc_lengths=self._slot_lengths[slots],
+            doc_field_lengths=self._slot_field_lengths[slots],
+            doc_fields=[self._slot_fields[slot] for slot in slots.tolist()],
+            positions=(
+                self._pos_column[range_indices(self._pos_starts[positions], tfs)].astype(np.int64)
+                if self.store_positions else None
+            ),
+        )
+
+    def write_snapshot(
+        self,
+        path: Path,
+        stored_payload: Callable[[str], bytes],
+        state: Optional[BM25SnapshotState] = None
+    ) -> int:
+        """
+        기반 세그먼트와 메모리 변경분을 합쳐 새 세그먼트 파일 작성
+
+        Args:
+            path: 세그먼트 파일 경로
+            stored_payload: 메모리 문서 ID -> 저장 필드 바이트
+            state: capture_snapshot() 결과 (없으면 현재 상태 그대로 기록)
+
+        Returns:
+            작성된 파일 크기 (bytes)
+        """
+        if state is None:
+            state = self._memory_state(self._base_live)
+
+        # 메모리 문서 컬럼의 용어 ID를 새 어휘 번호로 바꿔 (용어, 문서 순번, tf) 포스팅으로 펼침
+        m_terms = state.term_ids
+        memory_term_ids = np.unique(m_terms)
+        memory_terms = [state.terms[term_id] for term_id in memory_term_ids.tolist()]
+
+        base = state.base
+        base_terms: List[str] = base.terms() if base else []
+        vocabulary = sorted(set(base_terms).union(memory_terms), key=lambda t: t.encode("utf-8"))
+        term_index = {term: i for i, term in enumerate(vocabulary)}
+
+        doc_ids: List[str] = []
+        doc_lengths: List[np.ndarray] = []
+        field_lengths: List[np.ndarray] = []
+        stored: List[bytes] = []
+        term_ids, doc_nums, term_freqs = [], [], []
+        # 위치는 위치 없이 기록된 기반 세그먼트가 있으면 새 세그먼트에도 쓰지 않는다 (재구성 필요)
+        write_positions = state.positions is not None and (base is None or not base.doc_count or base.has_positions)
+        positions: List[np.ndarray] = []
+
+        base_field_keys, base_key_ids, base_field_docs = (
+            base.all_field_postings(self.filter_fields) if base and base.doc_count else ([], None, None)
+        )
+        memory_field_keys = {key for keys in state.doc_fields for key in keys}
+        field_keys = sorted(set(base_field_keys) | memory_field_keys, key=lambda k: k.encode("utf-8"))
+        field_index = {key: i for i, key in enumerate(field_keys)}
+        field_key_ids, field_doc_nums = [], []
+
+        if base and base.doc_count:
+            live = state.base_live
+            live_docs = np.flatnonzero(live)
+            remap = np.cumsum(live) - 1
+
+            b_terms, b_docs, b_tfs = base.all_postings()
+            keep = live[b_docs]
+            term_remap = np.array([term_index[t] for t in base_terms], dtype=np.int64)
+            term_ids.append(term_remap[b_terms[keep]])
+            doc_nums.append(remap[b_docs[keep]])
+            term_freqs.append(b_tfs[keep])
+            if write_positions:
+                base_positions = base.all_positions(b_tfs)
+                positions.append(base_positions[range_indices((b_tfs.cumsum() - b_tfs)[keep], b_tfs[keep])])
+
+            if base_field_keys:
+                keep = live[base_field_docs]
+                key_remap = np.array([field_index[k] for k in base_field_keys], dtype=np.int64)
+                field_key_ids.append(key_remap[base_key_ids[keep]])
+                field_doc_nums.append(remap[base_field_docs[keep]])
+
+            for doc_num in live_docs:
+                doc_num = int(doc_num)
+                doc_ids.append(base.doc_id(doc_num))
+                stored.append(base.stored_bytes(doc_num))
+            doc_lengths.append(base.doc_lengths[live_docs])
+
+            # 기반 필드 길이를 엔진 text_fields 순서로 재배치 (세그먼트에 없는 필드는 0)
+            base_columns = {field: i for i, field in enumerate(base.text_fields)}
+            base_field_lengths = np.zeros((len(live_docs), len(self.text_fields)), dtype=np.uint32)
+            for column, field in enumerate(self.text_fields):
+                if field in base_columns:
+                    base_field_lengths[:, column] = base.field_lengths[live_docs, base_columns[field]]
+            field_lengths.append(base_field_lengths)
+
+        offset = len(doc_ids)
+        for doc_id in state.doc_ids:
+            doc_ids.append(doc_id)
+            stored.append(stored_payload(doc_id))
+        doc_lengths.append(state.doc_lengths)
+        field_lengths.append(state.doc_field_lengths.reshape(-1, len(self.text_fields)))
+
+        memory_remap = np.zeros(len(state.terms), dtype=np.int64)
+        memory_remap[memory_term_ids] = [term_index[term] for term in memory_terms]
+        term_ids.append(memory_remap[m_terms])
+        doc_nums.append(np.repeat(np.arange(offset, offset + len(state.doc_ids), dtype=np.int64), state.doc_term_counts))
+        term_freqs.append(state.term_freqs)
+        if write_positions:
+            positions.append(state.positions)
+
+        f_keys, f_docs = [], []
+        for doc_num, keys in enumerate(state.doc_fields, start=offset):
+            for key in keys:
+                f_keys.append(field_index[key])
+                f_docs.append(doc_num)
+        field_key_ids.append(np.array(f_keys, dtype=np.int64))
+        field_doc_nums.append(np.array(f_docs, dtype=np.int64))
+
+        # 삭제로 포스팅이 모두 사라진 용어는 새 어휘에서 뺀다 (정렬 순서는 유지)
+        term_ids = np.concatenate(term_ids)
+        used_terms = np.unique(term_ids)
+        if len(used_terms) < len(vocabulary):
+            vocabulary = [vocabulary[term_id] for term_id in used_terms.tolist()]
+            term_ids = np.searchsorted(used_terms, term_ids)
+
+        return write_segment(
+            path,
+            terms=vocabulary,
+            term_ids=term_ids,
+            doc_nums=np.concatenate(doc_nums),
+            term_freqs=np.concatenate(term_freqs),
+            doc_ids=doc_ids,
+            doc_lengths=np.concatenate(doc_lengths).astype(np.uint32),
+            stored=stored,
+            field_keys=field_keys,
+            field_key_ids=np.concatenate(field_key_ids),
+            field_doc_nums=np.concatenate(field_doc_nums),
+            text_fields=self.text_fields,
+            field_lengths=np.concatenate(field_lengths),
+            positions=np.concatenate(positions) if write_positions else None,
+        )
+
+    def discard_snapshot(self) -> None:
+        """기록 실패 시 변경 추적 중단 (메모리 변경분은 그대로 유지)"""
+        self._touched = None
+
+    def complete_snapshot(self, segment: BM25SegmentReader) -> None:
+        """
+        새 세그먼트를 기반으로 교체
+
+        capture_snapshot() 이후 변경된 문서만 메모리에 남기고, 그 문서의 이전 버전은
+        새 기반에서 삭제 표시한다. 호출자는 쓰기와 같은 락 안에서 호출해야 한다.
+        """
+        touched = self._touched or {}
+        self._touched = None
+        kept = {
+            doc_id: (
+                self.doc_term_freqs(doc_id), self._slot_fields[self._slots[doc_id]],
+                self._slot_positions(self._slots[doc_id])
+            )
+            for doc_id in touched if doc_id in self._slots
+        }
+
+        # 어휘와 슬롯은 남는 문서만으로 다시 채번한다
+        self._reset_memory()
+        self.attach_base(segment)
+
+        for doc_id in touched:
+            doc_num = segment.find_doc(doc_id)
+            if doc_num is not None:
+                self._delete_base_doc(doc_num)
+        for doc_id, (term_freqs, field_keys, positions) in kept.items():
+            self._add_term_freqs(doc_id, term_freqs, field_keys, positions)
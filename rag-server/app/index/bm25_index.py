@@ -1,20 +1,32 @@
-from typing import List, Dict, Any, Optional, Union
-from llama_index.retrievers.bm25 import BM25Retriever
-from llama_index.core.schema import TextNode, NodeWithScore
+from typing import List, Dict, Any, Optional, Tuple, Union
+from llama_index.core.schema import TextNode
 from llama_index.core import Document
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer
 import re
+import copy
 import json
-import pickle
+import os
+import asyncio
+import threading
 from pathlib import Path
 import uuid
 import logging
+from collections import Counter
+from concurrent.futures import Executor
 from datetime import datetime
 
 from .base_index import BaseIndex, IndexedDocument
+from .bm25_docstore import BM25DocumentStore
+from .bm25_engine import BM25InvertedIndex
+from .bm25_journal import BM25SnapshotScheduler, BM25WriteJournal
+from .bm25_segment import (
+    DEFAULT_TEXT_FIELD, BM25SegmentReader, SegmentFormatError, decode_stored_document, encode_stored_document,
+    extract_field_values, field_key, normalize_field_value, text_field_term
+)
+from .symbol_trie import SymbolTrie, metadata_symbol_entries
+from .symbols import SYMBOL_FIELD, extract_symbols, normalize_symbol
 from app.retriever.document_builder import EnhancedDocument
 
 logger = logging.getLogger(__name__)
@@ -38,9 +50,43 @@ def _download_nltk_data():
 _download_nltk_data()
 
 
+# 코드 토큰 패턴 (밑줄을 제외한 단어 문자 연속)
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+# CamelCase 경계 (getUserById -> get User By Id)
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z])')
+_CAMEL_SPLIT = re.compile(r'([a-z])([A-Z])')
+_NON_WORD = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+# NLTK word_tokenize(Treebank)가 분리하는 축약형 - 기존 토큰화 결과 유지용
+_TREEBANK_CONTRACTIONS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# BM25F 필드 추출 패턴
+_CLASS_NAME = re.compile(r'\bclass\s+(\w+)', re.IGNORECASE)
+_ANNOTATION = re.compile(r'@(\w+)')
+# 정의부만 이름 필드로 (def/function 선언, 본문 블록이 이어지는 메서드 시그니처)
+_DECLARATION = re.compile(r'\b(?:def|function)\s+(\w+)|\b(\w+)\s*\([^()]*\)\s*(?:throws\s+[\w.,\s]+)?\{')
+_CONTROL_KEYWORDS = frozenset({"if", "for", "while", "switch", "catch", "synchronized", "try", "with"})
+_IMPORTANT_SUFFIX = re.compile(
+    r'\b(\w*(?:Controller|Service|Repository|Component|Entity|DTO|Interface))\b', re.IGNORECASE
+)
+
+# 질의 구문 조건: "save book" (순서대로 인접), "save book"~3 (순서 무관, 토큰 수 + 3개 창 안)
+_PHRASE = re.compile(r'"([^"]*)"(?:~(\d+))?')
+
+
 class CodeTokenizer:
     """코드 특화 토크나이저"""
     
+    STEM_CACHE_SIZE = 200_000  # 스테밍 결과 메모 최대 항목 수
+    
     def __init__(self, language: str = "english"):
         self.language = language
         self.stemmer = PorterStemmer()
@@ -57,6 +103,9 @@ class CodeTokenizer:
         }
         # 중요한 키워드들은 불용어에서 제외: class, function, def, interface, controller 등
         self.stop_words.update(self.code_stop_words)
+        
+        # 소문자 단어 -> 색인 토큰 (불용어 등 제외 대상은 None)
+        self._stem_cache: Dict[str, Optional[str]] = {}
     
     def tokenize(self, text: str) -> List[str]:
         """텍스트 토큰화"""
@@ -64,49 +113,78 @@ class CodeTokenizer:
             return []
         
         try:
-            # 코드 패턴 전처리
-            text = self._preprocess_code(text)
-            
-            # 기본 토큰화
-            tokens = word_tokenize(text.lower())
-            
-            # 필터링 및 스테밍
-            filtered_tokens = []
-            for token in tokens:
-                # 불용어 및 특수문자 제거, 최소 길이 확인
-                if (len(token) > 1 and 
-                    token not in self.stop_words and
-                    token.isalnum()):
-                    
-                    # 스테밍 적용
-                    stemmed = self.stemmer.stem(token)
-                    filtered_tokens.append(stemmed)
-            
-            return filtered_tokens
-            
+            return self.tokenize_words(self.split_words(text))
         except Exception as e:
             logger.warning(f"토큰화 실패: {e}, 원본 텍스트: {text[:100]}...")
             # 실패 시 간단한 fallback 토큰화
             return self._fallback_tokenize(text)
     
+    def split_words(self, text: str) -> List[str]:
+        """
+        코드 텍스트를 소문자 단어로 분리 (한 번의 스캔)
+        
+        _preprocess_code + word_tokenize(text.lower())와 같은 단어 목록을 만든다.
+        """
+        words = []
+        for word in _WORD_PATTERN.findall(text):
+            # 소문자/대문자만으로 된 단어는 CamelCase 경계 검사 생략
+            if word.islower() or word.isupper() or not _CAMEL_BOUNDARY.search(word):
+                parts = (word,)
+            else:
+                parts = _CAMEL_BOUNDARY.split(word)
+            for part in parts:
+                part = part.lower()
+                contraction = _TREEBANK_CONTRACTIONS.get(part)
+                if contraction:
+                    words.extend(contraction)
+                else:
+                    words.append(part)
+        return words
+    
+    def tokenize_words(self, words: List[str]) -> List[str]:
+        """소문자 단어 목록을 불용어 제거 + 스테밍된 토큰으로 변환"""
+        cache = self._stem_cache
+        tokens = []
+        for word in words:
+            try:
+                stemmed = cache[word]
+            except KeyError:
+                stemmed = self._stem_word(word)
+            if stemmed is not None:
+                tokens.append(stemmed)
+        return tokens
+    
+    def _stem_word(self, word: str) -> Optional[str]:
+        """단어 하나의 색인 토큰 계산 후 메모"""
+        # 불용어 및 특수문자 제거, 최소 길이 확인
+        if len(word) > 1 and word not in self.stop_words and word.isalnum():
+            stemmed = self.stemmer.stem(word)
+        else:
+            stemmed = None
+        
+        if len(self._stem_cache) >= self.STEM_CACHE_SIZE:
+            self._stem_cache.clear()
+        self._stem_cache[word] = stemmed
+        return stemmed
+    
     def _preprocess_code(self, text: str) -> str:
         """코드 특화 전처리"""
         # CamelCase 분리 (getUserById -> get User By Id)
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+        text = _CAMEL_SPLIT.sub(r'\1 \2', text)
         
         # snake_case 분리 (get_user_by_id -> get user by id)
-        text = re.sub(r'_', ' ', text)
+        text = text.replace('_', ' ')
         
         # 특수 문자를 공백으로 치환 (중괄호, 괄호, 세미콜론 등)
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = _NON_WORD.sub(' ', text)
         
         # 연속 공백 제거
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE.sub(' ', text)
         
         return text.strip()
     
     def _fallback_tokenize(self, text: str) -> List[str]:
-        """Fallback 토큰화 (NLTK 실패 시)"""
+        """Fallback 토큰화 (기본 토큰화 실패 시)"""
         # 간단한 정규표현식 기반 토큰화
         text = self._preprocess_code(text)
         tokens = re.findall(r'\b\w+\b', text.lower())
@@ -123,6 +201,9 @@ class CodeTokenizer:
 class BM25IndexConfig:
     """BM25 Index 설정"""
     
+    # BM25F 텍스트 필드별 기본 가중치 (질의마다 덮어쓸 수 있음)
+    DEFAULT_FIELD_WEIGHTS = {"code": 1.0, "name": 3.0, "keywords": 1.5, "annotations": 1.5, "types": 1.0}
+    
     def __init__(
         self,
         k1: float = 1.2,
@@ -132,7 +213,20 @@ class BM25IndexConfig:
         index_path: str = "data/bm25_index",
         use_stemming: bool = True,
         include_metadata: bool = True,
-        metadata_weight: float = 0.3  # 메타데이터 가중치
+        metadata_weight: float = 0.3,  # 메타데이터 가중치
+        journal_fsync: bool = True,  # 저널 커밋마다 fsync
+        background_snapshot: bool = True,  # 백그라운드 스냅샷 사용 여부
+        snapshot_debounce_seconds: float = 2.0,  # 마지막 쓰기 이후 스냅샷까지 대기 시간
+        snapshot_max_delay_seconds: float = 30.0,  # 연속 쓰기 중 최대 스냅샷 지연
+        merge_deleted_ratio: float = 0.2,  # 기반 세그먼트의 삭제 표시 비율이 이 이상이면 병합
+        merge_pending_ratio: float = 0.1,  # 스냅샷 이후 저널 레코드가 기반 문서 수 대비 이 비율 이상이면 병합
+        merge_min_pending_records: int = 1000,  # 병합 전에 저널에 쌓아 둘 수 있는 최소 레코드 수
+        filter_fields: tuple = ("language", "code_type", "file_path"),  # 필터용으로 색인할 메타데이터 필드
+        index_symbols: bool = True,  # 심볼 이름 정확 일치 조회용 필드 색인 여부
+        text_fields: tuple = (DEFAULT_TEXT_FIELD, "name", "keywords", "annotations", "types"),  # BM25F 텍스트 필드
+        field_weights: Optional[Dict[str, float]] = None,  # 필드별 기본 가중치 (없으면 DEFAULT_FIELD_WEIGHTS)
+        field_b: Optional[Dict[str, float]] = None,  # 필드별 길이 정규화 계수 (없으면 b)
+        store_positions: bool = False  # 구문/근접 질의용 토큰 위치 저장 여부 (세그먼트 크기 증가)
     ):
         self.k1 = k1
         self.b = b
@@ -142,77 +236,143 @@ class BM25IndexConfig:
         self.use_stemming = use_stemming
         self.include_metadata = include_metadata
         self.metadata_weight = metadata_weight
+        self.journal_fsync = journal_fsync
+        self.background_snapshot = background_snapshot
+        self.snapshot_debounce_seconds = snapshot_debounce_seconds
+        self.snapshot_max_delay_seconds = snapshot_max_delay_seconds
+        self.merge_deleted_ratio = merge_deleted_ratio
+        self.merge_pending_ratio = merge_pending_ratio
+        self.merge_min_pending_records = merge_min_pending_records
+        self.filter_fields = tuple(filter_fields)
+        self.index_symbols = index_symbols
+        self.text_fields = tuple(text_fields)
+        self.field_weights = dict(self.DEFAULT_FIELD_WEIGHTS if field_weights is None else field_weights)
+        self.field_b = dict(field_b or {})
+        self.store_positions = store_positions
 
 
 class CodeBM25Index(BaseIndex):
     """코드 BM25 인덱스"""
     
+    SEGMENT_FILE = "segment.bm25"
+    JOURNAL_FILE = "journal.log"
+    MANIFEST_FILE = "manifest.json"
+    RESIDUAL_FILTER_OVERFETCH = 4  # 후처리 필터 사용 시 limit 대비 추가 조회 배수
+    PROXIMITY_RERANK_OVERFETCH = 4  # 근접 가중치 재정렬 시 limit 대비 추가 조회 배수
+    PREPARE_CHUNK_SIZE = 128  # 프로세스 풀 작업 하나당 문서 수
+    SYMBOL_TRIE_ENTRY_BYTES = 200  # 심볼 트라이 (키, 항목) 쌍당 메모리 근사치 (노드/딕셔너리 포함)
+    LEGACY_NODES_FILE = "nodes.json"
+    LEGACY_DOCS_MAP_FILE = "documents_map.pkl"
+    
     def __init__(self, config: BM25IndexConfig = None):
         self.config = config or BM25IndexConfig()
         self.tokenizer = CodeTokenizer(self.config.language)
-        self.retriever = None
-        self.nodes = []
-        self.documents_map = {}  # ID -> EnhancedDocument 매핑
+        self.engine = BM25InvertedIndex(
+            k1=self.config.k1,
+            b=self.config.b,
+            filter_fields=self.config.filter_fields,
+            text_fields=self.config.text_fields,
+            field_weights=self.config.field_weights,
+            field_b=self.config.field_b,
+            store_positions=self.config.store_positions
+        )
         
         # 인덱스 저장 경로 생성
         self.config.index_path.mkdir(parents=True, exist_ok=True)
+        
+        # 세그먼트에 아직 기록되지 않은 문서의 원문/메타데이터 (역색인은 용어 컬럼만 보관)
+        self.documents = BM25DocumentStore(self.config.index_path)
+        
+        # 쓰기 저널과 백그라운드 스냅샷
+        self._lock = threading.RLock()  # 엔진/노드 변경과 스냅샷 교체 보호
+        self._snapshot_lock = threading.Lock()  # 스냅샷 직렬화
+        self._journal: Optional[BM25WriteJournal] = None
+        self._snapshots: Optional[BM25SnapshotScheduler] = None
+        self._applied_seq = 0  # 엔진에 반영된 마지막 저널 순번
+        self._retired = False  # 다음 세대로 교체되어 디스크에 더 이상 기록하지 않음 (검색만 가능)
+        self._segment_seq = 0  # 기반 세그먼트에 반영된 마지막 저널 순번
+        
+        # 언어별 문서 수 (추가/삭제 시 갱신하고 스냅샷 때 매니페스트에 함께 저장)
+        self._languages: Counter = Counter()
+        
+        # 심볼 자동완성 트라이 (첫 자동완성 요청 때 만들고 이후 추가/삭제마다 갱신)
+        self._symbol_trie: Optional[SymbolTrie] = None
     
     async def setup(self):
         """인덱스 초기화"""
         try:
+            await self._stop_background_writers()
+            self._symbol_trie = None
+            
             # 기존 인덱스 로드 시도
-            if await self._load_existing_index():
-                logger.info(f"기존 BM25 인덱스 로드 완료: {len(self.nodes)}개 문서")
-                return
+            loaded = await self._load_existing_index()
+            if not loaded:
+                # 새 인덱스 초기화
+                self.documents.clear()
+                self.engine.clear()
+                self._languages = Counter()
+                self._applied_seq = 0
+                self._segment_seq = 0
+            
+            # 마지막 스냅샷 이후 저널 재생
+            replayed = self._open_journal()
+            if self.config.background_snapshot:
+                self._snapshots = BM25SnapshotScheduler(
+                    self.merge,
+                    debounce_seconds=self.config.snapshot_debounce_seconds,
+                    max_delay_seconds=self.config.snapshot_max_delay_seconds,
+                    name=f"bm25-snapshot-{self.config.index_path.name}"
+                )
+                if replayed or self.engine.has_pending_changes:
+                    self._snapshots.notify()
             
-            # 새 인덱스 초기화
-            self.nodes = []
-            self.documents_map = {}
-            self._build_retriever()
-            logger.info("새로운 BM25 인덱스 초기화 완료")
+            if self.config.store_positions and not self.engine.has_positions:
+                logger.warning(
+                    f"토큰 위치 없이 기록된 BM25 세그먼트: 구문/근접 질의는 재구성 후 사용 가능 ({self.config.index_path})"
+                )
+            
+            if loaded or replayed:
+                logger.info(f"기존 BM25 인덱스 로드 완료: {self.engine.doc_count}개 문서 (저널 재생 {replayed}건)")
+            else:
+                logger.info("새로운 BM25 인덱스 초기화 완료")
             
         except Exception as e:
             logger.error(f"BM25 인덱스 초기화 실패: {e}")
             raise
     
-    async def add_documents(self, documents: List[Union[EnhancedDocument, Dict[str, Any]]]) -> List[str]:
-        """문서 추가"""
+    async def add_documents(
+        self,
+        documents: List[Union[EnhancedDocument, Dict[str, Any]]],
+        executor: Optional[Executor] = None
+    ) -> List[str]:
+        """
+        문서 추가
+        
+        Args:
+            documents: 추가할 문서
+            executor: 필드 추출/토큰화를 나눠 실행할 프로세스 풀 (없으면 현재 프로세스에서 실행)
+        """
         if not documents:
             return []
         
-        added_ids = []
-        new_nodes = []
-        
         try:
-            for doc in documents:
-                if isinstance(doc, EnhancedDocument):
-                    # EnhancedDocument 처리
-                    enhanced_text = self._create_enhanced_text(doc)
-                    text_node = TextNode(
-                        text=enhanced_text,
-                        metadata=doc.metadata.model_dump(),
-                        id_=doc.text_node.id_
-                    )
-                    
-                    new_nodes.append(text_node)
-                    self.documents_map[text_node.id_] = doc
-                    added_ids.append(text_node.id_)
-                    
-                else:
-                    # Dict 형태의 문서 처리
-                    node = await self._create_text_node_from_dict(doc)
-                    new_nodes.append(node)
-                    added_ids.append(node.id_)
+            self._check_writable()
             
-            # 기존 노드에 추가
-            self.nodes.extend(new_nodes)
+            # 토큰화는 락 밖에서 수행
+            prepared = await self._prepare_documents(documents, executor)
             
-            # Retriever 재구성
-            self._build_retriever()
+            # 용어 빈도만 역색인에 반영 (같은 ID는 교체)하고 원문은 문서 저장소로, 입력 순서대로 저널에 기록
+            with self._lock:
+                for node, _, term_freqs in prepared:
+                    self._store_node(node, term_freqs)
+                seq = self._log([
+                    {"op": "add", "id": node.id_, "text": node.text, "metadata": node.metadata, "fields": fields}
+                    for node, fields, _ in prepared
+                ])
             
-            # 인덱스 저장
-            await self._save_index()
+            await self._commit(seq)
             
+            added_ids = [node.id_ for node, _, _ in prepared]
             logger.info(f"BM25 인덱스에 {len(added_ids)}개 문서 추가 완료")
             return added_ids
             
@@ -220,74 +380,47 @@ class CodeBM25Index(BaseIndex):
             logger.error(f"문서 추가 실패: {e}")
             raise
     
-    def _create_enhanced_text(self, doc: EnhancedDocument) -> str:
-        """강화된 텍스트 생성"""
-        text_parts = []
-        
-        # 기본 코드 내용
-        text_parts.append(doc.text_node.text)
-        
-        # 메타데이터 기반 텍스트 추가 (가중치 적용)
-        if self.config.include_metadata:
-            metadata = doc.metadata
-            
-            # 함수/클래스명 강조 (높은 가중치)
-            for _ in range(3):  # 3번 반복으로 가중치 증가
-                text_parts.append(metadata.name)
-            
-            # 키워드 추가
-            if metadata.keywords:
-                text_parts.extend(metadata.keywords)
-            
-            # 파라미터 타입 추가
-            for param in metadata.parameters:
-                if isinstance(param, dict) and param.get('type'):
-                    text_parts.append(param['type'])
-                elif isinstance(param, str):
-                    text_parts.append(param)
-            
-            # 반환 타입 추가
-            if metadata.return_type:
-                text_parts.append(metadata.return_type)
-            
-            # 상속/구현 관계
-            if metadata.extends:
-                text_parts.append(metadata.extends)
-            
-            if metadata.implements:
-                text_parts.extend(metadata.implements)
-            
-            # 검색 키워드 추가
-            if hasattr(doc, 'search_keywords') and doc.search_keywords:
-                text_parts.extend(doc.search_keywords)
-            
-            # 의미적 태그 추가
-            if hasattr(doc, 'semantic_tags') and doc.semantic_tags:
-                text_parts.extend(doc.semantic_tags)
+    async def _prepare_documents(
+        self,
+        documents: List[Union[EnhancedDocument, Dict[str, Any]]],
+        executor: Optional[Executor] = None
+    ) -> List[tuple]:
+        """문서별 (TextNode, 텍스트 필드, 용어 빈도) 준비 - 풀이 있으면 청크 단위로 나눠 실행 후 입력 순서로 병합"""
+        if executor is None:
+            return [self._prepare_document(doc) for doc in documents]
         
-        return ' '.join(filter(None, text_parts))
+        loop = asyncio.get_running_loop()
+        chunk_size = self.PREPARE_CHUNK_SIZE
+        chunks = await asyncio.gather(*[
+            loop.run_in_executor(executor, prepare_document_chunk, self.config, documents[i:i + chunk_size])
+            for i in range(0, len(documents), chunk_size)
+        ])
+        return [item for chunk in chunks for item in chunk]
+    
+    def _prepare_document(self, doc: Union[EnhancedDocument, Dict[str, Any]]) -> tuple:
+        """문서 하나의 TextNode, BM25F 텍스트 필드, 색인 용어 빈도"""
+        if isinstance(doc, EnhancedDocument):
+            # EnhancedDocument 처리 (검색 키워드/의미 태그는 keywords 필드로)
+            node = TextNode(
+                text=doc.text_node.text,
+                metadata=doc.metadata.dict(),  # Pydantic V1 복원
+                id_=doc.text_node.id_
+            )
+            fields = self._extract_text_fields(
+                node.text, node.metadata, list(doc.search_keywords or []) + list(doc.semantic_tags or [])
+            )
+        else:
+            # Dict 형태의 문서 처리
+            node = self._create_text_node_from_dict(doc)
+            fields = self._extract_text_fields(node.text, node.metadata)
+        return node, fields, self._tokenize_fields(fields, positions=self.config.store_positions)
     
-    async def _create_text_node_from_dict(self, doc_dict: Dict[str, Any]) -> TextNode:
-        """딕셔너리에서 TextNode 생성"""
+    def _create_text_node_from_dict(self, doc_dict: Dict[str, Any]) -> TextNode:
+        """딕셔너리에서 TextNode 생성 (메타데이터는 텍스트에 덧붙이지 않고 필드로 색인)"""
         node_id = doc_dict.get('id', str(uuid.uuid4()))
         text = doc_dict.get('content', doc_dict.get('text', ''))
         metadata = doc_dict.get('metadata', {})
         
-        # 메타데이터 기반 텍스트 강화
-        if self.config.include_metadata and metadata:
-            enhanced_parts = [text]
-            
-            # 메타데이터에서 텍스트 추가
-            for key in ['name', 'function_name', 'keywords']:
-                if key in metadata:
-                    value = metadata[key]
-                    if isinstance(value, list):
-                        enhanced_parts.extend(value)
-                    elif isinstance(value, str):
-                        enhanced_parts.append(value)
-            
-            text = ' '.join(filter(None, enhanced_parts))
-        
         # 인덱싱 시간 추가
         metadata['indexed_at'] = datetime.now().isoformat()
         
@@ -297,112 +430,256 @@ class CodeBM25Index(BaseIndex):
             id_=node_id
         )
     
-    def _build_retriever(self):
-        """BM25 Retriever 구성 (하이브리드 방식: 커스텀 전처리 + 기본 토크나이저)"""
-        if not self.nodes:
-            self.retriever = None
-            return
+    def _extract_text_fields(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        extra_keywords: List[str] = ()
+    ) -> Dict[str, str]:
+        """
+        BM25F 텍스트 필드별 원문
         
-        try:
-            # 📌 하이브리드 방식: 커스텀 토크나이저의 전처리 기능을 활용한 노드 생성
-            enhanced_nodes = self._create_enhanced_nodes_for_bm25()
-            
-            # 기본 토크나이저를 사용하여 BM25Retriever 생성 (안정성 확보)
-            self.retriever = BM25Retriever.from_defaults(
-                nodes=enhanced_nodes,
-                similarity_top_k=self.config.top_k
-            )
-            
-            # BM25 파라미터 강제 설정
-            if hasattr(self.retriever, 'bm25') and self.retriever.bm25:
-                self.retriever.bm25.k1 = self.config.k1
-                self.retriever.bm25.b = self.config.b
-                logger.debug(f"BM25 파라미터 설정: k1={self.config.k1}, b={self.config.b}")
-            
-            logger.debug(f"BM25 Retriever 구성 완료: {len(enhanced_nodes)}개 노드 (하이브리드 전처리 적용)")
+        code는 원문 그대로, 나머지 필드는 코드에서 추출한 식별자와 메타데이터 값을 모은다.
+        같은 값은 필드마다 한 번만 넣으며, 강조는 반복 대신 질의 시점의 필드 가중치로 한다.
+        """
+        fields: Dict[str, List[str]] = {
+            DEFAULT_TEXT_FIELD: [text], "name": [], "keywords": [], "annotations": [], "types": []
+        }
+        
+        # 코드에서 추출: 클래스/메서드 정의명, 어노테이션, Controller 등 중요 접미사 (호출부는 code 필드로 충분)
+        fields["name"].extend(_CLASS_NAME.findall(text))
+        fields["name"].extend(
+            name for match in _DECLARATION.findall(text) for name in match
+            if name and name not in _CONTROL_KEYWORDS
+        )
+        fields["annotations"].extend(_ANNOTATION.findall(text))
+        fields["keywords"].extend(_IMPORTANT_SUFFIX.findall(text))
+        
+        if self.config.include_metadata and metadata:
+            for key in ('name', 'function_name'):
+                fields["name"].extend(self._metadata_values(metadata.get(key)))
+            fields["keywords"].extend(self._metadata_values(metadata.get('keywords')))
+            fields["keywords"].extend(extra_keywords)
+            fields["annotations"].extend(self._metadata_values(metadata.get('annotations')))
             
-        except Exception as e:
-            logger.error(f"BM25 Retriever 구성 실패: {e}")
-            self.retriever = None
-    
-    def _create_enhanced_nodes_for_bm25(self) -> List[TextNode]:
-        """BM25를 위한 향상된 노드 생성 (커스텀 토크나이저의 장점 활용)"""
-        enhanced_nodes = []
-        
-        for node in self.nodes:
-            # ✨ 커스텀 토크나이저의 핵심 기능들을 활용하여 검색 친화적 텍스트 생성
-            enhanced_text = self._enhance_text_for_search(node.text)
-            
-            # 향상된 텍스트로 새 노드 생성
-            enhanced_node = TextNode(
-                text=enhanced_text,
-                metadata=node.metadata,
-                id_=node.id_
-            )
-            enhanced_nodes.append(enhanced_node)
+            # 파라미터/반환 타입과 상속/구현 관계
+            for param in metadata.get('parameters') or []:
+                fields["types"].extend(self._metadata_values(param.get('type') if isinstance(param, dict) else param))
+            for key in ('return_type', 'extends', 'implements'):
+                fields["types"].extend(self._metadata_values(metadata.get(key)))
         
-        return enhanced_nodes
+        return {
+            field: " ".join(dict.fromkeys(value for value in values if value))
+            for field, values in fields.items()
+            if field in self.config.text_fields
+        }
+    
+    @staticmethod
+    def _metadata_values(value: Any) -> List[str]:
+        """메타데이터 값을 문자열 목록으로 (문자열/문자열 리스트만)"""
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, list):
+            return [item for item in value if isinstance(item, str)]
+        return []
     
-    def _enhance_text_for_search(self, original_text: str) -> str:
-        """검색을 위한 텍스트 향상 (커스텀 토크나이저 기능 활용)"""
-        # 1. 원본 텍스트 유지
-        enhanced_parts = [original_text]
+    def _tokenize_fields(self, fields: Dict[str, str], positions: bool = False) -> Dict[str, Any]:
+        """
+        텍스트 필드별 토큰화 결과를 필드 용어 키 빈도로 합침
         
-        # 2. 커스텀 전처리 적용 (CamelCase 분리, snake_case 분리 등)
-        preprocessed = self.tokenizer._preprocess_code(original_text)
-        enhanced_parts.append(preprocessed)
+        positions=True면 빈도 대신 필드 안 토큰 위치 목록(불용어 제거 후 순번)을 모은다.
+        """
+        if positions:
+            term_positions: Dict[str, List[int]] = {}
+            for field, value in fields.items():
+                for position, token in enumerate(self.tokenizer.tokenize(value)):
+                    term_positions.setdefault(text_field_term(field, token), []).append(position)
+            return term_positions
         
-        # 3. 주요 키워드 추출 및 강조 (가중치 증가)
-        try:
-            important_tokens = self._extract_important_keywords(original_text)
-            if important_tokens:
-                # 중요 키워드들을 여러 번 반복하여 가중치 증가
-                enhanced_parts.extend(important_tokens * 2)  # 2번 반복으로 가중치 증가
-        except Exception as e:
-            logger.debug(f"키워드 추출 실패: {e}")
+        term_freqs: Counter = Counter()
+        for field, value in fields.items():
+            for token in self.tokenizer.tokenize(value):
+                term_freqs[text_field_term(field, token)] += 1
+        return dict(term_freqs)
+    
+    def _index_node(self, node: TextNode, fields: Optional[Dict[str, str]] = None):
+        """노드 하나를 역색인에 추가 (기존 문서는 교체)"""
+        if fields is None:
+            fields = self._extract_text_fields(node.text, node.metadata)
+        self._store_node(node, self._tokenize_fields(fields, positions=self.config.store_positions))
+    
+    def _store_node(self, node: TextNode, term_freqs: Dict[str, Any]):
+        """
+        용어 빈도는 역색인에, 원문과 메타데이터는 문서 저장소에 기록 (락 안에서 호출)
         
-        # 4. 모든 부분을 공백으로 연결
-        return " ".join(enhanced_parts)
+        위치를 저장하는 인덱스는 term_freqs로 _tokenize_fields(positions=True)의 용어별 위치 목록을 받는다.
+        """
+        positions = None
+        if self.config.store_positions:
+            positions = term_freqs
+            term_freqs = {term: len(found) for term, found in positions.items()}
+        self._uncount_node(node.id_)
+        self.documents.put(node.id_, encode_stored_document(node.text, node.metadata))
+        self.engine.add_term_freqs(node.id_, term_freqs, self._field_keys(node.metadata), positions)
+        self._languages[self._language_of(node.metadata)] += 1
+        if self._symbol_trie is not None:
+            for entry in metadata_symbol_entries(node.metadata):
+                self._symbol_trie.add(entry)
+    
+    def _remove_node(self, doc_id: str) -> bool:
+        """역색인과 문서 저장소에서 문서 제거 (락 안에서 호출)"""
+        self._uncount_node(doc_id)
+        self.documents.discard(doc_id)
+        return self.engine.remove_document(doc_id)
+    
+    def _uncount_node(self, doc_id: str):
+        """교체/삭제되는 기존 문서를 언어별 문서 수와 심볼 트라이에서 제외 (락 안에서 호출)"""
+        node = self._get_node(doc_id)
+        if node is None:
+            return
+        language = self._language_of(node.metadata)
+        self._languages[language] -= 1
+        if self._languages[language] <= 0:
+            del self._languages[language]
+        if self._symbol_trie is not None:
+            for entry in metadata_symbol_entries(node.metadata):
+                self._symbol_trie.remove(entry)
+    
+    @staticmethod
+    def _language_of(metadata: Dict[str, Any]) -> str:
+        return str(metadata.get('language', 'unknown'))
+    
+    def _field_keys(self, metadata: Dict[str, Any]) -> List[str]:
+        """필터용 필드 색인 키와 심볼 정확 일치 키"""
+        keys = extract_field_values(metadata, self.config.filter_fields)
+        if self.config.index_symbols:
+            keys.extend(field_key(SYMBOL_FIELD, symbol) for symbol in extract_symbols(metadata))
+        return keys
     
-    def _extract_important_keywords(self, text: str) -> List[str]:
-        """중요 키워드 추출 (클래스명, 메서드명, 어노테이션 등)"""
-        import re
-        keywords = []
+    def _split_filters(self, filters: Optional[Dict[str, Any]]) -> tuple:
+        """
+        필터를 필드 색인으로 처리할 조건과 나머지 조건으로 분리
         
-        # 클래스명 추출 (class 다음의 단어)
-        class_matches = re.findall(r'\bclass\s+(\w+)', text, re.IGNORECASE)
-        keywords.extend(class_matches)
+        Returns:
+            (필드 -> 허용 값 목록, 결과에 후처리로 적용할 필터)
+        """
+        indexed: Dict[str, List[str]] = {}
+        residual: Dict[str, Any] = {}
+        for key, value in (filters or {}).items():
+            normalized = normalize_field_value(value)
+            if key in self.config.filter_fields and normalized is not None:
+                indexed[key] = [normalized]
+            else:
+                residual[key] = value
+        return indexed, residual
+    
+    def _parse_phrases(self, query: str) -> Tuple[str, List[Tuple[List[str], Optional[int]]]]:
+        """
+        질의의 따옴표 구문 조건 분리
         
-        # 메서드명 추출 (함수명())
-        method_matches = re.findall(r'\b(\w+)\s*\(', text)
-        keywords.extend(method_matches)
+        Returns:
+            (따옴표와 ~N을 뗀 점수 계산용 질의, (구문 토큰 목록, slop) 목록 - 인접 구문은 slop None)
+        """
+        phrases = []
+        for match in _PHRASE.finditer(query):
+            tokens = self.tokenizer.tokenize(match.group(1))
+            if tokens:
+                phrases.append((tokens, int(match.group(2)) if match.group(2) else None))
+        return _PHRASE.sub(lambda match: f" {match.group(1)} ", query), phrases
+    
+    def _retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        phrase_query: bool = True,
+        proximity_window: Optional[int] = None,
+        proximity_boost: float = 0.0
+    ) -> List[tuple]:
+        """
+        역색인에서 필터를 만족하는 상위 top_k (TextNode, score) 조회
         
-        # 어노테이션 추출 (@RestController 등)
-        annotation_matches = re.findall(r'@(\w+)', text)
-        keywords.extend(annotation_matches)
+        Args:
+            phrase_query: 따옴표 구문을 위치 조건으로 적용 (위치 색인이 없으면 일반 단어로 검색)
+            proximity_window: 서로 다른 질의 토큰이 모두 이 토큰 수 안에 나오는 문서의 점수를
+                (1 + proximity_boost * 토큰 수 / 구간 길이)배로 올림 (상위 후보를 더 조회해 재정렬)
+        """
+        top_k = top_k or self.config.top_k
+        phrases = []
+        if phrase_query and '"' in query:
+            query, phrases = self._parse_phrases(query)
+        query_tokens = self.tokenizer.tokenize(query)
         
-        # Controller, Service 등 중요 접미사
-        important_suffixes = re.findall(r'\b(\w*(?:Controller|Service|Repository|Component|Entity|DTO|Interface))\b', text, re.IGNORECASE)
-        keywords.extend(important_suffixes)
+        with self._lock:
+            positional = self.engine.has_positions
+            if (phrases or proximity_window) and not positional:
+                logger.warning(f"토큰 위치가 없는 BM25 인덱스라 구문/근접 조건 없이 검색: {self.config.index_path}")
+            distinct = len(set(query_tokens))
+            rerank = positional and proximity_window and proximity_boost > 0 and distinct > 1
+            
+            hits = self.engine.search(
+                query_tokens,
+                top_k=top_k * self.PROXIMITY_RERANK_OVERFETCH if rerank else top_k,
+                filters=filters,
+                field_weights=field_weights,
+                phrases=phrases if positional else ()
+            )
+            if rerank:
+                spans = self.engine.proximity_spans([doc_id for doc_id, _ in hits], query_tokens)
+                hits = [
+                    (doc_id, score * (1.0 + proximity_boost * distinct / spans[doc_id]))
+                    if spans.get(doc_id, proximity_window + 1) <= proximity_window else (doc_id, score)
+                    for doc_id, score in hits
+                ]
+                hits = sorted(hits, key=lambda item: (-item[1], item[0]))[:top_k]
+            return [(self._get_node(doc_id), score) for doc_id, score in hits]
+    
+    def _fetch_size(self, limit: int, residual_filters: Dict[str, Any]) -> int:
+        """요청 limit에 맞춘 조회 개수 (후처리 필터가 있으면 제외될 몫만큼 더 조회)"""
+        return limit * self.RESIDUAL_FILTER_OVERFETCH if residual_filters else limit
+    
+    def _get_node(self, doc_id: str) -> Optional[TextNode]:
+        """문서 ID로 TextNode 조회 (문서 저장소나 세그먼트의 저장 필드를 그때 디코딩)"""
+        payload = self.documents.get(doc_id)
+        if payload is None:
+            doc_num = self.engine.base_doc_num(doc_id)
+            if doc_num is None:
+                return None
+            payload = self.engine.base.stored_bytes(doc_num)
         
-        return list(set(keywords))  # 중복 제거
+        stored = decode_stored_document(payload)
+        return TextNode(text=stored['text'], metadata=stored['metadata'], id_=doc_id)
+    
+    def _iter_nodes(self):
+        """살아 있는 전체 문서 순회"""
+        for doc_id in self.engine.iter_doc_ids():
+            yield self._get_node(doc_id)
     
-    async def search(self, query: str, limit: int = 10, filters: Dict[str, Any] = None) -> List[IndexedDocument]:
-        """BM25 검색"""
-        if not self.retriever or not query.strip():
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Dict[str, Any] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        phrase_query: bool = True
+    ) -> List[IndexedDocument]:
+        """BM25 검색 (field_weights: 이번 질의의 BM25F 필드 가중치, phrase_query: 따옴표 구문 조건 적용)"""
+        if not self.engine.doc_count or not query.strip():
             return []
         
         try:
-            # 검색 실행
-            nodes_with_scores = self.retriever.retrieve(query)
+            # 검색 실행 (색인된 필드 필터는 점수 계산 단계에서 적용)
+            indexed_filters, filters = self._split_filters(filters)
+            nodes_with_scores = self._retrieve(
+                query, self._fetch_size(limit, filters), indexed_filters, field_weights, phrase_query
+            )
             
             # 결과 변환
             results = []
-            for node_with_score in nodes_with_scores:
+            for node, _ in nodes_with_scores:
                 if len(results) >= limit:
                     break
-                    
-                node = node_with_score.node
                 
                 # 필터 적용
                 if filters and not self._apply_filters(node.metadata, filters):
@@ -423,24 +700,41 @@ class CodeBM25Index(BaseIndex):
             logger.error(f"BM25 검색 실패: {e}")
             return []
     
-    async def search_with_scores(self, query: str, limit: int = 10, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """점수와 함께 BM25 검색"""
-        if not self.retriever or not query.strip():
-            logger.warning(f"BM25 검색 중단: retriever={self.retriever is not None}, query='{query.strip()}'")
+    async def search_with_scores(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Dict[str, Any] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        phrase_query: bool = True,
+        proximity_window: Optional[int] = None,
+        proximity_boost: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        점수와 함께 BM25 검색
+        
+        Args:
+            field_weights: 이번 질의의 BM25F 필드 가중치
+            phrase_query: 따옴표 구문("save book", "save book"~3)을 위치 조건으로 적용
+            proximity_window, proximity_boost: 질의 토큰이 가까이 모여 있는 문서의 점수 가중 (_retrieve 참고)
+        """
+        if not self.engine.doc_count or not query.strip():
+            logger.warning(f"BM25 검색 중단: documents={self.engine.doc_count}, query='{query.strip()}'")
             return []
         
         try:
             logger.debug(f"BM25 검색 시작: query='{query}', limit={limit}")
-            nodes_with_scores = self.retriever.retrieve(query)
+            indexed_filters, filters = self._split_filters(filters)
+            nodes_with_scores = self._retrieve(
+                query, self._fetch_size(limit, filters), indexed_filters, field_weights,
+                phrase_query, proximity_window, proximity_boost
+            )
             logger.debug(f"BM25 원시 결과: {len(nodes_with_scores)}개")
             
             results = []
-            for i, node_with_score in enumerate(nodes_with_scores):
+            for i, (node, score) in enumerate(nodes_with_scores):
                 if len(results) >= limit:
                     break
-                    
-                node = node_with_score.node
-                score = node_with_score.score
                 
                 logger.debug(f"결과 #{i}: id={node.id_}, score={score}, content_length={len(node.text)}")
                 
@@ -465,6 +759,64 @@ class CodeBM25Index(BaseIndex):
             logger.error(f"점수별 BM25 검색 실패: {e}", exc_info=True)
             return []
     
+    async def find_symbol(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        식별자 질의의 심볼 정확 일치 조회 (BookController, BookController.createBook, 패키지 FQN)
+        
+        점수 계산 없이 심볼 필드 색인 키 하나만 찾으므로 식별자가 아닌 질의나 일치하는 청크가
+        없으면 빈 목록을 반환하고, 호출하는 쪽이 일반 검색으로 넘어간다.
+        """
+        symbol = normalize_symbol(query)
+        if symbol is None or not self.config.index_symbols:
+            return []
+        
+        results = []
+        with self._lock:
+            for doc_id in self.engine.field_doc_ids(SYMBOL_FIELD, symbol):
+                node = self._get_node(doc_id)
+                if node is None or (filters and not self._apply_filters(node.metadata, filters)):
+                    continue
+                results.append({
+                    'id': node.id_,
+                    'content': node.text,
+                    'metadata': node.metadata,
+                    'score': 1.0,
+                    'source': 'symbol'
+                })
+                if len(results) >= limit:
+                    break
+        return results
+    
+    async def complete_symbols(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        심볼 이름/camelCase 하위 토큰 접두사 자동완성 (BookServ -> BookService, findBy -> findByTitle)
+        
+        트라이는 첫 요청 때 저장된 메타데이터로 한 번 만들고, 이후에는 문서 추가/교체/삭제 때
+        증분으로 갱신한다.
+        """
+        if not prefix.strip():
+            return []
+        if self._symbol_trie is None:
+            await asyncio.to_thread(self._build_symbol_trie)
+        with self._lock:
+            trie = self._symbol_trie
+            return trie.complete(prefix.strip(), limit) if trie is not None else []
+    
+    def _build_symbol_trie(self):
+        with self._lock:
+            if self._symbol_trie is not None:
+                return
+            trie = SymbolTrie()
+            for node in self._iter_nodes():
+                for entry in metadata_symbol_entries(node.metadata):
+                    trie.add(entry)
+            self._symbol_trie = trie
+    
     def _apply_filters(self, metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
         """필터 적용"""
         try:
@@ -491,10 +843,7 @@ class CodeBM25Index(BaseIndex):
     async def update_document(self, doc_id: str, document: Dict[str, Any]) -> bool:
         """문서 업데이트"""
         try:
-            # 기존 문서 제거
-            await self.delete_document(doc_id)
-            
-            # 새 문서 추가
+            # 추가가 같은 ID의 기존 문서를 교체하므로 (기반 문서는 삭제 표시) 저널 커밋 한 번으로 끝난다
             updated_doc = document.copy()
             updated_doc['id'] = doc_id
             added_ids = await self.add_documents([updated_doc])
@@ -512,25 +861,18 @@ class CodeBM25Index(BaseIndex):
     async def delete_document(self, doc_id: str) -> bool:
         """문서 삭제"""
         try:
-            # 노드 목록에서 제거
-            original_count = len(self.nodes)
-            self.nodes = [node for node in self.nodes if node.id_ != doc_id]
-            removed_count = original_count - len(self.nodes)
+            self._check_writable()
             
-            # 문서 맵에서 제거
-            if doc_id in self.documents_map:
-                del self.documents_map[doc_id]
+            # 노드와 역색인에서 제거 (해당 문서의 포스팅만 정리)
+            with self._lock:
+                removed = self._remove_node(doc_id)
+                seq = self._log([{"op": "delete", "id": doc_id}]) if removed else None
             
-            # Retriever 재구성
-            self._build_retriever()
-            
-            # 인덱스 저장
-            await self._save_index()
-            
-            if removed_count > 0:
+            if removed:
+                await self._commit(seq)
                 logger.info(f"문서 삭제 완료: {doc_id}")
             
-            return removed_count > 0
+            return removed
             
         except Exception as e:
             logger.error(f"문서 삭제 실패 ({doc_id}): {e}")
@@ -539,50 +881,8 @@ class CodeBM25Index(BaseIndex):
     async def get_stats(self) -> Dict[str, Any]:
         """인덱스 통계 정보"""
         try:
-            total_docs = len(self.nodes)
-            
-            if total_docs == 0:
-                return {
-                    "total_documents": 0,
-                    "total_tokens": 0,
-                    "average_tokens_per_doc": 0.0,
-                    "language_distribution": {},
-                    "bm25_parameters": {
-                        "k1": self.config.k1,
-                        "b": self.config.b
-                    },
-                    "index_path": str(self.config.index_path)
-                }
-            
-            # 토큰 수 계산
-            total_tokens = 0
-            for node in self.nodes:
-                try:
-                    tokens = self.tokenizer.tokenize(node.text)
-                    total_tokens += len(tokens)
-                except:
-                    # 토큰화 실패 시 대략적인 추정
-                    total_tokens += len(node.text.split())
-            
-            avg_tokens = total_tokens / total_docs if total_docs > 0 else 0
-            
-            # 언어별 문서 수 계산
-            language_stats = {}
-            for node in self.nodes:
-                lang = node.metadata.get('language', 'unknown')
-                language_stats[lang] = language_stats.get(lang, 0) + 1
-            
-            return {
-                "total_documents": total_docs,
-                "total_tokens": total_tokens,
-                "average_tokens_per_doc": round(avg_tokens, 2),
-                "language_distribution": language_stats,
-                "bm25_parameters": {
-                    "k1": self.config.k1,
-                    "b": self.config.b
-                },
-                "index_path": str(self.config.index_path)
-            }
+            with self._lock:
+                return self._compute_stats()
             
         except Exception as e:
             logger.error(f"통계 정보 조회 실패: {e}")
@@ -592,69 +892,370 @@ class CodeBM25Index(BaseIndex):
                 "error": str(e)
             }
     
-    async def _save_index(self):
-        """인덱스 저장"""
+    def _compute_stats(self) -> Dict[str, Any]:
+        """통계 계산 (락 안에서 호출, 유지 중인 집계만 읽으므로 컬렉션 크기와 무관)"""
+        disk_bytes = self.documents.file_size + sum(
+            path.stat().st_size for path in (self.segment_path, self.journal_path, self.manifest_path)
+            if path.exists()
+        )
+        return self._format_stats(self.config, self._counters(), disk_bytes)
+    
+    def _counters(self) -> Dict[str, Any]:
+        """매니페스트에 저장하는 통계 집계 (락 안에서 호출)"""
+        return {
+            "documents": self.engine.doc_count,
+            # 원문(code 필드) 토큰 수
+            "tokens": self.engine.field_total_length(DEFAULT_TEXT_FIELD),
+            "vocabulary": self.engine.vocabulary_size,
+            "languages": dict(self._languages)
+        }
+    
+    @staticmethod
+    def _format_stats(config: BM25IndexConfig, counters: Dict[str, Any], disk_bytes: int) -> Dict[str, Any]:
+        total_docs = counters["documents"]
+        total_tokens = counters["tokens"]
+        return {
+            "total_documents": total_docs,
+            "total_tokens": total_tokens,
+            "average_tokens_per_doc": round(total_tokens / total_docs, 2) if total_docs else 0.0,
+            "language_distribution": counters["languages"],
+            "vocabulary_size": counters["vocabulary"],
+            "disk_bytes": disk_bytes,
+            "bm25_parameters": {
+                "k1": config.k1,
+                "b": config.b
+            },
+            "index_path": str(config.index_path)
+        }
+    
+    @classmethod
+    def read_persisted_stats(cls, config: BM25IndexConfig) -> Optional[Dict[str, Any]]:
+        """
+        로드하지 않은 컬렉션의 통계를 매니페스트에서 읽음
+        
+        마지막 스냅샷 이후 저널에 변경이 남아 있거나 통계가 없는 (이전 버전) 매니페스트면
+        None을 반환하므로 호출자는 인덱스를 로드해서 get_stats()를 호출해야 한다.
+        """
+        index_path = Path(config.index_path)
+        paths = [index_path / name for name in (cls.SEGMENT_FILE, cls.JOURNAL_FILE, cls.MANIFEST_FILE)]
         try:
-            # 노드 데이터 저장
-            nodes_data = []
-            for node in self.nodes:
-                nodes_data.append({
-                    'id': node.id_,
-                    'text': node.text,
-                    'metadata': node.metadata
-                })
+            journal_path = index_path / cls.JOURNAL_FILE
+            if journal_path.exists() and journal_path.stat().st_size:
+                return None
+            with open(index_path / cls.MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                counters = json.load(f).get("stats")
+            if counters is None:
+                return None
+            disk_bytes = sum(path.stat().st_size for path in paths if path.exists())
+        except (OSError, ValueError) as e:
+            logger.debug(f"BM25 통계 매니페스트 읽기 실패 ({index_path}): {e}")
+            return None
+        return cls._format_stats(config, counters, disk_bytes)
+    
+    def estimated_memory_bytes(self) -> int:
+        """상주 메모리 근사치 (역색인 + 문서 저장소 위치 색인, 원문은 파일에 있으므로 제외)"""
+        with self._lock:
+            size = self.engine.estimated_memory_bytes() + self.documents.estimated_memory_bytes()
+            if self._symbol_trie is not None:
+                size += len(self._symbol_trie) * self.SYMBOL_TRIE_ENTRY_BYTES
+            return size
+    
+    @property
+    def segment_path(self) -> Path:
+        return self.config.index_path / self.SEGMENT_FILE
+    
+    @property
+    def journal_path(self) -> Path:
+        return self.config.index_path / self.JOURNAL_FILE
+    
+    @property
+    def manifest_path(self) -> Path:
+        return self.config.index_path / self.MANIFEST_FILE
+    
+    def _log(self, records: List[Dict[str, Any]]) -> Optional[int]:
+        """변경을 저널 버퍼에 추가 (엔진 반영과 같은 락 안에서 호출)"""
+        if self._journal is None:
+            return None
+        self._applied_seq = self._journal.enqueue(records)
+        return self._applied_seq
+    
+    async def _commit(self, seq: Optional[int]):
+        """저널 기록 완료까지 대기 후 백그라운드 스냅샷 예약"""
+        if self._journal is None:
+            # setup() 전에는 저널이 없으므로 바로 스냅샷
+            await self._save_index()
+            return
+        
+        # 동시에 커밋하는 다른 배치와 한 번의 fsync로 묶인다
+        await asyncio.to_thread(self._journal.sync, seq)
+        if self._snapshots is not None:
+            self._snapshots.notify()
+    
+    def _open_journal(self) -> int:
+        """저널 열기 및 마지막 스냅샷 이후 레코드 재생, 재생 건수 반환"""
+        self._journal = BM25WriteJournal(self.journal_path, fsync=self.config.journal_fsync)
+        self._journal.ensure_seq_at_least(self._applied_seq)
+        
+        replayed = 0
+        with self._lock:
+            for seq, record in self._journal.replay(after_seq=self._applied_seq):
+                self._apply_record(record)
+                self._applied_seq = seq
+                replayed += 1
+        return replayed
+    
+    def _apply_record(self, record: Dict[str, Any]):
+        """저널 레코드 하나를 인덱스에 반영"""
+        if record["op"] == "add":
+            self._index_node(
+                TextNode(text=record["text"], metadata=record["metadata"], id_=record["id"]), record.get("fields")
+            )
+        elif record["op"] == "delete":
+            self._remove_node(record["id"])
+        else:
+            logger.warning(f"알 수 없는 BM25 저널 레코드: {record.get('op')}")
+    
+    def merge(self) -> bool:
+        """
+        병합 정책을 만족할 때만 스냅샷 (백그라운드 스케줄러에서 호출)
+        
+        세그먼트 재작성은 컬렉션 크기에 비례하므로 변경마다 하지 않는다. 변경분은 저널로
+        내구성이 보장되고 삭제는 비트셋으로 걸러지므로, 삭제 표시 비율이나 저널에 쌓인
+        레코드 수가 기준을 넘을 때만 기반 세그먼트와 변경분을 합쳐 다시 쓴다.
+        
+        Returns:
+            새 세그먼트를 기록했는지 여부
+        """
+        with self._lock:
+            due = self._merge_due()
+        return self.snapshot() if due else False
+    
+    def _merge_due(self) -> bool:
+        """병합 정책 판단 (락 안에서 호출)"""
+        engine = self.engine
+        pending_records = self._applied_seq - self._segment_seq
+        if not engine.has_pending_changes and not pending_records:
+            return False
+        if engine.base is None or not engine.base.has_blocks:
+            return True
+        if engine.base_deleted_ratio >= self.config.merge_deleted_ratio:
+            return True
+        return pending_records >= max(
+            self.config.merge_min_pending_records, self.config.merge_pending_ratio * engine.base.doc_count
+        )
+    
+    def snapshot(self) -> bool:
+        """
+        메모리 변경분을 세그먼트로 기록 (백그라운드 스레드에서 호출 가능)
+        
+        병합 정책과 무관하게 기반 세그먼트와 변경분을 합쳐 다시 쓴다 (삭제 표시된 문서는 제거).
+        락은 변경분 복사와 기반 교체에만 잡으므로 기록 중에도 검색과 쓰기가 계속된다.
+        
+        Returns:
+            새 세그먼트를 기록했는지 여부
+        """
+        with self._snapshot_lock:
+            if self._retired:
+                return False
+            with self._lock:
+                if not self.engine.has_pending_changes and self.segment_path.exists():
+                    if self._applied_seq > self._segment_seq:
+                        # 저널 변경이 서로 상쇄된 경우 세그먼트는 그대로 두고 매니페스트만 앞당긴다
+                        self._write_manifest(self._applied_seq, self._counters())
+                        self._segment_seq = self._applied_seq
+                        if self._journal is not None:
+                            self._journal.truncate(self._segment_seq)
+                    return False
+                state = self.engine.capture_snapshot()
+                locations = self.documents.capture()
+                seq = self._applied_seq
+                counters = self._counters()
+            
+            def stored_payload(doc_id: str) -> bytes:
+                return self.documents.read(locations[doc_id])
             
-            nodes_file = self.config.index_path / "nodes.json"
-            with open(nodes_file, 'w', encoding='utf-8') as f:
-                json.dump(nodes_data, f, ensure_ascii=False, indent=2)
+            try:
+                size = self.engine.write_snapshot(self.segment_path, stored_payload, state)
+                segment = BM25SegmentReader(self.segment_path)
+                self._write_manifest(seq, counters)
+            except Exception:
+                with self._lock:
+                    self.engine.discard_snapshot()
+                raise
             
-            # 문서 맵 저장 (pickle은 선택적)
-            if self.documents_map:
-                docs_map_file = self.config.index_path / "documents_map.pkl"
-                with open(docs_map_file, 'wb') as f:
-                    pickle.dump(self.documents_map, f)
+            with self._lock:
+                self.engine.complete_snapshot(segment)
+                self._segment_seq = seq
+                # 세그먼트에 기록된 문서는 문서 저장소에서 제외
+                self.documents.retain([doc_id for doc_id in self.documents if self.engine.in_memory(doc_id)])
             
-            logger.debug(f"BM25 인덱스 저장 완료: {len(self.nodes)}개 노드")
+            # 스냅샷에 포함된 저널 레코드 정리
+            if self._journal is not None:
+                self._journal.truncate(seq)
             
+            logger.debug(f"BM25 세그먼트 저장 완료: {self.engine.doc_count}개 문서, {size} bytes (저널 순번 {seq})")
+            return True
+    
+    def _write_manifest(self, journal_seq: int, counters: Dict[str, Any]):
+        """세그먼트가 반영한 저널 순번과 그 시점의 통계 집계 기록 (원자적 교체)"""
+        manifest = {"segment": self.SEGMENT_FILE, "journal_seq": journal_seq, "stats": counters}
+        tmp_path = self.manifest_path.with_name(self.MANIFEST_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _read_manifest(self) -> Dict[str, Any]:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    async def _save_index(self):
+        """인덱스 저장 (바이너리 세그먼트로 기록 후 mmap으로 다시 열기)"""
+        try:
+            await asyncio.to_thread(self.snapshot)
         except Exception as e:
             logger.error(f"인덱스 저장 실패: {e}")
     
+    def _check_writable(self):
+        if self._retired:
+            raise RuntimeError(f"교체된 BM25 인덱스 세대에는 쓸 수 없음: {self.config.index_path}")
+    
+    async def retire(self):
+        """
+        다음 세대로 교체되기 전 호출 (BM25IndexRegistry.replace)
+        
+        진행 중인 스냅샷이 끝나기를 기다린 뒤 백그라운드 기록과 저널을 닫아 교체된 디렉터리에
+        더 이상 쓰지 않게 한다. 이미 고정한 요청의 검색은 teardown() 전까지 계속 처리한다.
+        """
+        self._retired = True
+        await self._stop_background_writers()
+    
+    async def _stop_background_writers(self):
+        """스냅샷 스케줄러와 저널 종료"""
+        if self._snapshots is not None:
+            await asyncio.to_thread(self._snapshots.stop)
+            self._snapshots = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    
+    async def teardown(self, snapshot: bool = True):
+        """인덱스 종료 (남은 변경분을 스냅샷으로 기록)"""
+        if self._snapshots is not None:
+            await asyncio.to_thread(self._snapshots.stop)
+            self._snapshots = None
+        if snapshot:
+            await self._save_index()
+        await self._stop_background_writers()
+        
+        with self._lock:
+            self.engine.clear()
+            self.documents.close()
+            self._languages = Counter()
+            self._symbol_trie = None
+    
     async def _load_existing_index(self) -> bool:
         """기존 인덱스 로드"""
         try:
-            nodes_file = self.config.index_path / "nodes.json"
-            docs_map_file = self.config.index_path / "documents_map.pkl"
-            
-            if not nodes_file.exists():
-                return False
-            
-            # 노드 데이터 로드
-            with open(nodes_file, 'r', encoding='utf-8') as f:
-                nodes_data = json.load(f)
-            
-            self.nodes = []
-            for node_data in nodes_data:
-                node = TextNode(
-                    text=node_data['text'],
-                    metadata=node_data['metadata'],
-                    id_=node_data['id']
-                )
-                self.nodes.append(node)
-            
-            # 문서 맵 로드 (선택적)
-            self.documents_map = {}
-            if docs_map_file.exists():
-                try:
-                    with open(docs_map_file, 'rb') as f:
-                        self.documents_map = pickle.load(f)
-                except Exception as e:
-                    logger.warning(f"문서 맵 로드 실패: {e}")
-            
-            # Retriever 구성
-            self._build_retriever()
+            if self.segment_path.exists():
+                # 역직렬화 없이 mmap으로 열기만 한다
+                self.documents.clear()
+                self.engine.clear()
+                self.engine.attach_base(BM25SegmentReader(self.segment_path))
+                manifest = self._read_manifest()
+                self._applied_seq = self._segment_seq = int(manifest.get("journal_seq", 0))
+                
+                counters = manifest.get("stats")
+                if counters is not None:
+                    self._languages = Counter(counters["languages"])
+                else:
+                    # 통계 없이 기록된 이전 세그먼트는 한 번만 저장 필드를 읽어 집계
+                    self._languages = Counter(self._language_of(node.metadata) for node in self._iter_nodes())
+                return True
             
-            return True
+            self._applied_seq = self._segment_seq = 0
+            self._languages = Counter()
+            return await self._migrate_legacy_index()
             
+        except SegmentFormatError as e:
+            logger.warning(f"BM25 세그먼트 로드 실패: {e}")
+            return False
         except Exception as e:
             logger.warning(f"기존 인덱스 로드 실패: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    async def _migrate_legacy_index(self) -> bool:
+        """기존 nodes.json 인덱스를 세그먼트 포맷으로 변환"""
+        nodes_file = self.config.index_path / self.LEGACY_NODES_FILE
+        if not nodes_file.exists():
+            return False
+        
+        with open(nodes_file, 'r', encoding='utf-8') as f:
+            nodes_data = json.load(f)
+        
+        self.documents.clear()
+        self.engine.clear()
+        for node_data in nodes_data:
+            node = TextNode(
+                text=node_data['text'],
+                metadata=node_data['metadata'],
+                id_=node_data['id']
+            )
+            self._index_node(node)
+        
+        await self._save_index()
+        if not self.segment_path.exists():
+            return True
+        
+        # 세그먼트로 옮긴 뒤 기존 파일 정리
+        nodes_file.unlink()
+        docs_map_file = self.config.index_path / self.LEGACY_DOCS_MAP_FILE
+        if docs_map_file.exists():
+            docs_map_file.unlink()
+        
+        logger.info(f"기존 BM25 인덱스를 세그먼트 포맷으로 변환: {len(nodes_data)}개 문서")
+        return True
+
+
+# 작업 프로세스별 토큰화용 인덱스 (토큰화 설정별로 한 번만 생성)
+_worker_indexes: Dict[tuple, CodeBM25Index] = {}
+
+
+def prepare_document_chunk(
+    config: BM25IndexConfig,
+    documents: List[Union[EnhancedDocument, Dict[str, Any]]]
+) -> List[tuple]:
+    """프로세스 풀 작업: 문서 청크의 (TextNode, 텍스트 필드, 용어 빈도) 목록을 입력 순서대로 반환"""
+    key = (config.language, config.include_metadata, config.text_fields, config.store_positions)
+    index = _worker_indexes.get(key)
+    if index is None:
+        index = _worker_indexes[key] = CodeBM25Index(config)
+    return [index._prepare_document(doc) for doc in documents]
+
+
+def build_generation(
+    config: BM25IndexConfig,
+    documents: List[Union[EnhancedDocument, Dict[str, Any]]]
+) -> List[str]:
+    """
+    재구성 작업 프로세스: config.index_path에 다음 세대 세그먼트를 기록하고 추가된 문서 ID 반환
+    
+    setup() 전에는 저널이 없으므로 추가가 끝나면 바로 세그먼트와 매니페스트로 기록된다.
+    """
+    config = copy.copy(config)
+    config.background_snapshot = False
+    index = CodeBM25Index(config)
+    
+    async def build() -> List[str]:
+        try:
+            added_ids = await index.add_documents(documents)
+            if added_ids and not index.segment_path.exists():
+                raise RuntimeError(f"다음 세대 세그먼트 기록 실패: {config.index_path}")
+            return added_ids
+        finally:
+            await index.teardown(snapshot=False)
+    
+    return asyncio.run(build())
@@ -0,0 +1,255 @@
+"""
+BM25 쓰기 저널과 백그라운드 스냅샷
+
+문서 추가/삭제는 append-only 저널에 기록하고, 전체 세그먼트 재작성(스냅샷)은
+백그라운드 스레드에서 디바운스 간격으로 병합 정책을 확인해 수행한다. 쓰기 지연은 배치
+크기에만 비례하고, 재시작 시 마지막 스냅샷 이후의 저널을 재생하여 복구한다.
+
+레코드 포맷 (리틀 엔디언)
+    [payload 길이 u32][crc32 u32][seq u64][JSON payload]
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("<IIQ")
+
+
+class BM25WriteJournal:
+    """
+    그룹 커밋을 지원하는 append-only 저널
+
+    enqueue()는 레코드에 순번을 매겨 버퍼에 쌓기만 하고, sync()를 호출한 여러
+    작성자 중 하나가 대표로 버퍼 전체를 한 번의 write + fsync로 기록한다.
+    """
+
+    def __init__(self, path: Path, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._flushing = False
+        self._file = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._last_seq = self._recover()
+        self._durable_seq = self._last_seq
+        self._file = open(self.path, "ab")
+
+    @property
+    def last_seq(self) -> int:
+        """마지막으로 순번이 매겨진 레코드"""
+        return self._last_seq
+
+    @property
+    def durable_seq(self) -> int:
+        return self._durable_seq
+
+    def _read_frames(self) -> Tuple[List[Tuple[int, bytes]], int]:
+        """저널 파일 파싱 - (seq, payload) 목록과 마지막 정상 레코드 끝 위치"""
+        if not self.path.exists():
+            return [], 0
+
+        data = self.path.read_bytes()
+        frames = []
+        position = 0
+        while position + _FRAME.size <= len(data):
+            length, crc, seq = _FRAME.unpack_from(data, position)
+            start = position + _FRAME.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            frames.append((seq, payload))
+            position = start + length
+        return frames, position
+
+    def _recover(self) -> int:
+        """손상된 꼬리 레코드를 잘라내고 마지막 순번 반환"""
+        frames, valid_end = self._read_frames()
+        if self.path.exists() and self.path.stat().st_size > valid_end:
+            logger.warning(f"BM25 저널 손상 구간 제거: {self.path} ({valid_end} bytes 이후)")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+        return frames[-1][0] if frames else 0
+
+    def ensure_seq_at_least(self, seq: int) -> None:
+        """스냅샷이 저널보다 앞선 경우 순번 이어가기"""
+        with self._cond:
+            if seq > self._last_seq:
+                self._last_seq = seq
+                self._durable_seq = max(self._durable_seq, seq)
+
+    def enqueue(self, records: List[Dict[str, Any]]) -> int:
+        """레코드를 버퍼에 추가하고 마지막 순번 반환 (I/O 없음)"""
+        with self._cond:
+            for record in records:
+                self._last_seq += 1
+                payload = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+                self._pending.append(_FRAME.pack(len(payload), zlib.crc32(payload), self._last_seq) + payload)
+            return self._last_seq
+
+    def sync(self, seq: int) -> None:
+        """seq까지 디스크에 기록될 때까지 대기 (그룹 커밋)"""
+        with self._cond:
+            while self._durable_seq < seq:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+
+                # 대표 작성자: 지금까지 쌓인 모든 레코드를 한 번에 기록
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                target = self._last_seq
+                self._cond.release()
+                try:
+                    self._write(batch)
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self._cond.notify_all()
+                self._durable_seq = max(self._durable_seq, target)
+
+    def _write(self, frames: List[bytes]) -> None:
+        if not frames:
+            return
+        self._file.write(b"".join(frames))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def replay(self, after_seq: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """after_seq 이후 레코드 재생"""
+        frames, _ = self._read_frames()
+        for seq, payload in frames:
+            if seq > after_seq:
+                yield seq, json.loads(payload)
+
+    def truncate(self, upto_seq: int) -> None:
+        """스냅샷에 반영된 upto_seq 이하 레코드 제거"""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+
+            frames, _ = self._read_frames()
+            remaining = [
+                _FRAME.pack(len(payload), zlib.crc32(payload), seq) + payload
+                for seq, payload in frames if seq > upto_seq
+            ]
+            # 아직 기록되지 않은 레코드 중 스냅샷에 포함된 것은 버림
+            self._pending = [
+                frame for frame in self._pending
+                if _FRAME.unpack_from(frame, 0)[2] > upto_seq
+            ]
+
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(remaining))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "ab")
+
+            # 스냅샷이 내구성을 보장하므로 대기 중인 작성자를 깨운다
+            self._durable_seq = max(self._durable_seq, upto_seq)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._file is None:
+                return
+            try:
+                self._write(self._pending)
+                self._pending = []
+                self._durable_seq = self._last_seq
+            finally:
+                self._file.close()
+                self._file = None
+
+
+class BM25SnapshotScheduler:
+    """
+    디바운스 기반 백그라운드 스냅샷 스케줄러
+
+    마지막 쓰기 이후 debounce_seconds 동안 추가 쓰기가 없거나, 첫 미반영 쓰기 이후
+    max_delay_seconds가 지나면 snapshot_fn을 백그라운드 스레드에서 실행한다.
+    """
+
+    def __init__(
+        self,
+        snapshot_fn: Callable[[], Any],
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        name: str = "bm25-snapshot"
+    ):
+        self.snapshot_fn = snapshot_fn
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+        self._cond = threading.Condition()
+        self._first_dirty: Optional[float] = None
+        self._last_write: Optional[float] = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> bool:
+        return self._first_dirty is not None
+
+    def notify(self) -> None:
+        """쓰기 발생 알림"""
+        with self._cond:
+            now = time.monotonic()
+            if self._first_dirty is None:
+                self._first_dirty = now
+            self._last_write = now
+            self._cond.notify()
+
+    def _due_in(self) -> Optional[float]:
+        if self._first_dirty is None:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(
+            self._last_write + self.debounce_seconds - now,
+            self._first_dirty + self.max_delay_seconds - now
+        ))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    due_in = self._due_in()
+                    if due_in == 0.0:
+                        break
+                    self._cond.wait(due_in)
+                if not self._running:
+                    return
+                self._first_dirty = None
+                self._last_write = None
+
+            try:
+                self.snapshot_fn()
+            except Exception as e:
+                logger.error(f"BM25 백그라운드 스냅샷 실패: {e}", exc_info=True)
+                # 다음 주기에 다시 시도
+                self.notify()
+
+    def stop(self) -> None:
+        """스케줄러 종료 (진행 중인 스냅샷은 완료까지 대기)"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
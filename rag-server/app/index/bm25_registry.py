@@ -0,0 +1,213 @@
+"""
+컬렉션별 BM25 인덱스 레지스트리
+
+한 프로세스에서 여러 프로젝트 컬렉션을 제공할 때 한 번 접근한 인덱스가 메모리에
+계속 남지 않도록, 첫 조회 시 지연 로드하고 추정 상주 크기가 예산을 넘으면 가장 오래
+사용하지 않은 인덱스를 디스크(콜드) 상태로 내린다.
+
+재구성은 다음 세대 인덱스를 따로 만든 뒤 replace()로 참조를 한 번에 바꾼다. 조회는
+acquire() 시점의 세대를 고정(pin)해서 쓰므로 교체 중에도 이전 세대나 새 세대 중 하나만
+보며, 이전 세대는 마지막 사용이 끝날 때 종료한다.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .bm25_index import CodeBM25Index
+
+logger = logging.getLogger(__name__)
+
+
+class BM25IndexRegistry:
+    """메모리 예산 기반 LRU 인덱스 레지스트리"""
+
+    def __init__(
+        self,
+        index_factory: Callable[[str], CodeBM25Index],
+        memory_budget_bytes: int = 512 * 1024 * 1024
+    ):
+        self.index_factory = index_factory
+        self.memory_budget_bytes = memory_budget_bytes
+
+        # 사용 순서대로 정렬된 상주 인덱스 (마지막이 가장 최근)
+        self._resident: "OrderedDict[str, CodeBM25Index]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        # 인덱스 객체(id)별 사용 중인 요청 수, 교체됐지만 아직 사용 중인 이전 세대
+        self._pins: Dict[int, int] = {}
+        self._retired: Dict[int, CodeBM25Index] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, collection_name: str) -> bool:
+        return collection_name in self._resident
+
+    @property
+    def resident_collections(self) -> List[str]:
+        return list(self._resident)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def generation(self, collection_name: str) -> int:
+        """컬렉션 인덱스 세대 번호 (replace()마다 증가, 처음 로드한 세대는 0)"""
+        return self._generations.get(collection_name, 0)
+
+    async def get(self, collection_name: str) -> CodeBM25Index:
+        """인덱스 조회 (없으면 디스크에서 로드)"""
+        index = self._resident.get(collection_name)
+        if index is not None:
+            self.hits += 1
+            self._resident.move_to_end(collection_name)
+            return index
+
+        async with self._lock:
+            # 대기하는 동안 다른 요청이 로드했을 수 있음
+            index = self._resident.get(collection_name)
+            if index is not None:
+                self.hits += 1
+                self._resident.move_to_end(collection_name)
+                return index
+
+            self.misses += 1
+            index = self.index_factory(collection_name)
+            await index.setup()
+            self._resident[collection_name] = index
+            self._sizes[collection_name] = index.estimated_memory_bytes()
+            logger.info(f"BM25 인덱스 로드: {collection_name} ({self._sizes[collection_name]} bytes)")
+
+            await self._enforce_budget(keep=collection_name)
+            return index
+
+    @asynccontextmanager
+    async def acquire(self, collection_name: str) -> AsyncIterator[CodeBM25Index]:
+        """사용하는 동안 축출되거나 종료되지 않도록 현재 세대 인덱스 고정"""
+        index = await self.get(collection_name)
+        key = id(index)
+        self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield index
+        finally:
+            self._pins[key] -= 1
+            if not self._pins[key]:
+                del self._pins[key]
+                # 교체된 세대의 마지막 사용이 끝나면 종료
+                retired = self._retired.pop(key, None)
+                if retired is not None:
+                    await retired.teardown(snapshot=False)
+
+    async def replace(self, collection_name: str, install: Callable[[], Any]) -> int:
+        """
+        컬렉션을 다음 세대 인덱스로 원자적 교체
+
+        이전 세대의 백그라운드 기록을 멈춘 뒤 install()로 디스크의 컬렉션을 다음 세대로 바꾸고
+        (디렉터리 교체), 새 인덱스를 로드해 참조를 한 번에 바꾼다. 교체 전까지 조회는 이전
+        세대가 처리하고, 이전 세대를 고정한 요청은 끝날 때까지 그 세대를 그대로 쓴다.
+
+        Returns:
+            새 세대 번호
+        """
+        async with self._lock:
+            previous: Optional[CodeBM25Index] = self._resident.get(collection_name)
+            if previous is not None:
+                await previous.retire()
+            await asyncio.to_thread(install)
+
+            index = self.index_factory(collection_name)
+            await index.setup()
+            self._resident[collection_name] = index
+            self._resident.move_to_end(collection_name)
+            self._sizes[collection_name] = index.estimated_memory_bytes()
+            generation = self._generations[collection_name] = self.generation(collection_name) + 1
+            logger.info(f"BM25 인덱스 세대 교체: {collection_name} -> {generation}")
+
+            if previous is not None:
+                if self._pins.get(id(previous)):
+                    self._retired[id(previous)] = previous
+                else:
+                    await previous.teardown(snapshot=False)
+
+            await self._enforce_budget(keep=collection_name)
+            return generation
+
+    async def refresh_size(self, collection_name: str):
+        """쓰기 이후 크기 재추정 및 예산 확인"""
+        index = self._resident.get(collection_name)
+        if index is None:
+            return
+        self._sizes[collection_name] = index.estimated_memory_bytes()
+        async with self._lock:
+            await self._enforce_budget(keep=collection_name)
+
+    async def _enforce_budget(self, keep: str):
+        """예산을 넘으면 LRU 순서로 축출 (방금 사용한 인덱스와 사용 중인 인덱스 제외)"""
+        for name in list(self._resident):
+            if self.resident_bytes <= self.memory_budget_bytes:
+                return
+            if name == keep or self._pins.get(id(self._resident[name])):
+                continue
+            await self._evict(name, snapshot=True)
+
+    async def _evict(self, collection_name: str, snapshot: bool):
+        index = self._resident.pop(collection_name)
+        size = self._sizes.pop(collection_name, 0)
+        await index.teardown(snapshot=snapshot)
+        self.evictions += 1
+        logger.info(f"BM25 인덱스 축출: {collection_name} ({size} bytes)")
+
+    async def evict(self, collection_name: str) -> bool:
+        """인덱스를 콜드 상태로 내림 (변경분은 세그먼트로 기록, 사용 중인 인덱스는 내리지 않음)"""
+        async with self._lock:
+            index = self._resident.get(collection_name)
+            if index is None or self._pins.get(id(index)):
+                return False
+            await self._evict(collection_name, snapshot=True)
+            return True
+
+    async def discard(self, collection_name: str) -> bool:
+        """
+        스냅샷 없이 인덱스 종료 (컬렉션 삭제용)
+
+        사용 중인 인덱스는 replace()의 이전 세대처럼 기록만 멈추고, 고정한 요청이 끝날 때 종료한다.
+        """
+        async with self._lock:
+            index = self._resident.pop(collection_name, None)
+            self._sizes.pop(collection_name, None)
+            if index is None:
+                return False
+            if self._pins.get(id(index)):
+                await index.retire()
+                self._retired[id(index)] = index
+            else:
+                await index.teardown(snapshot=False)
+            return True
+
+    async def close(self):
+        """모든 상주 인덱스 종료"""
+        async with self._lock:
+            while self._resident:
+                _, index = self._resident.popitem(last=False)
+                await index.teardown(snapshot=True)
+            while self._retired:
+                _, index = self._retired.popitem()
+                await index.teardown(snapshot=False)
+            self._sizes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """레지스트리 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "resident_collections": len(self._resident),
+            "resident_bytes": self.resident_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes
+        }
@@ -0,0 +1,766 @@
+"""
+BM25 세그먼트 파일 포맷
+
+nodes.json + documents_map.pkl 대신 사용하는 버전 관리되는 바이너리 포맷.
+mmap으로 열어 전체 코퍼스를 역직렬화하지 않고 바로 검색할 수 있다.
+
+레이아웃 (리틀 엔디언)
+    header      : magic, version, flags, doc_count, term_count, total_length
+    sections    : (offset, length) 테이블
+    TERMS       : 바이트 순으로 정렬된 용어 UTF-8 연결 (인턴된 어휘)
+    TERM_TABLE  : 용어별 고정 길이 레코드 (용어 위치, df, 포스팅 위치) - 이진 탐색용
+    POSTINGS    : 용어별 [doc 번호 델타 varint * df][tf varint * df]
+                  (v3) 용어별로 BLOCK_SIZE개씩 나눈 블록 [doc 델타 * n][tf * n], 블록 첫 doc은 절대값
+    BLOCKS      : (v3) 블록별 마지막 doc, 최대 tf, 최소 문서 길이, 바이트 위치 - 건너뛰기와
+                  점수 상한(MaxScore) 계산용
+    DOC_LENGTHS : uint32 문서 길이 컬럼
+    DOC_IDS     : 문서 ID 오프셋 + UTF-8 연결, ID 정렬 순서 (이진 탐색용)
+    STORED      : 문서별 JSON (text, metadata) 오프셋 + 연결 - 응답 생성 시에만 디코딩
+    FORWARD     : 문서별 [용어 수][term_id 델타 varint][tf varint] - 삭제 시 df 보정용
+    FIELDS      : (v2) 메타데이터 필드 값별 정렬된 문서 번호 델타 varint - 필터용
+                  키는 "필드\x00값" UTF-8, 테이블은 TERM_TABLE과 같은 레코드 형식
+    TEXT_FIELDS : (v4) BM25F 텍스트 필드 이름 ("\n" 구분)과 문서별 필드 길이 uint32 행렬
+                  (doc_count x 필드 수). 기본 필드(code) 밖의 용어는 "필드\x1f용어"로 저장하고,
+                  BLOCKS의 최소 문서 길이는 용어가 속한 필드의 길이 기준
+    POSITIONS   : (v5) 용어별로 POSTINGS와 같은 (doc) 순서의 [위치 델타 varint * tf] - 구문/근접 질의용.
+                  위치는 필드 안 토큰 순번(불용어 제거 후)이며 문서마다 첫 위치는 절대값.
+                  POSITION_OFFSETS는 용어별 바이트 위치 (term_count + 1, 위치를 저장하지 않으면 비어 있음)
+"""
+import json
+import mmap
+import os
+import struct
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SEGMENT_MAGIC = b"BM25SEG\x00"
+SEGMENT_VERSION = 5
+_SUPPORTED_VERSIONS = (1, 2, 3, 4, 5)
+BLOCK_SIZE = 128
+
+_HEADER = struct.Struct("<8sIIIIQ")
+_SECTION = struct.Struct("<QQ")
+_SECTIONS_V1 = (
+    "terms", "term_table", "postings", "doc_lengths",
+    "doc_id_offsets", "doc_ids", "doc_id_order",
+    "stored_offsets", "stored", "forward_offsets", "forward",
+)
+_SECTIONS_V2 = _SECTIONS_V1 + ("field_keys", "field_table", "field_postings")
+_SECTIONS_V3 = _SECTIONS_V2 + ("term_block_starts", "blocks")
+_SECTIONS_V4 = _SECTIONS_V3 + ("text_fields", "field_lengths")
+_SECTIONS = _SECTIONS_V4 + ("position_offsets", "positions")
+_SECTIONS_BY_VERSION = {1: _SECTIONS_V1, 2: _SECTIONS_V2, 3: _SECTIONS_V3, 4: _SECTIONS_V4, 5: _SECTIONS}
+
+DEFAULT_TEXT_FIELD = "code"
+_TEXT_FIELD_SEPARATOR = "\x1f"
+
+TERM_RECORD = np.dtype([
+    ("term_offset", "<u8"),
+    ("term_length", "<u4"),
+    ("df", "<u4"),
+    ("postings_offset", "<u8"),
+    ("postings_length", "<u8"),
+])
+
+BLOCK_RECORD = np.dtype([
+    ("last_doc", "<u4"),
+    ("max_tf", "<u4"),
+    ("min_length", "<u4"),
+    ("length", "<u4"),
+    ("offset", "<u8"),
+])
+
+_EMPTY_U64 = np.zeros(0, dtype=np.uint64)
+_EMPTY_I64 = np.zeros(0, dtype=np.int64)
+
+
+def field_key(field: str, value: str) -> str:
+    """필드 색인 키"""
+    return f"{field}\x00{value}"
+
+
+def text_field_term(field: str, term: str) -> str:
+    """BM25F 필드별 용어 키 (기본 필드는 용어 그대로)"""
+    return term if field == DEFAULT_TEXT_FIELD else f"{field}{_TEXT_FIELD_SEPARATOR}{term}"
+
+
+def text_field_of(term_key: str) -> str:
+    """용어 키가 속한 BM25F 필드"""
+    field, separator, _ = term_key.partition(_TEXT_FIELD_SEPARATOR)
+    return field if separator else DEFAULT_TEXT_FIELD
+
+
+def normalize_field_value(value: Any) -> Optional[str]:
+    """필드 값을 색인 키 문자열로 정규화 (문자열/Enum만 색인)"""
+    if isinstance(value, Enum):
+        value = value.value
+    return value if isinstance(value, str) else None
+
+
+def extract_field_values(metadata: Dict[str, Any], fields: Sequence[str]) -> List[str]:
+    """메타데이터에서 색인 대상 필드의 키 목록 추출 (리스트 값은 원소별로 색인)"""
+    keys = []
+    for field in fields:
+        value = metadata.get(field)
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        for item in values:
+            normalized = normalize_field_value(item)
+            if normalized is not None:
+                keys.append(field_key(field, normalized))
+    return list(dict.fromkeys(keys))
+
+
+class SegmentFormatError(Exception):
+    """세그먼트 파일 포맷 오류"""
+    pass
+
+
+def encode_varints(values: np.ndarray) -> Tuple[bytes, np.ndarray]:
+    """
+    부호 없는 정수 배열을 LEB128 varint로 인코딩 (벡터화)
+
+    Returns:
+        (인코딩된 바이트, 값별 바이트 수)
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+
+    if not len(values):
+        return b"", nbytes
+
+    starts = np.cumsum(nbytes) - nbytes
+    byte_index = np.arange(int(nbytes.sum()), dtype=np.int64) - np.repeat(starts, nbytes)
+    repeated = np.repeat(values, nbytes)
+    out = ((repeated >> (byte_index * 7).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    out[byte_index < np.repeat(nbytes - 1, nbytes)] |= 0x80
+    return out.tobytes(), nbytes
+
+
+def decode_varints(buffer) -> np.ndarray:
+    """LEB128 varint 스트림 디코딩 (벡터화)"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if not len(data):
+        return _EMPTY_U64
+
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    shifts = (np.arange(len(data), dtype=np.int64) - np.repeat(starts, lengths)) * 7
+    values = (data & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.add.reduceat(values, starts)
+
+
+def _group_starts(sizes: np.ndarray) -> np.ndarray:
+    return np.cumsum(sizes) - sizes
+
+
+def range_indices(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """[start, start + count) 구간들을 이어 붙인 인덱스 배열"""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if not total:
+        return _EMPTY_I64
+    return np.repeat(np.asarray(starts, dtype=np.int64) - _group_starts(counts), counts) + np.arange(total, dtype=np.int64)
+
+
+def _restore_runs(deltas: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """그룹별 [첫 값 절대값, 델타...] 연속을 절대값으로 복원"""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if not len(deltas):
+        return _EMPTY_I64
+    deltas = deltas.astype(np.int64)
+    cumulative = np.cumsum(deltas)
+    nonempty = sizes > 0
+    first = _group_starts(sizes)[nonempty]
+    return cumulative - np.repeat(cumulative[first] - deltas[first], sizes[nonempty])
+
+
+def _encode_groups(group_sizes: np.ndarray, keys: np.ndarray, values: Optional[np.ndarray],
+                   with_count: bool) -> Tuple[bytes, np.ndarray]:
+    """
+    정렬된 (key, value) 쌍을 그룹별 [count?][key 델타 * n][value * n] 블록으로 인코딩
+    (values가 None이면 [count?][key 델타 * n])
+
+    Returns:
+        (연결된 바이트, 그룹별 바이트 오프셋 (len = 그룹 수 + 1))
+    """
+    group_sizes = np.asarray(group_sizes, dtype=np.int64)
+    header = 1 if with_count else 0
+    group_starts = _group_starts(group_sizes)
+    width = 1 if values is None else 2
+    block_sizes = group_sizes * width + header
+    block_starts = _group_starts(block_sizes)
+
+    repeated_group_start = np.repeat(group_starts, group_sizes)
+    repeated_block_start = np.repeat(block_starts, group_sizes)
+    repeated_size = np.repeat(group_sizes, group_sizes)
+    position = np.arange(len(keys), dtype=np.int64) - repeated_group_start
+
+    deltas = keys.astype(np.int64).copy()
+    if len(deltas):
+        deltas[1:] -= keys[:-1].astype(np.int64)
+        deltas[group_starts[group_sizes > 0]] = keys[group_starts[group_sizes > 0]]
+
+    flat = np.empty(int(block_sizes.sum()), dtype=np.uint64)
+    if with_count:
+        flat[block_starts] = group_sizes
+    flat[repeated_block_start + header + position] = deltas
+    if values is not None:
+        flat[repeated_block_start + header + repeated_size + position] = values
+
+    encoded, nbytes = encode_varints(flat)
+    byte_offsets = np.zeros(len(group_sizes) + 1, dtype=np.uint64)
+    if len(flat):
+        cumulative = np.concatenate(([0], np.cumsum(nbytes)))
+        byte_offsets[:-1] = cumulative[block_starts]
+        byte_offsets[-1] = cumulative[-1]
+    return encoded, byte_offsets
+
+
+def block_sizes(dfs: np.ndarray, block_size: int = BLOCK_SIZE) -> np.ndarray:
+    """용어별 df를 BLOCK_SIZE 단위 블록 크기 목록으로 펼침 (용어 순서대로)"""
+    dfs = np.asarray(dfs, dtype=np.int64)
+    nblocks = (dfs + block_size - 1) // block_size
+    index_in_term = np.arange(int(nblocks.sum()), dtype=np.int64) - np.repeat(_group_starts(nblocks), nblocks)
+    return np.minimum(block_size, np.repeat(dfs, nblocks) - index_in_term * block_size)
+
+
+def _decode_blocks(values: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """[doc 델타 * n][값 * n] 블록 연속을 (doc 번호, 값)으로 복원 (블록 첫 doc은 절대값)"""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    total = int(sizes.sum())
+    if not total:
+        return _EMPTY_I64, _EMPTY_I64
+
+    group_starts = _group_starts(sizes)
+    position = np.arange(total, dtype=np.int64) - np.repeat(group_starts, sizes)
+    delta_index = np.repeat(_group_starts(sizes * 2), sizes) + position
+    deltas = values[delta_index].astype(np.int64)
+    tfs = values[delta_index + np.repeat(sizes, sizes)].astype(np.int64)
+
+    # 블록별 누적합으로 델타 복원
+    nonempty = sizes > 0
+    cumulative = np.cumsum(deltas)
+    first = group_starts[nonempty]
+    doc_nums = cumulative - np.repeat(cumulative[first] - deltas[first], sizes[nonempty])
+    return doc_nums, tfs
+
+
+def _encode_term_table(offsets: np.ndarray, counts: np.ndarray, postings_offsets: np.ndarray) -> np.ndarray:
+    table = np.zeros(len(counts), dtype=TERM_RECORD)
+    table["term_offset"] = offsets[:-1]
+    table["term_length"] = np.diff(offsets).astype(np.uint32)
+    table["df"] = counts
+    table["postings_offset"] = postings_offsets[:-1]
+    table["postings_length"] = np.diff(postings_offsets)
+    return table
+
+
+def _pack_strings(values: Sequence[bytes]) -> Tuple[bytes, np.ndarray]:
+    offsets = np.zeros(len(values) + 1, dtype=np.uint64)
+    if values:
+        offsets[1:] = np.cumsum([len(v) for v in values])
+    return b"".join(values), offsets
+
+
+def encode_stored_document(text: str, metadata: Dict[str, Any]) -> bytes:
+    """저장 필드 인코딩"""
+    return json.dumps(
+        {"text": text, "metadata": metadata}, ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def decode_stored_document(payload: bytes) -> Dict[str, Any]:
+    """저장 필드 디코딩 (text, metadata)"""
+    return json.loads(payload)
+
+
+def write_segment(
+    path: Path,
+    terms: Sequence[str],
+    term_ids: np.ndarray,
+    doc_nums: np.ndarray,
+    term_freqs: np.ndarray,
+    doc_ids: Sequence[str],
+    doc_lengths: np.ndarray,
+    stored: Sequence[bytes],
+    field_keys: Sequence[str] = (),
+    field_key_ids: Optional[np.ndarray] = None,
+    field_doc_nums: Optional[np.ndarray] = None,
+    text_fields: Sequence[str] = (DEFAULT_TEXT_FIELD,),
+    field_lengths: Optional[np.ndarray] = None,
+    positions: Optional[np.ndarray] = None,
+) -> int:
+    """
+    세그먼트 파일 작성 (임시 파일에 쓴 뒤 원자적으로 교체)
+
+    Args:
+        terms: 바이트 순으로 정렬된 어휘
+        term_ids, doc_nums, term_freqs: (용어, 문서, tf) 포스팅 삼중항 (순서 무관)
+        doc_ids: 로컬 문서 번호 순 문서 ID
+        doc_lengths: 로컬 문서 번호 순 문서 길이
+        stored: 로컬 문서 번호 순 저장 필드 바이트
+        field_keys: 바이트 순으로 정렬된 필드 색인 키 (field_key())
+        field_key_ids, field_doc_nums: (필드 키, 문서) 쌍 (순서 무관)
+        text_fields: BM25F 텍스트 필드 이름 (첫 번째가 기본 필드)
+        field_lengths: 로컬 문서 번호 순 필드별 길이 (doc_count x 필드 수, 없으면 doc_lengths)
+        positions: 포스팅 입력 순서대로 tf개씩 이어 붙인 필드 안 토큰 위치 (포스팅마다 오름차순,
+            없으면 위치를 저장하지 않는 세그먼트)
+
+    Returns:
+        작성된 파일 크기 (bytes)
+    """
+    path = Path(path)
+    doc_count = len(doc_ids)
+    term_count = len(terms)
+    term_ids = np.asarray(term_ids, dtype=np.int64)
+    doc_nums = np.asarray(doc_nums, dtype=np.int64)
+    term_freqs = np.asarray(term_freqs, dtype=np.int64)
+    doc_lengths = np.asarray(doc_lengths, dtype=np.uint32)
+    text_fields = list(text_fields)
+    if field_lengths is None:
+        field_lengths = doc_lengths.reshape(-1, 1)
+    field_lengths = np.ascontiguousarray(field_lengths, dtype=np.uint32).reshape(doc_count, len(text_fields))
+
+    # 용어 사전
+    encoded_terms = [term.encode("utf-8") for term in terms]
+    terms_blob, term_offsets = _pack_strings(encoded_terms)
+
+    # 역방향 포스팅: (term, doc) 정렬
+    order = np.lexsort((doc_nums, term_ids))
+    by_term_docs = doc_nums[order]
+    by_term_tfs = term_freqs[order]
+    dfs = np.bincount(term_ids, minlength=term_count).astype(np.int64)
+    sizes = block_sizes(dfs)
+    postings_blob, block_offsets = _encode_groups(sizes, by_term_docs, by_term_tfs, with_count=False)
+
+    term_block_starts = np.zeros(term_count + 1, dtype=np.uint64)
+    term_block_starts[1:] = np.cumsum((dfs + BLOCK_SIZE - 1) // BLOCK_SIZE)
+    term_table = _encode_term_table(term_offsets, dfs, block_offsets[term_block_starts.astype(np.int64)])
+
+    # 블록별 건너뛰기/점수 상한 정보
+    blocks = np.zeros(len(sizes), dtype=BLOCK_RECORD)
+    if len(sizes):
+        posting_starts = _group_starts(sizes)
+        blocks["last_doc"] = by_term_docs[posting_starts + sizes - 1]
+        blocks["max_tf"] = np.maximum.reduceat(by_term_tfs, posting_starts)
+        # 용어가 속한 필드의 길이 (알 수 없는 필드는 전체 문서 길이)
+        field_columns = {field: i for i, field in enumerate(text_fields)}
+        term_columns = np.array([field_columns.get(text_field_of(term), -1) for term in terms], dtype=np.int64)
+        posting_columns = np.repeat(term_columns, dfs)
+        lengths = doc_lengths[by_term_docs].copy()
+        known = posting_columns >= 0
+        lengths[known] = field_lengths[by_term_docs[known], posting_columns[known]]
+        blocks["min_length"] = np.minimum.reduceat(lengths, posting_starts)
+        blocks["offset"] = block_offsets[:-1]
+        blocks["length"] = np.diff(block_offsets)
+
+    # 위치: 포스팅을 (term, doc) 순으로 옮기고 포스팅 안에서 델타 인코딩
+    positions_blob, position_offsets = b"", _EMPTY_U64
+    if positions is not None:
+        positions = np.asarray(positions, dtype=np.int64)
+        gathered = positions[range_indices(_group_starts(term_freqs)[order], by_term_tfs)]
+        deltas = gathered.copy()
+        deltas[1:] -= gathered[:-1]
+        first = _group_starts(by_term_tfs)
+        deltas[first] = gathered[first]
+        positions_blob, nbytes = encode_varints(deltas)
+        term_value_ends = np.zeros(term_count + 1, dtype=np.int64)
+        term_value_ends[1:] = np.cumsum(np.bincount(term_ids, weights=term_freqs, minlength=term_count))
+        position_offsets = np.concatenate(([0], np.cumsum(nbytes)))[term_value_ends].astype(np.uint64)
+
+    # 정방향 색인: (doc, term) 정렬
+    order = np.lexsort((term_ids, doc_nums))
+    forward_blob, forward_offsets = _encode_groups(
+        np.bincount(doc_nums, minlength=doc_count).astype(np.int64),
+        term_ids[order], term_freqs[order], with_count=True
+    )
+
+    # 문서 ID / 저장 필드
+    encoded_ids = [doc_id.encode("utf-8") for doc_id in doc_ids]
+    ids_blob, id_offsets = _pack_strings(encoded_ids)
+    id_order = np.array(
+        sorted(range(doc_count), key=encoded_ids.__getitem__), dtype=np.uint32
+    )
+    stored_blob, stored_offsets = _pack_strings(list(stored))
+
+    # 필드 색인: (키, doc) 정렬
+    field_key_ids = np.asarray(field_key_ids if field_key_ids is not None else _EMPTY_I64, dtype=np.int64)
+    field_doc_nums = np.asarray(field_doc_nums if field_doc_nums is not None else _EMPTY_I64, dtype=np.int64)
+    field_keys_blob, field_key_offsets = _pack_strings([key.encode("utf-8") for key in field_keys])
+    order = np.lexsort((field_doc_nums, field_key_ids))
+    field_counts = np.bincount(field_key_ids, minlength=len(field_keys)).astype(np.int64)
+    field_blob, field_offsets = _encode_groups(field_counts, field_doc_nums[order], None, with_count=False)
+    field_table = _encode_term_table(field_key_offsets, field_counts, field_offsets)
+
+    sections = {
+        "terms": terms_blob,
+        "term_table": term_table.tobytes(),
+        "postings": postings_blob,
+        "doc_lengths": doc_lengths.tobytes(),
+        "doc_id_offsets": id_offsets.tobytes(),
+        "doc_ids": ids_blob,
+        "doc_id_order": id_order.tobytes(),
+        "stored_offsets": stored_offsets.tobytes(),
+        "stored": stored_blob,
+        "forward_offsets": forward_offsets.tobytes(),
+        "forward": forward_blob,
+        "field_keys": field_keys_blob,
+        "field_table": field_table.tobytes(),
+        "field_postings": field_blob,
+        "term_block_starts": term_block_starts.tobytes(),
+        "blocks": blocks.tobytes(),
+        "text_fields": "\n".join(text_fields).encode("utf-8"),
+        "field_lengths": field_lengths.tobytes(),
+        "position_offsets": position_offsets.tobytes(),
+        "positions": positions_blob,
+    }
+
+    total_length = int(doc_lengths.sum(dtype=np.uint64))
+    header = _HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, len(field_keys), doc_count, term_count, total_length)
+    position = len(header) + _SECTION.size * len(_SECTIONS)
+
+    table = []
+    chunks = []
+    for name in _SECTIONS:
+        padding = (-position) % 8
+        chunks.append(b"\x00" * padding)
+        position += padding
+        data = sections[name]
+        table.append(_SECTION.pack(position, len(data)))
+        chunks.append(data)
+        position += len(data)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(table))
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return position
+
+
+class BM25SegmentReader:
+    """mmap 기반 읽기 전용 세그먼트"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SegmentFormatError(f"빈 세그먼트 파일: {self.path}")
+
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        if len(self._mm) < _HEADER.size:
+            raise SegmentFormatError(f"세그먼트 헤더 손상: {self.path}")
+
+        magic, version, field_key_count, doc_count, term_count, total_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != SEGMENT_MAGIC:
+            raise SegmentFormatError(f"세그먼트 파일이 아님: {self.path}")
+        if version not in _SUPPORTED_VERSIONS:
+            raise SegmentFormatError(f"지원하지 않는 세그먼트 버전 {version}: {self.path}")
+
+        self.version = version
+        self.doc_count = doc_count
+        self.term_count = term_count
+        self.total_length = total_length
+
+        self._sections = {}
+        for i, name in enumerate(_SECTIONS_BY_VERSION[version]):
+            self._sections[name] = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+
+        # 고정 폭 컬럼은 복사 없이 mmap 위의 뷰로 사용
+        self.term_table = self._array("term_table", TERM_RECORD, term_count)
+        self.doc_lengths = self._array("doc_lengths", np.uint32, doc_count)
+        self._doc_id_offsets = self._array("doc_id_offsets", np.uint64, doc_count + 1)
+        self._doc_id_order = self._array("doc_id_order", np.uint32, doc_count)
+        self._stored_offsets = self._array("stored_offsets", np.uint64, doc_count + 1)
+        self._forward_offsets = self._array("forward_offsets", np.uint64, doc_count + 1)
+
+        # v1 세그먼트는 필드 색인이 없으므로 처음 필터링할 때 저장 필드에서 만든다
+        self.field_key_count = field_key_count if version >= 2 else 0
+        self.field_table = (
+            self._array("field_table", TERM_RECORD, field_key_count) if version >= 2 else None
+        )
+        self._legacy_fields: Optional[Dict[str, np.ndarray]] = None
+        self._legacy_field_names: Tuple[str, ...] = ()
+
+        # v3 이전 세그먼트는 용어 전체가 하나의 블록 (건너뛰기 정보 없음)
+        self.has_blocks = version >= 3
+        if self.has_blocks:
+            self._term_block_starts = self._array("term_block_starts", np.uint64, term_count + 1)
+            block_count = int(self._term_block_starts[-1]) if term_count else 0
+            self.blocks = self._array("blocks", BLOCK_RECORD, block_count)
+        else:
+            self._term_block_starts = None
+            self.blocks = None
+
+        # v4 이전 세그먼트는 기본 필드 하나 (필드 길이 = 문서 길이)
+        if version >= 4:
+            offset, length = self._sections["text_fields"]
+            self.text_fields = tuple(self._mm[offset:offset + length].decode("utf-8").split("\n"))
+            self.field_lengths = self._array(
+                "field_lengths", np.uint32, doc_count * len(self.text_fields)
+            ).reshape(doc_count, len(self.text_fields))
+        else:
+            self.text_fields = (DEFAULT_TEXT_FIELD,)
+            self.field_lengths = self.doc_lengths.reshape(doc_count, 1)
+
+        # v5 세그먼트라도 위치를 저장하지 않았으면 구문/근접 질의에 쓸 수 없다
+        self.has_positions = version >= 5 and self._sections["position_offsets"][1] > 0
+        self._position_offsets = (
+            self._array("position_offsets", np.uint64, term_count + 1) if self.has_positions else None
+        )
+
+    def _array(self, section: str, dtype, count: int) -> np.ndarray:
+        offset, _ = self._sections[section]
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset)
+
+    def _slice(self, section: str, start: int, end: int) -> memoryview:
+        offset, _ = self._sections[section]
+        return memoryview(self._mm)[offset + start:offset + end]
+
+    @property
+    def file_size(self) -> int:
+        return len(self._mm)
+
+    def term(self, term_id: int) -> str:
+        record = self.term_table[term_id]
+        start = int(record["term_offset"])
+        return bytes(self._slice("terms", start, start + int(record["term_length"]))).decode("utf-8")
+
+    def terms(self) -> List[str]:
+        """전체 어휘 (병합/재작성 시에만 사용)"""
+        offset, length = self._sections["terms"]
+        blob = self._mm[offset:offset + length]
+        starts = self.term_table["term_offset"]
+        ends = starts + self.term_table["term_length"]
+        return [blob[int(s):int(e)].decode("utf-8") for s, e in zip(starts, ends)]
+
+    def lookup_term(self, term: str) -> Optional[int]:
+        """용어 ID 이진 탐색"""
+        key = term.encode("utf-8")
+        offsets = self.term_table["term_offset"]
+        lengths = self.term_table["term_length"]
+        base, _ = self._sections["terms"]
+        mm = self._mm
+
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + int(offsets[mid])
+            candidate = mm[start:start + int(lengths[mid])]
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def document_frequency(self, term: str) -> int:
+        term_id = self.lookup_term(term)
+        return 0 if term_id is None else int(self.term_table["df"][term_id])
+
+    def _term_block_sizes(self, term_id: int) -> np.ndarray:
+        df = int(self.term_table["df"][term_id])
+        if not self.has_blocks:
+            return np.array([df], dtype=np.int64)
+        return block_sizes(np.array([df]))
+
+    def postings_by_id(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """용어 ID의 포스팅 (로컬 문서 번호, tf) 디코딩"""
+        record = self.term_table[term_id]
+        start = int(record["postings_offset"])
+        values = decode_varints(self._slice("postings", start, start + int(record["postings_length"])))
+        return _decode_blocks(values, self._term_block_sizes(term_id))
+
+    def term_blocks(self, term_id: int) -> np.ndarray:
+        """용어의 블록 레코드 (v3 이상, mmap 뷰)"""
+        start = int(self._term_block_starts[term_id])
+        return self.blocks[start:int(self._term_block_starts[term_id + 1])]
+
+    def block_postings(self, term_id: int, block_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """선택한 블록만 디코딩 (block_ids는 용어 내 블록 번호, 오름차순)"""
+        blocks = self.term_blocks(term_id)[block_ids]
+        if not len(blocks):
+            return _EMPTY_I64, _EMPTY_I64
+        mm = self._mm
+        base, _ = self._sections["postings"]
+        data = b"".join(
+            mm[base + int(offset):base + int(offset) + int(length)]
+            for offset, length in zip(blocks["offset"], blocks["length"])
+        )
+        df = int(self.term_table["df"][term_id])
+        sizes = np.minimum(BLOCK_SIZE, df - np.asarray(block_ids, dtype=np.int64) * BLOCK_SIZE)
+        return _decode_blocks(decode_varints(data), sizes)
+
+    def term_positions(self, term_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """용어 ID의 포스팅과 위치 (로컬 문서 번호, tf, 포스팅 순서로 tf개씩 이어 붙인 위치) - 위치 세그먼트 전용"""
+        doc_nums, tfs = self.postings_by_id(term_id)
+        start, end = int(self._position_offsets[term_id]), int(self._position_offsets[term_id + 1])
+        return doc_nums, tfs, _restore_runs(decode_varints(self._slice("positions", start, end)), tfs)
+
+    def all_positions(self, term_freqs: np.ndarray) -> np.ndarray:
+        """전체 위치를 all_postings() 포스팅 순서로 디코딩 (term_freqs: all_postings()의 tf, 병합용)"""
+        offset, length = self._sections["positions"]
+        return _restore_runs(decode_varints(self._mm[offset:offset + length]), term_freqs)
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        term_id = self.lookup_term(term)
+        return None if term_id is None else self.postings_by_id(term_id)
+
+    def all_postings(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """전체 포스팅을 (term_id, doc_num, tf) 삼중항으로 디코딩 (병합용)"""
+        offset, length = self._sections["postings"]
+        values = decode_varints(self._mm[offset:offset + length])
+        dfs = self.term_table["df"].astype(np.int64)
+        if not int(dfs.sum()):
+            return _EMPTY_I64, _EMPTY_I64, _EMPTY_I64
+
+        doc_nums, tfs = _decode_blocks(values, block_sizes(dfs) if self.has_blocks else dfs)
+        term_ids = np.repeat(np.arange(self.term_count, dtype=np.int64), dfs)
+        return term_ids, doc_nums, tfs
+
+    def _lookup_field_key(self, key: str) -> Optional[int]:
+        encoded = key.encode("utf-8")
+        offsets = self.field_table["term_offset"]
+        lengths = self.field_table["term_length"]
+        base, _ = self._sections["field_keys"]
+        mm = self._mm
+
+        lo, hi = 0, self.field_key_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + int(offsets[mid])
+            candidate = mm[start:start + int(lengths[mid])]
+            if candidate < encoded:
+                lo = mid + 1
+            elif candidate > encoded:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _field_docs_by_id(self, key_id: int) -> np.ndarray:
+        record = self.field_table[key_id]
+        start = int(record["postings_offset"])
+        deltas = decode_varints(self._slice("field_postings", start, start + int(record["postings_length"])))
+        return np.cumsum(deltas).astype(np.int64)
+
+    def _build_legacy_fields(self, fields: Sequence[str]) -> Dict[str, np.ndarray]:
+        doc_lists: Dict[str, List[int]] = {}
+        for doc_num in range(self.doc_count):
+            metadata = self.stored_document(doc_num).get("metadata") or {}
+            for key in extract_field_values(metadata, fields):
+                doc_lists.setdefault(key, []).append(doc_num)
+        return {key: np.array(nums, dtype=np.int64) for key, nums in doc_lists.items()}
+
+    def field_docs(self, key: str, fields: Sequence[str] = ()) -> np.ndarray:
+        """필드 색인 키에 해당하는 정렬된 로컬 문서 번호"""
+        if self.version < 2:
+            if self._legacy_fields is None or tuple(fields) != self._legacy_field_names:
+                self._legacy_fields = self._build_legacy_fields(fields)
+                self._legacy_field_names = tuple(fields)
+            return self._legacy_fields.get(key, _EMPTY_I64)
+
+        key_id = self._lookup_field_key(key)
+        return _EMPTY_I64 if key_id is None else self._field_docs_by_id(key_id)
+
+    def all_field_postings(self, fields: Sequence[str] = ()) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """전체 필드 색인을 (키 목록, key_id, doc_num)으로 디코딩 (병합용)"""
+        if self.version < 2:
+            if self._legacy_fields is None or tuple(fields) != self._legacy_field_names:
+                self._legacy_fields = self._build_legacy_fields(fields)
+                self._legacy_field_names = tuple(fields)
+            keys = list(self._legacy_fields)
+            key_ids = [np.full(len(docs), i, dtype=np.int64) for i, docs in enumerate(self._legacy_fields.values())]
+            doc_nums = list(self._legacy_fields.values())
+        else:
+            offset, length = self._sections["field_keys"]
+            blob = self._mm[offset:offset + length]
+            starts = self.field_table["term_offset"]
+            ends = starts + self.field_table["term_length"]
+            keys = [blob[int(s):int(e)].decode("utf-8") for s, e in zip(starts, ends)]
+            doc_nums = [self._field_docs_by_id(i) for i in range(self.field_key_count)]
+            key_ids = [np.full(len(docs), i, dtype=np.int64) for i, docs in enumerate(doc_nums)]
+
+        if not keys:
+            return [], _EMPTY_I64, _EMPTY_I64
+        return keys, np.concatenate(key_ids), np.concatenate(doc_nums)
+
+    def doc_terms(self, doc_num: int) -> Dict[str, int]:
+        """문서의 용어별 tf (정방향 색인)"""
+        start = int(self._forward_offsets[doc_num])
+        end = int(self._forward_offsets[doc_num + 1])
+        values = decode_varints(self._slice("forward", start, end))
+        if not len(values):
+            return {}
+        count = int(values[0])
+        term_ids = np.cumsum(values[1:1 + count])
+        tfs = values[1 + count:1 + 2 * count]
+        return {self.term(int(t)): int(tf) for t, tf in zip(term_ids, tfs)}
+
+    def doc_id(self, doc_num: int) -> str:
+        start = int(self._doc_id_offsets[doc_num])
+        end = int(self._doc_id_offsets[doc_num + 1])
+        return bytes(self._slice("doc_ids", start, end)).decode("utf-8")
+
+    def find_doc(self, doc_id: str) -> Optional[int]:
+        """문서 ID로 로컬 문서 번호 이진 탐색"""
+        key = doc_id.encode("utf-8")
+        lo, hi = 0, self.doc_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            doc_num = int(self._doc_id_order[mid])
+            start = int(self._doc_id_offsets[doc_num])
+            candidate = bytes(self._slice("doc_ids", start, int(self._doc_id_offsets[doc_num + 1])))
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return doc_num
+        return None
+
+    def stored_bytes(self, doc_num: int) -> bytes:
+        start = int(self._stored_offsets[doc_num])
+        end = int(self._stored_offsets[doc_num + 1])
+        return bytes(self._slice("stored", start, end))
+
+    def stored_document(self, doc_num: int) -> Dict[str, Any]:
+        """저장 필드 디코딩 (text, metadata)"""
+        return decode_stored_document(self.stored_bytes(doc_num))
+
+    def close(self):
+        """mmap 해제 (남아 있는 뷰가 있으면 GC에 맡긴다)"""
+        for name in ("term_table", "doc_lengths", "_doc_id_offsets", "_doc_id_order",
+                     "_stored_offsets", "_forward_offsets", "field_table", "_term_block_starts", "blocks",
+                     "field_lengths", "_position_offsets"):
+            self.__dict__.pop(name, None)
+        try:
+            self._mm.close()
+        except (BufferError, AttributeError):
+            pass
+        self._file.close()
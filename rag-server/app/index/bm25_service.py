@@ -1,7 +1,18 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional, Set
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import copy
 import logging
+import multiprocessing
+import os
+import shutil
+import uuid
 
-from .bm25_index import CodeBM25Index, BM25IndexConfig
+from .bm25_index import CodeBM25Index, BM25IndexConfig, build_generation, prepare_document_chunk
+from .bm25_registry import BM25IndexRegistry
+from app.core.config import settings
 from app.retriever.document_builder import EnhancedDocument
 
 logger = logging.getLogger(__name__)
@@ -10,35 +21,107 @@ logger = logging.getLogger(__name__)
 class BM25IndexService:
     """BM25 Index 서비스 - 컬렉션별 인덱스 관리"""
     
-    def __init__(self):
-        # 컬렉션명별로 분리된 인덱스들을 관리
-        self.indexes: Dict[str, CodeBM25Index] = {}
-        self._initialized: Dict[str, bool] = {}
-    
-    def _get_or_create_index(self, collection_name: str) -> CodeBM25Index:
-        """컬렉션별 인덱스 가져오기 또는 생성"""
-        if collection_name not in self.indexes:
-            # 컬렉션별 설정 생성
-            config = BM25IndexConfig(
-                index_path=f"data/bm25_index/{collection_name}",
-                k1=1.2,
-                b=0.75,
-                top_k=10
-            )
-            self.indexes[collection_name] = CodeBM25Index(config)
-            self._initialized[collection_name] = False
-            logger.info(f"새 BM25 인덱스 생성: {collection_name}")
+    def __init__(
+        self,
+        config: BM25IndexConfig = None,
+        memory_budget_bytes: Optional[int] = None,
+        tokenize_workers: Optional[int] = None,
+        parallel_tokenize_threshold: Optional[int] = None
+    ):
+        # 컬렉션별 설정의 기본값 (index_path는 컬렉션 디렉터리의 상위 경로)
+        self.config = config or BM25IndexConfig(
+            index_path=settings.bm25_index_root, store_positions=settings.bm25_store_positions
+        )
+        
+        # 컬렉션명별 인덱스는 메모리 예산 안에서 지연 로드/축출
+        if memory_budget_bytes is None:
+            memory_budget_bytes = settings.bm25_memory_budget_mb * 1024 * 1024
+        self.registry = BM25IndexRegistry(self._create_index, memory_budget_bytes)
+        
+        # 대량 배치의 강화 텍스트 생성/토큰화용 프로세스 풀 (첫 대량 배치에서 생성)
+        if tokenize_workers is None:
+            tokenize_workers = settings.bm25_tokenize_workers
+        self.tokenize_workers = tokenize_workers or os.cpu_count() or 1
+        self.parallel_tokenize_threshold = (
+            settings.bm25_parallel_tokenize_threshold
+            if parallel_tokenize_threshold is None else parallel_tokenize_threshold
+        )
+        self._tokenize_pool: Optional[ProcessPoolExecutor] = None
+        
+        # 컬렉션별 쓰기 세대 (검색 결과 캐시 무효화용)
+        self._write_generations: Dict[str, int] = {}
         
-        return self.indexes[collection_name]
+        # 재구성 중인 컬렉션과 진행 중인 쓰기 수 (재구성은 쓰기가 끝나기를 기다리고, 쓰기는 재구성을 기다림)
+        self._write_gate = asyncio.Condition()
+        self._active_writes: Counter = Counter()
+        self._rebuilding: Set[str] = set()
+    
+    def write_generation(self, collection_name: str) -> int:
+        """컬렉션 쓰기 세대 - 색인/수정/삭제/재구성이 끝날 때마다 증가"""
+        return self._write_generations.get(collection_name, 0)
+    
+    def _bump_write_generation(self, collection_name: str):
+        # 쓰기가 반영된 뒤 올려야 그 사이 검색 결과가 새 세대로 캐시되지 않음
+        self._write_generations[collection_name] = self.write_generation(collection_name) + 1
+    
+    def _collection_config(self, collection_name: str) -> BM25IndexConfig:
+        config = copy.copy(self.config)
+        config.index_path = self.config.index_path / collection_name
+        return config
+    
+    def _create_index(self, collection_name: str) -> CodeBM25Index:
+        """컬렉션별 인덱스 생성 (setup은 레지스트리가 호출)"""
+        return CodeBM25Index(self._collection_config(collection_name))
+    
+    def _get_tokenize_pool(self, batch_size: int) -> Optional[ProcessPoolExecutor]:
+        """배치 크기가 임계값 이상이면 토큰화 프로세스 풀 반환 (작은 배치는 현재 프로세스에서 처리)"""
+        if self.tokenize_workers <= 1 or batch_size < self.parallel_tokenize_threshold:
+            return None
+        if self._tokenize_pool is None:
+            self._tokenize_pool = ProcessPoolExecutor(max_workers=self.tokenize_workers, mp_context=self._mp_context())
+            logger.info(f"BM25 토큰화 프로세스 풀 시작: {self.tokenize_workers}개")
+        return self._tokenize_pool
+    
+    @staticmethod
+    def _mp_context():
+        """작업 프로세스 시작 방식 - 스냅샷/저널 스레드가 있는 프로세스를 fork하지 않도록 forkserver(없으면 spawn)"""
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            # 토크나이저 모듈은 fork 서버에서 한 번만 임포트하고 작업 프로세스는 복제
+            context.set_forkserver_preload([prepare_document_chunk.__module__])
+        return context
+    
+    @asynccontextmanager
+    async def _write_access(self, collection_name: str) -> AsyncIterator[None]:
+        """쓰기 구간 - 컬렉션을 재구성하는 중이면 새 세대로 교체될 때까지 대기"""
+        async with self._write_gate:
+            await self._write_gate.wait_for(lambda: collection_name not in self._rebuilding)
+            self._active_writes[collection_name] += 1
+        try:
+            yield
+        finally:
+            async with self._write_gate:
+                self._active_writes[collection_name] -= 1
+                self._write_gate.notify_all()
+    
+    @asynccontextmanager
+    async def _exclusive_rebuild(self, collection_name: str) -> AsyncIterator[None]:
+        """재구성 구간 - 새 쓰기를 막고 진행 중인 쓰기가 모두 끝난 뒤 진입"""
+        async with self._write_gate:
+            await self._write_gate.wait_for(lambda: collection_name not in self._rebuilding)
+            self._rebuilding.add(collection_name)
+            await self._write_gate.wait_for(lambda: not self._active_writes[collection_name])
+        try:
+            yield
+        finally:
+            async with self._write_gate:
+                self._rebuilding.discard(collection_name)
+                self._write_gate.notify_all()
     
     async def initialize(self, collection_name: str = "default"):
-        """특정 컬렉션 인덱스 초기화"""
-        index = self._get_or_create_index(collection_name)
-        
-        if not self._initialized.get(collection_name, False):
-            await index.setup()
-            self._initialized[collection_name] = True
-            logger.info(f"BM25 Index 초기화 완료: {collection_name}")
+        """특정 컬렉션 인덱스 초기화 (필요 시 디스크에서 로드)"""
+        await self.registry.get(collection_name)
     
     async def index_documents(
         self, 
@@ -46,11 +129,11 @@ class BM25IndexService:
         collection_name: str = "default"
     ) -> Dict[str, Any]:
         """특정 컬렉션에 문서들 인덱싱"""
-        await self.initialize(collection_name)
-        index = self._get_or_create_index(collection_name)
-        
         try:
-            added_ids = await index.add_documents(documents)
+            executor = self._get_tokenize_pool(len(documents))
+            async with self._write_access(collection_name), self.registry.acquire(collection_name) as index:
+                added_ids = await index.add_documents(documents, executor=executor)
+            await self.registry.refresh_size(collection_name)
             
             return {
                 "success": True,
@@ -67,23 +150,31 @@ class BM25IndexService:
                 "indexed_count": 0,
                 "collection_name": collection_name
             }
+        finally:
+            # 실패한 배치도 일부 문서는 반영됐을 수 있음
+            self._bump_write_generation(collection_name)
     
     async def search_keywords(
         self, 
         query: str, 
         collection_name: str = "default",
         limit: int = 10,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        phrase_query: bool = True,
+        proximity_window: Optional[int] = None,
+        proximity_boost: float = 0.0
     ) -> List[Dict[str, Any]]:
-        """특정 컬렉션에서 키워드 검색"""
-        await self.initialize(collection_name)
+        """
+        특정 컬렉션에서 키워드 검색
         
-        if collection_name not in self.indexes:
-            logger.warning(f"컬렉션 '{collection_name}'을 찾을 수 없음")
-            return []
-        
-        index = self.indexes[collection_name]
-        results = await index.search_with_scores(query, limit, filters)
+        field_weights는 질의별 BM25F 필드 가중치, phrase_query/proximity_*는 위치 색인 기반
+        구문 조건과 근접 가중치 (CodeBM25Index.search_with_scores 참고)
+        """
+        async with self.registry.acquire(collection_name) as index:
+            results = await index.search_with_scores(
+                query, limit, filters, field_weights, phrase_query, proximity_window, proximity_boost
+            )
         
         # 결과에 컬렉션 정보 추가
         for result in results:
@@ -91,6 +182,32 @@ class BM25IndexService:
         
         return results
     
+    async def find_symbol(
+        self,
+        query: str,
+        collection_name: str = "default",
+        limit: int = 10,
+        filters: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """특정 컬렉션에서 식별자 질의의 심볼 정확 일치 조회 (식별자가 아니거나 일치가 없으면 빈 목록)"""
+        async with self.registry.acquire(collection_name) as index:
+            results = await index.find_symbol(query, limit, filters)
+        
+        for result in results:
+            result['collection_name'] = collection_name
+        
+        return results
+    
+    async def complete_symbols(
+        self,
+        prefix: str,
+        collection_name: str = "default",
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """특정 컬렉션의 심볼 이름 접두사 자동완성 (인기도/중요도 점수 순)"""
+        async with self.registry.acquire(collection_name) as index:
+            return await index.complete_symbols(prefix, limit)
+    
     async def update_document(
         self, 
         doc_id: str, 
@@ -98,13 +215,13 @@ class BM25IndexService:
         collection_name: str = "default"
     ) -> bool:
         """특정 컬렉션에서 문서 업데이트"""
-        await self.initialize(collection_name)
-        
-        if collection_name not in self.indexes:
-            return False
-            
-        index = self.indexes[collection_name]
-        return await index.update_document(doc_id, document)
+        try:
+            async with self._write_access(collection_name), self.registry.acquire(collection_name) as index:
+                updated = await index.update_document(doc_id, document)
+        finally:
+            self._bump_write_generation(collection_name)
+        await self.registry.refresh_size(collection_name)
+        return updated
     
     async def delete_document(
         self, 
@@ -112,27 +229,27 @@ class BM25IndexService:
         collection_name: str = "default"
     ) -> bool:
         """특정 컬렉션에서 문서 삭제"""
-        await self.initialize(collection_name)
-        
-        if collection_name not in self.indexes:
-            return False
-            
-        index = self.indexes[collection_name]
-        return await index.delete_document(doc_id)
+        try:
+            async with self._write_access(collection_name), self.registry.acquire(collection_name) as index:
+                deleted = await index.delete_document(doc_id)
+        finally:
+            self._bump_write_generation(collection_name)
+        await self.registry.refresh_size(collection_name)
+        return deleted
     
     async def delete_collection(self, collection_name: str) -> bool:
         """전체 컬렉션 삭제"""
         try:
-            if collection_name in self.indexes:
-                # 인덱스 파일 삭제
-                index = self.indexes[collection_name]
-                import shutil
-                if index.config.index_path.exists():
-                    shutil.rmtree(index.config.index_path)
-                
-                # 메모리에서 제거
-                del self.indexes[collection_name]
-                del self._initialized[collection_name]
+            index_path = self.config.index_path / collection_name
+            if collection_name in self.registry or index_path.exists():
+                async with self._write_access(collection_name):
+                    # 메모리에서 제거 (남은 변경분은 기록하지 않음)
+                    await self.registry.discard(collection_name)
+                    
+                    # 인덱스 파일 삭제
+                    if index_path.exists():
+                        shutil.rmtree(index_path)
+                self._bump_write_generation(collection_name)
                 
                 logger.info(f"BM25 컬렉션 삭제 완료: {collection_name}")
                 return True
@@ -145,24 +262,26 @@ class BM25IndexService:
             return False
     
     async def get_index_stats(self, collection_name: str = "default") -> Dict[str, Any]:
-        """특정 컬렉션 인덱스 통계"""
-        await self.initialize(collection_name)
-        
-        if collection_name not in self.indexes:
-            return {
-                "collection_name": collection_name,
-                "total_documents": 0,
-                "error": "Collection not found"
-            }
-            
-        index = self.indexes[collection_name]
-        stats = await index.get_stats()
+        """특정 컬렉션 인덱스 통계 (상주하지 않는 컬렉션은 로드하지 않고 매니페스트의 집계를 읽음)"""
+        stats = None
+        if collection_name not in self.registry:
+            stats = CodeBM25Index.read_persisted_stats(self._collection_config(collection_name))
+        if stats is None:
+            async with self.registry.acquire(collection_name) as index:
+                stats = await index.get_stats()
         stats["collection_name"] = collection_name
         return stats
     
     async def get_all_collections(self) -> List[str]:
-        """모든 컬렉션 목록 조회"""
-        return list(self.indexes.keys())
+        """모든 컬렉션 목록 조회 (메모리에 없는 디스크 컬렉션 포함)"""
+        collections = set(self.registry.resident_collections)
+        if self.config.index_path.exists():
+            # '.'으로 시작하는 디렉터리는 재구성 중인 다음 세대 / 교체된 이전 세대
+            collections.update(
+                path.name for path in self.config.index_path.iterdir()
+                if path.is_dir() and not path.name.startswith(".")
+            )
+        return sorted(collections)
     
     async def get_global_stats(self) -> Dict[str, Any]:
         """전체 통계 정보"""
@@ -170,7 +289,8 @@ class BM25IndexService:
         total_tokens = 0
         collections = {}
         
-        for collection_name in self.indexes.keys():
+        collection_names = await self.get_all_collections()
+        for collection_name in collection_names:
             stats = await self.get_index_stats(collection_name)
             collections[collection_name] = stats
             total_docs += stats.get("total_documents", 0)
@@ -180,7 +300,8 @@ class BM25IndexService:
             "total_documents": total_docs,
             "total_tokens": total_tokens,
             "collections": collections,
-            "collection_count": len(self.indexes)
+            "collection_count": len(collection_names),
+            "registry": self.registry.get_stats()
         }
     
     async def rebuild_index(
@@ -188,18 +309,57 @@ class BM25IndexService:
         documents: List[EnhancedDocument],
         collection_name: str = "default"
     ) -> Dict[str, Any]:
-        """특정 컬렉션 인덱스 재구성"""
+        """
+        특정 컬렉션 인덱스 재구성
+        
+        다음 세대는 별도 디렉터리에 작업 프로세스가 만들어 검색을 처리하는 인터프리터와 GIL을
+        나누지 않고, 완성되면 레지스트리가 디렉터리와 인덱스 참조를 한 번에 교체한다. 그동안
+        검색은 이전 세대가 그대로 처리한다.
+        
+        재구성은 진행 중인 쓰기가 끝난 뒤 시작하고, 재구성하는 동안 들어온 색인/수정/삭제는
+        교체가 끝날 때까지 기다렸다가 새 세대에 반영된다. 따라서 이전 세대에만 들어가 교체와
+        함께 사라지는 쓰기가 없고, 디렉터리를 교체할 때 이전 세대의 저널/문서 저장소에 쓰는
+        요청도 없다 (저널과 스냅샷은 교체 전 retire()로 닫힘).
+        """
+        async with self._exclusive_rebuild(collection_name):
+            return await self._rebuild_generation(documents, collection_name)
+    
+    async def _rebuild_generation(self, documents: List[EnhancedDocument], collection_name: str) -> Dict[str, Any]:
+        """다음 세대를 만들어 교체 (쓰기를 막은 상태에서 호출)"""
+        suffix = uuid.uuid4().hex[:8]
+        staging_path = self.config.index_path / f".{collection_name}.rebuild-{suffix}"
         try:
-            # 기존 컬렉션 삭제
-            await self.delete_collection(collection_name)
+            config = copy.copy(self.config)
+            config.index_path = staging_path
+            with ProcessPoolExecutor(max_workers=1, mp_context=self._mp_context()) as builder:
+                added_ids = await asyncio.get_running_loop().run_in_executor(
+                    builder, build_generation, config, documents
+                )
+            
+            def install():
+                live_path = self.config.index_path / collection_name
+                retired_path = self.config.index_path / f".{collection_name}.retired-{suffix}"
+                if live_path.exists():
+                    os.replace(live_path, retired_path)
+                os.replace(staging_path, live_path)
+                # 이전 세대의 mmap/열린 파일은 닫힐 때까지 유효하므로 디렉터리는 바로 지운다
+                shutil.rmtree(retired_path, ignore_errors=True)
             
-            # 새 문서들로 인덱스 구성
-            result = await self.index_documents(documents, collection_name)
+            generation = await self.registry.replace(collection_name, install)
+            self._bump_write_generation(collection_name)
             
-            logger.info(f"BM25 인덱스 재구성 완료: {collection_name}, {result['indexed_count']}개 문서")
-            return result
+            logger.info(f"BM25 인덱스 재구성 완료: {collection_name}, {len(added_ids)}개 문서 (세대 {generation})")
+            return {
+                "success": True,
+                "indexed_count": len(added_ids),
+                "document_ids": added_ids,
+                "index_type": "bm25",
+                "collection_name": collection_name,
+                "generation": generation
+            }
             
         except Exception as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
             logger.error(f"BM25 인덱스 재구성 실패 ({collection_name}): {e}")
             return {
                 "success": False,
@@ -207,6 +367,13 @@ class BM25IndexService:
                 "collection_name": collection_name
             }
     
+    async def close(self):
+        """상주 인덱스를 기록하고 토큰화 프로세스 풀 종료"""
+        await self.registry.close()
+        if self._tokenize_pool is not None:
+            self._tokenize_pool.shutdown(wait=True)
+            self._tokenize_pool = None
+    
     async def health_check(self, collection_name: str = "default") -> Dict[str, Any]:
         """특정 컬렉션 헬스 체크"""
         try:
@@ -0,0 +1,241 @@
+"""
+심볼 자동완성용 압축 트라이
+
+BookServ, findBy처럼 입력 중인 부분 이름은 BM25(스테밍된 전체 토큰)나 벡터로는 찾기
+어렵다. 청크 메타데이터의 name/parent_class를 심볼 항목으로 모으고, 전체 이름과 camelCase
+하위 토큰에서 시작하는 접미사(BookServiceImpl -> serviceimpl, impl)를 키로 압축 트라이
+(radix tree)에 넣는다.
+
+항목 점수는 그 심볼을 정의하거나 소속으로 가진 청크 수(인기도)에 종류별 중요도를 곱한
+정수이며, 노드마다 하위 트리의 최고 점수를 유지해 접두사 아래 전체를 훑지 않고 점수 순으로
+상위 limit개만 꺼낸다.
+"""
+import heapq
+import itertools
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .symbols import first_metadata_string
+
+# 심볼 항목 (표시 이름, 종류)
+SymbolEntry = Tuple[str, str]
+
+# camelCase/PascalCase/snake_case 하위 토큰 (HTTPServer -> HTTP, Server)
+_SUB_TOKEN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# 종류별 중요도 (클래스/인터페이스는 메서드보다 먼저 제안)
+KIND_WEIGHTS = {"class": 2, "interface": 2}
+DEFAULT_KIND_WEIGHT = 1
+# 전체 이름 앞부분과 일치하는 키는 하위 토큰 중간에서 일치하는 키보다 우선
+_FULL_KEY_FACTOR = 2
+
+
+def sub_token_suffixes(name: str) -> List[str]:
+    """이름 전체와 두 번째 이후 하위 토큰에서 시작하는 접미사 (소문자)"""
+    starts = [match.start() for match in _SUB_TOKEN.finditer(name)]
+    suffixes = [name.lower()]
+    suffixes.extend(name[start:].lstrip("_").lower() for start in starts[1:])
+    return list(dict.fromkeys(suffix for suffix in suffixes if suffix))
+
+
+class _Node:
+    __slots__ = ("label", "children", "values", "best")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        # 이 노드에서 끝나는 키의 항목별 가중치 합
+        self.values: Dict[SymbolEntry, int] = {}
+        # 하위 트리(자신 포함) 항목 가중치의 최댓값
+        self.best = 0
+
+    def refresh_best(self):
+        self.best = max(
+            max(self.values.values(), default=0),
+            max((child.best for child in self.children.values()), default=0)
+        )
+
+
+class SymbolTrie:
+    """심볼 이름/하위 토큰 접두사 검색용 압축 트라이"""
+
+    def __init__(self):
+        self._root = _Node()
+        self._entries = 0
+
+    def __len__(self) -> int:
+        """서로 다른 (키, 항목) 쌍 수"""
+        return self._entries
+
+    @staticmethod
+    def _entry_keys(entry: SymbolEntry) -> List[Tuple[str, int]]:
+        """항목의 (키, 가중치 배수) 목록 - 마지막 이름의 하위 토큰 접미사와 점 표기 전체 이름"""
+        symbol, kind = entry
+        weight = KIND_WEIGHTS.get(kind, DEFAULT_KIND_WEIGHT)
+        name = symbol.rsplit(".", 1)[-1]
+        keys = {}
+        for i, suffix in enumerate(sub_token_suffixes(name)):
+            keys[suffix] = weight * (_FULL_KEY_FACTOR if i == 0 else 1)
+        keys.setdefault(symbol.lower(), weight * _FULL_KEY_FACTOR)
+        return list(keys.items())
+
+    def add(self, entry: SymbolEntry, count: int = 1):
+        """항목을 count개 청크만큼 추가"""
+        for key, factor in self._entry_keys(entry):
+            self._insert(key, entry, factor * count)
+
+    def remove(self, entry: SymbolEntry, count: int = 1):
+        """항목을 count개 청크만큼 제거 (0이 되면 키에서 삭제)"""
+        for key, factor in self._entry_keys(entry):
+            self._delete(key, entry, factor * count)
+
+    def _insert(self, key: str, entry: SymbolEntry, weight: int):
+        path = [self._root]
+        node, rest = self._root, key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node(rest)
+                rest = ""
+            else:
+                common = _common_prefix_length(child.label, rest)
+                if common < len(child.label):
+                    # 간선 분할: child.label = 공통부분 + 나머지
+                    split = _Node(child.label[:common])
+                    child.label = child.label[common:]
+                    split.children[child.label[0]] = child
+                    split.best = child.best
+                    node.children[split.label[0]] = split
+                    child = split
+                rest = rest[common:]
+            path.append(child)
+            node = child
+
+        if entry not in node.values:
+            self._entries += 1
+        node.values[entry] = node.values.get(entry, 0) + weight
+        for visited in reversed(path):
+            visited.best = max(visited.best, node.values[entry])
+
+    def _delete(self, key: str, entry: SymbolEntry, weight: int):
+        path = self._find_path(key)
+        if path is None:
+            return
+        node = path[-1]
+        if entry not in node.values:
+            return
+        remaining = node.values[entry] - weight
+        if remaining > 0:
+            node.values[entry] = remaining
+        else:
+            del node.values[entry]
+            self._entries -= 1
+
+        # 빈 잎 노드 제거, 값 없는 단일 자식 노드는 자식과 합친 뒤 최고 점수 갱신
+        for depth in range(len(path) - 1, 0, -1):
+            current, parent = path[depth], path[depth - 1]
+            if not current.values and not current.children:
+                del parent.children[current.label[0]]
+            elif not current.values and len(current.children) == 1:
+                (only,) = current.children.values()
+                only.label = current.label + only.label
+                parent.children[only.label[0]] = only
+            else:
+                current.refresh_best()
+        self._root.refresh_best()
+
+    def _find_path(self, key: str) -> Optional[List[_Node]]:
+        """루트부터 키가 정확히 끝나는 노드까지의 경로 (없으면 None)"""
+        path = [self._root]
+        node, rest = self._root, key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None or not rest.startswith(child.label):
+                return None
+            rest = rest[len(child.label):]
+            node = child
+            path.append(node)
+        return path
+
+    def _prefix_node(self, prefix: str) -> Optional[_Node]:
+        """접두사로 시작하는 모든 키를 하위 트리로 갖는 노드"""
+        node, rest = self._root, prefix
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return None
+            if rest.startswith(child.label):
+                rest = rest[len(child.label):]
+            elif child.label.startswith(rest):
+                rest = ""
+            else:
+                return None
+            node = child
+        return node
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        접두사로 시작하는 키의 항목을 점수 내림차순으로 최대 limit개
+
+        노드와 항목을 한 힙에 넣고 노드는 하위 트리 최고 점수로 정렬하므로, 꺼낸 항목은 아직
+        펼치지 않은 노드의 어떤 항목보다도 점수가 높거나 같다. 같은 항목이 여러 키로 일치하면
+        가장 높은 점수 하나만 쓴다.
+        """
+        node = self._prefix_node(prefix.lower())
+        if node is None or limit <= 0:
+            return []
+
+        order = itertools.count()
+        # (-점수, 종류 0=항목/1=노드, 순번, 값) - 같은 점수면 항목을 먼저 꺼냄
+        heap: List[tuple] = [(-node.best, 1, next(order), node)]
+        seen = set()
+        # 힙에 한 번이라도 넣은 항목 (꺼낸 항목 포함)
+        queued = set()
+        results = []
+        while heap and len(results) < limit:
+            negative_score, is_node, _, item = heapq.heappop(heap)
+            if not is_node:
+                if item not in seen:
+                    seen.add(item)
+                    symbol, kind = item
+                    results.append({"symbol": symbol, "kind": kind, "score": -negative_score})
+                continue
+            # 아직 힙에 없던 항목이 남은 자리 수만큼 들어가면 그보다 낮은 항목은 결과에 들어갈 수
+            # 없으므로 거기서 멈춤 (이미 넣은 항목은 다른 키로 중복될 수 있어 자리 수에 세지 않음)
+            wanted = limit - len(results)
+            candidates = heapq.nlargest(wanted + len(queued), item.values.items(), key=lambda pair: pair[1])
+            for entry, weight in candidates:
+                if wanted <= 0:
+                    break
+                if entry in seen:
+                    continue
+                heapq.heappush(heap, (-weight, 0, next(order), entry))
+                if entry not in queued:
+                    queued.add(entry)
+                    wanted -= 1
+            for child in item.children.values():
+                heapq.heappush(heap, (-child.best, 1, next(order), child))
+        return results
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+def metadata_symbol_entries(metadata: Dict[str, Any]) -> Iterable[SymbolEntry]:
+    """
+    청크 메타데이터의 자동완성 항목 - 청크 자신(parent_class.name)과 소속 클래스(parent_class)
+
+    소속 클래스 항목은 멤버 청크 수만큼 더해지므로 큰 클래스일수록 먼저 제안된다.
+    """
+    name = first_metadata_string(metadata, ("name", "function_name"))
+    parent = first_metadata_string(metadata, ("parent_class", "class_name"))
+    kind = first_metadata_string(metadata, ("code_type",)) or "unknown"
+    if name:
+        yield (f"{parent}.{name}" if parent else name, kind)
+    if parent:
+        yield (parent, "class")
@@ -0,0 +1,69 @@
+"""
+코드 심볼 이름 추출/정규화
+
+CodeMetadata(또는 같은 키의 메타데이터 딕셔너리)에서 클래스/메서드 이름, parent_class.method,
+패키지를 붙인 Java FQN을 뽑아 대소문자 구분 없는 정확 일치 키로 만든다. BM25 인덱스는
+이 키를 필드 색인(SYMBOL_FIELD)으로 저장하므로 세그먼트 기록/병합/재구성 때 함께 유지된다.
+"""
+import re
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+SYMBOL_FIELD = "symbol"  # BM25 필드 색인에서 심볼 키가 쓰는 필드 이름
+
+# 식별자 또는 점으로 이은 식별자 (com.example.BookController.createBook)
+_QUALIFIED_IDENTIFIER = re.compile(r"^[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*$")
+
+_NAME_KEYS = ("name", "function_name")
+_PARENT_KEYS = ("parent_class", "class_name")
+_PACKAGE_KEYS = ("namespace", "package", "package_name")
+
+
+def normalize_symbol(text: str) -> Optional[str]:
+    """
+    질의나 메타데이터 값을 심볼 키로 정규화 (식별자 형태가 아니면 None)
+
+    BookController#createBook, BookController::createBook, createBook() 같은 표기도
+    점 표기로 맞추고 소문자로 비교한다.
+    """
+    symbol = text.strip().replace("#", ".").replace("::", ".")
+    if symbol.endswith("()"):
+        symbol = symbol[:-2]
+    if not _QUALIFIED_IDENTIFIER.match(symbol):
+        return None
+    return symbol.lower()
+
+
+def first_metadata_string(metadata: Dict[str, Any], keys) -> Optional[str]:
+    """keys 중 처음으로 비어 있지 않은 문자열(Enum은 값) 메타데이터"""
+    for key in keys:
+        value = metadata.get(key)
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, str) and value and value != "unknown":
+            return value
+    return None
+
+
+def extract_symbols(metadata: Dict[str, Any]) -> List[str]:
+    """
+    청크 메타데이터의 정확 일치 심볼 키 목록
+
+    메서드는 name, parent_class.name, package.parent_class.name을, 클래스처럼 상위 클래스가 없는
+    청크는 name과 package.name을 만든다.
+    """
+    if not metadata:
+        return []
+    name = first_metadata_string(metadata, _NAME_KEYS)
+    if name is None:
+        return []
+    parent = first_metadata_string(metadata, _PARENT_KEYS)
+    package = first_metadata_string(metadata, _PACKAGE_KEYS)
+
+    qualified = f"{parent}.{name}" if parent else name
+    candidates = [name, qualified]
+    if package:
+        candidates.append(f"{package}.{qualified}")
+
+    symbols = (normalize_symbol(candidate) for candidate in candidates)
+    return list(dict.fromkeys(symbol for symbol in symbols if symbol))
@@ -1,11 +1,14 @@
-from typing import List, Dict, Any, Optional, Union
-from llama_index.core import VectorStoreIndex, StorageContext, Settings
+from typing import List, Dict, Any, Optional, Tuple, Union
+from llama_index.core import Settings
 from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.core.schema import TextNode, NodeWithScore
-from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.query_engine import RetrieverQueryEngine
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from llama_index.core.schema import TextNode, BaseNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, PayloadSchemaType,
+    SearchParams
+)
+import asyncio
+import time
 import uuid
 import logging
 from datetime import datetime
@@ -13,12 +16,22 @@ from datetime import datetime
 from .base_index import BaseIndex, IndexedDocument
 from app.retriever.document_builder import EnhancedDocument
 from app.core.config import settings
+from app.core.exceptions import CollectionNotFoundError, InvalidFilterError
+from app.core.qdrant_clients import qdrant_clients, upload_points_in_batches
 
 logger = logging.getLogger(__name__)
 
 # LlamaIndex 전역 설정에서 LLM 비활성화
 Settings.llm = None
 
+# 검색 필터로 자주 쓰는 메타데이터 필드 (노드 메타데이터는 페이로드 최상위 키로 저장됨)
+DEFAULT_PAYLOAD_INDEX_FIELDS: Dict[str, PayloadSchemaType] = {
+    "file_path": PayloadSchemaType.KEYWORD,
+    "language": PayloadSchemaType.KEYWORD,
+    "code_type": PayloadSchemaType.KEYWORD,
+    "keywords": PayloadSchemaType.KEYWORD,
+}
+
 class VectorIndexConfig:
     """Vector Index 설정"""
     
@@ -29,24 +42,48 @@ class VectorIndexConfig:
         distance: Distance = Distance.COSINE,
         qdrant_url: str = None,
         qdrant_port: int = 6333,
-        qdrant_grpc_port: int = 6334,
+        qdrant_grpc_port: int = None,
         qdrant_prefer_grpc: bool = False,
         qdrant_https: bool = False,
         qdrant_api_key: str = None,
         similarity_top_k: int = 10,
-        retrieval_mode: str = "similarity"  # similarity, mmr, etc.
+        retrieval_mode: str = "similarity",  # similarity, mmr, etc.
+        embedding_batch_size: int = None,
+        embedding_max_concurrency: int = None,
+        embedding_batch_retries: int = None,
+        upload_prefer_grpc: bool = None,
+        upload_batch_size: int = None,
+        upload_parallelism: int = None,
+        payload_index_fields: Dict[str, PayloadSchemaType] = None,
+        search_hnsw_ef: int = None,
+        search_exact: bool = False
     ):
         self.collection_name = collection_name
         self.vector_size = vector_size
         self.distance = distance
         self.qdrant_url = qdrant_url or f"http://{settings.qdrant_host}:{settings.qdrant_port}"
         self.qdrant_port = qdrant_port
-        self.qdrant_grpc_port = qdrant_grpc_port
+        self.qdrant_grpc_port = qdrant_grpc_port or settings.qdrant_grpc_port
         self.qdrant_prefer_grpc = qdrant_prefer_grpc
         self.qdrant_https = qdrant_https
         self.qdrant_api_key = qdrant_api_key
         self.similarity_top_k = similarity_top_k
         self.retrieval_mode = retrieval_mode
+        self.embedding_batch_size = max(1, embedding_batch_size or settings.embedding_batch_size)
+        self.embedding_max_concurrency = max(1, embedding_max_concurrency or settings.embedding_max_concurrency)
+        self.embedding_batch_retries = (
+            settings.embedding_batch_retries if embedding_batch_retries is None else embedding_batch_retries
+        )
+        self.upload_prefer_grpc = settings.qdrant_upload_prefer_grpc if upload_prefer_grpc is None else upload_prefer_grpc
+        self.upload_batch_size = max(1, upload_batch_size or settings.qdrant_upload_batch_size)
+        self.upload_parallelism = max(1, upload_parallelism or settings.qdrant_upload_parallelism)
+        # 빈 dict면 페이로드 인덱스를 만들지 않음
+        self.payload_index_fields = (
+            dict(DEFAULT_PAYLOAD_INDEX_FIELDS) if payload_index_fields is None else payload_index_fields
+        )
+        # 검색 기본 HNSW 파라미터 (None이면 컬렉션 설정의 ef 사용, exact면 전수 검색)
+        self.search_hnsw_ef = search_hnsw_ef or settings.qdrant_search_hnsw_ef or None
+        self.search_exact = search_exact
 
 
 class CodeVectorIndex(BaseIndex):
@@ -54,17 +91,25 @@ class CodeVectorIndex(BaseIndex):
     
     def __init__(self, config: VectorIndexConfig = None):
         self.config = config or VectorIndexConfig()
-        self.client = None
+        self.client = None  # 공유 AsyncQdrantClient
+        self.upload_client = None  # 대량 업로드용 (upload_prefer_grpc면 gRPC)
         self.vector_store = None
-        self.index = None
-        self.retriever = None
-        self.query_engine = None
+        self.embedding_client = None
+        # 마지막 add_documents 호출의 임베딩 처리량 (청크 수, 배치 수, 실패 배치 수, 소요 시간, 청크/초)
+        self.last_embedding_stats: Dict[str, Any] = {}
+        # 마지막 add_documents 호출의 업로드 처리량 (포인트 수, 배치 수, 소요 시간, 포인트/초, 전송 방식)
+        self.last_upload_stats: Dict[str, Any] = {}
     
-    async def setup(self):
-        """인덱스 초기화"""
+    async def setup(self, create: bool = True):
+        """
+        인덱스 초기화
+        
+        create=False(검색용)면 컬렉션이나 페이로드 인덱스를 만들지 않고, 컬렉션이 없으면
+        CollectionNotFoundError를 낸다.
+        """
         try:
-            # Qdrant 클라이언트 생성
-            self.client = QdrantClient(
+            # 같은 접속 설정의 인덱스와 공유하는 비동기 Qdrant 클라이언트
+            self.client = qdrant_clients.get(
                 url=self.config.qdrant_url,
                 port=self.config.qdrant_port,
                 grpc_port=self.config.qdrant_grpc_port,
@@ -72,54 +117,24 @@ class CodeVectorIndex(BaseIndex):
                 https=self.config.qdrant_https,
                 api_key=self.config.qdrant_api_key
             )
+            self.upload_client = self._get_upload_client()
             
             # 컬렉션 존재 확인 및 생성
-            await self._ensure_collection_exists()
+            if create:
+                await self._ensure_collection_exists()
+            elif not await self.client.collection_exists(self.config.collection_name):
+                raise CollectionNotFoundError(f"컬렉션이 없습니다: {self.config.collection_name}")
             
-            # Vector Store 생성
+            # 노드 <-> 포인트 페이로드 변환, 업로드/삭제는 LlamaIndex 저장 형식을 그대로 사용
             self.vector_store = QdrantVectorStore(
-                client=self.client,
-                collection_name=self.config.collection_name
-            )
-            
-            # Storage Context 설정
-            storage_context = StorageContext.from_defaults(
-                vector_store=self.vector_store
-            )
-            
-            # 커스텀 임베딩 모델 생성
-            from app.core.embedding import CustomEmbeddingModel
-            embed_model = CustomEmbeddingModel()
-            
-            # Vector Index 생성 또는 로드
-            try:
-                self.index = VectorStoreIndex.from_vector_store(
-                    vector_store=self.vector_store,
-                    embed_model=embed_model,
-                    llm=None
-                )
-            except Exception:
-                # 빈 인덱스 생성
-                self.index = VectorStoreIndex(
-                    nodes=[],
-                    storage_context=storage_context,
-                    embed_model=embed_model,
-                    llm=None
-                )
-            
-            # Retriever 생성
-            self.retriever = VectorIndexRetriever(
-                index=self.index,
-                similarity_top_k=self.config.similarity_top_k
+                collection_name=self.config.collection_name,
+                aclient=self.client
             )
             
-            # Query Engine은 LLM이 필요하므로 제거
-            # self.query_engine = RetrieverQueryEngine(
-            #     retriever=self.retriever
-            # )
-            
             logger.info(f"Vector Index 초기화 완료: {self.config.collection_name}")
             
+        except CollectionNotFoundError:
+            raise
         except Exception as e:
             logger.error(f"Vector Index 초기화 실패: {e}")
             raise
@@ -130,11 +145,14 @@ class CodeVectorIndex(BaseIndex):
         
         if self.config.collection_name not in collections:
             await self._create_collection()
+            await self._ensure_payload_indexes(existing_fields=set())
+        else:
+            await self._ensure_payload_indexes()
     
     async def _get_collections(self) -> List[str]:
         """컬렉션 목록 조회"""
         try:
-            response = self.client.get_collections()
+            response = await self.client.get_collections()
             return [collection.name for collection in response.collections]
         except Exception as e:
             logger.error(f"컬렉션 목록 조회 실패: {e}")
@@ -143,7 +161,7 @@ class CodeVectorIndex(BaseIndex):
     async def _create_collection(self):
         """컬렉션 생성"""
         try:
-            self.client.create_collection(
+            await self.client.create_collection(
                 collection_name=self.config.collection_name,
                 vectors_config=VectorParams(
                     size=self.config.vector_size,
@@ -155,6 +173,40 @@ class CodeVectorIndex(BaseIndex):
             logger.error(f"컬렉션 생성 실패: {e}")
             raise
     
+    async def _ensure_payload_indexes(self, existing_fields: Optional[set] = None):
+        """
+        필터 대상 필드의 페이로드 인덱스 생성 (이미 있는 필드는 건너뜀)
+        
+        인덱스가 있어야 Qdrant가 HNSW 탐색 중에 필터를 적용하고 선택도에 맞게 검색 계획을
+        세운다. 인덱스 생성이 실패해도 필터 검색은 동작하므로 경고만 남긴다.
+        """
+        fields = self.config.payload_index_fields
+        if not fields:
+            return
+        
+        if existing_fields is None:
+            try:
+                collection_info = await self.client.get_collection(self.config.collection_name)
+                existing_fields = set(collection_info.payload_schema or {})
+            except Exception as e:
+                logger.warning(f"페이로드 스키마 조회 실패: {e}")
+                existing_fields = set()
+        
+        async def create(field_name: str, field_schema: PayloadSchemaType):
+            try:
+                await self.client.create_payload_index(
+                    collection_name=self.config.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                    wait=True
+                )
+                logger.info(f"페이로드 인덱스 생성: {self.config.collection_name}.{field_name}")
+            except Exception as e:
+                logger.warning(f"페이로드 인덱스 생성 실패 ({field_name}): {e}")
+        
+        missing = [(name, schema) for name, schema in fields.items() if name not in existing_fields]
+        await asyncio.gather(*(create(name, schema) for name, schema in missing))
+    
     async def add_documents(self, documents: List[Union[EnhancedDocument, Dict[str, Any]]]) -> List[str]:
         """문서 추가"""
         added_ids = []
@@ -164,9 +216,6 @@ class CodeVectorIndex(BaseIndex):
             for doc in documents:
                 if isinstance(doc, EnhancedDocument):
                     text_node = doc.text_node
-                    # 임베딩이 없으면 생성
-                    if not hasattr(text_node, 'embedding') or text_node.embedding is None:
-                        await self._generate_embedding(text_node)
                     nodes.append(text_node)
                     added_ids.append(text_node.id_)
                 else:
@@ -175,9 +224,13 @@ class CodeVectorIndex(BaseIndex):
                     nodes.append(node)
                     added_ids.append(node.id_)
             
+            # 임베딩이 없는 노드만 배치로 생성
+            pending = [node for node in nodes if getattr(node, 'embedding', None) is None]
+            self.last_embedding_stats = await self._embed_nodes(pending)
+            
             # 노드들을 인덱스에 추가
+            self.last_upload_stats = await self._upload_nodes(nodes)
             if nodes:
-                self.index.insert_nodes(nodes)
                 logger.info(f"문서 {len(nodes)}개 추가 완료")
             
             return added_ids
@@ -186,6 +239,48 @@ class CodeVectorIndex(BaseIndex):
             logger.error(f"문서 추가 실패: {e}")
             raise
     
+    def _get_upload_client(self):
+        """대량 업로드용 공유 클라이언트 (gRPC를 쓰지 않으면 검색용 클라이언트 그대로)"""
+        if not self.config.upload_prefer_grpc or self.config.qdrant_prefer_grpc:
+            return self.client
+        return qdrant_clients.get(
+            url=self.config.qdrant_url,
+            port=self.config.qdrant_port,
+            grpc_port=self.config.qdrant_grpc_port,
+            prefer_grpc=True,
+            https=self.config.qdrant_https,
+            api_key=self.config.qdrant_api_key
+        )
+    
+    async def _upload_nodes(self, nodes: List[BaseNode]) -> Dict[str, Any]:
+        """임베딩된 노드를 upload_batch_size개씩 upload_parallelism개 동시 요청으로 업서트"""
+        stats = await upload_points_in_batches(
+            self.upload_client,
+            self.config.collection_name,
+            self._node_points(nodes),
+            batch_size=self.config.upload_batch_size,
+            parallelism=self.config.upload_parallelism
+        )
+        stats["transport"] = "grpc" if self.config.upload_prefer_grpc or self.config.qdrant_prefer_grpc else "rest"
+        if nodes:
+            logger.info(
+                f"포인트 업로드 완료: {stats['points']}개, {stats['batches']}개 배치 "
+                f"({stats['transport']}), {stats['points_per_sec']} points/sec"
+            )
+        return stats
+    
+    @staticmethod
+    def _node_points(nodes: List[BaseNode]) -> List[PointStruct]:
+        """LlamaIndex 저장 형식(노드 직렬화 페이로드) 그대로 Qdrant 포인트 생성"""
+        return [
+            PointStruct(
+                id=node.node_id,
+                vector=node.get_embedding(),
+                payload=node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+            )
+            for node in nodes
+        ]
+    
     async def _create_text_node_from_dict(self, doc_dict: Dict[str, Any]) -> TextNode:
         """딕셔너리에서 TextNode 생성"""
         node_id = doc_dict.get('id', str(uuid.uuid4()))
@@ -201,29 +296,64 @@ class CodeVectorIndex(BaseIndex):
             id_=node_id
         )
         
-        # 임베딩 생성
-        await self._generate_embedding(node)
-        
         return node
     
-    async def _generate_embedding(self, node: TextNode):
-        """노드에 대한 임베딩 생성"""
-        try:
-            # 임베딩 클라이언트를 통해 생성
+    def _get_embedding_client(self):
+        """배치 임베딩에 공유하는 임베딩 클라이언트 (재시도 횟수 = 배치별 재시도)"""
+        if self.embedding_client is None:
             from app.core.clients import EmbeddingClient
-            
-            embedding_client = EmbeddingClient()
-            response = await embedding_client.embed_single({"text": node.text})
-            
-            if 'embedding' in response:
-                node.embedding = response["embedding"]
-            else:
-                logger.warning(f"임베딩 생성 실패 - 노드 ID: {node.id_}")
-                
+            self.embedding_client = EmbeddingClient(max_retries=self.config.embedding_batch_retries)
+        return self.embedding_client
+    
+    async def _embed_nodes(self, nodes: List[TextNode]) -> Dict[str, Any]:
+        """
+        노드 임베딩을 embedding_batch_size개씩 벌크 엔드포인트로 생성
+        
+        동시에 진행하는 배치는 embedding_max_concurrency개로 제한하고, 재시도까지 실패한 배치의
+        노드에는 기존처럼 영벡터를 넣는다. 처리량 통계를 반환한다.
+        """
+        batch_size = self.config.embedding_batch_size
+        batches = [nodes[i:i + batch_size] for i in range(0, len(nodes), batch_size)]
+        semaphore = asyncio.Semaphore(self.config.embedding_max_concurrency)
+        start_time = time.perf_counter()
+        
+        async def embed_batch(batch: List[TextNode]) -> bool:
+            async with semaphore:
+                return await self._embed_batch(batch)
+        
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        elapsed = time.perf_counter() - start_time
+        
+        stats = {
+            "chunks": len(nodes),
+            "batches": len(batches),
+            "failed_batches": results.count(False),
+            "elapsed_seconds": round(elapsed, 4),
+            "chunks_per_sec": round(len(nodes) / elapsed, 2) if nodes and elapsed > 0 else 0.0
+        }
+        if nodes:
+            logger.info(
+                f"임베딩 생성 완료: {stats['chunks']}개 청크, {stats['batches']}개 배치 "
+                f"(실패 {stats['failed_batches']}), {stats['chunks_per_sec']} chunks/sec"
+            )
+        return stats
+    
+    async def _embed_batch(self, batch: List[TextNode]) -> bool:
+        """배치 하나를 벌크 임베딩 (실패하면 영벡터로 채우고 False)"""
+        try:
+            response = await self._get_embedding_client().embed_bulk({"texts": [node.text for node in batch]})
+            embeddings = response.get("embeddings", [])
+            if len(embeddings) != len(batch):
+                raise ValueError(f"임베딩 수 불일치: 요청 {len(batch)}개, 응답 {len(embeddings)}개")
+            for node, item in zip(batch, embeddings):
+                node.embedding = item["embedding"]
+            return True
         except Exception as e:
-            logger.error(f"임베딩 생성 중 오류: {e}")
+            logger.error(f"배치 임베딩 생성 중 오류 ({len(batch)}개 청크): {e}")
             # 기본 임베딩 설정 (테스트용)
-            node.embedding = [0.0] * self.config.vector_size
+            for node in batch:
+                node.embedding = [0.0] * self.config.vector_size
+            return False
     
     async def update_document(self, doc_id: str, document: Dict[str, Any]) -> bool:
         """문서 업데이트"""
@@ -244,23 +374,59 @@ class CodeVectorIndex(BaseIndex):
     async def delete_document(self, doc_id: str) -> bool:
         """문서 삭제"""
         try:
-            self.index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            await self.vector_store.adelete(doc_id)
             logger.info(f"문서 삭제 완료: {doc_id}")
             return True
         except Exception as e:
             logger.error(f"문서 삭제 실패 ({doc_id}): {e}")
             return False
     
+    async def _query_nodes(
+        self,
+        query: str,
+        limit: int,
+        filters: Dict[str, Any] = None,
+        score_threshold: float = None,
+        hnsw_ef: int = None,
+        exact: bool = None
+    ) -> List[Tuple[BaseNode, float]]:
+        """
+        질의 임베딩으로 Qdrant를 검색해 (노드, 점수) 목록 반환
+        
+        필터는 Qdrant Filter로 변환해 HNSW 탐색 안에서 적용하고, limit/score_threshold도
+        검색 요청에 그대로 실어 보내므로 조건에 맞는 결과를 limit개까지 그대로 받는다
+        (여유분을 가져와 Python에서 거르지 않음).
+        """
+        response = await self._get_embedding_client().embed_single({"text": query})
+        points = await self.client.query_points(
+            collection_name=self.config.collection_name,
+            query=response["embedding"],
+            query_filter=self._convert_filters_to_qdrant(filters),
+            search_params=self._search_params(hnsw_ef, exact),
+            limit=limit,
+            score_threshold=score_threshold,
+            with_payload=True
+        )
+        result = self.vector_store.parse_to_query_result(points.points)
+        return list(zip(result.nodes, result.similarities))
+    
+    def _search_params(self, hnsw_ef: int = None, exact: bool = None) -> Optional[SearchParams]:
+        """요청별 HNSW 파라미터 (지정하지 않은 값은 설정 기본값, 둘 다 없으면 서버 기본값)"""
+        hnsw_ef = hnsw_ef or self.config.search_hnsw_ef
+        exact = self.config.search_exact if exact is None else exact
+        if not hnsw_ef and not exact:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, exact=exact)
+    
     async def search(self, query: str, limit: int = 10, filters: Dict[str, Any] = None) -> List[IndexedDocument]:
         """벡터 검색"""
         try:
             # 검색 실행
-            nodes_with_scores = self.retriever.retrieve(query)
+            nodes_with_scores = await self._query_nodes(query, limit, filters)
             
             # 결과 변환
             results = []
-            for node_with_score in nodes_with_scores[:limit]:
-                node = node_with_score.node
+            for node, _ in nodes_with_scores:
                 indexed_doc = IndexedDocument(
                     id=node.id_,
                     content=node.text,
@@ -270,28 +436,42 @@ class CodeVectorIndex(BaseIndex):
                 results.append(indexed_doc)
             
             return results
+        except InvalidFilterError:
+            raise
         except Exception as e:
             logger.error(f"벡터 검색 실패: {e}")
             return []
     
-    async def search_with_scores(self, query: str, limit: int = 10, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    async def search_with_scores(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Dict[str, Any] = None,
+        score_threshold: float = None,
+        hnsw_ef: int = None,
+        exact: bool = None
+    ) -> List[Dict[str, Any]]:
         """점수와 함께 벡터 검색"""
         try:
-            nodes_with_scores = self.retriever.retrieve(query)
+            nodes_with_scores = await self._query_nodes(
+                query, limit, filters,
+                score_threshold=score_threshold, hnsw_ef=hnsw_ef, exact=exact
+            )
             
             results = []
-            for node_with_score in nodes_with_scores[:limit]:
-                node = node_with_score.node
+            for node, score in nodes_with_scores:
                 result = {
                     'id': node.id_,
                     'content': node.text,
                     'metadata': node.metadata,
-                    'score': node_with_score.score,
+                    'score': score,
                     'source': 'vector'
                 }
                 results.append(result)
             
             return results
+        except InvalidFilterError:
+            raise
         except Exception as e:
             logger.error(f"점수별 벡터 검색 실패: {e}")
             return []
@@ -299,7 +479,7 @@ class CodeVectorIndex(BaseIndex):
     async def get_stats(self) -> Dict[str, Any]:
         """인덱스 통계 정보"""
         try:
-            collection_info = self.client.get_collection(self.config.collection_name)
+            collection_info = await self.client.get_collection(self.config.collection_name)
             
             return {
                 "collection_name": self.config.collection_name,
@@ -321,24 +501,21 @@ class CodeVectorIndex(BaseIndex):
         self, 
         query: str, 
         threshold: float = 0.7,
-        limit: int = 10
+        limit: int = 10,
+        filters: Dict[str, Any] = None,
+        hnsw_ef: int = None,
+        exact: bool = None
     ) -> List[Dict[str, Any]]:
-        """임계값 기반 유사도 검색"""
-        results = await self.search_with_scores(query, limit * 2)  # 여유있게 검색
-        
-        # 임계값 필터링
-        filtered_results = [
-            result for result in results 
-            if result['score'] >= threshold
-        ]
-        
-        return filtered_results[:limit]
+        """임계값 기반 유사도 검색 (임계값 미만 결과는 Qdrant가 제외)"""
+        return await self.search_with_scores(
+            query, limit, filters, score_threshold=threshold, hnsw_ef=hnsw_ef, exact=exact
+        )
     
     async def get_document_by_id(self, doc_id: str) -> Optional[IndexedDocument]:
         """ID로 문서 조회"""
         try:
             # Qdrant에서 직접 조회
-            points = self.client.retrieve(
+            points = await self.client.retrieve(
                 collection_name=self.config.collection_name,
                 ids=[doc_id]
             )
@@ -361,7 +538,7 @@ class CodeVectorIndex(BaseIndex):
         """필터 조건으로 대량 삭제"""
         try:
             # 필터 조건에 맞는 포인트들 검색
-            search_result = self.client.scroll(
+            search_result = await self.client.scroll(
                 collection_name=self.config.collection_name,
                 scroll_filter=self._convert_filters_to_qdrant(filters),
                 limit=10000  # 대량 삭제를 위한 높은 limit
@@ -374,42 +551,47 @@ class CodeVectorIndex(BaseIndex):
             point_ids = [point.id for point in search_result[0]]
             
             # 대량 삭제 실행
-            self.client.delete(
+            await self.client.delete(
                 collection_name=self.config.collection_name,
                 points_selector=point_ids
             )
             
             logger.info(f"대량 삭제 완료: {len(point_ids)}개 문서")
             return len(point_ids)
+        except InvalidFilterError:
+            raise
         except Exception as e:
             logger.error(f"대량 삭제 실패: {e}")
             return 0
     
     def _convert_filters_to_qdrant(self, filters: Dict[str, Any]):
-        """필터를 Qdrant 형식으로 변환"""
+        """
+        필터를 Qdrant 형식으로 변환 (목록 값은 그중 하나와 일치, 배열 필드는 원소 중 하나와 일치)
+        
+        변환할 수 없는 값은 필터 없이 검색/삭제하지 않도록 InvalidFilterError로 알린다.
+        """
         if not filters:
             return None
         
-        try:
-            conditions = []
-            for key, value in filters.items():
-                conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
-                    )
-                )
-            
-            return Filter(must=conditions) if conditions else None
-        except Exception as e:
-            logger.error(f"필터 변환 실패: {e}")
-            return None
+        conditions = []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            try:
+                if isinstance(value, (list, tuple, set)):
+                    match = MatchAny(any=list(value))
+                else:
+                    match = MatchValue(value=value)
+                conditions.append(FieldCondition(key=key, match=match))
+            except Exception as e:
+                raise InvalidFilterError(f"지원하지 않는 필터 값 ({key}={value!r})") from e
+        
+        return Filter(must=conditions) if conditions else None
     
     async def teardown(self):
-        """리소스 정리"""
-        try:
-            if self.client:
-                self.client.close()
-                logger.info("Vector Index 리소스 정리 완료")
-        except Exception as e:
-            logger.error(f"리소스 정리 중 오류: {e}") 
\ No newline at end of file
+        """리소스 정리 (공유 Qdrant/HTTP 클라이언트는 앱 종료 시 각 풀에서 닫음)"""
+        self.client = None
+        self.upload_client = None
+        self.vector_store = None
+        self.embedding_client = None
+        logger.info("Vector Index 리소스 정리 완료") 
\ No newline at end of file
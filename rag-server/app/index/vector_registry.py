@@ -0,0 +1,184 @@
+"""
+컬렉션별 벡터 인덱스 핸들 레지스트리
+
+컬렉션마다 CodeVectorIndex를 한 번만 setup()(컬렉션 존재 확인/생성, 공유 클라이언트 연결)하고
+이후 인덱싱/검색 요청은 준비된 핸들을 재사용한다. 일정 시간 쓰지 않은 핸들과 최대 개수를
+넘는 가장 오래된 핸들은 teardown()으로 정리하며, 사용 중(acquire)인 핸들과 기본 컬렉션처럼
+persistent로 지정한 핸들은 정리하지 않는다.
+
+검색은 create=False로 핸들을 열어 없는 컬렉션을 만들지 않고, 이렇게 연 핸들을 인덱싱에
+쓸 때 한 번 더 setup()해 컬렉션/페이로드 인덱스를 준비한다.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Set
+
+from .vector_index import CodeVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndexRegistry:
+    """유휴 시간/개수 제한 기반 벡터 인덱스 핸들 레지스트리"""
+
+    def __init__(
+        self,
+        index_factory: Callable[[str], CodeVectorIndex],
+        idle_seconds: float = 600.0,
+        max_handles: int = 32,
+        persistent: Iterable[str] = ()
+    ):
+        self.index_factory = index_factory
+        self.idle_seconds = idle_seconds
+        self.max_handles = max(1, max_handles)
+        self.persistent = set(persistent)
+
+        # 사용 순서대로 정렬된 준비된 핸들 (마지막이 가장 최근)
+        self._handles: "OrderedDict[str, CodeVectorIndex]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        # create=False로 연 (컬렉션/페이로드 인덱스를 준비하지 않은) 핸들
+        self._read_only: Set[str] = set()
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, collection_name: str) -> bool:
+        return collection_name in self._handles
+
+    @property
+    def resident_collections(self) -> List[str]:
+        return list(self._handles)
+
+    def _touch(self, collection_name: str):
+        self._handles.move_to_end(collection_name)
+        self._last_used[collection_name] = time.monotonic()
+
+    async def get(self, collection_name: str, create: bool = True) -> CodeVectorIndex:
+        """핸들 조회 (없으면 만들어 setup, create=False면 있는 컬렉션만 열고 아무것도 만들지 않음)"""
+        index = self._handles.get(collection_name)
+        if index is not None and not (create and collection_name in self._read_only):
+            self.hits += 1
+            self._touch(collection_name)
+            return index
+
+        async with self._lock:
+            # 대기하는 동안 다른 요청이 만들었을 수 있음
+            index = self._handles.get(collection_name)
+            if index is not None:
+                if create and collection_name in self._read_only:
+                    await index.setup()
+                    self._read_only.discard(collection_name)
+                self.hits += 1
+                self._touch(collection_name)
+                return index
+
+            self.misses += 1
+            index = self.index_factory(collection_name)
+            await index.setup(create=create)
+            self._handles[collection_name] = index
+            if not create:
+                self._read_only.add(collection_name)
+            self._touch(collection_name)
+            logger.info(f"벡터 인덱스 핸들 생성: {collection_name}")
+
+            await self._evict_unused(keep=collection_name)
+            return index
+
+    @asynccontextmanager
+    async def acquire(self, collection_name: str, create: bool = True) -> AsyncIterator[CodeVectorIndex]:
+        """사용하는 동안 정리되지 않도록 핸들 고정"""
+        index = await self.get(collection_name, create=create)
+        self._pins[collection_name] = self._pins.get(collection_name, 0) + 1
+        try:
+            yield index
+        finally:
+            self._pins[collection_name] -= 1
+            if not self._pins[collection_name]:
+                del self._pins[collection_name]
+            self._last_used[collection_name] = time.monotonic()
+
+    def _evictable(self, collection_name: str, keep: str = None) -> bool:
+        return (
+            collection_name != keep
+            and collection_name not in self.persistent
+            and not self._pins.get(collection_name)
+        )
+
+    async def _evict_unused(self, keep: str = None) -> int:
+        """유휴 시간을 넘은 핸들과 최대 개수를 넘는 LRU 핸들 정리"""
+        now = time.monotonic()
+        evicted = 0
+        for name in list(self._handles):
+            if not self._evictable(name, keep):
+                continue
+            idle = now - self._last_used.get(name, now)
+            if idle >= self.idle_seconds or len(self._handles) > self.max_handles:
+                await self._evict(name)
+                evicted += 1
+        return evicted
+
+    async def _evict(self, collection_name: str):
+        index = self._handles.pop(collection_name)
+        self._last_used.pop(collection_name, None)
+        self._read_only.discard(collection_name)
+        await index.teardown()
+        self.evictions += 1
+        logger.info(f"벡터 인덱스 핸들 정리: {collection_name}")
+
+    async def evict_idle(self) -> int:
+        """유휴 핸들 정리 (정리한 핸들 수 반환)"""
+        async with self._lock:
+            return await self._evict_unused()
+
+    async def run_idle_eviction(self, interval: float = None):
+        """
+        유휴 핸들을 주기적으로 정리 (앱 lifespan 동안 백그라운드로 실행, 취소하면 종료)
+
+        새 컬렉션 요청이 없어도 유휴 시간을 넘은 핸들이 남지 않도록 기본적으로 유휴 시간의
+        절반마다 확인한다.
+        """
+        interval = interval or max(self.idle_seconds / 2, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.info(f"유휴 벡터 인덱스 핸들 {evicted}개 정리")
+            except Exception as e:
+                logger.warning(f"유휴 벡터 인덱스 핸들 정리 실패: {e}")
+
+    async def discard(self, collection_name: str) -> bool:
+        """핸들 정리 (컬렉션 삭제용)"""
+        async with self._lock:
+            if collection_name not in self._handles:
+                return False
+            await self._evict(collection_name)
+            return True
+
+    async def close(self):
+        """모든 핸들 정리"""
+        async with self._lock:
+            while self._handles:
+                name, index = self._handles.popitem(last=False)
+                self._last_used.pop(name, None)
+                self._read_only.discard(name)
+                await index.teardown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """레지스트리 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "resident_collections": len(self._handles),
+            "idle_seconds": self.idle_seconds,
+            "max_handles": self.max_handles
+        }
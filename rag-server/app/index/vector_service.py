@@ -1,8 +1,12 @@
 from typing import List, Dict, Any, Optional, Union
+import copy
 import logging
 import asyncio
 
 from .vector_index import CodeVectorIndex, VectorIndexConfig
+from .vector_registry import VectorIndexRegistry
+from app.core.config import settings
+from app.core.exceptions import CollectionNotFoundError, InvalidFilterError
 from app.retriever.document_builder import EnhancedDocument
 
 logger = logging.getLogger(__name__)
@@ -11,18 +15,49 @@ logger = logging.getLogger(__name__)
 class VectorIndexService:
     """Vector Index 서비스"""
     
-    def __init__(self, config: VectorIndexConfig = None):
+    def __init__(
+        self,
+        config: VectorIndexConfig = None,
+        idle_seconds: float = None,
+        max_handles: int = None
+    ):
         self.config = config or VectorIndexConfig()
         self.index = CodeVectorIndex(self.config)
+        # 컬렉션별 준비된(setup 완료) 인덱스 핸들, 기본 컬렉션은 정리하지 않음
+        self.registry = VectorIndexRegistry(
+            self._create_index,
+            idle_seconds=settings.vector_index_idle_seconds if idle_seconds is None else idle_seconds,
+            max_handles=max_handles or settings.vector_index_max_handles,
+            persistent=(self.config.collection_name,)
+        )
         self._initialized = False
         self._lock = asyncio.Lock()
+        # 컬렉션별 쓰기 세대 (검색 결과 캐시 무효화용)
+        self._write_generations: Dict[str, int] = {}
+    
+    def write_generation(self, collection_name: str = None) -> int:
+        """컬렉션 쓰기 세대 - 이 서비스를 통한 색인/수정/삭제가 끝날 때마다 증가"""
+        return self._write_generations.get(collection_name or self.config.collection_name, 0)
+    
+    def _bump_write_generation(self, collection_name: str = None):
+        # 쓰기가 반영된 뒤 올려야 그 사이 검색 결과가 새 세대로 캐시되지 않음
+        collection_name = collection_name or self.config.collection_name
+        self._write_generations[collection_name] = self.write_generation(collection_name) + 1
+    
+    def _create_index(self, collection_name: str) -> CodeVectorIndex:
+        """컬렉션 인덱스 생성 (기본 컬렉션은 서비스 인덱스, 나머지는 같은 설정의 새 인덱스)"""
+        if collection_name == self.config.collection_name:
+            return self.index
+        config = copy.copy(self.config)
+        config.collection_name = collection_name
+        return CodeVectorIndex(config)
     
     async def initialize(self):
         """서비스 초기화"""
         async with self._lock:
             if not self._initialized:
                 try:
-                    await self.index.setup()
+                    await self.registry.get(self.config.collection_name)
                     self._initialized = True
                     logger.info(f"Vector Index 서비스 초기화 완료: {self.config.collection_name}")
                 except Exception as e:
@@ -36,17 +71,7 @@ class VectorIndexService:
     
     async def index_documents(self, documents: List[EnhancedDocument], collection_name: str = None) -> Dict[str, Any]:
         """문서들 인덱싱"""
-        # collection_name이 제공되면 새로운 인덱스 인스턴스 생성
-        if collection_name and collection_name != self.config.collection_name:
-            temp_config = VectorIndexConfig(collection_name=collection_name, vector_size=384)
-            temp_index = CodeVectorIndex(temp_config)
-            await temp_index.setup()
-            current_index = temp_index
-            current_collection = collection_name
-        else:
-            await self._ensure_initialized()
-            current_index = self.index
-            current_collection = self.config.collection_name
+        current_collection = collection_name or self.config.collection_name
         
         if not documents:
             return {
@@ -58,7 +83,12 @@ class VectorIndexService:
             }
         
         try:
-            added_ids = await current_index.add_documents(documents)
+            # 컬렉션 핸들은 처음 한 번만 setup하고 이후 호출은 재사용
+            async with self.registry.acquire(current_collection) as current_index:
+                added_ids = await current_index.add_documents(documents)
+                
+                embedding_stats = current_index.last_embedding_stats
+                upload_stats = current_index.last_upload_stats
             
             logger.info(f"문서 인덱싱 완료: {len(added_ids)}개 (컬렉션: {current_collection})")
             
@@ -67,6 +97,10 @@ class VectorIndexService:
                 "indexed_count": len(added_ids),
                 "document_ids": added_ids,
                 "collection": current_collection,
+                "embedding_stats": embedding_stats,
+                "embedding_chunks_per_sec": embedding_stats.get("chunks_per_sec", 0.0),
+                "upload_stats": upload_stats,
+                "upload_points_per_sec": upload_stats.get("points_per_sec", 0.0),
                 "message": f"{len(added_ids)}개 문서가 성공적으로 인덱싱되었습니다"
             }
         except Exception as e:
@@ -77,6 +111,8 @@ class VectorIndexService:
                 "indexed_count": 0,
                 "collection": current_collection
             }
+        finally:
+            self._bump_write_generation(current_collection)
     
     async def index_legacy_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """기존 형식 문서들 인덱싱"""
@@ -108,15 +144,20 @@ class VectorIndexService:
                 "error": str(e),
                 "indexed_count": 0
             }
+        finally:
+            self._bump_write_generation()
     
     async def search_similar_code(
         self, 
         query: str, 
         limit: int = 10,
         threshold: float = 0.0,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        collection_name: str = None,
+        hnsw_ef: int = None,
+        exact: bool = None
     ) -> List[Dict[str, Any]]:
-        """유사 코드 검색"""
+        """유사 코드 검색 (collection_name이 없으면 기본 컬렉션, hnsw_ef/exact는 요청별 HNSW 파라미터)"""
         await self._ensure_initialized()
         
         if not query.strip():
@@ -124,19 +165,26 @@ class VectorIndexService:
             return []
         
         try:
-            if threshold > 0:
-                results = await self.index.similarity_search_with_threshold(
-                    query, threshold, limit
-                )
-                logger.info(f"임계값 검색 완료: {len(results)}개 결과 (threshold: {threshold})")
-            else:
-                results = await self.index.search_with_scores(
-                    query, limit, filters
-                )
-                logger.info(f"일반 검색 완료: {len(results)}개 결과")
+            # 검색은 없는 컬렉션을 만들지 않음
+            async with self.registry.acquire(collection_name or self.config.collection_name, create=False) as index:
+                if threshold > 0:
+                    results = await index.similarity_search_with_threshold(
+                        query, threshold, limit, filters, hnsw_ef=hnsw_ef, exact=exact
+                    )
+                    logger.info(f"임계값 검색 완료: {len(results)}개 결과 (threshold: {threshold})")
+                else:
+                    results = await index.search_with_scores(
+                        query, limit, filters, hnsw_ef=hnsw_ef, exact=exact
+                    )
+                    logger.info(f"일반 검색 완료: {len(results)}개 결과")
             
             return results
             
+        except InvalidFilterError:
+            raise
+        except CollectionNotFoundError as e:
+            logger.warning(f"유사 코드 검색 대상 없음: {e}")
+            return []
         except Exception as e:
             logger.error(f"유사 코드 검색 실패: {e}")
             return []
@@ -168,6 +216,8 @@ class VectorIndexService:
             logger.info(f"문서 검색 완료: {len(results)}개 결과")
             return results
             
+        except InvalidFilterError:
+            raise
         except Exception as e:
             logger.error(f"문서 검색 실패: {e}")
             return []
@@ -200,6 +250,8 @@ class VectorIndexService:
                 "document_id": doc_id,
                 "error": str(e)
             }
+        finally:
+            self._bump_write_generation()
     
     async def delete_document(self, doc_id: str) -> Dict[str, Any]:
         """문서 삭제"""
@@ -229,6 +281,8 @@ class VectorIndexService:
                 "document_id": doc_id,
                 "error": str(e)
             }
+        finally:
+            self._bump_write_generation()
     
     async def delete_by_file_path(self, file_path: str) -> Dict[str, Any]:
         """파일 경로로 문서 삭제"""
@@ -255,6 +309,8 @@ class VectorIndexService:
                 "deleted_count": 0,
                 "error": str(e)
             }
+        finally:
+            self._bump_write_generation()
     
     async def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """ID로 문서 조회"""
@@ -294,7 +350,8 @@ class VectorIndexService:
                     "vector_size": self.config.vector_size,
                     "similarity_top_k": self.config.similarity_top_k,
                     "retrieval_mode": self.config.retrieval_mode
-                }
+                },
+                "registry": self.registry.get_stats()
             }
             
             return enhanced_stats
@@ -343,11 +400,8 @@ class VectorIndexService:
             # 설정된 top_k 값 사용 또는 기본값
             limit = top_k or self.config.similarity_top_k
             
-            results = await self.index.search_with_scores(query, limit)
-            
-            # 최소 점수 필터링
-            if min_score > 0:
-                results = [r for r in results if r.get('score', 0) >= min_score]
+            # 최소 점수는 Qdrant 검색 조건으로 전달
+            results = await self.index.search_with_scores(query, limit, score_threshold=min_score)
             
             logger.info(f"유사도 검색 완료: {len(results)}개 결과 (min_score: {min_score})")
             return results
@@ -421,8 +475,9 @@ class VectorIndexService:
     async def teardown(self):
         """서비스 종료 및 리소스 정리"""
         try:
-            if self._initialized and self.index:
-                await self.index.teardown()
+            # 기본 컬렉션 인덱스를 포함한 모든 컬렉션 핸들 정리
+            await self.registry.close()
+            if self._initialized:
                 self._initialized = False
                 logger.info("Vector Index 서비스 종료 완료")
         except Exception as e:
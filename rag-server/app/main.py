@@ -1,6 +1,12 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from datetime import datetime
 from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.core.qdrant_clients import qdrant_clients
+from app.index.bm25_service import get_bm25_index_service
+from app.index.vector_service import get_vector_index_service
 from app.features.users.router import router as users_router
 from app.features.indexing.router import router as indexing_router
 from app.features.prompts.router import router as prompts_router
@@ -10,10 +16,26 @@ from app.features.generation.router import router as generation_router
 # 파서들을 임포트하여 자동 등록
 from app.features.indexing.parsers import PythonParser, JavaParser, JavaScriptParser
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 새 컬렉션 요청이 없어도 유휴 벡터 인덱스 핸들을 주기적으로 정리
+    idle_eviction = asyncio.create_task(get_vector_index_service().registry.run_idle_eviction())
+    yield
+    idle_eviction.cancel()
+    with suppress(asyncio.CancelledError):
+        await idle_eviction
+    # 상주 BM25 인덱스 기록/토큰화 프로세스 풀 종료, 벡터 인덱스 핸들 정리 (공유 클라이언트보다 먼저)
+    await get_bm25_index_service().close()
+    await get_vector_index_service().teardown()
+    # 외부 서비스 커넥션 풀의 keep-alive 연결과 공유 Qdrant 클라이언트 정리
+    await http_clients.aclose()
+    await qdrant_clients.aclose()
+
 app = FastAPI(
     title="RAG Server API",
     description="RAG 오케스트레이션 서비스",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 라우터 등록
@@ -33,4 +55,9 @@ async def health_check():
         "status": "healthy",
         "service": "rag-server",
         "timestamp": datetime.utcnow()
-    } 
\ No newline at end of file
+    }
+
+@app.get("/health/http-clients")
+async def http_client_stats():
+    """외부 서비스 HTTP 커넥션 풀 요청/연결 재사용 카운터"""
+    return http_clients.stats()
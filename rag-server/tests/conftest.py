@@ -1,3 +1,5 @@
+import asyncio
+import copy
 import pytest
 import subprocess
 import time
@@ -6,6 +8,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.db.database import Base, get_db
+from app.index.bm25_registry import BM25IndexRegistry
+from app.index.bm25_service import get_bm25_index_service
 
 # 테스트 데이터베이스 설정
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -67,4 +71,16 @@ def docker_services():
     yield
     
     # 테스트 완료 후 서비스 정리
-    # subprocess.run(["docker-compose", "down"], check=True) 
\ No newline at end of file
+    # subprocess.run(["docker-compose", "down"], check=True) 
+
+@pytest.fixture(autouse=True)
+def bm25_index_root(tmp_path, monkeypatch):
+    """앱 전역 BM25 서비스가 소스 트리(data/bm25_index) 대신 테스트별 임시 디렉터리에 기록"""
+    service = get_bm25_index_service()
+    config = copy.copy(service.config)
+    config.index_path = tmp_path / "bm25_index"
+    registry = BM25IndexRegistry(service._create_index, service.registry.memory_budget_bytes)
+    monkeypatch.setattr(service, "config", config)
+    monkeypatch.setattr(service, "registry", registry)
+    yield config.index_path
+    asyncio.run(registry.close())
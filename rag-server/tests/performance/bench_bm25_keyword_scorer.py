@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+BM25KeywordScorer 벤치마크 - 후보 문서 재순위화 (이전 Counter 루프 vs CSR 행렬)
+
+VectorClient.hybrid_search처럼 후보 문서 수백 개로 fit한 뒤 쿼리 점수와 정규화를 구하는
+시간을 측정하고, 두 구현의 점수가 같은지 확인한다.
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_bm25_keyword_scorer.py --docs 500 --queries 50
+"""
+import argparse
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from typing import List
+
+import numpy as np
+
+from app.features.search.bm25_scorer import BM25KeywordScorer
+
+
+class LegacyKeywordScorer:
+    """변경 전 구현 (문서별 Counter, 문서 x 쿼리 용어 파이썬 루프)"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def fit(self, documents: List[List[str]]) -> None:
+        self.documents = documents
+        self.num_docs = len(documents)
+        self.doc_freqs = [Counter(doc) for doc in documents]
+        self.avg_doc_len = sum(len(doc) for doc in documents) / self.num_docs
+        word_doc_count = defaultdict(int)
+        for doc in documents:
+            for word in set(doc):
+                word_doc_count[word] += 1
+        self.idf = {
+            word: max(math.log((self.num_docs - df + 0.5) / (df + 0.5)), 0.01)
+            for word, df in word_doc_count.items()
+        }
+
+    def score(self, query: List[str], doc_index: int) -> float:
+        doc_freq = self.doc_freqs[doc_index]
+        doc_len = len(self.documents[doc_index])
+        score = 0.0
+        for term in query:
+            tf = doc_freq.get(term, 0)
+            if term not in self.idf or tf == 0:
+                continue
+            denominator = tf + self.k1 * (1 - self.b + self.b * (doc_len / self.avg_doc_len))
+            score += self.idf[term] * (tf * (self.k1 + 1) / denominator)
+        return score
+
+    def get_scores(self, query: List[str]) -> List[float]:
+        return [self.score(query, i) for i in range(self.num_docs)]
+
+    def normalize_scores(self, scores: List[float]) -> List[float]:
+        normalized = []
+        for score in scores:
+            if score >= 5.0:
+                normalized.append(0.9 + min(0.1, (score - 5.0) / 10.0))
+            elif score >= 2.0:
+                normalized.append(0.7 + 0.2 * (score - 2.0) / 3.0)
+            elif score >= 0.5:
+                normalized.append(0.4 + 0.3 * (score - 0.5) / 1.5)
+            elif score >= 0.1:
+                normalized.append(0.1 + 0.3 * (score - 0.1) / 0.4)
+            elif score > 0:
+                normalized.append(0.01 + 0.09 * score / 0.1)
+            else:
+                normalized.append(0.0)
+        return normalized
+
+
+def build_candidates(docs: int, seed: int = 7) -> List[List[str]]:
+    """코드 청크 크기(수십~수백 토큰)의 Zipf 분포 토큰 문서"""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    return [rng.choices(vocab, weights=weights, k=rng.randint(30, 400)) for _ in range(docs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=500, help="후보 문서 수")
+    parser.add_argument("--queries", type=int, default=50, help="쿼리 수")
+    args = parser.parse_args()
+
+    documents = build_candidates(args.docs)
+    rng = random.Random(11)
+    queries = [[f"term{rng.randint(0, 300)}" for _ in range(rng.randint(2, 6))] for _ in range(args.queries)]
+    print(f"후보 문서 {len(documents)}개, 쿼리 {len(queries)}개")
+
+    def rerank(scorer):
+        # hybrid_search와 같이 쿼리마다 후보 집합으로 fit 후 점수/정규화
+        outputs = []
+        for query in queries:
+            scorer.fit(documents)
+            outputs.append(scorer.normalize_scores(scorer.get_scores(query)))
+        return outputs
+
+    results = {}
+    for label, scorer in (("legacy loop", LegacyKeywordScorer()), ("csr", BM25KeywordScorer())):
+        start = time.perf_counter()
+        results[label] = rerank(scorer)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<20} fit+score {elapsed / len(queries) * 1000:8.2f} ms/query")
+
+    for before, after in zip(results["legacy loop"], results["csr"]):
+        assert np.allclose(before, after), "점수 불일치"
+
+    # 같은 후보 집합에 여러 쿼리를 배치로 점수 계산
+    legacy, scorer = LegacyKeywordScorer(), BM25KeywordScorer()
+    legacy.fit(documents)
+    scorer.fit(documents)
+    start = time.perf_counter()
+    for query in queries:
+        legacy.get_scores(query)
+    legacy_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    scorer.normalize_scores(scorer.get_batch_scores(queries))
+    batch_elapsed = time.perf_counter() - start
+    print(f"{'legacy loop':<20} score only {legacy_elapsed / len(queries) * 1000:7.3f} ms/query")
+    print(f"{'csr batch':<20} score only {batch_elapsed / len(queries) * 1000:7.3f} ms/query"
+          f"  x{legacy_elapsed / batch_elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+BM25 인덱스 메모리 벤치마크 - 색인 청크당 상주 메모리 (스냅샷 전 메모리 변경분 기준)
+
+bench_code_tokenizer와 같은 Java 코퍼스를 한 컬렉션에 색인한 뒤, 입력 문서 목록을 해제한
+상태에서 인덱스가 붙잡고 있는 메모리를 측정한다. 크기가 제한된 토크나이저 스테밍 메모는
+색인 전에 코퍼스로 미리 채워 청크당 비용에서 제외한다.
+
+- python: tracemalloc으로 잰 파이썬 할당 증가량
+- rss: tracemalloc 없이 별도 프로세스에서 잰 RSS(/proc) 증가량 (측정 전 malloc_trim으로
+  배치 처리 중 해제된 힙은 반환)
+
+스냅샷 후(mmap 세그먼트 기반) 수치도 함께 출력한다.
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_bm25_memory.py --copies 200
+"""
+import argparse
+import asyncio
+import ctypes
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_code_tokenizer import build_corpus  # noqa: E402
+
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index  # noqa: E402
+
+
+def rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux /proc 기준, 없으면 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def release_free_heap():
+    """glibc가 잡고 있는 해제된 힙을 OS에 반환 (배치별 임시 객체가 RSS에 남지 않게, glibc가 아니면 생략)"""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def measure_now(trace: bool) -> int:
+    gc.collect()
+    release_free_heap()
+    return tracemalloc.get_traced_memory()[0] if trace else rss_bytes()
+
+
+async def index_corpus(corpus, batch: int, trace: bool):
+    """코퍼스 색인 전후 메모리 차이 (trace면 tracemalloc, 아니면 RSS)와 인덱스 반환"""
+    config = BM25IndexConfig(index_path=tempfile.mkdtemp(), journal_fsync=False, background_snapshot=False)
+    index = CodeBM25Index(config)
+    await index.setup()
+    for text in corpus:
+        index.tokenizer.tokenize(text)
+
+    if trace:
+        tracemalloc.start()
+    before = measure_now(trace)
+    for start in range(0, len(corpus), batch):
+        documents = [
+            # 요청마다 새로 만들어지는 원문처럼 코퍼스와 문자열 객체를 공유하지 않게 복사
+            {"id": f"chunk_{i}", "content": corpus[i].encode("utf-8").decode("utf-8"),
+             "metadata": {"language": "java", "file_path": f"F{i % 97}.java"}}
+            for i in range(start, min(start + batch, len(corpus)))
+        ]
+        await index.add_documents(documents)
+        del documents
+    return measure_now(trace) - before, before, index
+
+
+def rss_worker(copies: int, batch: int, queue):
+    corpus = build_corpus(copies)
+    delta, _, index = asyncio.run(index_corpus(corpus, batch, trace=False))
+    queue.put(delta)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=200, help="Java 소스 복제 횟수")
+    parser.add_argument("--batch", type=int, default=500, help="add_documents 배치 크기")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.copies)
+    text_bytes = sum(len(text.encode("utf-8")) for text in corpus)
+    count = len(corpus)
+    print(f"청크 {count}개, 원문 {text_bytes / count:,.0f} bytes/chunk")
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=rss_worker, args=(args.copies, args.batch, queue))
+    worker.start()
+    rss = queue.get() / count
+    worker.join()
+
+    traced, traced_before, index = await index_corpus(corpus, args.batch, trace=True)
+    traced /= count
+    print(f"{'메모리 변경분':<16} python {traced:10,.0f} bytes/chunk  rss {rss:10,.0f} bytes/chunk"
+          f"  (원문 대비 x{traced * count / text_bytes:.2f})")
+    print(f"{'추정치':<16} estimated_memory_bytes {index.estimated_memory_bytes() / count:10,.0f} bytes/chunk")
+
+    index.snapshot()
+    traced_snap = measure_now(trace=True)
+    print(f"{'스냅샷 후':<16} python {(traced_snap - traced_before) / count:10,.0f} bytes/chunk"
+          f"  segment {index.segment_path.stat().st_size / count:10,.0f} bytes/chunk")
+
+    tracemalloc.stop()
+    await index.teardown(snapshot=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
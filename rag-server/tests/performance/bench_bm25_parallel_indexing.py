@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+BM25 대량 인덱싱 벤치마크 - 토큰화 프로세스 수별 index_documents 소요 시간
+
+bench_code_tokenizer와 같은 Java 코퍼스를 한 배치로 색인한다. 풀 생성/작업 프로세스
+임포트 비용은 제외하도록 작은 배치로 먼저 풀을 띄운 뒤 측정한다.
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_bm25_parallel_indexing.py --copies 1000 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_code_tokenizer import build_corpus  # noqa: E402
+
+from app.index.bm25_index import BM25IndexConfig  # noqa: E402
+from app.index.bm25_service import BM25IndexService  # noqa: E402
+
+
+async def measure(workers: int, documents) -> float:
+    config = BM25IndexConfig(index_path=tempfile.mkdtemp(), journal_fsync=False, background_snapshot=False)
+    service = BM25IndexService(config, tokenize_workers=workers, parallel_tokenize_threshold=1)
+    try:
+        if workers > 1:
+            await service.index_documents(documents[:workers * 128], "warmup")
+
+        start = time.perf_counter()
+        result = await service.index_documents(documents, "spring")
+        elapsed = time.perf_counter() - start
+        assert result["success"], result
+        return elapsed
+    finally:
+        await service.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=1000, help="Java 소스 복제 횟수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    documents = [
+        {"id": str(i), "content": content, "metadata": {"language": "java"}}
+        for i, content in enumerate(build_corpus(args.copies))
+    ]
+    print(f"문서 {len(documents)}개")
+
+    baseline = None
+    for workers in args.workers:
+        elapsed = await measure(workers, documents)
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:8.2f}s  {len(documents) / elapsed:8.1f} docs/s  x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
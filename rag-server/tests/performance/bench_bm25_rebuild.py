@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+BM25 재구성 중 검색 지연 벤치마크 - 유휴 상태와 같은 컬렉션 재구성 중의 search_keywords 지연 비교
+
+bench_code_tokenizer와 같은 Java 코퍼스로 컬렉션을 만든 뒤, 같은 코퍼스로 rebuild_index를
+실행하는 동안 검색을 반복한다. 재구성은 다음 세대를 작업 프로세스에서 만들고 교체하므로
+검색은 이전 세대로 계속 응답해야 한다 (빈 결과 수도 함께 출력).
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_bm25_rebuild.py --copies 400
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_code_tokenizer import build_corpus  # noqa: E402
+
+from app.index.bm25_index import BM25IndexConfig  # noqa: E402
+from app.index.bm25_service import BM25IndexService  # noqa: E402
+
+QUERIES = ["book controller", "member service save", "find by id repository", "get mapping request"]
+
+
+def percentile(timings, q: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def search_loop(service: BM25IndexService, until) -> tuple:
+    """until(검색 횟수)가 참이 될 때까지 검색, (지연 목록, 빈 결과 수) 반환"""
+    timings, empty = [], 0
+    n = 0
+    while not until(n):
+        start = time.perf_counter()
+        results = await service.search_keywords(QUERIES[n % len(QUERIES)], "spring", limit=10)
+        timings.append(time.perf_counter() - start)
+        empty += not results
+        n += 1
+        await asyncio.sleep(0)
+    return timings, empty
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=400, help="Java 소스 복제 횟수")
+    parser.add_argument("--idle-queries", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=1, help="색인 토큰화 프로세스 수")
+    args = parser.parse_args()
+
+    documents = [
+        {"id": str(i), "content": content, "metadata": {"language": "java"}}
+        for i, content in enumerate(build_corpus(args.copies))
+    ]
+    config = BM25IndexConfig(index_path=tempfile.mkdtemp(), journal_fsync=False, background_snapshot=False)
+    service = BM25IndexService(config, tokenize_workers=args.workers, parallel_tokenize_threshold=1)
+    try:
+        await service.index_documents(documents, "spring")
+        print(f"문서 {len(documents)}개")
+
+        idle, idle_empty = await search_loop(service, lambda n: n >= args.idle_queries)
+        print(f"{'유휴':<8} 검색 {len(idle):5}회  p50 {percentile(idle, 0.5):7.2f} ms"
+              f"  p99 {percentile(idle, 0.99):7.2f} ms  빈 결과 {idle_empty}회")
+
+        start = time.perf_counter()
+        rebuild = asyncio.create_task(service.rebuild_index(documents, "spring"))
+        during, empty = await search_loop(service, lambda n: rebuild.done())
+        result = await rebuild
+        assert result["success"], result
+        print(f"{'재구성 중':<8} 검색 {len(during):5}회  p50 {percentile(during, 0.5):7.2f} ms"
+              f"  p99 {percentile(during, 0.99):7.2f} ms  빈 결과 {empty}회"
+              f"  (재구성 {time.perf_counter() - start:.2f}s, 세대 {result['generation']})")
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+BM25 단일 파일 재색인 벤치마크 - 컬렉션 크기별 update_document + 병합 정책 확인 소요 시간
+
+bench_code_tokenizer와 같은 Java 코퍼스를 색인하고 세그먼트로 기록한 뒤, 파일 하나의 청크를
+update_document로 교체하고 백그라운드 스케줄러가 호출하는 merge()까지 잰다. 병합 기준을
+넘지 않는 한 세그먼트는 다시 쓰지 않으므로 소요 시간은 컬렉션 크기와 무관해야 한다.
+비교를 위해 전체 재작성(snapshot) 시간도 출력한다.
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_bm25_update.py --copies 50 200 800
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_code_tokenizer import build_corpus  # noqa: E402
+
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index  # noqa: E402
+
+
+async def measure(copies: int, updates: int):
+    corpus = build_corpus(copies)
+    config = BM25IndexConfig(index_path=tempfile.mkdtemp(), journal_fsync=False, background_snapshot=False)
+    index = CodeBM25Index(config)
+    await index.setup()
+    await index.add_documents([
+        {"id": f"chunk_{i}", "content": text, "metadata": {"language": "java"}} for i, text in enumerate(corpus)
+    ])
+    index.snapshot()
+
+    timings = []
+    for n in range(updates):
+        doc_id = f"chunk_{(n * 7919) % len(corpus)}"
+        start = time.perf_counter()
+        await index.update_document(doc_id, {"content": corpus[n % len(corpus)] + " // edited", "metadata": {}})
+        index.merge()
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index.snapshot()
+    rewrite = time.perf_counter() - start
+    await index.teardown(snapshot=False)
+    return len(corpus), timings, rewrite
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, nargs="+", default=[50, 200, 800], help="Java 소스 복제 횟수")
+    parser.add_argument("--updates", type=int, default=50, help="컬렉션별 업데이트 횟수")
+    args = parser.parse_args()
+
+    for copies in args.copies:
+        count, timings, rewrite = await measure(copies, args.updates)
+        print(f"청크 {count:>7}개  update+merge median {statistics.median(timings) * 1000:7.2f} ms"
+              f"  p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:7.2f} ms"
+              f"  전체 재작성 {rewrite * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+CodeTokenizer 마이크로벤치마크 - 초당 토큰 수 (이전 NLTK 경로 vs 단일 패스 토크나이저)
+
+temp_test_files의 Java 소스를 식별자만 바꿔 복제한 코퍼스로 색인용 토큰화와 질의용 토큰화
+(tokenize)를 측정한다. 질의 토큰은 이전 경로와 같은지 확인하고, 색인 토큰은 반복으로 강조하던
+강화 텍스트 대비 BM25F 필드 토큰 수를 비교한다.
+
+    cd rag-server && PYTHONPATH=. python tests/performance/bench_code_tokenizer.py --copies 200
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+from typing import Callable, List
+
+from nltk.tokenize import word_tokenize
+
+from app.index.bm25_index import (
+    _ANNOTATION, _CLASS_NAME, _IMPORTANT_SUFFIX, BM25IndexConfig, CodeBM25Index, CodeTokenizer
+)
+
+JAVA_DIR = Path(__file__).resolve().parents[2] / "temp_test_files"
+IDENTIFIER = re.compile(r'\b([A-Z][a-z]+)')
+LEGACY_METHOD_NAME = re.compile(r'\b(\w+)\s*\(')  # 변경 전 중요 키워드 추출 (호출부 포함)
+
+
+def build_corpus(copies: int) -> List[str]:
+    """Java 소스를 클래스명 접두어만 바꿔 복제 (어휘 다양성 확보)"""
+    sources = [path.read_text(encoding="utf-8") for path in sorted(JAVA_DIR.glob("*.java"))]
+    if not sources:
+        sys.exit(f"Java 소스가 없습니다: {JAVA_DIR}")
+    corpus = []
+    for i in range(copies):
+        prefix = f"Mod{chr(ord('A') + i % 26)}{i // 26}"
+        corpus.extend(IDENTIFIER.sub(lambda m: prefix + m.group(1) if len(m.group(1)) > 4 else m.group(1), source)
+                      for source in sources)
+    return corpus
+
+
+class LegacyTokenizer(CodeTokenizer):
+    """변경 전 토큰화 경로 (정규식 4회 + word_tokenize + 캐시 없는 스테밍)"""
+
+    def tokenize(self, text: str) -> List[str]:
+        if not text or not text.strip():
+            return []
+        text = self._preprocess_code(text)
+        tokens = word_tokenize(text.lower())
+        return [
+            self.stemmer.stem(token) for token in tokens
+            if len(token) > 1 and token not in self.stop_words and token.isalnum()
+        ]
+
+
+def legacy_index_tokens(tokenizer: LegacyTokenizer, text: str) -> List[str]:
+    """변경 전 색인 경로: 원문 + 전처리본 + 중요 키워드 2회 반복을 이어 붙여 토큰화"""
+    keywords = list(set(
+        _CLASS_NAME.findall(text) + LEGACY_METHOD_NAME.findall(text) + _ANNOTATION.findall(text)
+        + _IMPORTANT_SUFFIX.findall(text)
+    ))
+    return tokenizer.tokenize(" ".join([text, tokenizer._preprocess_code(text)] + keywords * 2))
+
+
+def field_index_tokens(index: CodeBM25Index, text: str) -> List[str]:
+    """BM25F 필드 색인 토큰 (필드 접두어 포함)"""
+    return list(Counter(index._tokenize_fields(index._extract_text_fields(text, {}))).elements())
+
+
+def measure(label: str, fn: Callable[[str], List[str]], corpus: List[str]) -> List[List[str]]:
+    start = time.perf_counter()
+    outputs = [fn(text) for text in corpus]
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(output) for output in outputs)
+    print(f"{label:<28} {tokens:>10,} tokens  {elapsed:8.3f}s  {tokens / elapsed:>12,.0f} tokens/s")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=200, help="Java 소스 복제 횟수")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.copies)
+    print(f"코퍼스: {len(corpus)}개 파일, {sum(map(len, corpus)):,} bytes")
+
+    index = CodeBM25Index(BM25IndexConfig(index_path="/tmp/bench_code_tokenizer"))
+    legacy = LegacyTokenizer()
+
+    measure("index (enhanced text)", lambda text: legacy_index_tokens(legacy, text), corpus)
+    measure("index (BM25F fields)", lambda text: field_index_tokens(index, text), corpus)
+
+    before = measure("query (before)", legacy.tokenize, corpus)
+    after = measure("query (after)", index.tokenizer.tokenize, corpus)
+    assert before == after, "질의 토큰 불일치"
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,18 @@
 외부 서비스 클라이언트 테스트
 """
 import pytest
-from unittest.mock import AsyncMock, patch, Mock
+from unittest.mock import ANY, AsyncMock, patch, Mock
 import httpx
 from app.core.clients import EmbeddingClient, LLMClient, VectorClient, ExternalServiceClients, external_clients
 from app.core.exceptions import EmbeddingServiceError, LLMServiceError, VectorDBError
+from app.core.http_clients import HTTPClientPool
+from app.features.search.bm25_scorer import BM25KeywordScorer
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_pool(monkeypatch):
+    """테스트마다 패치된 httpx.AsyncClient로 새 커넥션 풀을 만들도록 전역 풀 교체"""
+    monkeypatch.setattr("app.core.clients.http_clients", HTTPClientPool())
 
 
 class TestEmbeddingClient:
@@ -16,6 +24,7 @@ class TestEmbeddingClient:
         """단일 텍스트 임베딩 API를 호출해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             mock_response = Mock()
             mock_response.json.return_value = {
                 "embedding": [0.1, 0.2, 0.3],
@@ -24,7 +33,7 @@ class TestEmbeddingClient:
             mock_response.status_code = 200
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.request.return_value = mock_response
+            mock_client.return_value.request.return_value = mock_response
             
             client = EmbeddingClient("http://localhost:8001")
             
@@ -33,11 +42,12 @@ class TestEmbeddingClient:
             
             # Then
             assert result["embedding"] == [0.1, 0.2, 0.3]
-            mock_client.return_value.__aenter__.return_value.request.assert_called_once_with(
+            mock_client.return_value.request.assert_called_once_with(
                 "POST",
                 "http://localhost:8001/api/v1/embed",
                 json={"text": "test text"},
-                timeout=30.0
+                timeout=30.0,
+                extensions=ANY
             )
 
     @pytest.mark.asyncio
@@ -45,6 +55,7 @@ class TestEmbeddingClient:
         """벌크 텍스트 임베딩 API를 호출해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             mock_response = Mock()
             mock_response.json.return_value = {
                 "embeddings": [
@@ -56,7 +67,7 @@ class TestEmbeddingClient:
             mock_response.status_code = 200
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.request.return_value = mock_response
+            mock_client.return_value.request.return_value = mock_response
             
             client = EmbeddingClient("http://localhost:8001")
             
@@ -66,11 +77,12 @@ class TestEmbeddingClient:
             # Then
             assert len(result["embeddings"]) == 2
             assert result["count"] == 2
-            mock_client.return_value.__aenter__.return_value.request.assert_called_once_with(
+            mock_client.return_value.request.assert_called_once_with(
                 "POST",
                 "http://localhost:8001/api/v1/embed/bulk",
                 json={"texts": ["text1", "text2"]},
-                timeout=30.0
+                timeout=30.0,
+                extensions=ANY
             )
 
     @pytest.mark.asyncio
@@ -78,12 +90,13 @@ class TestEmbeddingClient:
         """HTTP 오류를 적절히 처리해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 500
             mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
                 "Server Error", request=Mock(), response=mock_response
             )
-            mock_client.return_value.__aenter__.return_value.request.return_value = mock_response
+            mock_client.return_value.request.return_value = mock_response
             
             client = EmbeddingClient("http://localhost:8001")
             
@@ -96,6 +109,7 @@ class TestEmbeddingClient:
         """일시적 장애 시 재시도해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             # 첫 번째 호출은 실패, 두 번째 호출은 성공
             mock_success_response = Mock()
             mock_success_response.json.return_value = {"embedding": [0.1, 0.2, 0.3]}
@@ -108,7 +122,7 @@ class TestEmbeddingClient:
                 "Service Unavailable", request=Mock(), response=mock_fail_response
             )
             
-            mock_client.return_value.__aenter__.return_value.request.side_effect = [
+            mock_client.return_value.request.side_effect = [
                 mock_fail_response,
                 mock_success_response
             ]
@@ -120,7 +134,7 @@ class TestEmbeddingClient:
             
             # Then
             assert result["embedding"] == [0.1, 0.2, 0.3]
-            assert mock_client.return_value.__aenter__.return_value.request.call_count == 2
+            assert mock_client.return_value.request.call_count == 2
 
     def test_embedding_client_should_use_default_settings(self):
         """설정이 없을 때 기본값을 사용해야 함"""
@@ -141,6 +155,7 @@ class TestLLMClient:
         """채팅 완성 API를 호출해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             mock_response = Mock()
             mock_response.json.return_value = {
                 "choices": [
@@ -155,7 +170,7 @@ class TestLLMClient:
             mock_response.status_code = 200
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.request.return_value = mock_response
+            mock_client.return_value.request.return_value = mock_response
             
             client = LLMClient("http://localhost:8002")
             
@@ -168,14 +183,15 @@ class TestLLMClient:
             # Then
             assert "choices" in result
             assert len(result["choices"]) == 1
-            mock_client.return_value.__aenter__.return_value.request.assert_called_once_with(
+            mock_client.return_value.request.assert_called_once_with(
                 "POST",
                 "http://localhost:8002/v1/chat/completions",
                 json={
                     "model": "gpt-4o-mini",
                     "messages": [{"role": "user", "content": "Write a hello function"}]
                 },
-                timeout=60.0
+                timeout=60.0,
+                extensions=ANY
             )
 
     @pytest.mark.asyncio
@@ -183,12 +199,13 @@ class TestLLMClient:
         """LLM 서비스 오류를 처리해야 함"""
         # Given
         with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 500
             mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
                 "Server Error", request=Mock(), response=mock_response
             )
-            mock_client.return_value.__aenter__.return_value.request.return_value = mock_response
+            mock_client.return_value.request.return_value = mock_response
             
             client = LLMClient("http://localhost:8002")
             
@@ -196,6 +213,28 @@ class TestLLMClient:
             with pytest.raises(LLMServiceError):
                 await client.chat_completion({"messages": []})
 
+    @pytest.mark.asyncio
+    async def test_llm_client_should_not_retry_when_max_retries_is_zero(self):
+        """max_retries=0이면 설정값으로 바꾸지 않고 한 번만 요청해야 함"""
+        # Given
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.request = AsyncMock()
+            mock_response = Mock()
+            mock_response.status_code = 503
+            mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
+                "Service Unavailable", request=Mock(), response=mock_response
+            )
+            mock_client.return_value.request.return_value = mock_response
+
+            client = LLMClient("http://localhost:8002", max_retries=0)
+
+            # When & Then
+            assert client.max_retries == 0
+            assert LLMClient("http://localhost:8002").max_retries == 3  # settings에서 가져온 값
+            with pytest.raises(LLMServiceError):
+                await client.chat_completion({"messages": []})
+            assert mock_client.return_value.request.call_count == 1
+
 
 class TestVectorClient:
     """벡터 DB 클라이언트 테스트"""
@@ -301,6 +340,35 @@ class TestVectorClient:
         with pytest.raises(VectorDBError):
             client.create_collection("test_collection", 384)
 
+    @patch('app.core.clients.QdrantClient')
+    def test_hybrid_search_reuses_fitted_bm25_until_write(self, mock_qdrant):
+        """같은 후보 집합은 학습된 BM25 점수기를 재사용하고 쓰기 후에는 다시 학습해야 함"""
+        # Given
+        mock_instance = Mock()
+        points = []
+        for i, keywords in enumerate([["save", "book"], ["delete", "book"], ["find", "book"], ["list", "book"]]):
+            point = Mock()
+            point.id = f"id-{i}"
+            point.score = 0.9
+            point.payload = {"keywords": keywords}
+            points.append(point)
+        mock_instance.search.return_value = points
+        mock_qdrant.return_value = mock_instance
+        client = VectorClient()
+        
+        # When
+        original_fit = BM25KeywordScorer.fit
+        with patch.object(BM25KeywordScorer, 'fit', autospec=True, side_effect=original_fit) as fit:
+            first = client.hybrid_search("test_collection", [0.1], keywords=["delete"], limit=2)
+            second = client.hybrid_search("test_collection", [0.1], keywords=["save"], limit=2)
+            client.insert_code_embedding("test_collection", [0.1], {"keywords": ["find"]})
+            client.hybrid_search("test_collection", [0.1], keywords=["save"], limit=2)
+        
+        # Then
+        assert first[0]["id"] == "id-1"
+        assert second[0]["id"] == "id-0"
+        assert fit.call_count == 2
+
 
 class TestExternalServiceClients:
     """외부 서비스 클라이언트 팩토리 테스트"""
@@ -0,0 +1,145 @@
+"""
+공유 HTTP 커넥션 풀 테스트
+"""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.clients import EmbeddingClient, ExternalServiceClients
+from app.core.http_clients import HTTPClientPool
+
+_BODY = b'{"embedding": [0.1, 0.2]}'
+_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (
+    len(_BODY), _BODY
+)
+
+
+@pytest.fixture
+async def keep_alive_server():
+    """요청마다 같은 JSON을 keep-alive로 돌려주는 로컬 HTTP/1.1 서버"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                writer.write(_RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", connections
+    server.close()
+    await server.wait_closed()
+
+
+class TestHTTPClientPool:
+    """서비스별 공유 클라이언트/연결 재사용 카운터 테스트"""
+
+    async def test_clients_share_one_keep_alive_connection(self, keep_alive_server):
+        url, connections = keep_alive_server
+        pool = HTTPClientPool()
+        first = EmbeddingClient(url, max_retries=0, pool=pool)
+        second = EmbeddingClient(url, max_retries=0, pool=pool)
+
+        for client in (first, second, first):
+            response = await client.embed_single({"text": "hello"})
+            assert response["embedding"] == [0.1, 0.2]
+
+        assert len(connections) == 1
+        assert pool.stats()["services"]["embedding"] == {
+            "requests": 3, "connections_opened": 1, "connections_reused": 2
+        }
+        await pool.aclose()
+
+    async def test_aclose_closes_clients(self):
+        pool = HTTPClientPool()
+        client = pool.get("llm")
+
+        await pool.aclose()
+
+        assert client.is_closed
+        assert pool.get("llm") is not client
+        await pool.aclose()
+
+    async def test_same_loop_reuses_client(self):
+        pool = HTTPClientPool()
+        assert pool.get("embedding") is pool.get("embedding")
+        assert pool.get("embedding") is not pool.get("llm")
+        await pool.aclose()
+
+    def test_pool_limits_from_arguments(self):
+        pool = HTTPClientPool(max_connections=8, max_keepalive_connections=0, keepalive_expiry=5.0)
+
+        assert pool.limits.max_connections == 8
+        assert pool.limits.max_keepalive_connections == 0
+        assert pool.limits.keepalive_expiry == 5.0
+
+    def test_http2_falls_back_without_h2(self, monkeypatch):
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        assert HTTPClientPool(http2=True).http2 is False
+
+    def test_external_clients_share_pool(self):
+        pool = HTTPClientPool()
+        clients = ExternalServiceClients(pool=pool)
+
+        assert clients.embedding.pool is pool
+        assert clients.llm.pool is pool
+        assert clients.connection_stats()["services"] == {}
+
+
+class TestAppLifespan:
+    """앱 종료 시 공유 리소스 정리 테스트"""
+
+    async def test_shutdown_closes_index_services_and_clients(self, monkeypatch):
+        from app import main
+        calls = []
+
+        def record(name):
+            return AsyncMock(side_effect=lambda: calls.append(name))
+
+        monkeypatch.setattr(main.get_bm25_index_service(), "close", record("bm25"))
+        monkeypatch.setattr(main.get_vector_index_service(), "teardown", record("vector"))
+        monkeypatch.setattr(main.http_clients, "aclose", record("http"))
+        monkeypatch.setattr(main.qdrant_clients, "aclose", record("qdrant"))
+
+        async with main.lifespan(main.app):
+            assert calls == []
+
+        assert calls == ["bm25", "vector", "http", "qdrant"]
+
+    async def test_idle_vector_handles_evicted_during_lifespan(self, monkeypatch):
+        from app import main
+        state = {}
+
+        async def run_idle_eviction():
+            state["running"] = True
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        vector_service = main.get_vector_index_service()
+        monkeypatch.setattr(vector_service.registry, "run_idle_eviction", run_idle_eviction)
+        monkeypatch.setattr(vector_service, "teardown", AsyncMock())
+        monkeypatch.setattr(main.get_bm25_index_service(), "close", AsyncMock())
+        monkeypatch.setattr(main.http_clients, "aclose", AsyncMock())
+        monkeypatch.setattr(main.qdrant_clients, "aclose", AsyncMock())
+
+        async with main.lifespan(main.app):
+            await asyncio.sleep(0)
+            assert state == {"running": True}
+
+        assert state == {"running": True, "cancelled": True}
@@ -1,3 +1,7 @@
+import math
+import random
+
+import numpy as np
 import pytest
 from app.features.search.bm25_scorer import BM25KeywordScorer
 
@@ -127,4 +131,73 @@ def test_bm25_scorer_should_use_configurable_parameters():
     # Then
     assert score_default != score_custom  # 매개변수가 다르면 점수도 달라야 함
     assert score_default > 0
-    assert score_custom > 0 
\ No newline at end of file
+    assert score_custom > 0 
+
+def _reference_scores(documents, query, k1=1.5, b=0.75):
+    """행렬화 이전의 문서/용어 루프 BM25 계산"""
+    n = len(documents)
+    avg = sum(len(doc) for doc in documents) / n
+    scores = []
+    for doc in documents:
+        score = 0.0
+        for term in query:
+            tf = doc.count(term)
+            if tf == 0:
+                continue
+            df = sum(1 for other in documents if term in other)
+            idf = max(math.log((n - df + 0.5) / (df + 0.5)), 0.01)
+            score += idf * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * (len(doc) / avg))))
+        scores.append(score)
+    return scores
+
+
+def test_bm25_scorer_should_match_loop_implementation():
+    """희소 행렬 점수가 문서/용어 루프 계산과 같아야 함"""
+    # Given
+    rng = random.Random(3)
+    vocab = [f"t{i}" for i in range(30)]
+    documents = [[rng.choice(vocab) for _ in range(rng.randint(0, 25))] for _ in range(80)]
+    scorer = BM25KeywordScorer(k1=1.2, b=0.6)
+    scorer.fit(documents)
+    
+    for query in (["t1", "t2"], ["t3", "t3", "t29", "missing"], []):
+        # When
+        scores = scorer.get_scores(query)
+        
+        # Then
+        assert scores == pytest.approx(_reference_scores(documents, query, k1=1.2, b=0.6))
+        assert [scorer.score(query, i) for i in range(len(documents))] == pytest.approx(scores)
+
+
+def test_bm25_scorer_should_score_query_batches():
+    """배치 점수가 쿼리별 점수와 같아야 함"""
+    # Given
+    scorer = BM25KeywordScorer()
+    scorer.fit([["loan", "service"], ["user", "loan", "loan"], ["class"]])
+    queries = [["loan"], ["user", "class"], ["unknown"]]
+    
+    # When
+    batch = scorer.get_batch_scores(queries)
+    
+    # Then
+    assert batch.shape == (3, 3)
+    for row, query in zip(batch, queries):
+        assert row.tolist() == pytest.approx(scorer.get_scores(query))
+    assert scorer.get_top_k(["loan"], k=2)[0][0] == 1
+
+
+def test_bm25_scorer_should_normalize_arrays_like_lists():
+    """정규화는 배열 입력에도 리스트와 같은 값을 배열로 반환해야 함"""
+    # Given
+    scorer = BM25KeywordScorer()
+    raw_scores = [0.0, 0.05, 0.3, 1.0, 3.0, 7.0, 20.0]
+    
+    # When
+    from_list = scorer.normalize_scores(raw_scores)
+    from_array = scorer.normalize_scores(np.array(raw_scores))
+    
+    # Then
+    assert isinstance(from_list, list)
+    assert isinstance(from_array, np.ndarray)
+    assert from_array.tolist() == from_list
+    assert from_list == pytest.approx([0.0, 0.055, 0.25, 0.5, 0.7 + 0.2 / 3, 1.0, 1.0])
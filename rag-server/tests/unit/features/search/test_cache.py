@@ -0,0 +1,189 @@
+"""
+검색 결과 캐시 테스트
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.features.indexing.schema import IndexingRequest
+from app.features.indexing.service import HybridIndexingService
+from app.features.search.cache import SearchResultCache
+from app.features.search.schema import BM25SearchRequest, VectorSearchRequest
+from app.features.search.service import HybridSearchService
+from app.index.bm25_index import BM25IndexConfig
+from app.index.bm25_service import BM25IndexService
+from app.index.vector_registry import VectorIndexRegistry
+
+
+def _docs(count=5):
+    return [
+        {"id": f"book-{i}", "content": f"class BookController{i} handles book requests", "metadata": {}}
+        for i in range(count)
+    ]
+
+
+class TestSearchResultCache:
+    """LRU/TTL 캐시 테스트"""
+
+    def test_key_normalizes_query_and_option_order(self):
+        """질의 공백과 필터/파라미터 순서는 키에 영향을 주지 않아야 함"""
+        first = SearchResultCache.make_key("bm25", "lib", 0, " book   controller ", 10, {"a": 1, "b": 2}, x=1, y=2)
+        second = SearchResultCache.make_key("bm25", "lib", 0, "book controller", 10, {"b": 2, "a": 1}, y=2, x=1)
+        assert first == second
+        assert first != SearchResultCache.make_key("bm25", "lib", 1, "book controller", 10, {"a": 1, "b": 2}, x=1, y=2)
+        assert first != SearchResultCache.make_key("bm25", "lib", 0, "Book controller", 10, {"a": 1, "b": 2}, x=1, y=2)
+
+    def test_evicts_least_recently_used(self):
+        """최대 항목 수를 넘으면 가장 오래 쓰지 않은 항목을 제거해야 함"""
+        cache = SearchResultCache(max_entries=2)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        assert cache.get("a") == [1]
+        cache.put("c", [3])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1]
+        assert cache.get("c") == [3]
+        assert cache.evictions == 1
+
+    def test_expired_entries_are_misses(self, monkeypatch):
+        """TTL이 지난 항목은 제거되고 miss로 집계되어야 함"""
+        now = [100.0]
+        monkeypatch.setattr("app.features.search.cache.time.monotonic", lambda: now[0])
+        cache = SearchResultCache(ttl_seconds=10)
+        cache.put("a", [1])
+
+        now[0] += 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        stats = cache.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["misses"] == 1
+
+    def test_stats_report_hit_rate(self):
+        cache = SearchResultCache()
+        cache.put("a", [1])
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.record_bypass()
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["bypasses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+class TestSearchServiceCache:
+    """HybridSearchService 검색 결과 캐시 테스트"""
+
+    @pytest.fixture
+    async def service(self, tmp_path):
+        service = HybridSearchService()
+        service.bm25_service = BM25IndexService(
+            BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+        )
+        service.result_cache = SearchResultCache()
+        yield service
+        await service.bm25_service.close()
+
+    async def test_repeated_bm25_query_is_served_from_cache(self, service):
+        """같은 BM25 질의는 두 번째부터 캐시에서 응답해야 함"""
+        await service.bm25_service.index_documents(_docs(), "lib")
+        service.bm25_service.search_keywords = AsyncMock(wraps=service.bm25_service.search_keywords)
+        request = BM25SearchRequest(query="book controller", index_name="lib", top_k=3)
+
+        first = await service.bm25_search(request)
+        second = await service.bm25_search(BM25SearchRequest(query=" book  controller", index_name="lib", top_k=3))
+
+        assert first.cached is False
+        assert second.cached is True
+        assert [r.document_id for r in second.results] == [r.document_id for r in first.results]
+        assert service.bm25_service.search_keywords.await_count == 1
+        assert service.get_cache_stats()["hits"] == 1
+
+    async def test_write_invalidates_cached_bm25_results(self, service):
+        """컬렉션에 쓰기가 일어나면 이전 결과를 쓰지 않아야 함"""
+        await service.bm25_service.index_documents(_docs(2), "lib")
+        request = BM25SearchRequest(query="book controller", index_name="lib", top_k=10)
+        assert (await service.bm25_search(request)).total_results == 2
+
+        await service.bm25_service.index_documents(_docs(4), "lib")
+        response = await service.bm25_search(request)
+        assert response.cached is False
+        assert response.total_results == 4
+
+        await service.bm25_service.delete_document("book-0", "lib")
+        assert (await service.bm25_search(request)).total_results == 3
+
+        # 다른 컬렉션 쓰기는 영향 없음
+        await service.bm25_service.index_documents(_docs(1), "other")
+        assert (await service.bm25_search(request)).cached is True
+
+    async def test_failed_bm25_search_not_cached(self, service, monkeypatch):
+        """검색 실패로 돌아온 빈 결과는 캐시하지 않아야 함"""
+        await service.bm25_service.index_documents(_docs(), "lib")
+        request = BM25SearchRequest(query="book", index_name="lib", top_k=3)
+        index = await service.bm25_service.registry.get("lib")
+        search_with_scores = index.search_with_scores
+        monkeypatch.setattr(index, "search_with_scores", AsyncMock(return_value=[]))
+
+        assert (await service.bm25_search(request)).total_results == 0
+        assert service.get_cache_stats()["entries"] == 0
+
+        monkeypatch.setattr(index, "search_with_scores", search_with_scores)
+        response = await service.bm25_search(request)
+        assert response.cached is False
+        assert response.total_results == 3
+
+    async def test_bypass_flag_skips_cache(self, service):
+        """use_cache=False 요청은 캐시를 읽지도 쓰지도 않아야 함"""
+        await service.bm25_service.index_documents(_docs(), "lib")
+        request = BM25SearchRequest(query="book", index_name="lib", use_cache=False)
+
+        assert (await service.bm25_search(request)).cached is False
+        assert (await service.bm25_search(request)).cached is False
+        stats = service.get_cache_stats()
+        assert stats["entries"] == 0
+        assert stats["bypasses"] == 2
+
+    async def test_vector_results_keyed_on_write_generation(self, service, monkeypatch):
+        """벡터 검색도 캐시되고 색인 후에는 다시 검색해야 함"""
+        vector_service = service.vector_service
+        monkeypatch.setattr(vector_service, "search_similar_code", AsyncMock(return_value=[
+            {"id": "1", "content": "class BookController {}", "score": 0.9, "metadata": {}}
+        ]))
+        request = VectorSearchRequest(query="book", collection_name="lib", top_k=5, filter_metadata={"language": "java"})
+
+        assert (await service.vector_search(request)).cached is False
+        assert (await service.vector_search(request)).cached is True
+
+        vector_service._bump_write_generation("lib")
+        assert (await service.vector_search(request)).cached is False
+        assert vector_service.search_similar_code.await_count == 2
+
+    async def test_indexing_service_write_invalidates_vector_results(self, service, monkeypatch):
+        """인덱싱 서비스로 색인하면 검색 서비스의 벡터 캐시도 무효화되어야 함"""
+        handle = Mock()
+        handle.setup = AsyncMock()
+        handle.teardown = AsyncMock()
+        handle.add_documents = AsyncMock(return_value=["doc1"])
+        handle.last_embedding_stats = {}
+        handle.last_upload_stats = {}
+        handle.search_with_scores = AsyncMock(return_value=[
+            {"id": "doc1", "content": "class BookController {}", "score": 0.9, "metadata": {}}
+        ])
+        indexing_service = HybridIndexingService()
+        assert indexing_service.vector_service is service.vector_service
+        monkeypatch.setattr(service.vector_service, "registry", VectorIndexRegistry(lambda name: handle))
+        request = VectorSearchRequest(query="book", collection_name="lib", top_k=5)
+
+        assert (await service.vector_search(request)).cached is False
+        assert (await service.vector_search(request)).cached is True
+
+        response = await indexing_service.create_vector_index(
+            IndexingRequest(documents=[{"content": "class BookController {}"}], collection_name="lib")
+        )
+        assert response.success is True
+        assert (await service.vector_search(request)).cached is False
+        assert handle.search_with_scores.await_count == 2
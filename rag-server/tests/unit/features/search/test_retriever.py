@@ -11,7 +11,7 @@ def mock_embedding_client():
 @pytest.fixture
 def mock_vector_client():
     client = Mock()
-    client.hybrid_search = Mock()
+    client.ahybrid_search = AsyncMock()
     return client
 
 @pytest.mark.asyncio
@@ -26,7 +26,7 @@ async def test_hybrid_retriever_should_combine_results(
         "embedding": [0.1, 0.2, 0.3]
     }
     
-    mock_vector_client.hybrid_search.return_value = [
+    mock_vector_client.ahybrid_search.return_value = [
         {
             "id": "1", 
             "vector_score": 0.9, 
@@ -55,7 +55,7 @@ async def test_hybrid_retriever_should_combine_results(
     assert "vector_score" in results[0]
     assert "keyword_score" in results[0]
     mock_embedding_client.embed_single.assert_called_once_with({"text": "test function"})
-    mock_vector_client.hybrid_search.assert_called_once()
+    mock_vector_client.ahybrid_search.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_hybrid_retriever_should_handle_empty_results(
@@ -69,7 +69,7 @@ async def test_hybrid_retriever_should_handle_empty_results(
         "embedding": [0.1, 0.2, 0.3]
     }
     
-    mock_vector_client.hybrid_search.return_value = []
+    mock_vector_client.ahybrid_search.return_value = []
     
     # When
     results = await retriever.search(
@@ -6,7 +6,9 @@ from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, Mock, patch
 from typing import Dict, Any
 
+from app.core.exceptions import InvalidFilterError
 from app.main import app
+from app.features.search.service import hybrid_search_service
 from app.features.search.schema import VectorSearchResponse, BM25SearchResponse, HybridSearchResponse, SearchResult
 
 client = TestClient(app)
@@ -204,6 +206,21 @@ class TestHybridSearchRouter:
         # Then
         assert response.status_code == 422  # Validation error
 
+    def test_bm25_search_api_should_validate_field_weights(self):
+        """BM25 검색 API가 음수 필드 가중치를 거부해야 함"""
+        # Given
+        invalid_request = {
+            "query": "test query",
+            "index_name": "test_index",
+            "field_weights": {"name": -1.0}
+        }
+        
+        # When
+        response = client.post("/api/v1/search/bm25", json=invalid_request)
+        
+        # Then
+        assert response.status_code == 422  # Validation error
+
     @patch('app.features.search.service.HybridSearchService.vector_search')
     def test_search_api_should_handle_server_error(self, mock_vector_search, sample_vector_search_request):
         """검색 API가 서버 오류를 적절히 처리해야 함"""
@@ -224,6 +241,20 @@ class TestHybridSearchRouter:
         assert response.status_code == 500
         assert "Test server error" in response.json()["detail"]
 
+    def test_vector_search_api_should_reject_invalid_filter(self, sample_vector_search_request):
+        """변환할 수 없는 필터는 필터 없이 검색하지 않고 400으로 응답해야 함"""
+        # Given
+        sample_vector_search_request["filter_metadata"] = {"language": {"eq": "java"}}
+        search = AsyncMock(side_effect=InvalidFilterError("지원하지 않는 필터 값 (language={'eq': 'java'})"))
+
+        # When
+        with patch.object(hybrid_search_service.vector_service, 'search_similar_code', search):
+            response = client.post("/api/v1/search/vector", json=sample_vector_search_request)
+
+        # Then
+        assert response.status_code == 400
+        assert "language" in response.json()["detail"]
+
     @patch('app.features.search.service.HybridSearchService.health_check')
     def test_search_health_check_should_return_status(self, mock_health_check):
         """검색 서비스 헬스체크가 상태 정보를 반환해야 함"""
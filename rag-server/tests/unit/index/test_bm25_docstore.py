@@ -0,0 +1,94 @@
+import pytest
+from llama_index.core.schema import TextNode
+
+from app.index.bm25_docstore import BM25DocumentStore
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+
+
+class TestBM25DocumentStore:
+    """메모리 문서 저장 필드 저장소 테스트"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = BM25DocumentStore(tmp_path)
+        yield store
+        store.close()
+
+    def test_put_get_and_replace(self, store):
+        """같은 ID로 다시 넣으면 새 저장 필드를 돌려줘야 함"""
+        store.put("a", b"first")
+        store.put("b", b"second")
+        store.put("a", b"replaced")
+
+        assert store.get("a") == b"replaced"
+        assert store.get("b") == b"second"
+        assert store.get("missing") is None
+        assert sorted(store) == ["a", "b"]
+
+    def test_captured_locations_survive_changes(self, store):
+        """capture() 이후 교체/삭제되어도 고정한 위치는 retain() 전까지 읽을 수 있어야 함"""
+        store.put("a", b"old")
+        store.put("b", b"gone")
+        locations = store.capture()
+
+        store.put("a", b"new")
+        assert store.discard("b") is True
+
+        assert store.read(locations["a"]) == b"old"
+        assert store.read(locations["b"]) == b"gone"
+        assert "b" not in store
+
+    def test_retain_rewrites_kept_documents(self, store):
+        """retain()은 주어진 문서만 남기고 파일을 줄여야 함"""
+        for i in range(10):
+            store.put(f"d{i}", f"payload-{i}".encode())
+
+        store.retain(["d3", "d7", "missing"])
+
+        assert sorted(store) == ["d3", "d7"]
+        assert store.get("d7") == b"payload-7"
+        assert store.file_size == len(b"payload-3") + len(b"payload-7")
+
+
+class TestCodeBM25IndexDocumentStore:
+    """CodeBM25Index 원문 조회 경로 테스트"""
+
+    def _config(self, tmp_path):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+
+    async def test_responses_read_text_from_store_and_segment(self, tmp_path):
+        """응답 원문은 메모리 문서는 저장소에서, 세그먼트 문서는 세그먼트에서 읽어야 함"""
+        index = CodeBM25Index(self._config(tmp_path))
+        await index.setup()
+        await index.add_documents([{"id": "1", "content": "class BookController", "metadata": {"language": "java"}}])
+        index.snapshot()
+        await index.add_documents([{"id": "2", "content": "class BookService", "metadata": {"language": "java"}}])
+
+        assert set(index.documents) == {"2"}
+        results = {r["id"]: r for r in await index.search_with_scores("book")}
+        assert results["1"]["content"] == "class BookController"
+        assert results["2"]["content"] == "class BookService"
+        assert results["2"]["metadata"]["language"] == "java"
+        await index.teardown(snapshot=False)
+
+    async def test_snapshot_keeps_documents_changed_during_write(self, tmp_path):
+        """스냅샷 기록 중 교체된 문서는 새 원문으로 저장소에 남아야 함"""
+        index = CodeBM25Index(self._config(tmp_path))
+        await index.setup()
+        await index.add_documents([{"id": "1", "content": "old book", "metadata": {}}])
+
+        original_write = index.engine.write_snapshot
+
+        def write_with_concurrent_update(*args, **kwargs):
+            with index._lock:
+                index._index_node(TextNode(text="new book", metadata={}, id_="1"))
+            return original_write(*args, **kwargs)
+
+        index.engine.write_snapshot = write_with_concurrent_update
+        assert index.snapshot() is True
+
+        assert set(index.documents) == {"1"}
+        assert index.segment_path.exists()
+        results = await index.search_with_scores("book")
+        assert [r["content"] for r in results] == ["new book"]
+        await index.teardown(snapshot=False)
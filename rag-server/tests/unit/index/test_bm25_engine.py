@@ -0,0 +1,257 @@
+import math
+import pytest
+
+from app.index.bm25_engine import BM25InvertedIndex
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+
+
+class TestBM25InvertedIndex:
+    """증분 BM25 역색인 테스트"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = BM25InvertedIndex(k1=1.2, b=0.75)
+        engine.add_document("a", ["book", "control", "book"])
+        engine.add_document("b", ["user", "servic"])
+        engine.add_document("c", ["book", "servic", "save"])
+        return engine
+
+    def test_statistics_are_maintained(self, engine):
+        """문서 수, 총 길이, df가 누적 관리되어야 함"""
+        assert engine.doc_count == 3
+        assert engine.total_length == 8
+        assert engine.avgdl == pytest.approx(8 / 3)
+        assert engine.document_frequency("book") == 2
+        assert engine.vocabulary_size == 5
+
+    def test_search_ranks_by_bm25(self, engine):
+        """BM25 점수 순으로 정렬되어야 함"""
+        hits = engine.search(["book"], top_k=10)
+
+        assert [doc_id for doc_id, _ in hits] == ["a", "c"]
+        assert hits[0][1] > hits[1][1] > 0
+
+    def test_score_matches_formula(self, engine):
+        """점수가 BM25 공식과 일치해야 함"""
+        n, df = 3, 2
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = 1.2 * (1 - 0.75 + 0.75 * 3 / (8 / 3))
+        expected = idf * 2 * 2.2 / (2 + norm)
+
+        scores = engine.score_documents(["book"])
+        assert scores["a"] == pytest.approx(expected)
+
+    def test_remove_document_updates_postings(self, engine):
+        """삭제 시 해당 문서의 포스팅과 통계만 정리되어야 함"""
+        assert engine.remove_document("a") is True
+        assert engine.remove_document("a") is False
+
+        assert engine.doc_count == 2
+        assert engine.total_length == 5
+        assert engine.document_frequency("book") == 1
+        assert engine.document_frequency("control") == 0
+        assert engine.vocabulary_size == 4
+        assert [doc_id for doc_id, _ in engine.search(["book"])] == ["c"]
+
+    def test_add_existing_id_replaces_document(self, engine):
+        """같은 ID로 추가하면 기존 문서를 교체해야 함"""
+        engine.add_document("b", ["book"])
+
+        assert engine.doc_count == 3
+        assert engine.document_frequency("user") == 0
+        assert engine.document_frequency("book") == 3
+
+    def test_incremental_equals_bulk_build(self):
+        """증분 추가/삭제 결과가 처음부터 만든 인덱스와 같아야 함"""
+        docs = {f"d{i}": [f"t{i % 3}", f"t{i % 5}", "common"] for i in range(20)}
+
+        incremental = BM25InvertedIndex()
+        for doc_id, tokens in docs.items():
+            incremental.add_document(doc_id, tokens)
+        for i in range(0, 20, 4):
+            incremental.remove_document(f"d{i}")
+
+        bulk = BM25InvertedIndex()
+        for doc_id, tokens in docs.items():
+            if int(doc_id[1:]) % 4:
+                bulk.add_document(doc_id, tokens)
+
+        query = ["t1", "t3", "common"]
+        assert incremental.search(query, top_k=20) == bulk.search(query, top_k=20)
+
+    def test_compaction_keeps_live_documents(self, monkeypatch):
+        """삭제된 문서의 컬럼 항목을 압축해도 살아 있는 문서의 검색/필터/통계는 그대로여야 함"""
+        from app.index import bm25_engine
+
+        monkeypatch.setattr(bm25_engine, "_COMPACT_MIN_DEAD_POSTINGS", 0)
+        docs = {f"d{i}": [f"t{i % 3}", f"t{i % 5}", "common"] for i in range(20)}
+
+        compacted = BM25InvertedIndex(filter_fields=("language",))
+        reference = BM25InvertedIndex(filter_fields=("language",))
+        for doc_id, tokens in docs.items():
+            compacted.add_document(doc_id, tokens, ["language\x00java"])
+            if int(doc_id[1:]) % 4 == 1:
+                reference.add_document(doc_id, tokens, ["language\x00java"])
+        for i in range(20):
+            if i % 4 != 1:
+                compacted.remove_document(f"d{i}")
+
+        live_postings = sum(len(set(docs[f"d{i}"])) for i in range(1, 20, 4))
+        added_postings = sum(len(set(tokens)) for tokens in docs.values())
+        assert compacted._column_size - compacted._dead_postings == live_postings
+        assert compacted._column_size < added_postings
+        assert compacted.doc_term_freqs("d5") == {"t2": 1, "t0": 1, "common": 1}
+        assert compacted.document_frequency("t0") == reference.document_frequency("t0")
+        query = ["t1", "t3", "common"]
+        assert compacted.search(query, top_k=20) == reference.search(query, top_k=20)
+        assert compacted.search(query, top_k=20, filters={"language": ["java"]}) == reference.search(query, top_k=20)
+
+
+class TestBM25FScoring:
+    """BM25F 텍스트 필드 점수 테스트"""
+
+    FIELDS = ("code", "name", "keywords")
+
+    @pytest.fixture
+    def engine(self):
+        engine = BM25InvertedIndex(text_fields=self.FIELDS, field_weights={"name": 3.0})
+        engine.add_document("body", ["book", "book", "list", "servic", "save"])
+        engine.add_document("named", ["list", "servic", "name\x1fbook"])
+        engine.add_document("other", ["user", "keywords\x1frepositori"])
+        return engine
+
+    def test_field_lengths_are_maintained(self, engine):
+        """필드별 문서 길이와 평균이 누적 관리되어야 함"""
+        assert engine.doc_field_lengths("named") == (2, 1, 0)
+        assert engine.field_avg_lengths().tolist() == pytest.approx([8 / 3, 1 / 3, 1 / 3])
+
+        engine.remove_document("named")
+        assert engine.field_avg_lengths().tolist() == pytest.approx([3.0, 1.0, 0.5])
+
+    def test_df_is_max_across_fields(self, engine):
+        """용어 df는 필드별 df의 최댓값이어야 함"""
+        engine.add_document("both", ["book", "name\x1fbook"])
+
+        n, df = 4, 2
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        avg_code, avg_name = 9 / 4, 2 / 4
+        pseudo_tf = 1.0 / (0.25 + 0.75 * 1 / avg_code) + 3.0 / (0.25 + 0.75 * 1 / avg_name)
+        expected = idf * pseudo_tf * 2.2 / (pseudo_tf + 1.2)
+
+        assert engine.score_documents(["book"])["both"] == pytest.approx(expected)
+
+    def test_field_weights_per_query(self, engine):
+        """질의별 필드 가중치로 재색인 없이 순위가 바뀌어야 함"""
+        assert [doc_id for doc_id, _ in engine.search(["book"])] == ["body", "named"]
+        assert [doc_id for doc_id, _ in engine.search(["book"], field_weights={"name": 6.0})] == ["named", "body"]
+        assert [doc_id for doc_id, _ in engine.search(["book"], field_weights={"name": 0})] == ["body"]
+        # 알 수 없는 필드는 무시
+        assert engine.search(["book"], field_weights={"unknown": 5.0}) == engine.search(["book"])
+
+
+class TestCodeBM25IndexIncremental:
+    """CodeBM25Index 증분 색인 테스트"""
+
+    @pytest.fixture
+    async def bm25_index(self, tmp_path):
+        index = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25"), top_k=5))
+        await index.setup()
+        return index
+
+    async def test_add_and_search_without_rebuild(self, bm25_index):
+        """배치 추가 직후 바로 검색되어야 함"""
+        await bm25_index.add_documents([
+            {"id": "1", "content": "class BookController { getBook() }", "metadata": {"language": "java"}},
+            {"id": "2", "content": "def create_user(name): pass", "metadata": {"language": "python"}},
+        ])
+        await bm25_index.add_documents([
+            {"id": "3", "content": "class BookService { saveBook() }", "metadata": {"language": "java"}},
+        ])
+
+        results = await bm25_index.search_with_scores("book", limit=10)
+
+        assert {r["id"] for r in results} == {"1", "3"}
+        assert all(r["source"] == "bm25" and r["score"] > 0 for r in results)
+
+    async def test_delete_and_reload(self, bm25_index, tmp_path):
+        """삭제가 반영되고 재시작 후에도 유지되어야 함"""
+        await bm25_index.add_documents([
+            {"id": "1", "content": "BookController", "metadata": {}},
+            {"id": "2", "content": "BookService", "metadata": {}},
+        ])
+        assert await bm25_index.delete_document("1") is True
+
+        reloaded = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25")))
+        await reloaded.setup()
+
+        results = await reloaded.search_with_scores("book")
+        assert [r["id"] for r in results] == ["2"]
+
+
+class TestFilteredSearch:
+    """필드 색인 기반 필터 검색 테스트"""
+
+    def _engine(self):
+        engine = BM25InvertedIndex(filter_fields=("language",))
+        for i in range(30):
+            language = "java" if i % 10 == 0 else "python"
+            engine.add_document(f"d{i}", ["book"] * (1 + i % 4), [f"language\x00{language}"])
+        return engine
+
+    def test_filter_applies_before_top_k(self):
+        """필터 조건을 만족하는 문서 안에서 top-k를 선택해야 함"""
+        engine = self._engine()
+
+        hits = engine.search(["book"], top_k=5, filters={"language": ["java"]})
+
+        assert sorted(doc_id for doc_id, _ in hits) == ["d0", "d10", "d20"]
+
+    def test_filter_over_segment_and_memory(self, tmp_path):
+        """세그먼트 문서와 메모리 문서 모두에 필터가 적용되어야 함"""
+        from app.index.bm25_segment import BM25SegmentReader, encode_stored_document
+
+        engine = self._engine()
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, lambda doc_id: encode_stored_document(doc_id, {}))
+        engine.complete_snapshot(BM25SegmentReader(path))
+        engine.add_document("new", ["book"], ["language\x00java"])
+        engine.remove_document("d10")
+
+        hits = engine.search(["book"], top_k=10, filters={"language": ["java"]})
+        assert sorted(doc_id for doc_id, _ in hits) == ["d0", "d20", "new"]
+        assert engine.search(["book"], filters={"language": ["kotlin"]}) == []
+        assert engine.base.field_docs("language\x00java").tolist() == [0, 10, 20]
+
+    def test_filtered_scores_match_unfiltered(self):
+        """필터는 후보만 줄이고 점수 자체는 바꾸지 않아야 함"""
+        engine = self._engine()
+
+        unfiltered = dict(engine.search(["book"], top_k=30))
+        for doc_id, score in engine.search(["book"], top_k=30, filters={"language": ["java"]}):
+            assert score == pytest.approx(unfiltered[doc_id])
+
+
+class TestCodeBM25IndexFilters:
+    """CodeBM25Index 필터 검색 테스트"""
+
+    async def test_filtered_search_fills_limit(self, tmp_path):
+        """필터된 검색도 조건을 만족하는 문서로 결과를 채워야 함"""
+        index = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25"), top_k=5,
+                                              background_snapshot=False, journal_fsync=False))
+        await index.setup()
+        documents = [
+            {"id": f"py-{i}", "content": "book book book repository", "metadata": {"language": "python"}}
+            for i in range(10)
+        ] + [
+            {"id": f"java-{i}", "content": "book repository", "metadata": {"language": "java", "code_type": "class"}}
+            for i in range(5)
+        ]
+        await index.add_documents(documents)
+        index.snapshot()
+
+        results = await index.search_with_scores("book", limit=5, filters={"language": "java"})
+        assert sorted(r["id"] for r in results) == [f"java-{i}" for i in range(5)]
+
+        # 색인되지 않은 조건은 결과에 후처리로 적용
+        results = await index.search_with_scores("book", limit=5, filters={"language": "java", "name": "x"})
+        assert results == []
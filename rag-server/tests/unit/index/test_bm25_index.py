@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
+from collections import Counter
 from typing import List, Dict, Any
 
 from app.index.bm25_index import (
@@ -59,6 +60,58 @@ class TestCodeTokenizer:
         processed = tokenizer._preprocess_code("getUserById(String name)")
         assert "get" in processed.lower()
         assert "user" in processed.lower()
+    
+    @pytest.mark.parametrize("text", [
+        "@RestController public class BookController { getUserById(user_id); }",
+        "HTTPResponse parseXMLDocument aBcD x_y_Z __init__ ALL_CAPS_NAME",
+        "cannot wanna gonna gotta lemme gimme 한글주석 café Straße ² 3rd v2Api",
+        "a; b, c. d! e? f -> g => h :: i ... 'j' \"k\" `l`",
+    ])
+    def test_matches_nltk_word_tokenize(self, text):
+        """단일 패스 토큰화 결과가 전처리 + word_tokenize 경로와 같아야 함"""
+        from nltk.tokenize import word_tokenize
+        tokenizer = CodeTokenizer()
+        expected = [
+            tokenizer.stemmer.stem(token)
+            for token in word_tokenize(tokenizer._preprocess_code(text).lower())
+            if len(token) > 1 and token not in tokenizer.stop_words and token.isalnum()
+        ]
+        
+        assert tokenizer.tokenize(text) == expected
+    
+    def test_stem_cache_is_bounded(self):
+        """스테밍 메모는 최대 크기를 넘지 않아야 함"""
+        tokenizer = CodeTokenizer()
+        tokenizer.STEM_CACHE_SIZE = 10
+        tokenizer.tokenize(" ".join(f"word{i}" for i in range(25)))
+        
+        assert 0 < len(tokenizer._stem_cache) <= 10
+        assert tokenizer.tokenize("running runner") == ["run", "runner"]
+
+
+class TestIndexTokenization:
+    """BM25F 필드별 색인 토큰화 테스트"""
+    
+    def test_extracts_fields_from_code(self, tmp_path):
+        """코드에서 이름/어노테이션/중요 접미사를 필드로 분리하고 원문은 code 필드에 둬야 함"""
+        index = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25")))
+        text = "@Service public class BookServiceImpl implements BookService { List<Book> findAllBooks() {} }"
+        
+        fields = index._extract_text_fields(text, {})
+        
+        assert fields["code"] == text
+        assert fields["name"].split() == ["BookServiceImpl", "findAllBooks"]
+        assert fields["annotations"] == "Service"
+        assert "BookService" in fields["keywords"].split()
+    
+    def test_tokenize_fields_qualifies_terms(self, tmp_path):
+        """기본 필드 밖의 토큰은 필드 접두어가 붙은 용어로 색인되어야 함"""
+        index = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25")))
+        
+        term_freqs = index._tokenize_fields({"code": "find books", "name": "findBooks findBooks"})
+        
+        assert term_freqs == {"find": 1, "book": 1, "name\x1ffind": 2, "name\x1fbook": 2}
+        assert index._tokenize_fields({"code": "   "}) == {}
 
 
 class TestBM25IndexConfig:
@@ -92,10 +145,10 @@ class TestCodeBM25Index:
     """BM25 Index 테스트"""
     
     @pytest.fixture
-    def bm25_config(self):
+    def bm25_config(self, tmp_path):
         """BM25 설정 fixture"""
         return BM25IndexConfig(
-            index_path="tests/data/test_bm25_index",
+            index_path=str(tmp_path / "test_bm25_index"),
             k1=1.2,
             b=0.75,
             top_k=5
@@ -132,13 +185,13 @@ class TestCodeBM25Index:
         
         text_node = TextNode(
             text=content,
-            metadata=metadata.model_dump(),
+            metadata=metadata.dict(),
             id_="test_doc_1"
         )
         
         document = Document(
             text=content,
-            metadata=metadata.model_dump(),
+            metadata=metadata.dict(),
             id_="test_doc_1"
         )
         
@@ -156,16 +209,15 @@ class TestCodeBM25Index:
         """BM25 Index 초기화 테스트"""
         assert bm25_index.config is not None
         assert bm25_index.tokenizer is not None
-        assert bm25_index.nodes == []
-        assert bm25_index.documents_map == {}
+        assert len(bm25_index.documents) == 0
     
     @pytest.mark.asyncio
     async def test_bm25_index_setup(self, bm25_index):
         """BM25 Index setup 테스트"""
         await bm25_index.setup()
         # setup 후에도 기본 상태가 유지되어야 함
-        assert bm25_index.nodes == []
-        assert bm25_index.retriever is None
+        assert len(bm25_index.documents) == 0
+        assert bm25_index.engine.doc_count == 0
     
     @pytest.mark.asyncio
     async def test_add_single_document(self, bm25_index, sample_enhanced_document):
@@ -176,9 +228,9 @@ class TestCodeBM25Index:
         
         assert len(added_ids) == 1
         assert added_ids[0] == "test_doc_1"
-        assert len(bm25_index.nodes) == 1
-        assert "test_doc_1" in bm25_index.documents_map
-        assert bm25_index.retriever is not None
+        assert bm25_index.engine.doc_count == 1
+        assert "test_doc_1" in bm25_index.documents
+        assert bm25_index.engine.doc_count == 1
     
     @pytest.mark.asyncio
     async def test_add_multiple_documents(self, bm25_index):
@@ -201,8 +253,8 @@ class TestCodeBM25Index:
         added_ids = await bm25_index.add_documents(documents)
         
         assert len(added_ids) == 3
-        assert len(bm25_index.nodes) == 3
-        assert bm25_index.retriever is not None
+        assert bm25_index.engine.doc_count == 3
+        assert bm25_index.engine.doc_count == 3
     
     @pytest.mark.asyncio
     async def test_search_empty_index(self, bm25_index):
@@ -245,15 +297,31 @@ class TestCodeBM25Index:
                 assert result["source"] == "bm25"
     
     @pytest.mark.asyncio
-    async def test_create_enhanced_text(self, bm25_index, sample_enhanced_document):
-        """강화된 텍스트 생성 테스트"""
-        enhanced_text = bm25_index._create_enhanced_text(sample_enhanced_document)
-        
-        assert isinstance(enhanced_text, str)
-        assert len(enhanced_text) > 0
-        # 메타데이터 정보가 포함되어야 함
-        assert sample_enhanced_document.metadata.name in enhanced_text
-        assert any(keyword in enhanced_text for keyword in sample_enhanced_document.search_keywords)
+    async def test_extract_text_fields_from_metadata(self, bm25_index, sample_enhanced_document):
+        """메타데이터와 검색 키워드는 원문에 덧붙이지 않고 필드로 색인되어야 함"""
+        node, fields, term_freqs = bm25_index._prepare_document(sample_enhanced_document)
+        
+        assert node.text == sample_enhanced_document.text_node.text
+        assert fields["name"].split() == ["getUserById"]  # 호출부(findById)는 제외
+        assert set(sample_enhanced_document.search_keywords) <= set(fields["keywords"].split())
+        assert fields["types"].split() == ["String", "User"]
+        # 같은 이름은 반복되지 않음 (강조는 필드 가중치로)
+        assert term_freqs["name\x1fuser"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_name_field_outranks_body_mention(self, bm25_index):
+        """이름 필드 일치가 본문 언급보다 높게, 가중치를 끄면 반대로 순위가 매겨져야 함"""
+        await bm25_index.setup()
+        await bm25_index.add_documents([
+            {"id": "caller", "content": "void run() { log(validate); log(order); log(order); }", "metadata": {}},
+            {"id": "defined", "content": "void handle() { check(); }", "metadata": {"name": "validateOrder"}},
+        ])
+        
+        results = await bm25_index.search_with_scores("validate order", limit=2)
+        assert [r["id"] for r in results] == ["defined", "caller"]
+        
+        results = await bm25_index.search_with_scores("validate order", limit=2, field_weights={"name": 0})
+        assert [r["id"] for r in results] == ["caller"]
     
     @pytest.mark.asyncio
     async def test_update_document(self, bm25_index, sample_enhanced_document):
@@ -271,7 +339,7 @@ class TestCodeBM25Index:
         
         assert success is True
         # 업데이트 후에도 문서 수는 동일해야 함
-        assert len(bm25_index.nodes) == 1
+        assert bm25_index.engine.doc_count == 1
     
     @pytest.mark.asyncio
     async def test_delete_document(self, bm25_index, sample_enhanced_document):
@@ -280,13 +348,13 @@ class TestCodeBM25Index:
         await bm25_index.add_documents([sample_enhanced_document])
         
         # 삭제 전 확인
-        assert len(bm25_index.nodes) == 1
+        assert bm25_index.engine.doc_count == 1
         
         success = await bm25_index.delete_document("test_doc_1")
         
         assert success is True
-        assert len(bm25_index.nodes) == 0
-        assert "test_doc_1" not in bm25_index.documents_map
+        assert bm25_index.engine.doc_count == 0
+        assert "test_doc_1" not in bm25_index.documents
     
     @pytest.mark.asyncio
     async def test_get_stats(self, bm25_index, sample_enhanced_document):
@@ -306,7 +374,59 @@ class TestCodeBM25Index:
         assert stats_with_docs["total_tokens"] > 0
         assert "bm25_parameters" in stats_with_docs
         assert stats_with_docs["bm25_parameters"]["k1"] == bm25_index.config.k1
-    
+
+    @pytest.mark.asyncio
+    async def test_stats_are_maintained_incrementally(self, tmp_path):
+        """추가/교체/삭제 후 통계가 다시 토큰화 없이 전체 재계산 결과와 같고 재시작 후에도 유지되어야 함"""
+        config = BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents([
+            {"id": "1", "content": "class BookController { void saveBook() {} }", "metadata": {"language": "java"}},
+            {"id": "2", "content": "def find_member(member_id): pass", "metadata": {"language": "python"}},
+            {"id": "3", "content": "BookRepository findAll", "metadata": {}},
+        ])
+        assert index.snapshot() is True
+        await index.update_document("2", {"content": "class MemberService {}", "metadata": {"language": "java"}})
+        await index.delete_document("3")
+        await index.add_documents([{"id": "4", "content": "book member", "metadata": {"language": "kotlin"}}])
+
+        def recount():
+            nodes = list(index._iter_nodes())
+            return {
+                "total_documents": len(nodes),
+                "total_tokens": sum(len(index.tokenizer.tokenize(node.text)) for node in nodes),
+                "language_distribution": dict(Counter(node.metadata.get("language", "unknown") for node in nodes)),
+            }
+
+        expected = recount()
+        with patch.object(index.tokenizer, "tokenize", side_effect=AssertionError("통계 계산 중 토큰화")):
+            stats = await index.get_stats()
+        assert {key: stats[key] for key in expected} == expected
+        assert expected["language_distribution"] == {"java": 2, "kotlin": 1}
+        assert stats["disk_bytes"] > 0
+
+        # 삭제로 비게 된 기반 용어는 병합 전까지 어휘 수에 남고, 병합 후에는 정확해야 함
+        vocabulary = {term for doc_id in index.engine.iter_doc_ids() for term in index.engine.doc_term_freqs(doc_id)}
+        assert stats["vocabulary_size"] >= len(vocabulary)
+        assert index.snapshot() is True
+        assert (await index.get_stats())["vocabulary_size"] == len(vocabulary)
+        await index.add_documents([{"id": "5", "content": "brandNewTerm", "metadata": {}}])
+        await index.delete_document("5")
+        assert (await index.get_stats())["vocabulary_size"] == len(vocabulary)
+
+        # 스냅샷 + 저널 재생으로 복원된 집계도 같아야 함
+        reloaded = CodeBM25Index(config)
+        await reloaded.setup()
+        reloaded_stats = await reloaded.get_stats()
+        assert {key: reloaded_stats[key] for key in expected} == expected
+
+        # 저널이 비어 있으면 로드 없이 매니페스트에서 읽음
+        assert CodeBM25Index.read_persisted_stats(config) is None
+        await reloaded.teardown()
+        persisted = CodeBM25Index.read_persisted_stats(config)
+        assert {key: persisted[key] for key in expected} == expected
+
     @pytest.mark.asyncio
     async def test_apply_filters(self, bm25_index):
         """필터 적용 테스트"""
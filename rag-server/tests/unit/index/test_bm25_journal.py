@@ -0,0 +1,279 @@
+import threading
+import time
+import pytest
+
+from app.index.bm25_engine import BM25InvertedIndex
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.bm25_journal import BM25SnapshotScheduler, BM25WriteJournal
+from app.index.bm25_segment import BM25SegmentReader, encode_stored_document
+
+
+def _payload(doc_id):
+    return encode_stored_document(doc_id, {})
+
+
+class TestBM25WriteJournal:
+    """append-only 저널 테스트"""
+
+    def test_enqueue_sync_and_replay(self, tmp_path):
+        """기록한 레코드가 순번과 함께 재생되어야 함"""
+        journal = BM25WriteJournal(tmp_path / "journal.log", fsync=False)
+        seq = journal.enqueue([{"op": "add", "id": "1"}, {"op": "delete", "id": "2"}])
+        journal.sync(seq)
+        journal.close()
+
+        reopened = BM25WriteJournal(tmp_path / "journal.log", fsync=False)
+        assert reopened.last_seq == 2
+        assert list(reopened.replay()) == [(1, {"op": "add", "id": "1"}), (2, {"op": "delete", "id": "2"})]
+        assert [seq for seq, _ in reopened.replay(after_seq=1)] == [2]
+
+    def test_torn_tail_is_truncated(self, tmp_path):
+        """마지막 레코드가 잘린 경우 정상 레코드까지만 복구해야 함"""
+        path = tmp_path / "journal.log"
+        journal = BM25WriteJournal(path, fsync=False)
+        journal.sync(journal.enqueue([{"op": "add", "id": "1"}, {"op": "add", "id": "2"}]))
+        journal.close()
+        path.write_bytes(path.read_bytes()[:-3])
+
+        reopened = BM25WriteJournal(path, fsync=False)
+        assert [record["id"] for _, record in reopened.replay()] == ["1"]
+        assert reopened.sync(reopened.enqueue([{"op": "add", "id": "3"}])) is None
+        assert [record["id"] for _, record in reopened.replay()] == ["1", "3"]
+
+    def test_group_commit_batches_concurrent_writers(self, tmp_path):
+        """동시 작성자의 레코드는 더 적은 횟수의 write로 묶여야 함"""
+        journal = BM25WriteJournal(tmp_path / "journal.log", fsync=False)
+        writes = []
+        original_write = journal._write
+
+        def slow_write(frames):
+            writes.append(len(frames))
+            time.sleep(0.01)
+            original_write(frames)
+
+        journal._write = slow_write
+
+        def writer(i):
+            journal.sync(journal.enqueue([{"op": "add", "id": str(i)}]))
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(writes) == 20
+        assert len(writes) < 20
+        assert journal.durable_seq == 20
+        assert len(list(journal.replay())) == 20
+
+    def test_truncate_keeps_newer_records(self, tmp_path):
+        """스냅샷 순번 이하 레코드만 제거해야 함"""
+        journal = BM25WriteJournal(tmp_path / "journal.log", fsync=False)
+        journal.sync(journal.enqueue([{"op": "add", "id": str(i)} for i in range(5)]))
+        journal.enqueue([{"op": "add", "id": "pending"}])
+
+        journal.truncate(3)
+        journal.sync(journal.last_seq)
+
+        assert [seq for seq, _ in journal.replay()] == [4, 5, 6]
+
+
+class TestBM25SnapshotScheduler:
+    """디바운스 스냅샷 스케줄러 테스트"""
+
+    def test_burst_of_writes_triggers_single_snapshot(self):
+        """연속 쓰기는 한 번의 스냅샷으로 합쳐져야 함"""
+        calls = []
+        scheduler = BM25SnapshotScheduler(lambda: calls.append(time.monotonic()), debounce_seconds=0.05)
+        try:
+            for _ in range(10):
+                scheduler.notify()
+                time.sleep(0.005)
+            time.sleep(0.2)
+            assert len(calls) == 1
+        finally:
+            scheduler.stop()
+
+    def test_max_delay_bounds_snapshot_lag(self):
+        """쓰기가 계속되어도 최대 지연 이후에는 스냅샷해야 함"""
+        calls = []
+        scheduler = BM25SnapshotScheduler(lambda: calls.append(1), debounce_seconds=10, max_delay_seconds=0.05)
+        try:
+            scheduler.notify()
+            time.sleep(0.2)
+            assert len(calls) == 1
+        finally:
+            scheduler.stop()
+
+
+class TestConcurrentSnapshot:
+    """스냅샷 기록 중 변경 보존 테스트"""
+
+    def test_changes_during_write_survive_swap(self, tmp_path):
+        """기록 중 추가/삭제/교체된 문서가 교체 후에도 반영되어야 함"""
+        engine = BM25InvertedIndex()
+        reference = BM25InvertedIndex()
+        first = tmp_path / "first.bm25"
+        for target in (engine, reference):
+            target.add_document("base", ["alpha", "beta"])
+            target.add_document("gone", ["alpha"])
+        engine.write_snapshot(first, _payload)
+        engine.complete_snapshot(BM25SegmentReader(first))
+
+        for target in (engine, reference):
+            target.add_document("frozen", ["gamma"])
+            target.add_document("replaced", ["delta"])
+
+        state = engine.capture_snapshot()
+        # 기록 도중 들어온 변경
+        for target in (engine, reference):
+            target.add_document("late", ["alpha", "epsilon"])
+            target.add_document("replaced", ["zeta"])
+            target.remove_document("gone")
+            target.remove_document("frozen")
+
+        second = tmp_path / "second.bm25"
+        engine.write_snapshot(second, _payload, state)
+        engine.complete_snapshot(BM25SegmentReader(second))
+
+        assert sorted(engine.iter_doc_ids()) == sorted(reference.iter_doc_ids())
+        assert {doc_id for doc_id in engine.iter_doc_ids() if engine.in_memory(doc_id)} == {"late", "replaced"}
+        assert engine.document_frequency("delta") == 0
+        for query in (["alpha"], ["zeta"], ["gamma"], ["epsilon", "beta"]):
+            assert engine.search(query) == pytest.approx(reference.search(query))
+
+
+class TestCodeBM25IndexJournal:
+    """CodeBM25Index 저널/스냅샷 테스트"""
+
+    def _config(self, tmp_path, **kwargs):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, **kwargs)
+
+    async def test_writes_are_journaled_not_snapshotted(self, tmp_path):
+        """쓰기는 저널에만 기록되고 세그먼트는 바로 다시 쓰지 않아야 함"""
+        index = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await index.setup()
+        await index.add_documents([{"id": "1", "content": "BookController", "metadata": {}}])
+        await index.delete_document("1")
+        await index.add_documents([{"id": "2", "content": "BookService", "metadata": {}}])
+
+        assert not index.segment_path.exists()
+        assert [r["op"] for _, r in index._journal.replay()] == ["add", "delete", "add"]
+
+        reloaded = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await reloaded.setup()
+
+        results = await reloaded.search_with_scores("book")
+        assert [r["id"] for r in results] == ["2"]
+
+    async def test_snapshot_truncates_journal_and_replays_rest(self, tmp_path):
+        """스냅샷 이후 저널은 그 뒤 변경만 남고 재시작 시 재생되어야 함"""
+        index = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await index.setup()
+        await index.add_documents([{"id": "1", "content": "BookController", "metadata": {}}])
+        assert index.snapshot() is True
+        await index.add_documents([{"id": "2", "content": "BookService", "metadata": {}}])
+
+        assert [r["id"] for _, r in index._journal.replay()] == ["2"]
+
+        reloaded = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await reloaded.setup()
+
+        assert reloaded.engine.base_doc_count == 1
+        assert set(reloaded.documents) == {"2"}
+        results = await reloaded.search_with_scores("book")
+        assert {r["id"] for r in results} == {"1", "2"}
+
+    async def test_replay_keeps_text_fields(self, tmp_path):
+        """재생된 문서는 저널에 기록된 BM25F 필드로 같은 점수를 내야 함"""
+        index = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await index.setup()
+        await index.add_documents([
+            {"id": "1", "content": "void handle() {}", "metadata": {"name": "saveBook", "keywords": ["library"]}},
+            {"id": "2", "content": "book library", "metadata": {}},
+        ])
+        expected = await index.search_with_scores("save book library")
+
+        reloaded = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await reloaded.setup()
+
+        actual = await reloaded.search_with_scores("save book library")
+        assert [(r["id"], r["score"]) for r in actual] == [(r["id"], r["score"]) for r in expected]
+        for doc_id in ("1", "2"):
+            assert reloaded.engine.doc_field_lengths(doc_id) == index.engine.doc_field_lengths(doc_id)
+
+    async def test_update_is_single_journal_record(self, tmp_path):
+        """업데이트는 기존 문서를 교체하는 저널 레코드 하나로 기록되어야 함"""
+        index = CodeBM25Index(self._config(tmp_path, background_snapshot=False))
+        await index.setup()
+        await index.add_documents([{"id": "1", "content": "BookController", "metadata": {}}])
+        assert index.snapshot() is True
+
+        assert await index.update_document("1", {"content": "MemberService", "metadata": {}}) is True
+
+        assert [r["op"] for _, r in index._journal.replay()] == ["add"]
+        assert index.engine.base_deleted_ratio == 1.0
+        assert await index.search_with_scores("book") == []
+        assert [r["id"] for r in await index.search_with_scores("member")] == ["1"]
+
+    async def test_merge_policy_defers_segment_rewrite(self, tmp_path):
+        """작은 변경은 세그먼트를 다시 쓰지 않고, 삭제 비율이 기준을 넘으면 병합해야 함"""
+        index = CodeBM25Index(self._config(
+            tmp_path, background_snapshot=False, merge_deleted_ratio=0.25, merge_min_pending_records=100
+        ))
+        await index.setup()
+        await index.add_documents([
+            {"id": str(i), "content": f"BookController handler{i}", "metadata": {}} for i in range(20)
+        ])
+        assert index.merge() is True
+        segment = index.engine.base
+
+        await index.update_document("0", {"content": "MemberService", "metadata": {}})
+        await index.delete_document("1")
+        assert index.merge() is False
+        assert index.engine.base is segment
+        assert {r["id"] for r in await index.search_with_scores("book", limit=50)} == {str(i) for i in range(2, 20)}
+
+        for i in range(2, 5):
+            await index.delete_document(str(i))
+        assert index.engine.base_deleted_ratio == 0.25
+        assert index.merge() is True
+        assert index.engine.base is not segment
+        assert index.engine.base_deleted_ratio == 0.0
+        assert index.engine.base_doc_count == 16
+        assert list(index._journal.replay()) == []
+
+    async def test_merge_policy_bounds_journal(self, tmp_path):
+        """저널 레코드가 기준 수를 넘으면 삭제가 없어도 병합해야 함"""
+        index = CodeBM25Index(self._config(
+            tmp_path, background_snapshot=False, merge_pending_ratio=0.5, merge_min_pending_records=1
+        ))
+        await index.setup()
+        await index.add_documents([{"id": str(i), "content": "BookController", "metadata": {}} for i in range(4)])
+        assert index.merge() is True
+
+        await index.add_documents([{"id": "new1", "content": "BookService", "metadata": {}}])
+        assert index.merge() is False
+        await index.add_documents([{"id": "new2", "content": "BookService", "metadata": {}}])
+        assert index.merge() is True
+        assert index.engine.base_doc_count == 6
+
+    async def test_background_snapshot_after_debounce(self, tmp_path):
+        """디바운스 후 백그라운드에서 세그먼트가 기록되어야 함"""
+        index = CodeBM25Index(self._config(tmp_path, snapshot_debounce_seconds=0.05))
+        await index.setup()
+        try:
+            await index.add_documents([{"id": "1", "content": "BookController", "metadata": {}}])
+
+            deadline = time.monotonic() + 5
+            while index.engine.has_pending_changes and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+            assert index.segment_path.exists()
+            assert len(index.documents) == 0
+            assert list(index._journal.replay()) == []
+            results = await index.search_with_scores("book")
+            assert [r["id"] for r in results] == ["1"]
+        finally:
+            await index.teardown()
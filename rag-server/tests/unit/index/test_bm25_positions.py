@@ -0,0 +1,160 @@
+import pytest
+
+from app.index.bm25_engine import BM25InvertedIndex
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.bm25_segment import BM25SegmentReader, encode_stored_document
+
+
+def _payload(doc_id):
+    return encode_stored_document(f"text of {doc_id}", {})
+
+
+def _docs():
+    return {
+        "phrase": ["transact", "save", "book", "repositori"],
+        "reorder": ["book", "save", "transact"],
+        "spread": ["save", "the", "big", "old", "book", "transact"],
+        "partial": ["save", "author"],
+    }
+
+
+def _engine(docs):
+    engine = BM25InvertedIndex(store_positions=True)
+    for doc_id, tokens in docs.items():
+        engine.add_document(doc_id, tokens)
+    return engine
+
+
+def _ids(hits):
+    return sorted(doc_id for doc_id, _ in hits)
+
+
+class TestPositionalPostings:
+    """위치 포스팅 기록/구문 판정 테스트"""
+
+    def test_segment_roundtrip(self, tmp_path):
+        """세그먼트에 기록한 위치가 용어별 포스팅 순서로 복원되어야 함"""
+        engine = _engine({"a": ["save", "book", "save"], "b": ["book", "x", "save"]})
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, _payload)
+
+        reader = BM25SegmentReader(path)
+        assert reader.has_positions
+        doc_nums, tfs, positions = reader.term_positions(reader.lookup_term("save"))
+        assert [reader.doc_id(int(d)) for d in doc_nums] == ["a", "b"]
+        assert tfs.tolist() == [2, 1]
+        assert positions.tolist() == [0, 2, 2]
+        reader.close()
+
+    def test_phrase_matches_memory_and_segment(self, tmp_path):
+        """메모리 변경분과 병합된 세그먼트에서 같은 구문 판정 결과를 내야 함"""
+        engine = _engine(_docs())
+        query = ["transact", "save", "book"]
+
+        for _ in range(2):
+            assert _ids(engine.search(query, top_k=10, phrases=[(query, None)])) == ["phrase"]
+            assert _ids(engine.search(query, top_k=10, phrases=[(["save", "book"], 0)])) == ["phrase", "reorder"]
+            assert _ids(engine.search(query, top_k=10, phrases=[(["save", "book"], 3)])) == [
+                "phrase", "reorder", "spread"
+            ]
+            path = tmp_path / "segment.bm25"
+            engine.write_snapshot(path, _payload)
+            engine.attach_base(BM25SegmentReader(path))
+            engine._reset_memory()
+
+    def test_deletes_and_new_documents_after_merge(self, tmp_path):
+        """삭제 표시된 기반 문서는 빠지고, 병합 뒤 추가된 문서와 재병합된 위치는 유지되어야 함"""
+        engine = _engine(_docs())
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, _payload)
+        engine.attach_base(BM25SegmentReader(path))
+        engine._reset_memory()
+
+        engine.remove_document("phrase")
+        engine.add_document("late", ["call", "save", "book"])
+        phrase = [(["save", "book"], None)]
+        assert _ids(engine.search(["save", "book"], phrases=phrase)) == ["late"]
+
+        merged = tmp_path / "merged.bm25"
+        engine.write_snapshot(merged, _payload)
+        engine.attach_base(BM25SegmentReader(merged))
+        engine._reset_memory()
+        assert _ids(engine.search(["save", "book"], phrases=phrase)) == ["late"]
+        assert engine.proximity_spans(["late", "spread", "partial"], ["save", "book"]) == {"late": 2, "spread": 5}
+
+    def test_compaction_keeps_positions(self):
+        """삭제된 슬롯의 컬럼을 압축해도 남은 문서의 위치가 유지되어야 함"""
+        engine = _engine({f"d{i}": [f"w{j}" for j in range(40)] + ["save", "book"] for i in range(200)})
+        for i in range(150):
+            engine.remove_document(f"d{i}")
+        assert len(engine._pos_column) < 200 * 42
+        engine.add_document("last", ["book", "save"])
+
+        hits = engine.search(["save", "book"], top_k=100, phrases=[(["save", "book"], None)])
+        assert _ids(hits) == sorted(f"d{i}" for i in range(150, 200))
+        assert engine._slot_positions(engine._slots["last"]) == {"book": [0], "save": [1]}
+
+    def test_phrase_requires_positions(self):
+        engine = BM25InvertedIndex()
+        engine.add_document("a", ["save", "book"])
+        with pytest.raises(ValueError):
+            engine.match_phrases([(["save", "book"], None)])
+
+
+class TestIndexPhraseQuery:
+    """BM25 인덱스 따옴표 구문/근접 가중치 테스트"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return BM25IndexConfig(
+            index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False,
+            store_positions=True
+        )
+
+    @pytest.fixture
+    def documents(self):
+        return [
+            {"id": "adjacent", "content": "@Transactional public void saveBook(Book book) { repository.save(book); }"},
+            {"id": "far", "content": "void save(Author author) { log(author); cache.clear(); Book book = load(); }"},
+            {"id": "other", "content": "void deleteBook(Book book) { repository.delete(book); }"},
+        ]
+
+    async def test_quoted_phrase_restricts_results(self, config, documents):
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents(documents)
+
+        for _ in range(2):
+            results = await index.search_with_scores('"save book"')
+            assert [r["id"] for r in results] == ["adjacent"]
+            loose = await index.search_with_scores('"save book"~10')
+            assert {r["id"] for r in loose} == {"adjacent", "far"}
+            unquoted = await index.search_with_scores('"save book"', phrase_query=False)
+            assert {r["id"] for r in unquoted} == {"adjacent", "far", "other"}
+            index.snapshot()
+        await index.teardown(snapshot=False)
+
+    async def test_proximity_boost_raises_close_matches(self, config, documents):
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents(documents)
+
+        plain = {r["id"]: r["score"] for r in await index.search_with_scores("save author book")}
+        boosted = {
+            r["id"]: r["score"]
+            for r in await index.search_with_scores("save author book", proximity_window=20, proximity_boost=1.0)
+        }
+        # far는 세 토큰이 모두 있으므로 가중, adjacent/other에는 author가 없음
+        assert boosted["far"] > plain["far"]
+        assert boosted["adjacent"] == pytest.approx(plain["adjacent"])
+        await index.teardown(snapshot=False)
+
+    async def test_index_without_positions_ignores_phrase_syntax(self, tmp_path, documents):
+        config = BM25IndexConfig(index_path=str(tmp_path / "plain"), journal_fsync=False, background_snapshot=False)
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents(documents)
+
+        results = await index.search_with_scores('"save book"')
+        assert {r["id"] for r in results} == {"adjacent", "far", "other"}
+        await index.teardown(snapshot=False)
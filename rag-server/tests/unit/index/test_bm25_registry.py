@@ -0,0 +1,244 @@
+import asyncio
+
+import pytest
+
+from app.index.bm25_index import BM25IndexConfig
+from app.index.bm25_service import BM25IndexService
+
+
+def _docs(prefix, count=20):
+    return [
+        {"id": f"{prefix}-{i}", "content": f"class {prefix.title()}Controller{i} handles {prefix} requests", "metadata": {}}
+        for i in range(count)
+    ]
+
+
+class TestBM25IndexRegistry:
+    """메모리 예산 기반 BM25 인덱스 레지스트리 테스트"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+
+    async def test_lazy_load_counts_hits_and_misses(self, config):
+        """첫 접근은 miss, 이후 접근은 hit으로 집계되어야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+
+        await service.index_documents(_docs("book"), "books")
+        await service.search_keywords("book", "books")
+        await service.search_keywords("book", "books")
+
+        stats = service.registry.get_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+        assert stats["evictions"] == 0
+        assert stats["resident_collections"] == 1
+        assert stats["resident_bytes"] > 0
+        await service.registry.close()
+
+    async def test_evicts_least_recently_used_over_budget(self, config):
+        """예산을 넘으면 가장 오래 쓰지 않은 컬렉션을 내려야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1)
+
+        await service.index_documents(_docs("book"), "books")
+        await service.index_documents(_docs("member"), "members")
+
+        assert service.registry.resident_collections == ["members"]
+        assert service.registry.evictions == 1
+        # 축출 시 변경분은 세그먼트로 기록되어 콜드 상태로 남음
+        assert (config.index_path / "books" / "segment.bm25").exists()
+
+        results = await service.search_keywords("book controller", "books", limit=3)
+        assert len(results) == 3
+        assert all(r["collection_name"] == "books" for r in results)
+        assert service.registry.resident_collections == ["books"]
+        assert service.registry.get_stats()["misses"] == 3
+        await service.registry.close()
+
+    async def test_pinned_index_is_not_evicted(self, config):
+        """사용 중인 인덱스는 예산을 넘어도 축출되지 않아야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1)
+
+        async with service.registry.acquire("books") as books:
+            await service.initialize("members")
+            assert "books" in service.registry
+            assert await books.search_with_scores("book") == []
+
+        await service.registry.close()
+
+    async def test_delete_keeps_pinned_index_until_released(self, config):
+        """컬렉션을 삭제해도 사용 중인 검색은 끝날 때까지 같은 인덱스를 써야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        await service.index_documents(_docs("book"), "lib")
+
+        async with service.registry.acquire("lib") as pinned:
+            assert await service.delete_collection("lib") is True
+            assert "lib" not in service.registry
+
+            results = await pinned.search_with_scores("book controller", limit=50)
+            assert len(results) == 20
+            assert all(r["content"].startswith("class BookController") for r in results)
+            with pytest.raises(RuntimeError):
+                await pinned.add_documents(_docs("late", 1))
+
+        assert pinned.engine.doc_count == 0
+        assert not (config.index_path / "lib").exists()
+        assert await service.search_keywords("book controller", "lib") == []
+        await service.registry.close()
+
+    async def test_delete_refreshes_resident_size(self, config):
+        """문서를 삭제하면 상주 크기 추정도 다시 계산해야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        await service.index_documents(_docs("book"), "lib")
+        before = service.registry.resident_bytes
+
+        for i in range(10):
+            assert await service.delete_document(f"book-{i}", "lib") is True
+
+        index = await service.registry.get("lib")
+        assert service.registry.resident_bytes == index.estimated_memory_bytes() < before
+        await service.registry.close()
+
+    async def test_collections_include_cold_ones(self, config):
+        """메모리에 없는 디스크 컬렉션도 목록에 포함되어야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1)
+        await service.index_documents(_docs("book"), "books")
+        await service.index_documents(_docs("member"), "members")
+
+        assert await service.get_all_collections() == ["books", "members"]
+
+        assert await service.delete_collection("books") is True
+        assert await service.get_all_collections() == ["members"]
+        await service.registry.close()
+
+    async def test_global_stats_do_not_load_cold_collections(self, config):
+        """콜드 컬렉션 통계는 로드 없이 매니페스트에서 읽고 상주 컬렉션과 같은 값이어야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1)
+        await service.index_documents(_docs("book", 5), "books")
+        await service.index_documents(_docs("member", 7), "members")
+        misses = service.registry.get_stats()["misses"]
+
+        stats = await service.get_global_stats()
+
+        assert service.registry.get_stats()["misses"] == misses
+        assert service.registry.resident_collections == ["members"]
+        assert stats["total_documents"] == 12
+        cold = stats["collections"]["books"]
+        async with service.registry.acquire("books") as index:
+            loaded = await index.get_stats()
+        for key in ("total_documents", "total_tokens", "language_distribution", "vocabulary_size"):
+            assert cold[key] == loaded[key]
+        await service.registry.close()
+
+
+class TestGenerationSwap:
+    """재구성 시 세대 교체 테스트"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+
+    async def test_rebuild_keeps_pinned_generation_until_released(self, config):
+        """재구성 중 고정된 이전 세대는 그대로 검색되고 사용이 끝나면 종료되어야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        await service.index_documents(_docs("book"), "lib")
+
+        async with service.registry.acquire("lib") as previous:
+            result = await service.rebuild_index(_docs("member", 5), "lib")
+            assert result["success"] is True
+            assert result["generation"] == service.registry.generation("lib") == 1
+
+            # 고정된 이전 세대는 교체 후에도 이전 내용으로 검색
+            assert len(await previous.search_with_scores("book controller", limit=50)) == 20
+            assert previous.engine.doc_count == 20
+
+        assert previous.engine.doc_count == 0
+        assert await service.search_keywords("book controller", "lib") == []
+        assert len(await service.search_keywords("member controller", "lib", limit=50)) == 5
+        assert await service.get_all_collections() == ["lib"]
+        assert sorted(path.name for path in config.index_path.iterdir()) == ["lib"]
+
+        # 다음 세대는 디스크에서 다시 열어도 같아야 함
+        await service.registry.close()
+        reopened = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        assert len(await reopened.search_keywords("member controller", "lib", limit=50)) == 5
+        await reopened.registry.close()
+
+    async def test_searches_during_rebuild_see_a_full_generation(self, config):
+        """재구성 동안의 검색은 빈 컬렉션이 아니라 이전 세대 전체 또는 새 세대를 봐야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        await service.index_documents(_docs("book"), "lib")
+
+        rebuild = asyncio.create_task(service.rebuild_index(_docs("book", 300), "lib"))
+        counts = []
+        while not rebuild.done():
+            results = await service.search_keywords("book controller", "lib", limit=1000)
+            counts.append(len(results))
+            await asyncio.sleep(0)
+
+        assert (await rebuild)["success"] is True
+        assert counts and counts[0] == 20
+        assert set(counts) <= {20, 300}
+        assert len(await service.search_keywords("book controller", "lib", limit=1000)) == 300
+        await service.registry.close()
+
+    async def test_retired_generation_rejects_writes(self, config):
+        """교체된 세대에는 쓰기가 거부되고 새 세대에 영향이 없어야 함"""
+        service = BM25IndexService(config, memory_budget_bytes=1024 ** 3)
+        await service.index_documents(_docs("book", 3), "lib")
+
+        async with service.registry.acquire("lib") as previous:
+            await service.rebuild_index(_docs("member", 2), "lib")
+            with pytest.raises(RuntimeError):
+                await previous.add_documents(_docs("late", 1))
+            assert await previous.delete_document("book-0") is False
+
+        assert (await service.get_index_stats("lib"))["total_documents"] == 2
+        await service.registry.close()
+
+
+class TestParallelTokenization:
+    """대량 배치 프로세스 풀 토큰화 테스트"""
+
+    def _config(self, tmp_path, name):
+        return BM25IndexConfig(index_path=str(tmp_path / name), journal_fsync=False, background_snapshot=False)
+
+    async def test_pool_matches_in_process(self, tmp_path):
+        """프로세스 풀 결과가 현재 프로세스 토큰화와 같아야 함"""
+        docs = _docs("book", 300) + _docs("member", 200)
+        serial = BM25IndexService(self._config(tmp_path, "serial"), tokenize_workers=1)
+        parallel = BM25IndexService(
+            self._config(tmp_path, "parallel"), tokenize_workers=2, parallel_tokenize_threshold=100
+        )
+
+        try:
+            serial_result = await serial.index_documents(docs, "books")
+            parallel_result = await parallel.index_documents(docs, "books")
+
+            assert parallel._tokenize_pool is not None
+            assert serial._tokenize_pool is None
+            assert parallel_result["document_ids"] == serial_result["document_ids"]
+
+            serial_index = await serial.registry.get("books")
+            parallel_index = await parallel.registry.get("books")
+            doc_ids = list(serial_index.engine.iter_doc_ids())
+            assert list(parallel_index.engine.iter_doc_ids()) == doc_ids
+            assert [parallel_index.engine.doc_term_freqs(doc_id) for doc_id in doc_ids] == [
+                serial_index.engine.doc_term_freqs(doc_id) for doc_id in doc_ids
+            ]
+            expected = await serial.search_keywords("member controller", "books", limit=20)
+            actual = await parallel.search_keywords("member controller", "books", limit=20)
+            assert [(r["id"], r["score"]) for r in actual] == [(r["id"], r["score"]) for r in expected]
+        finally:
+            await serial.close()
+            await parallel.close()
+
+    async def test_small_batch_stays_in_process(self, tmp_path):
+        """임계값 미만 배치는 프로세스 풀을 만들지 않아야 함"""
+        service = BM25IndexService(self._config(tmp_path, "small"), tokenize_workers=4, parallel_tokenize_threshold=100)
+
+        result = await service.index_documents(_docs("book", 10), "books")
+
+        assert result["indexed_count"] == 10
+        assert service._tokenize_pool is None
+        await service.close()
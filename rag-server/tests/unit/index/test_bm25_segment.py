@@ -0,0 +1,395 @@
+import json
+import pytest
+import numpy as np
+
+from app.index.bm25_engine import BM25InvertedIndex
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.bm25_segment import (
+    BLOCK_SIZE, BM25SegmentReader, SegmentFormatError, decode_varints, encode_varints,
+    encode_stored_document
+)
+
+
+def _build_engine(docs):
+    engine = BM25InvertedIndex()
+    for doc_id, tokens in docs.items():
+        engine.add_document(doc_id, tokens)
+    return engine
+
+
+def _payload(doc_id):
+    return encode_stored_document(f"text of {doc_id}", {"name": doc_id})
+
+
+class TestVarint:
+    """varint 인코딩 테스트"""
+
+    def test_roundtrip(self):
+        """큰 값을 포함해 인코딩/디코딩이 일치해야 함"""
+        values = np.array([0, 1, 127, 128, 300, 2 ** 32 + 5, 16383, 16384], dtype=np.uint64)
+        encoded, nbytes = encode_varints(values)
+
+        assert len(encoded) == int(nbytes.sum())
+        assert decode_varints(encoded).tolist() == values.tolist()
+
+    def test_empty(self):
+        """빈 입력 처리"""
+        encoded, _ = encode_varints(np.array([], dtype=np.uint64))
+        assert encoded == b""
+        assert len(decode_varints(encoded)) == 0
+
+
+class TestBM25Segment:
+    """바이너리 세그먼트 테스트"""
+
+    @pytest.fixture
+    def docs(self):
+        return {
+            "doc-b": ["book", "control", "book"],
+            "doc-a": ["user", "servic"],
+            "doc-c": ["book", "servic", "save", "한글"],
+        }
+
+    @pytest.fixture
+    def segment(self, tmp_path, docs):
+        path = tmp_path / "segment.bm25"
+        _build_engine(docs).write_snapshot(path, _payload)
+        reader = BM25SegmentReader(path)
+        yield reader
+        reader.close()
+
+    def test_header_and_columns(self, segment):
+        """헤더와 고정 폭 컬럼이 기록되어야 함"""
+        assert segment.doc_count == 3
+        assert segment.term_count == 6
+        assert segment.total_length == 9
+        assert segment.doc_lengths.tolist() == [3, 2, 4]
+
+    def test_term_lookup_and_postings(self, segment):
+        """용어 이진 탐색과 포스팅 디코딩"""
+        doc_nums, tfs = segment.postings("book")
+
+        assert [segment.doc_id(int(d)) for d in doc_nums] == ["doc-b", "doc-c"]
+        assert tfs.tolist() == [2, 1]
+        assert segment.document_frequency("한글") == 1
+        assert segment.postings("missing") is None
+
+    def test_doc_lookup_and_stored_fields(self, segment):
+        """문서 ID 탐색과 저장 필드 지연 디코딩"""
+        doc_num = segment.find_doc("doc-a")
+
+        assert segment.doc_id(doc_num) == "doc-a"
+        assert segment.stored_document(doc_num) == {"text": "text of doc-a", "metadata": {"name": "doc-a"}}
+        assert segment.doc_terms(doc_num) == {"user": 1, "servic": 1}
+        assert segment.find_doc("doc-x") is None
+
+    def test_all_postings_matches_per_term(self, segment):
+        """전체 포스팅 디코딩이 용어별 디코딩과 일치해야 함"""
+        term_ids, doc_nums, tfs = segment.all_postings()
+
+        for term_id in range(segment.term_count):
+            mask = term_ids == term_id
+            expected_docs, expected_tfs = segment.postings_by_id(term_id)
+            assert doc_nums[mask].tolist() == expected_docs.tolist()
+            assert tfs[mask].tolist() == expected_tfs.tolist()
+
+    def test_rejects_unknown_format(self, tmp_path):
+        """다른 포맷 파일은 거부해야 함"""
+        path = tmp_path / "broken.bm25"
+        path.write_bytes(b"not a segment" * 10)
+
+        with pytest.raises(SegmentFormatError):
+            BM25SegmentReader(path)
+
+
+class TestBlockedPostings:
+    """블록 단위 포스팅 테스트"""
+
+    @pytest.fixture
+    def segment(self, tmp_path):
+        docs = {f"d{i:04d}": ["common"] * (1 + i % 4) + [f"t{i % 3}"] * (i % 5 + 1) for i in range(BLOCK_SIZE * 3 + 17)}
+        path = tmp_path / "segment.bm25"
+        _build_engine(docs).write_snapshot(path, _payload)
+        reader = BM25SegmentReader(path)
+        yield reader
+        reader.close()
+
+    def test_block_stats(self, segment):
+        """블록별 마지막 문서, 최대 tf, 최소 길이가 포스팅과 일치해야 함"""
+        term_id = segment.lookup_term("common")
+        doc_nums, tfs = segment.postings_by_id(term_id)
+        blocks = segment.term_blocks(term_id)
+
+        assert segment.has_blocks
+        assert len(blocks) == 4
+        for block_id, block in enumerate(blocks):
+            chunk = slice(block_id * BLOCK_SIZE, (block_id + 1) * BLOCK_SIZE)
+            assert block["last_doc"] == doc_nums[chunk][-1]
+            assert block["max_tf"] == tfs[chunk].max()
+            assert block["min_length"] == segment.doc_lengths[doc_nums[chunk]].min()
+
+    def test_block_postings_matches_full_decode(self, segment):
+        """선택한 블록만 디코딩한 결과가 전체 디코딩의 해당 구간과 같아야 함"""
+        term_id = segment.lookup_term("common")
+        doc_nums, tfs = segment.postings_by_id(term_id)
+
+        partial_docs, partial_tfs = segment.block_postings(term_id, np.array([1, 3]))
+        expected = np.r_[BLOCK_SIZE:2 * BLOCK_SIZE, 3 * BLOCK_SIZE:len(doc_nums)]
+        assert partial_docs.tolist() == doc_nums[expected].tolist()
+        assert partial_tfs.tolist() == tfs[expected].tolist()
+
+
+class TestMaxScoreSearch:
+    """블록 상한 기반 top-k 검색 테스트"""
+
+    def _engines(self, tmp_path, docs, filter_fields=()):
+        segmented = BM25InvertedIndex(filter_fields=filter_fields)
+        reference = BM25InvertedIndex(filter_fields=filter_fields)
+        for engine in (segmented, reference):
+            for doc_id, (tokens, keys) in docs.items():
+                engine.add_document(doc_id, tokens, keys)
+        path = tmp_path / "segment.bm25"
+        segmented.write_snapshot(path, _payload)
+        segmented.complete_snapshot(BM25SegmentReader(path))
+        return segmented, reference
+
+    @pytest.fixture
+    def docs(self):
+        rng = np.random.default_rng(7)
+        vocab = [f"w{i}" for i in range(60)]
+        weights = 1.0 / np.arange(1, len(vocab) + 1)
+        weights /= weights.sum()
+        return {
+            f"d{i:05d}": (
+                list(rng.choice(vocab, size=int(rng.integers(3, 40)), p=weights)),
+                [f"language\x00{'java' if i % 3 else 'python'}"]
+            )
+            for i in range(2000)
+        }
+
+    @pytest.mark.parametrize("top_k", [1, 10, 50])
+    def test_matches_exhaustive_scoring(self, tmp_path, docs, top_k):
+        """상한으로 건너뛴 결과가 전체 점수 계산과 같아야 함"""
+        segmented, reference = self._engines(tmp_path, docs)
+
+        for query in (["w0", "w5", "w40"], ["w1", "w1", "w59"], ["w2", "w3", "w4", "w7", "w30"]):
+            expected = reference.search(query, top_k=top_k)
+            actual = segmented.search(query, top_k=top_k)
+            assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+            assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+
+    def test_matches_with_deletes_updates_and_filters(self, tmp_path, docs):
+        """삭제/수정된 기반 문서와 필터가 있어도 결과가 같아야 함"""
+        segmented, reference = self._engines(tmp_path, docs, filter_fields=("language",))
+        for engine in (segmented, reference):
+            for i in range(0, 2000, 7):
+                engine.remove_document(f"d{i:05d}")
+            for i in range(3, 2000, 11):
+                engine.add_document(f"d{i:05d}", ["w5", "w40", "w40"], ["language\x00python"])
+
+        query = ["w5", "w40", "w12"]
+        for filters in (None, {"language": ["python"]}):
+            expected = reference.search(query, top_k=20, filters=filters)
+            actual = segmented.search(query, top_k=20, filters=filters)
+            assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+            assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+
+
+class TestBM25FSegment:
+    """필드별 길이를 가진 세그먼트(v4) 테스트"""
+
+    FIELDS = ("code", "name", "types")
+
+    @pytest.fixture
+    def docs(self):
+        rng = np.random.default_rng(11)
+        vocab = [f"w{i}" for i in range(40)]
+        docs = {}
+        for i in range(1500):
+            tokens = list(rng.choice(vocab, size=int(rng.integers(3, 30))))
+            tokens += [f"name\x1f{t}" for t in rng.choice(vocab[:10], size=int(rng.integers(0, 3)))]
+            tokens += [f"types\x1f{t}" for t in rng.choice(vocab[:20], size=int(rng.integers(0, 4)))]
+            docs[f"d{i:05d}"] = tokens
+        return docs
+
+    def _engine(self, docs):
+        engine = BM25InvertedIndex(text_fields=self.FIELDS, field_weights={"name": 3.0, "types": 0.5})
+        for doc_id, tokens in docs.items():
+            engine.add_document(doc_id, tokens)
+        return engine
+
+    def test_field_lengths_roundtrip(self, tmp_path, docs):
+        """필드 이름과 문서별 필드 길이가 세그먼트에 기록되어야 함"""
+        engine = self._engine(docs)
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, _payload)
+        reader = BM25SegmentReader(path)
+
+        assert reader.text_fields == self.FIELDS
+        doc_num = reader.find_doc("d00007")
+        assert tuple(reader.field_lengths[doc_num].tolist()) == engine.doc_field_lengths("d00007")
+        assert reader.field_lengths.sum(axis=1).tolist() == reader.doc_lengths.tolist()
+
+    @pytest.mark.parametrize("field_weights", [None, {"name": 0.0}, {"types": 4.0, "code": 0.2}])
+    def test_segment_matches_memory(self, tmp_path, docs, field_weights):
+        """세그먼트(MaxScore/밀집)와 메모리 경로의 BM25F 점수가 같아야 함"""
+        segmented, reference = self._engine(docs), self._engine(docs)
+        path = tmp_path / "segment.bm25"
+        segmented.write_snapshot(path, _payload)
+        segmented.complete_snapshot(BM25SegmentReader(path))
+        for engine in (segmented, reference):
+            for i in range(0, 1500, 9):
+                engine.remove_document(f"d{i:05d}")
+            engine.add_document("d00004", ["w1", "name\x1fw1", "types\x1fw2"])
+
+        for query in (["w1", "w2"], ["w3", "w3", "w25"], ["w0", "w5", "w9", "w17"]):
+            expected = reference.search(query, top_k=15, field_weights=field_weights)
+            assert segmented.search(query, top_k=15, field_weights=field_weights) == expected
+
+            dense = segmented.score_documents(query, field_weights=field_weights)
+            for doc_id, score in expected:
+                assert dense[doc_id] == score
+
+    def test_reads_single_field_segment(self, tmp_path):
+        """필드 정보가 없는 세그먼트는 전체 길이를 기본 필드 길이로 사용해야 함"""
+        engine = _build_engine({"a": ["book", "book"], "b": ["book", "user", "save"]})
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, _payload)
+
+        fielded = BM25InvertedIndex(text_fields=self.FIELDS)
+        fielded.attach_base(BM25SegmentReader(path))
+
+        assert fielded.field_avg_lengths().tolist() == pytest.approx([2.5, 1.0, 1.0])
+        assert fielded.search(["book"]) == engine.search(["book"])
+
+
+class TestSegmentBackedEngine:
+    """세그먼트 기반 엔진 테스트"""
+
+    def test_base_plus_memory_matches_in_memory(self, tmp_path):
+        """세그먼트 + 메모리 변경분 검색이 순수 메모리 인덱스와 같아야 함"""
+        docs = {f"d{i}": [f"t{i % 3}", f"t{i % 7}", "common"] * (1 + i % 2) for i in range(40)}
+        updates = {f"d{i}": [f"t{i % 5}", "fresh"] for i in range(0, 40, 6)}
+        deleted = [f"d{i}" for i in range(1, 40, 9)]
+
+        segmented = _build_engine(docs)
+        path = tmp_path / "segment.bm25"
+        segmented.write_snapshot(path, _payload)
+        segmented.complete_snapshot(BM25SegmentReader(path))
+
+        reference = _build_engine(docs)
+        for engine in (segmented, reference):
+            for doc_id, tokens in updates.items():
+                engine.add_document(doc_id, tokens)
+            for doc_id in deleted:
+                assert engine.remove_document(doc_id) is True
+
+        assert segmented.doc_count == reference.doc_count
+        assert segmented.total_length == reference.total_length
+        for term in ("t1", "t4", "common", "fresh"):
+            assert segmented.document_frequency(term) == reference.document_frequency(term)
+
+        query = ["t1", "t4", "common", "fresh"]
+        expected = reference.search(query, top_k=15)
+        actual = segmented.search(query, top_k=15)
+        assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+        assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+
+    def test_snapshot_compacts_deletes(self, tmp_path):
+        """재작성 시 삭제된 기반 문서가 제외되어야 함"""
+        engine = _build_engine({"a": ["x"], "b": ["x", "y"]})
+        first = tmp_path / "first.bm25"
+        engine.write_snapshot(first, _payload)
+        engine.complete_snapshot(BM25SegmentReader(first))
+
+        engine.remove_document("a")
+        engine.add_document("c", ["y"])
+        second = tmp_path / "second.bm25"
+        engine.write_snapshot(second, _payload)
+        engine.complete_snapshot(BM25SegmentReader(second))
+
+        assert sorted(engine.iter_doc_ids()) == ["b", "c"]
+        assert engine.document_frequency("x") == 1
+        assert engine.document_frequency("y") == 2
+
+    def test_delete_marks_tombstone_without_rewrite(self, tmp_path):
+        """기반 문서 삭제는 세그먼트를 그대로 두고 비트셋 표시만으로 검색에서 빠져야 함"""
+        engine = _build_engine({f"d{i}": ["x", f"t{i}"] for i in range(10)})
+        path = tmp_path / "segment.bm25"
+        engine.write_snapshot(path, _payload)
+        engine.complete_snapshot(BM25SegmentReader(path))
+        segment = engine.base
+
+        for doc_id in ("d1", "d2"):
+            assert engine.remove_document(doc_id) is True
+        assert engine.remove_document("d1") is False
+
+        assert engine.base is segment
+        assert engine.base_doc_count == 8
+        assert engine.base_deleted_ratio == pytest.approx(0.2)
+        assert engine.has_pending_changes
+        assert "d1" not in engine
+        assert engine.document_frequency("x") == 8
+        assert {doc_id for doc_id, _ in engine.search(["x", "t1"], top_k=10)} == (
+            {f"d{i}" for i in range(10)} - {"d1", "d2"}
+        )
+        assert "d2" not in engine.score_documents(["t2", "x"])
+
+
+class TestCodeBM25IndexSegment:
+    """CodeBM25Index 세그먼트 저장/로드 테스트"""
+
+    async def test_restart_serves_from_mmap(self, tmp_path):
+        """재시작 시 세그먼트를 열기만 하고 바로 검색되어야 함"""
+        config = BM25IndexConfig(index_path=str(tmp_path / "bm25"))
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents([
+            {"id": "1", "content": "class BookController", "metadata": {"language": "java"}},
+            {"id": "2", "content": "class MemberService", "metadata": {"language": "java"}},
+        ])
+        await index.teardown()
+
+        assert index.segment_path.exists()
+        assert not (tmp_path / "bm25" / "nodes.json").exists()
+
+        reloaded = CodeBM25Index(BM25IndexConfig(index_path=str(tmp_path / "bm25")))
+        await reloaded.setup()
+
+        assert len(reloaded.documents) == 0
+        assert reloaded.engine.doc_count == 2
+        results = await reloaded.search_with_scores("book controller")
+        assert results[0]["id"] == "1"
+        assert results[0]["metadata"]["language"] == "java"
+        assert "BookController" in results[0]["content"]
+
+    async def test_limit_above_config_top_k(self, tmp_path):
+        """요청 limit이 설정 top_k보다 크면 limit만큼 반환해야 함"""
+        config = BM25IndexConfig(index_path=str(tmp_path / "bm25"), top_k=10, background_snapshot=False)
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents([
+            {"id": str(i), "content": f"class BookController{i} extends BookBase", "metadata": {"language": "java"}}
+            for i in range(30)
+        ])
+
+        results = await index.search_with_scores("book", limit=25)
+
+        assert len(results) == 25
+        assert len(await index.search_with_scores("book")) == 10
+
+    async def test_migrates_legacy_nodes_json(self, tmp_path):
+        """기존 nodes.json 인덱스를 세그먼트로 변환해야 함"""
+        index_dir = tmp_path / "bm25"
+        index_dir.mkdir()
+        (index_dir / "nodes.json").write_text(json.dumps([
+            {"id": "legacy", "text": "LegacyRepository findAll", "metadata": {"language": "java"}}
+        ]), encoding="utf-8")
+
+        index = CodeBM25Index(BM25IndexConfig(index_path=str(index_dir)))
+        await index.setup()
+
+        assert index.segment_path.exists()
+        assert not (index_dir / "nodes.json").exists()
+        results = await index.search_with_scores("legacy repository")
+        assert [r["id"] for r in results] == ["legacy"]
@@ -1,10 +1,13 @@
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
+from pathlib import Path
 from typing import List, Dict, Any
 
+from app.core.config import settings
 from app.index.bm25_service import BM25IndexService
 from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.bm25_registry import BM25IndexRegistry
 from app.retriever.document_builder import EnhancedDocument
 from app.retriever.ast_parser import CodeMetadata, Language, CodeType
 
@@ -13,19 +16,23 @@ class TestBM25IndexService:
     """BM25 Index 서비스 테스트"""
     
     @pytest.fixture
-    def bm25_config(self):
+    def bm25_config(self, tmp_path):
         """BM25 설정 fixture"""
         return BM25IndexConfig(
-            index_path="tests/data/test_bm25_service",
+            index_path=str(tmp_path / "test_bm25_service"),
             k1=1.2,
             b=0.75,
-            top_k=10
+            top_k=10,
+            journal_fsync=False,
+            background_snapshot=False
         )
     
     @pytest.fixture
-    def bm25_service(self, bm25_config):
+    async def bm25_service(self, bm25_config):
         """BM25 Service fixture"""
-        return BM25IndexService(bm25_config)
+        service = BM25IndexService(bm25_config)
+        yield service
+        await service.close()
     
     @pytest.fixture
     def sample_enhanced_documents(self):
@@ -55,13 +62,13 @@ class TestBM25IndexService:
             
             text_node = TextNode(
                 text=content,
-                metadata=metadata.model_dump(),
+                metadata=metadata.dict(),
                 id_=f"doc_{i}"
             )
             
             document = Document(
                 text=content,
-                metadata=metadata.model_dump(),
+                metadata=metadata.dict(),
                 id_=f"doc_{i}"
             )
             
@@ -80,56 +87,57 @@ class TestBM25IndexService:
         return documents
     
     def test_service_initialization(self, bm25_service):
-        """서비스 초기화 테스트"""
+        """서비스 초기화 테스트 - 컬렉션 인덱스는 처음 사용할 때 로드"""
         assert bm25_service.config is not None
-        assert bm25_service.index is not None
-        assert isinstance(bm25_service.index, CodeBM25Index)
-        assert bm25_service._initialized is False
+        assert isinstance(bm25_service.registry, BM25IndexRegistry)
+        assert bm25_service.registry.resident_collections == []
     
     def test_service_initialization_with_default_config(self):
         """기본 설정으로 서비스 초기화 테스트"""
         service = BM25IndexService()
-        assert service.config is not None
         assert isinstance(service.config, BM25IndexConfig)
-        assert service.index is not None
+        assert str(service.config.index_path) == str(Path(settings.bm25_index_root))
+        assert service.registry.resident_collections == []
     
     @pytest.mark.asyncio
     async def test_service_initialize(self, bm25_service):
         """서비스 초기화 테스트"""
         # 초기화 전
-        assert bm25_service._initialized is False
+        assert "default" not in bm25_service.registry
         
         # 초기화 실행
         await bm25_service.initialize()
         
         # 초기화 후
-        assert bm25_service._initialized is True
+        assert "default" in bm25_service.registry
+        index = await bm25_service.registry.get("default")
+        assert isinstance(index, CodeBM25Index)
         
-        # 중복 초기화는 실행되지 않아야 함
-        with patch.object(bm25_service.index, 'setup') as mock_setup:
+        # 중복 초기화는 인덱스를 다시 로드하지 않아야 함
+        with patch.object(index, 'setup') as mock_setup:
             await bm25_service.initialize()
             mock_setup.assert_not_called()
+        assert bm25_service.registry.get_stats()["misses"] == 1
     
     @pytest.mark.asyncio
     async def test_index_documents_success(self, bm25_service, sample_enhanced_documents):
         """문서 인덱싱 성공 테스트"""
-        with patch.object(bm25_service.index, 'add_documents') as mock_add:
-            mock_add.return_value = ["doc_0", "doc_1", "doc_2"]
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'add_documents', AsyncMock(return_value=["doc_0", "doc_1", "doc_2"])) as mock_add:
             result = await bm25_service.index_documents(sample_enhanced_documents)
             
             assert result["success"] is True
             assert result["indexed_count"] == 3
             assert result["index_type"] == "bm25"
             assert len(result["document_ids"]) == 3
-            mock_add.assert_called_once_with(sample_enhanced_documents)
+            mock_add.assert_awaited_once_with(sample_enhanced_documents, executor=None)
+        assert bm25_service.write_generation("default") == 1
     
     @pytest.mark.asyncio
     async def test_index_documents_failure(self, bm25_service, sample_enhanced_documents):
         """문서 인덱싱 실패 테스트"""
-        with patch.object(bm25_service.index, 'add_documents') as mock_add:
-            mock_add.side_effect = Exception("인덱싱 실패")
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'add_documents', AsyncMock(side_effect=Exception("인덱싱 실패"))):
             result = await bm25_service.index_documents(sample_enhanced_documents)
             
             assert result["success"] is False
@@ -149,25 +157,24 @@ class TestBM25IndexService:
             }
         ]
         
-        with patch.object(bm25_service.index, 'search_with_scores') as mock_search:
-            mock_search.return_value = mock_results
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'search_with_scores', AsyncMock(return_value=mock_results)) as mock_search:
             results = await bm25_service.search_keywords("test query", limit=5)
             
             assert results == mock_results
-            mock_search.assert_called_once_with("test query", 5, None)
+            assert results[0]["collection_name"] == "default"
+            assert mock_search.await_args.args[:3] == ("test query", 5, None)
     
     @pytest.mark.asyncio
     async def test_search_keywords_with_filters(self, bm25_service):
         """필터가 있는 키워드 검색 테스트"""
         filters = {"language": "java", "type": "method"}
         
-        with patch.object(bm25_service.index, 'search_with_scores') as mock_search:
-            mock_search.return_value = []
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'search_with_scores', AsyncMock(return_value=[])) as mock_search:
             await bm25_service.search_keywords("test", limit=10, filters=filters)
             
-            mock_search.assert_called_once_with("test", 10, filters)
+            assert mock_search.await_args.args[:3] == ("test", 10, filters)
     
     @pytest.mark.asyncio
     async def test_update_document(self, bm25_service):
@@ -177,24 +184,22 @@ class TestBM25IndexService:
             "metadata": {"name": "updatedMethod"}
         }
         
-        with patch.object(bm25_service.index, 'update_document') as mock_update:
-            mock_update.return_value = True
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'update_document', AsyncMock(return_value=True)) as mock_update:
             result = await bm25_service.update_document("doc_1", doc_data)
             
             assert result is True
-            mock_update.assert_called_once_with("doc_1", doc_data)
+            mock_update.assert_awaited_once_with("doc_1", doc_data)
     
     @pytest.mark.asyncio
     async def test_delete_document(self, bm25_service):
         """문서 삭제 테스트"""
-        with patch.object(bm25_service.index, 'delete_document') as mock_delete:
-            mock_delete.return_value = True
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'delete_document', AsyncMock(return_value=True)) as mock_delete:
             result = await bm25_service.delete_document("doc_1")
             
             assert result is True
-            mock_delete.assert_called_once_with("doc_1")
+            mock_delete.assert_awaited_once_with("doc_1")
     
     @pytest.mark.asyncio
     async def test_get_index_stats(self, bm25_service):
@@ -206,42 +211,50 @@ class TestBM25IndexService:
             "language_distribution": {"java": 3, "python": 2}
         }
         
-        with patch.object(bm25_service.index, 'get_stats') as mock_stats_method:
-            mock_stats_method.return_value = mock_stats
-            
+        index = await bm25_service.registry.get("default")
+        with patch.object(index, 'get_stats', AsyncMock(return_value=dict(mock_stats))) as mock_stats_method:
             result = await bm25_service.get_index_stats()
             
-            assert result == mock_stats
-            mock_stats_method.assert_called_once()
+            assert result == {**mock_stats, "collection_name": "default"}
+            mock_stats_method.assert_awaited_once()
     
     @pytest.mark.asyncio
     async def test_rebuild_index_success(self, bm25_service, sample_enhanced_documents):
-        """인덱스 재구성 성공 테스트"""
-        with patch.object(bm25_service, 'index_documents') as mock_index:
-            mock_index.return_value = {
-                "success": True,
-                "indexed_count": 3
-            }
-            
-            result = await bm25_service.rebuild_index(sample_enhanced_documents)
-            
-            assert result["success"] is True
-            assert result["indexed_count"] == 3
-            
-            # 기존 데이터가 초기화되었는지 확인
-            assert bm25_service.index.nodes == []
-            assert bm25_service.index.documents_map == {}
-    
+        """인덱스 재구성 성공 테스트 - 기존 문서는 새 세대로 교체"""
+        await bm25_service.index_documents(sample_enhanced_documents[:1])
+        
+        result = await bm25_service.rebuild_index(sample_enhanced_documents[1:])
+        
+        assert result["success"] is True
+        assert result["indexed_count"] == 2
+        assert result["generation"] == 1
+        stats = await bm25_service.get_index_stats()
+        assert stats["total_documents"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rebuild_index_keeps_concurrent_writes(self, bm25_service, sample_enhanced_documents):
+        """재구성 중 들어온 쓰기는 교체 후 새 세대에 반영"""
+        rebuild = asyncio.create_task(bm25_service.rebuild_index(sample_enhanced_documents[1:]))
+        await asyncio.sleep(0)
+
+        write = await bm25_service.index_documents(sample_enhanced_documents[:1])
+        result = await rebuild
+
+        assert result["success"] is True
+        assert write["success"] is True
+        stats = await bm25_service.get_index_stats()
+        assert stats["total_documents"] == 3
+
     @pytest.mark.asyncio
     async def test_rebuild_index_failure(self, bm25_service, sample_enhanced_documents):
         """인덱스 재구성 실패 테스트"""
-        with patch.object(bm25_service, 'index_documents') as mock_index:
-            mock_index.side_effect = Exception("재구성 실패")
-            
+        with patch.object(bm25_service.registry, 'replace', AsyncMock(side_effect=Exception("재구성 실패"))):
             result = await bm25_service.rebuild_index(sample_enhanced_documents)
-            
-            assert result["success"] is False
-            assert "error" in result
+        
+        assert result["success"] is False
+        assert "error" in result
+        # 만들다 만 다음 세대 디렉터리는 남지 않아야 함
+        assert not any(path.name.startswith(".") for path in bm25_service.config.index_path.iterdir())
     
     @pytest.mark.asyncio
     async def test_health_check_healthy(self, bm25_service):
@@ -274,17 +287,13 @@ class TestBM25IndexService:
     
     @pytest.mark.asyncio
     async def test_automatic_initialization_on_methods(self, bm25_service):
-        """메서드 호출 시 자동 초기화 테스트"""
-        with patch.object(bm25_service, 'initialize') as mock_init:
-            mock_init.return_value = None
-            
-            with patch.object(bm25_service.index, 'search_with_scores') as mock_search:
-                mock_search.return_value = []
-                
-                await bm25_service.search_keywords("test")
-                
-                # initialize가 호출되었는지 확인
-                mock_init.assert_called_once()
+        """메서드 호출 시 컬렉션 인덱스 자동 로드 테스트"""
+        assert "default" not in bm25_service.registry
+        
+        await bm25_service.search_keywords("test")
+        
+        assert "default" in bm25_service.registry
+        assert bm25_service.registry.get_stats()["misses"] == 1
     
     @pytest.mark.asyncio
     async def test_service_with_real_index_operations(self, bm25_service, sample_enhanced_documents):
@@ -308,4 +317,4 @@ class TestBM25IndexService:
         
         # 헬스 체크
         health = await bm25_service.health_check()
-        assert health["status"] == "healthy" 
\ No newline at end of file
+        assert health["status"] == "healthy"
@@ -0,0 +1,177 @@
+import random
+
+import pytest
+
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.symbol_trie import SymbolTrie, metadata_symbol_entries, sub_token_suffixes
+
+
+def _symbols(results):
+    return [r["symbol"] for r in results]
+
+
+def _brute_force_scores(counts, prefix):
+    """항목별 점수 - 접두사와 일치하는 키 중 가장 높은 가중치 x 추가 횟수"""
+    prefix = prefix.lower()
+    scores = {}
+    for entry, count in counts.items():
+        matched = [weight * count for key, weight in SymbolTrie._entry_keys(entry) if key.startswith(prefix)]
+        if matched:
+            scores[entry] = max(matched)
+    return scores
+
+
+def _chunk_trie(chunks):
+    """(소속 클래스, 이름) 메서드 청크들의 자동완성 트라이와 항목별 추가 횟수"""
+    counts = {}
+    for parent, name in chunks:
+        for entry in metadata_symbol_entries({"name": name, "parent_class": parent, "code_type": "method"}):
+            counts[entry] = counts.get(entry, 0) + 1
+    trie = SymbolTrie()
+    for entry, count in counts.items():
+        trie.add(entry, count=count)
+    return trie, counts
+
+
+def _assert_matches_brute_force(trie, counts, prefix, limit):
+    scores = _brute_force_scores(counts, prefix)
+    results = trie.complete(prefix, limit=limit)
+
+    assert len(results) == min(limit, len(scores))
+    assert len({(r["symbol"], r["kind"]) for r in results}) == len(results)
+    for result in results:
+        assert result["score"] == scores[(result["symbol"], result["kind"])]
+    assert [r["score"] for r in results] == sorted(scores.values(), reverse=True)[:limit]
+
+
+class TestSymbolTrie:
+    """압축 트라이 자동완성 테스트"""
+
+    def test_sub_token_suffixes(self):
+        assert sub_token_suffixes("BookServiceImpl") == ["bookserviceimpl", "serviceimpl", "impl"]
+        assert sub_token_suffixes("HTTPServer") == ["httpserver", "server"]
+        assert sub_token_suffixes("find_by_title") == ["find_by_title", "by_title", "title"]
+
+    def test_prefix_matches_name_and_sub_tokens(self):
+        trie = SymbolTrie()
+        trie.add(("BookService", "class"))
+        trie.add(("BookServiceImpl", "class"))
+        trie.add(("BookRepository.findByTitle", "method"))
+        trie.add(("MemberService", "class"))
+
+        assert set(_symbols(trie.complete("BookServ"))) == {"BookService", "BookServiceImpl"}
+        assert _symbols(trie.complete("findBy")) == ["BookRepository.findByTitle"]
+        assert _symbols(trie.complete("bookrepository.find")) == ["BookRepository.findByTitle"]
+        # 하위 토큰 중간에서 일치하는 후보
+        assert set(_symbols(trie.complete("service"))) == {"BookService", "BookServiceImpl", "MemberService"}
+        assert trie.complete("xyz") == []
+
+    def test_ranked_by_popularity_and_kind(self):
+        trie = SymbolTrie()
+        trie.add(("BookService.save", "method"))
+        trie.add(("BookService", "class"), count=5)
+        trie.add(("BookServiceHelper", "class"))
+
+        # 점 표기 전체 이름으로 멤버도 후보가 되지만 클래스가 먼저
+        results = trie.complete("BookS")
+        assert _symbols(results) == ["BookService", "BookServiceHelper", "BookService.save"]
+        assert results[0]["score"] > results[1]["score"] > results[2]["score"]
+
+    def test_name_start_outranks_sub_token_match(self):
+        """이름 앞부분 일치가 하위 토큰 중간 일치보다 우선해야 함"""
+        trie = SymbolTrie()
+        trie.add(("autoSave", "method"))
+        trie.add(("saveBook", "method"))
+
+        assert _symbols(trie.complete("save")) == ["saveBook", "autoSave"]
+
+    def test_limit_returns_best_matches(self):
+        trie = SymbolTrie()
+        for i in range(50):
+            trie.add((f"Handler{i:02d}", "class"), count=i + 1)
+
+        assert _symbols(trie.complete("handler", limit=3)) == ["Handler49", "Handler48", "Handler47"]
+
+    def test_entries_matching_several_keys_fill_limit(self):
+        """여러 키로 일치해 중복으로 빠지는 항목이 있어도 limit개를 채워야 함"""
+        chunks = [
+            ("BookController", "findById"), ("BookController", "updateBook"),
+            ("BookService", "createUser"), ("BookService", "deleteById"),
+            ("UserController", "listBooks"),
+            ("UserRepository", "deleteById"), ("UserRepository", "updateBook"), ("UserRepository", "updateBook"),
+        ]
+        trie, counts = _chunk_trie(chunks)
+
+        # UserRepository.deleteById는 하위 토큰 byid로만 "b"와 일치
+        assert len(trie.complete("b", limit=9)) == 9
+        assert ("UserRepository.deleteById", "method") in {
+            (r["symbol"], r["kind"]) for r in trie.complete("b", limit=9)
+        }
+        for prefix in ("", "b", "by", "book", "user", "u", "d"):
+            for limit in range(1, 13):
+                _assert_matches_brute_force(trie, counts, prefix, limit)
+
+    def test_random_completions_match_brute_force(self):
+        parents = ["BookController", "BookService", "BookRepository", "UserController", "UserService", "UserRepository"]
+        names = ["findAll", "findById", "save", "deleteById", "getBook", "createUser", "updateBook", "listBooks"]
+        rng = random.Random(11)
+        for _ in range(200):
+            chunks = [(rng.choice(parents), rng.choice(names)) for _ in range(rng.randint(2, 10))]
+            trie, counts = _chunk_trie(chunks)
+            for prefix in ("", "b", "by", "u", "f", "d", "s", "book"):
+                for limit in (1, 3, 5, 8, 12):
+                    _assert_matches_brute_force(trie, counts, prefix, limit)
+
+    def test_remove_restores_previous_state(self):
+        """추가한 항목을 모두 제거하면 빈 트라이가 되어야 함"""
+        entries = [(f"{a}{b}", "method") for a in ("find", "findBy", "save", "saveAll") for b in ("Book", "BookById", "Title")]
+        random.Random(7).shuffle(entries)
+        trie = SymbolTrie()
+        for entry in entries:
+            trie.add(entry)
+        for entry in entries[:6]:
+            trie.remove(entry)
+
+        remaining = {symbol for symbol, _ in entries[6:]}
+        assert set(_symbols(trie.complete("", limit=100))) == remaining
+        assert set(_symbols(trie.complete("book", limit=100))) == {s for s in remaining if "Book" in s}
+
+        for entry in entries[6:]:
+            trie.remove(entry)
+        assert len(trie) == 0
+        assert trie.complete("f") == []
+
+
+class TestIndexAutocomplete:
+    """BM25 인덱스 심볼 자동완성 증분 갱신 테스트"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+
+    async def test_trie_follows_adds_updates_and_deletes(self, config):
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents([
+            {"id": "1", "content": "save", "metadata": {"name": "save", "parent_class": "BookService", "code_type": "method"}},
+            {"id": "2", "content": "find", "metadata": {"name": "findByTitle", "parent_class": "BookService", "code_type": "method"}},
+        ])
+        index.merge()
+
+        results = await index.complete_symbols("BookServ")
+        assert _symbols(results)[0] == "BookService"
+        # 멤버 청크 2개 x 클래스 중요도 2 x 이름 앞부분 일치 2
+        assert results[0]["score"] == 2 * 2 * 2
+
+        await index.add_documents([
+            {"id": "3", "content": "impl", "metadata": {"name": "BookServiceImpl", "code_type": "class"}}
+        ])
+        await index.update_document("2", {"content": "find", "metadata": {"name": "findByAuthor", "parent_class": "BookService", "code_type": "method"}})
+        await index.delete_document("1")
+
+        assert set(_symbols(await index.complete_symbols("bookserv"))) == {
+            "BookService", "BookServiceImpl", "BookService.findByAuthor"
+        }
+        assert _symbols(await index.complete_symbols("findBy")) == ["BookService.findByAuthor"]
+        assert await index.complete_symbols("save") == []
+        await index.teardown(snapshot=False)
@@ -0,0 +1,107 @@
+import pytest
+
+from app.features.search.schema import BM25SearchRequest
+from app.features.search.service import HybridSearchService
+from app.index.bm25_index import BM25IndexConfig, CodeBM25Index
+from app.index.bm25_service import BM25IndexService
+from app.index.symbols import extract_symbols, normalize_symbol
+
+
+def _chunks():
+    return [
+        {
+            "id": "class", "content": "public class BookController { }",
+            "metadata": {"name": "BookController", "code_type": "class", "language": "java",
+                         "namespace": "com.example.library"}
+        },
+        {
+            "id": "create", "content": "public Book createBook(BookDto dto) { return service.save(dto); }",
+            "metadata": {"name": "createBook", "parent_class": "BookController", "code_type": "method",
+                         "language": "java", "namespace": "com.example.library"}
+        },
+        {
+            "id": "other", "content": "def create_book(): pass",
+            "metadata": {"name": "createBook", "code_type": "function", "language": "python"}
+        },
+    ]
+
+
+class TestSymbolExtraction:
+    """심볼 키 추출/정규화 테스트"""
+
+    def test_method_symbols_include_parent_and_fqn(self):
+        symbols = extract_symbols(_chunks()[1]["metadata"])
+        assert symbols == ["createbook", "bookcontroller.createbook", "com.example.library.bookcontroller.createbook"]
+
+    def test_class_symbols_include_package(self):
+        assert extract_symbols(_chunks()[0]["metadata"]) == ["bookcontroller", "com.example.library.bookcontroller"]
+
+    def test_missing_or_unknown_name_has_no_symbols(self):
+        assert extract_symbols({"name": "unknown"}) == []
+        assert extract_symbols({}) == []
+
+    @pytest.mark.parametrize("query,expected", [
+        ("BookController", "bookcontroller"),
+        (" BookController#createBook ", "bookcontroller.createbook"),
+        ("BookController::createBook()", "bookcontroller.createbook"),
+        ("book controller", None),
+        ("createBook(dto)", None),
+    ])
+    def test_normalize_query(self, query, expected):
+        assert normalize_symbol(query) == expected
+
+
+class TestSymbolLookup:
+    """BM25 인덱스 심볼 정확 일치 조회 테스트"""
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return BM25IndexConfig(index_path=str(tmp_path / "bm25"), journal_fsync=False, background_snapshot=False)
+
+    async def test_exact_hits_from_memory_and_segment(self, config):
+        """메모리 변경분과 기록된 세그먼트 모두에서 같은 결과를 내야 함"""
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents(_chunks())
+
+        assert [r["id"] for r in await index.find_symbol("BookController")] == ["class"]
+        assert [r["id"] for r in await index.find_symbol("createBook")] == ["create", "other"]
+
+        assert index.merge() is True
+        assert index.engine.base_doc_count == 3
+        assert [r["id"] for r in await index.find_symbol("bookController.createBook")] == ["create"]
+        assert [r["id"] for r in await index.find_symbol("com.example.library.BookController")] == ["class"]
+        assert [r["id"] for r in await index.find_symbol("createBook", filters={"language": "python"})] == ["other"]
+        assert await index.find_symbol("book controller") == []
+        await index.teardown(snapshot=False)
+
+    async def test_deleted_chunks_are_not_returned(self, config):
+        index = CodeBM25Index(config)
+        await index.setup()
+        await index.add_documents(_chunks())
+        index.merge()
+
+        await index.delete_document("create")
+        await index.update_document("other", {"content": "def remove_book(): pass", "metadata": {"name": "removeBook"}})
+
+        assert await index.find_symbol("createBook") == []
+        assert [r["id"] for r in await index.find_symbol("removeBook")] == ["other"]
+        await index.teardown(snapshot=False)
+
+    async def test_identifier_query_short_circuits_bm25_search(self, config):
+        """검색 서비스는 식별자 질의에 정확 일치가 있으면 BM25 점수 계산 없이 반환해야 함"""
+        service = HybridSearchService()
+        service.bm25_service = BM25IndexService(config)
+        await service.bm25_service.index_documents(_chunks(), "lib")
+
+        exact = await service.bm25_search(BM25SearchRequest(query="BookController.createBook", index_name="lib"))
+        assert [(r.document_id, r.match_type) for r in exact.results] == [("create", "symbol")]
+
+        ranked = await service.bm25_search(BM25SearchRequest(
+            query="BookController.createBook", index_name="lib", symbol_lookup=False
+        ))
+        assert ranked.results and all(r.match_type is None for r in ranked.results)
+
+        fallback = await service.bm25_search(BM25SearchRequest(query="create book", index_name="lib"))
+        assert fallback.results and all(r.match_type is None for r in fallback.results)
+        await service.bm25_service.close()
@@ -0,0 +1,312 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from app.core.exceptions import CollectionNotFoundError, InvalidFilterError
+from app.core.qdrant_clients import QdrantClientPool, upload_points_in_batches
+from app.index.vector_index import CodeVectorIndex, VectorIndexConfig
+
+_VECTORS = {"save book": [1.0, 0.0], "delete book": [0.0, 1.0], "find book": [0.7, 0.7]}
+
+
+class _FakeEmbeddingClient:
+    """텍스트별 고정 벡터를 돌려주고 동시에 진행 중인 질의 임베딩 수를 재는 클라이언트"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embed_single(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return {"embedding": _VECTORS[request["text"]]}
+        finally:
+            self.in_flight -= 1
+
+    async def embed_bulk(self, request):
+        return {"embeddings": [{"embedding": _VECTORS[text]} for text in request["texts"]]}
+
+
+@pytest.fixture
+async def memory_qdrant(monkeypatch):
+    """공유 클라이언트 풀 대신 인메모리 AsyncQdrantClient 사용"""
+    client = AsyncQdrantClient(location=":memory:")
+    monkeypatch.setattr("app.index.vector_index.qdrant_clients", Mock(get=Mock(return_value=client)))
+    yield client
+    await client.close()
+
+
+async def _index(embedding_client, **options):
+    index = CodeVectorIndex(VectorIndexConfig(collection_name="async_vectors", vector_size=2, **options))
+    index.embedding_client = embedding_client
+    await index.setup()
+    await index.add_documents([
+        {"id": str(uuid.uuid5(uuid.NAMESPACE_URL, text)), "content": text, "metadata": {"name": text}}
+        for text in _VECTORS
+    ])
+    return index
+
+
+class TestAsyncQdrantAccess:
+    """AsyncQdrantClient 기반 인덱싱/검색/통계 테스트"""
+
+    async def test_index_search_and_stats(self, memory_qdrant):
+        index = await _index(_FakeEmbeddingClient())
+
+        results = await index.search_with_scores("save book", limit=2)
+        assert [r["content"] for r in results] == ["save book", "find book"]
+        assert results[0]["metadata"]["name"] == "save book"
+        assert results[0]["score"] == pytest.approx(1.0)
+
+        documents = await index.search("delete book", limit=1)
+        assert [doc.content for doc in documents] == ["delete book"]
+
+        stats = await index.get_stats()
+        assert stats["total_documents"] == 3
+        assert stats["vector_size"] == 2
+        await index.teardown()
+
+    async def test_concurrent_searches_overlap(self, memory_qdrant):
+        """검색 요청이 이벤트 루프를 막지 않고 동시에 진행되어야 함"""
+        embedding_client = _FakeEmbeddingClient(delay=0.05)
+        index = await _index(embedding_client)
+
+        results = await asyncio.gather(*(index.search_with_scores(text, limit=1) for text in _VECTORS))
+
+        assert [r[0]["content"] for r in results] == list(_VECTORS)
+        assert embedding_client.max_in_flight == len(_VECTORS)
+        await index.teardown()
+
+    async def test_pool_shares_client_per_connection(self):
+        pool = QdrantClientPool()
+        first = pool.get(url="http://qdrant:6333", port=6333)
+
+        assert pool.get(url="http://qdrant:6333", port=6333) is first
+        assert pool.get(url="http://other:6333", port=6333) is not first
+        await pool.aclose()
+        assert len(pool) == 0
+
+
+class _RecordingQdrant:
+    """업서트 호출 순서/wait 플래그/동시 진행 수를 기록하는 클라이언트"""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def upsert(self, collection_name, points, wait):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.calls.append((len(points), wait, self.in_flight))
+
+
+class TestBulkUpload:
+    """배치 병렬 업로드/일관성 장벽 테스트"""
+
+    async def test_batches_pipeline_then_wait_on_last(self):
+        client = _RecordingQdrant()
+        points = [Mock() for _ in range(10)]
+
+        stats = await upload_points_in_batches(client, "c", points, batch_size=3, parallelism=2)
+
+        assert sorted(size for size, _, _ in client.calls[:-1]) == [3, 3, 3]
+        assert [wait for _, wait, _ in client.calls[:-1]] == [False, False, False]
+        # 마지막 배치는 앞선 배치가 모두 접수된 뒤 단독으로 wait=True
+        assert client.calls[-1] == (1, True, 0)
+        assert client.max_in_flight == 2
+        assert (stats["points"], stats["batches"]) == (10, 4)
+        assert stats["points_per_sec"] > 0
+
+    async def test_empty_upload_sends_nothing(self):
+        client = _RecordingQdrant()
+        stats = await upload_points_in_batches(client, "c", [], batch_size=3, parallelism=2)
+        assert client.calls == []
+        assert stats["batches"] == 0
+
+    async def test_index_points_visible_after_add(self, memory_qdrant):
+        index = await _index(_FakeEmbeddingClient(), upload_batch_size=1, upload_parallelism=2)
+
+        assert index.last_upload_stats["batches"] == 3
+        assert index.last_upload_stats["transport"] == "grpc"
+        assert (await index.get_stats())["total_documents"] == 3
+        await index.teardown()
+
+    def test_upload_client_prefers_grpc(self, monkeypatch):
+        pool = Mock()
+        monkeypatch.setattr("app.index.vector_index.qdrant_clients", pool)
+        index = CodeVectorIndex(VectorIndexConfig(qdrant_grpc_port=7334))
+        index.client = Mock()
+
+        assert index._get_upload_client() is pool.get.return_value
+        assert pool.get.call_args.kwargs["prefer_grpc"] is True
+        assert pool.get.call_args.kwargs["grpc_port"] == 7334
+
+        rest_only = CodeVectorIndex(VectorIndexConfig(upload_prefer_grpc=False))
+        rest_only.client = Mock()
+        assert rest_only._get_upload_client() is rest_only.client
+
+
+class TestReadOnlySetup:
+    """검색용 setup은 컬렉션을 만들지 않음"""
+
+    async def test_missing_collection_not_created(self, memory_qdrant):
+        index = CodeVectorIndex(VectorIndexConfig(collection_name="missing_vectors", vector_size=2))
+
+        with pytest.raises(CollectionNotFoundError):
+            await index.setup(create=False)
+        assert not await memory_qdrant.collection_exists("missing_vectors")
+
+        await index.setup()
+        assert await memory_qdrant.collection_exists("missing_vectors")
+        await index.setup(create=False)
+        await index.teardown()
+
+
+class TestPayloadFilters:
+    """서버 측 페이로드 필터/페이로드 인덱스 테스트"""
+
+    async def _filtered_index(self):
+        index = CodeVectorIndex(VectorIndexConfig(collection_name="filtered_vectors", vector_size=2))
+        index.embedding_client = _FakeEmbeddingClient()
+        await index.setup()
+        languages = {"save book": "java", "delete book": "python", "find book": "java"}
+        await index.add_documents([
+            {
+                "id": str(uuid.uuid5(uuid.NAMESPACE_URL, text)),
+                "content": text,
+                "metadata": {"language": languages[text], "keywords": text.split()}
+            }
+            for text in _VECTORS
+        ])
+        return index
+
+    async def test_filter_applied_in_search(self, memory_qdrant):
+        index = await self._filtered_index()
+
+        results = await index.search_with_scores("delete book", limit=2, filters={"language": "java"})
+        assert [r["content"] for r in results] == ["find book", "save book"]
+
+        results = await index.search_with_scores("save book", limit=3, filters={"keywords": ["delete", "find"]})
+        assert [r["content"] for r in results] == ["find book", "delete book"]
+        await index.teardown()
+
+    async def test_filter_and_limit_sent_to_qdrant(self, memory_qdrant, monkeypatch):
+        index = await self._filtered_index()
+        query_points = AsyncMock(side_effect=memory_qdrant.query_points)
+        monkeypatch.setattr(memory_qdrant, "query_points", query_points)
+
+        documents = await index.search("save book", limit=1, filters={"language": "python"})
+
+        assert [doc.content for doc in documents] == ["delete book"]
+        kwargs = query_points.call_args.kwargs
+        assert kwargs["limit"] == 1
+        assert kwargs["query_filter"].must[0].key == "language"
+        await index.teardown()
+
+    async def test_payload_indexes_created_for_new_collection(self):
+        client = Mock()
+        client.get_collections = AsyncMock(return_value=Mock(collections=[]))
+        client.create_collection = AsyncMock()
+        client.create_payload_index = AsyncMock()
+        index = CodeVectorIndex(VectorIndexConfig(collection_name="indexed_vectors"))
+        index.client = client
+
+        await index._ensure_collection_exists()
+
+        fields = {call.kwargs["field_name"] for call in client.create_payload_index.await_args_list}
+        assert fields == {"file_path", "language", "code_type", "keywords"}
+
+    async def test_existing_payload_indexes_skipped(self):
+        client = Mock()
+        existing = Mock()
+        existing.name = "indexed_vectors"
+        client.get_collections = AsyncMock(return_value=Mock(collections=[existing]))
+        client.get_collection = AsyncMock(return_value=Mock(payload_schema={"file_path": Mock(), "language": Mock()}))
+        client.create_payload_index = AsyncMock()
+        index = CodeVectorIndex(VectorIndexConfig(collection_name="indexed_vectors"))
+        index.client = client
+
+        await index._ensure_collection_exists()
+
+        fields = {call.kwargs["field_name"] for call in client.create_payload_index.await_args_list}
+        assert fields == {"code_type", "keywords"}
+
+    async def test_invalid_filter_raises_instead_of_unfiltered_query(self, memory_qdrant, monkeypatch):
+        index = await self._filtered_index()
+        query_points = AsyncMock(side_effect=memory_qdrant.query_points)
+        delete = AsyncMock(side_effect=memory_qdrant.delete)
+        monkeypatch.setattr(memory_qdrant, "query_points", query_points)
+        monkeypatch.setattr(memory_qdrant, "delete", delete)
+
+        with pytest.raises(InvalidFilterError):
+            await index.search_with_scores("save book", limit=3, filters={"language": {"eq": "java"}})
+        with pytest.raises(InvalidFilterError):
+            await index.search("save book", limit=3, filters={"language": {"eq": "java"}})
+        with pytest.raises(InvalidFilterError):
+            await index.bulk_delete_by_filter({"file_path": {"prefix": "src/"}})
+
+        query_points.assert_not_awaited()
+        delete.assert_not_awaited()
+        assert (await index.get_stats())["total_documents"] == 3
+        await index.teardown()
+
+
+class TestSearchPushdown:
+    """limit/score_threshold/HNSW 파라미터 전달 테스트"""
+
+    async def test_threshold_applied_by_qdrant(self, memory_qdrant, monkeypatch):
+        index = await _index(_FakeEmbeddingClient())
+        query_points = AsyncMock(side_effect=memory_qdrant.query_points)
+        monkeypatch.setattr(memory_qdrant, "query_points", query_points)
+
+        results = await index.similarity_search_with_threshold("save book", threshold=0.9, limit=3)
+
+        assert [r["content"] for r in results] == ["save book"]
+        kwargs = query_points.call_args.kwargs
+        assert (kwargs["limit"], kwargs["score_threshold"]) == (3, 0.9)
+        await index.teardown()
+
+    async def test_zero_threshold_excludes_negative_scores(self, memory_qdrant, monkeypatch):
+        index = await _index(_FakeEmbeddingClient())
+        monkeypatch.setitem(_VECTORS, "drop book", [-1.0, 0.2])
+        await index.add_documents([
+            {"id": str(uuid.uuid5(uuid.NAMESPACE_URL, "drop book")), "content": "drop book", "metadata": {}}
+        ])
+        query_points = AsyncMock(side_effect=memory_qdrant.query_points)
+        monkeypatch.setattr(memory_qdrant, "query_points", query_points)
+
+        assert len(await index.search_with_scores("find book", limit=4)) == 4
+        assert query_points.call_args.kwargs["score_threshold"] is None
+
+        results = await index.search_with_scores("find book", limit=4, score_threshold=0.0)
+        assert query_points.call_args.kwargs["score_threshold"] == 0.0
+        assert "drop book" not in [r["content"] for r in results]
+        assert len(results) == 3
+        await index.teardown()
+
+    async def test_search_params_per_request(self, memory_qdrant, monkeypatch):
+        index = await _index(_FakeEmbeddingClient(), search_hnsw_ef=64)
+        query_points = AsyncMock(side_effect=memory_qdrant.query_points)
+        monkeypatch.setattr(memory_qdrant, "query_points", query_points)
+
+        await index.search_with_scores("find book", limit=2)
+        assert query_points.call_args.kwargs["search_params"].hnsw_ef == 64
+
+        results = await index.search_with_scores("find book", limit=2, hnsw_ef=256, exact=True)
+        params = query_points.call_args.kwargs["search_params"]
+        assert (params.hnsw_ef, params.exact) == (256, True)
+        assert len(results) == 2
+        await index.teardown()
+
+    def test_no_search_params_by_default(self):
+        index = CodeVectorIndex(VectorIndexConfig())
+        assert index._search_params() is None
@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from llama_index.core.schema import TextNode
+
+from app.core.exceptions import EmbeddingServiceError
+from app.index.vector_index import CodeVectorIndex, VectorIndexConfig
+from app.retriever.document_builder import EnhancedDocument
+
+
+class _FakeEmbeddingClient:
+    """벌크 요청을 기록하고 동시 진행 수를 재는 임베딩 클라이언트"""
+
+    def __init__(self, fail_texts=()):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_texts = set(fail_texts)
+
+    async def embed_bulk(self, request):
+        texts = request["texts"]
+        self.requests.append(texts)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_texts & set(texts):
+                raise EmbeddingServiceError("요청 실패")
+            return {"embeddings": [{"embedding": [float(len(text)), 1.0]} for text in texts], "count": len(texts)}
+        finally:
+            self.in_flight -= 1
+
+
+def _index(client, **options):
+    index = CodeVectorIndex(VectorIndexConfig(collection_name="test_vectors", vector_size=2, **options))
+    index.client = Mock()
+    index.client.upsert = AsyncMock()
+    index.upload_client = index.client
+    index.embedding_client = client
+    return index
+
+
+def _documents(count):
+    return [{"id": f"doc{i}", "content": "x" * (i + 1)} for i in range(count)]
+
+
+class TestBatchedEmbedding:
+    """벡터 인덱스 배치 임베딩 파이프라인 테스트"""
+
+    async def test_documents_are_embedded_in_batches(self):
+        client = _FakeEmbeddingClient()
+        index = _index(client, embedding_batch_size=4, embedding_max_concurrency=2)
+
+        added_ids = await index.add_documents(_documents(10))
+
+        assert added_ids == [f"doc{i}" for i in range(10)]
+        assert [len(texts) for texts in client.requests] == [4, 4, 2]
+        assert client.max_in_flight == 2
+        points = index.client.upsert.call_args.kwargs["points"]
+        assert [point.vector[0] for point in points] == [float(i + 1) for i in range(10)]
+
+        stats = index.last_embedding_stats
+        assert (stats["chunks"], stats["batches"], stats["failed_batches"]) == (10, 3, 0)
+        assert stats["chunks_per_sec"] > 0
+
+    async def test_failed_batch_falls_back_to_zero_vectors(self):
+        """재시도까지 실패한 배치만 영벡터로 채워져야 함"""
+        client = _FakeEmbeddingClient(fail_texts={"xxxxx"})
+        index = _index(client, embedding_batch_size=2)
+
+        await index.add_documents(_documents(6))
+
+        points = index.client.upsert.call_args.kwargs["points"]
+        assert [point.vector for point in points[4:6]] == [[0.0, 0.0], [0.0, 0.0]]
+        assert all(point.vector[1] == 1.0 for point in points[:4])
+        assert index.last_embedding_stats["failed_batches"] == 1
+
+    async def test_mismatched_response_is_a_failed_batch(self):
+        client = Mock()
+
+        async def embed_bulk(request):
+            return {"embeddings": [{"embedding": [1.0, 1.0]}]}
+
+        client.embed_bulk = embed_bulk
+        index = _index(client, embedding_batch_size=3)
+
+        await index.add_documents(_documents(3))
+
+        points = index.client.upsert.call_args.kwargs["points"]
+        assert all(point.vector == [0.0, 0.0] for point in points)
+        assert index.last_embedding_stats["failed_batches"] == 1
+
+    async def test_existing_embeddings_are_not_requested(self):
+        client = _FakeEmbeddingClient()
+        index = _index(client)
+        document = Mock(spec=EnhancedDocument)
+        document.text_node = TextNode(text="ready", id_="ready", embedding=[9.0, 9.0])
+
+        await index.add_documents([document, {"id": "new", "content": "new"}])
+
+        assert client.requests == [["new"]]
+        assert index.last_embedding_stats["chunks"] == 1
+
+    def test_shared_client_uses_batch_retries(self):
+        index = CodeVectorIndex(VectorIndexConfig(embedding_batch_retries=0))
+
+        client = index._get_embedding_client()
+
+        assert client.max_retries == 0
+        assert index._get_embedding_client() is client
+
+    @pytest.mark.parametrize("option", ["embedding_batch_size", "embedding_max_concurrency"])
+    def test_batch_options_are_at_least_one(self, option):
+        config = VectorIndexConfig(**{option: -3})
+        assert getattr(config, option) == 1
@@ -42,8 +42,8 @@ class TestCodeVectorIndex:
     def mock_qdrant_client(self):
         """Qdrant 클라이언트 Mock"""
         client = Mock()
-        client.get_collections.return_value = Mock(collections=[])
-        client.create_collection.return_value = None
+        client.get_collections = AsyncMock(return_value=Mock(collections=[]))
+        client.create_collection = AsyncMock(return_value=None)
         return client
     
     @pytest.fixture
@@ -59,24 +59,24 @@ class TestCodeVectorIndex:
         """Vector Index 인스턴스"""
         return CodeVectorIndex(config)
     
-    @patch('app.index.vector_index.QdrantClient')
+    @patch('app.index.vector_index.qdrant_clients')
     async def test_setup_creates_collection_if_not_exists(self, mock_qdrant_class, vector_index, mock_qdrant_client):
         """컬렉션이 없으면 생성하는지 테스트"""
-        mock_qdrant_class.return_value = mock_qdrant_client
+        mock_qdrant_class.get.return_value = mock_qdrant_client
         
         await vector_index.setup()
         
         assert mock_qdrant_client.create_collection.called
         assert vector_index.client is not None
     
-    @patch('app.index.vector_index.QdrantClient')
+    @patch('app.index.vector_index.qdrant_clients')
     async def test_setup_skips_creation_if_collection_exists(self, mock_qdrant_class, vector_index, mock_qdrant_client):
         """컬렉션이 이미 존재하면 생성을 건너뛰는지 테스트"""
         # 컬렉션이 이미 존재한다고 설정
         existing_collection = Mock()
         existing_collection.name = "test_vectors"
-        mock_qdrant_client.get_collections.return_value = Mock(collections=[existing_collection])
-        mock_qdrant_class.return_value = mock_qdrant_client
+        mock_qdrant_client.get_collections = AsyncMock(return_value=Mock(collections=[existing_collection]))
+        mock_qdrant_class.get.return_value = mock_qdrant_client
         
         await vector_index.setup()
         
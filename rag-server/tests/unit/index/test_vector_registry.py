@@ -0,0 +1,168 @@
+"""
+컬렉션별 벡터 인덱스 핸들 레지스트리 테스트
+"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.core.exceptions import CollectionNotFoundError
+from app.index.vector_index import VectorIndexConfig
+from app.index.vector_registry import VectorIndexRegistry
+from app.index.vector_service import VectorIndexService
+
+
+def _handle(name):
+    index = Mock(name=name)
+    index.setup = AsyncMock()
+    index.teardown = AsyncMock()
+    index.add_documents = AsyncMock(return_value=["doc1"])
+    index.last_embedding_stats = {}
+    index.last_upload_stats = {}
+    index.search_with_scores = AsyncMock(return_value=[{"id": "doc1", "content": name, "score": 0.9}])
+    return index
+
+
+@pytest.fixture
+def created():
+    return {}
+
+
+@pytest.fixture
+def factory(created):
+    def create(name):
+        created[name] = _handle(name)
+        return created[name]
+    return create
+
+
+class TestVectorIndexRegistry:
+    """지연 생성/재사용/유휴 정리 테스트"""
+
+    async def test_setup_once_per_collection(self, factory, created):
+        registry = VectorIndexRegistry(factory)
+
+        first = await registry.get("a")
+        assert await registry.get("a") is first
+        await asyncio.gather(*(registry.get("b") for _ in range(5)))
+
+        assert created["a"].setup.await_count == 1
+        assert created["b"].setup.await_count == 1
+        assert registry.get_stats()["misses"] == 2
+        assert registry.get_stats()["hits"] == 5
+
+    async def test_idle_handles_evicted_and_torn_down(self, factory, created):
+        registry = VectorIndexRegistry(factory, idle_seconds=0, persistent=("default",))
+        await registry.get("default")
+        await registry.get("a")
+
+        assert await registry.evict_idle() == 1
+        assert "a" not in registry
+        assert "default" in registry
+        created["a"].teardown.assert_awaited_once()
+
+        # 다시 쓰면 새로 setup
+        await registry.get("a")
+        assert created["a"].setup.await_count == 1
+        assert registry.get_stats()["evictions"] == 1
+
+    async def test_acquired_handle_not_evicted(self, factory, created):
+        registry = VectorIndexRegistry(factory, idle_seconds=0)
+
+        async with registry.acquire("a"):
+            assert await registry.evict_idle() == 0
+            assert "a" in registry
+        assert await registry.evict_idle() == 1
+
+    async def test_max_handles_evicts_least_recent(self, factory, created):
+        registry = VectorIndexRegistry(factory, max_handles=2)
+        for name in ("a", "b", "a", "c"):
+            await registry.get(name)
+
+        assert registry.resident_collections == ["a", "c"]
+        created["b"].teardown.assert_awaited_once()
+
+    async def test_read_only_open_prepared_before_indexing(self, factory, created):
+        """검색용으로 연 핸들은 인덱싱에 처음 쓸 때만 컬렉션을 준비"""
+        registry = VectorIndexRegistry(factory)
+
+        await registry.get("a", create=False)
+        created["a"].setup.assert_awaited_once_with(create=False)
+
+        await registry.get("a")
+        await registry.get("a")
+        assert created["a"].setup.await_count == 2
+        assert created["a"].setup.await_args == ((), {})
+
+    async def test_periodic_eviction_without_new_collections(self, factory, created):
+        registry = VectorIndexRegistry(factory, idle_seconds=0.01, persistent=("default",))
+        await registry.get("default")
+        await registry.get("a")
+
+        task = asyncio.create_task(registry.run_idle_eviction(interval=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        assert registry.resident_collections == ["default"]
+        created["a"].teardown.assert_awaited_once()
+
+    async def test_close_tears_down_all(self, factory, created):
+        registry = VectorIndexRegistry(factory)
+        await registry.get("a")
+        await registry.get("b")
+
+        await registry.close()
+
+        assert registry.resident_collections == []
+        created["a"].teardown.assert_awaited_once()
+        created["b"].teardown.assert_awaited_once()
+
+
+class TestVectorServiceRouting:
+    """VectorIndexService 컬렉션 라우팅 테스트"""
+
+    @pytest.fixture
+    def service(self, monkeypatch, created):
+        monkeypatch.setattr(
+            "app.index.vector_service.CodeVectorIndex",
+            lambda config: created.setdefault(config.collection_name, _handle(config.collection_name))
+        )
+        service = VectorIndexService(VectorIndexConfig(collection_name="default"))
+        service.index = created.setdefault("default", _handle("default"))
+        return service
+
+    async def test_repeated_indexing_reuses_handle(self, service, created):
+        for _ in range(3):
+            result = await service.index_documents([Mock()], collection_name="project")
+            assert result["success"] is True
+            assert result["collection"] == "project"
+
+        assert created["project"].setup.await_count == 1
+        assert created["project"].add_documents.await_count == 3
+        created["default"].add_documents.assert_not_awaited()
+
+    async def test_search_routes_by_collection(self, service, created):
+        results = await service.search_similar_code("book", collection_name="project")
+        assert results[0]["content"] == "project"
+
+        results = await service.search_similar_code("book")
+        assert results[0]["content"] == "default"
+        assert created["project"].setup.await_count == 1
+
+    async def test_search_does_not_create_missing_collection(self, service, created):
+        missing = _handle("missing")
+        missing.setup = AsyncMock(side_effect=CollectionNotFoundError("missing"))
+        created["missing"] = missing
+
+        assert await service.search_similar_code("book", collection_name="missing") == []
+        missing.setup.assert_awaited_once_with(create=False)
+        assert "missing" not in service.registry
+
+    async def test_teardown_closes_handles(self, service, created):
+        await service.index_documents([Mock()], collection_name="project")
+        await service.initialize()
+
+        await service.teardown()
+
+        created["project"].teardown.assert_awaited_once()
+        created["default"].teardown.assert_awaited_once()